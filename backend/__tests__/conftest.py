@@ -9,7 +9,8 @@ from fastapi.testclient import TestClient
 from datetime import date, datetime
 import uuid
 
-from website_tracker_backend.infrastructure.database.connection import Base, get_db
+from website_tracker_backend.application.dependencies import get_db, get_read_db, get_writer
+from website_tracker_backend.infrastructure.database.connection import Base
 from website_tracker_backend.app import app
 from website_tracker_backend.infrastructure.database.models import User, TrackedSite, UsageRecord
 
@@ -80,6 +81,8 @@ def client(override_get_db):
         FastAPI test client
     """
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_writer] = lambda: None
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
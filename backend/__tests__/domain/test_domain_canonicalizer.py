@@ -0,0 +1,93 @@
+"""
+Tests for canonical domain reduction.
+"""
+import pytest
+from unittest.mock import Mock
+
+from website_tracker_backend.domain.services.domain_canonicalizer import (
+    DomainCanonicalizer,
+    parse_public_suffix_list,
+)
+from website_tracker_backend.domain.services.tracked_sites_service import TrackedSitesService
+from website_tracker_backend.domain.services.usage_service import UsageService
+from website_tracker_backend.domain.interfaces.usage_repository import UsageRepository
+from website_tracker_backend.domain.interfaces.tracked_sites_repository import TrackedSitesRepository
+
+
+@pytest.fixture
+def canonicalizer():
+    return DomainCanonicalizer()
+
+
+class TestDomainCanonicalizer:
+    """Test eTLD+1 reduction."""
+
+    @pytest.mark.parametrize("hostname, expected", [
+        ("youtube.com", "youtube.com"),
+        ("www.youtube.com", "youtube.com"),
+        ("m.youtube.com", "youtube.com"),
+        ("https://M.YouTube.com:443/watch?v=1", "youtube.com"),
+        ("example.com.", "example.com"),
+        ("news.bbc.co.uk", "bbc.co.uk"),
+        ("alice.github.io", "alice.github.io"),
+        ("www.münchen.de", "xn--mnchen-3ya.de"),
+    ])
+    def test_reduces_to_registrable_domain(self, canonicalizer, hostname, expected):
+        """Test subdomains collapse onto the domain below the public suffix."""
+        assert canonicalizer.canonicalize(hostname) == expected
+
+    @pytest.mark.parametrize("hostname", ["co.uk", "github.io", "localhost", "127.0.0.1", "[::1]"])
+    def test_leaves_suffixes_and_addresses(self, canonicalizer, hostname):
+        """Test public suffixes, single labels and IP addresses are kept."""
+        assert canonicalizer.canonicalize(hostname) == hostname
+
+    def test_wildcard_and_exception_rules(self):
+        """Test PSL wildcard and exception rules."""
+        canonicalizer = DomainCanonicalizer(["*.ck", "!www.ck"])
+
+        assert canonicalizer.canonicalize("a.b.ck") == "a.b.ck"
+        assert canonicalizer.canonicalize("x.a.b.ck") == "a.b.ck"
+        assert canonicalizer.canonicalize("www.ck") == "www.ck"
+
+    def test_memoizes_lookups(self, canonicalizer):
+        """Test repeated hostnames are served from the LRU memo."""
+        for _ in range(3):
+            canonicalizer.canonicalize("www.youtube.com")
+
+        info = canonicalizer.cache_info()
+        assert (info.hits, info.misses) == (2, 1)
+
+    def test_loads_public_suffix_list_file(self, tmp_path):
+        """Test rules are read from a public_suffix_list.dat file."""
+        path = tmp_path / "public_suffix_list.dat"
+        path.write_text("// ===BEGIN ICANN DOMAINS===\n\nuk\nco.uk\n\n// comment\n例.jp\n", encoding="utf-8")
+
+        canonicalizer = DomainCanonicalizer.from_file(path)
+
+        assert canonicalizer.canonicalize("www.bbc.co.uk") == "bbc.co.uk"
+        assert list(parse_public_suffix_list("!ü.de")) == ["!xn--tda.de"]
+
+
+class TestCanonicalSync:
+    """Test services canonicalize hostnames before writing."""
+
+    def test_usage_minutes_are_merged(self):
+        """Test minutes of hostnames sharing a domain are added up."""
+        usage_repo = Mock(spec=UsageRepository)
+        service = UsageService(usage_repo, Mock(spec=TrackedSitesRepository))
+
+        synced = service.sync_usage("user-1", None, {"www.youtube.com": 10.0, "m.youtube.com": 5.0, "": 1.0})
+
+        assert synced == 1
+        usage_repo.upsert_usage.assert_called_once_with("user-1", "youtube.com", None, 15.0)
+
+    def test_tracked_sites_keep_lowest_limit(self):
+        """Test hostnames sharing a domain keep the strictest limit."""
+        tracked_sites_repo = Mock(spec=TrackedSitesRepository)
+        service = TrackedSitesService(tracked_sites_repo)
+
+        synced = service.sync_tracked_sites("user-1", {"www.reddit.com": 30, "old.reddit.com": 20})
+
+        assert synced == 1
+        tracked_sites_repo.upsert_tracked_site.assert_called_once_with("user-1", "reddit.com", 20)
+        tracked_sites_repo.remove_tracked_sites_not_in_list.assert_called_once_with("user-1", ["reddit.com"])
@@ -0,0 +1,59 @@
+"""
+Tests for sync receipt domain service.
+"""
+import pytest
+from unittest.mock import Mock
+
+from website_tracker_backend.domain.services.sync_receipt_service import SyncReceiptService
+from website_tracker_backend.domain.interfaces.sync_receipt_repository import SyncReceiptRepository
+
+
+@pytest.fixture
+def sync_receipt_repo():
+    repo = Mock(spec=SyncReceiptRepository)
+    repo.get_response.return_value = None
+    repo.get_last_sequence.return_value = None
+    return repo
+
+
+class TestSyncReceiptService:
+    """Test recognizing repeated and stale sync requests."""
+
+    def test_requests_without_headers_skip_the_store(self, sync_receipt_repo):
+        """Test plain requests are processed without reading or writing receipts."""
+        service = SyncReceiptService(sync_receipt_repo)
+        
+        check = service.check("user-1", "usage", None, None)
+        service.record("user-1", "usage", None, None, {"status": "success"})
+        
+        assert check.replay is None and not check.stale
+        sync_receipt_repo.get_response.assert_not_called()
+        sync_receipt_repo.save_response.assert_not_called()
+
+    def test_seen_request_is_replayed(self, sync_receipt_repo):
+        """Test a known key returns the stored response."""
+        sync_receipt_repo.get_response.return_value = {"status": "success", "synced": 2}
+        service = SyncReceiptService(sync_receipt_repo)
+        
+        check = service.check("user-1", "usage", "key-1", None)
+        
+        assert check.replay == {"status": "success", "synced": 2}
+        sync_receipt_repo.get_response.assert_called_once_with("user-1", "usage", "key-1", None)
+
+    @pytest.mark.parametrize("sequence, stale", [(4, True), (5, True), (6, False)])
+    def test_sequence_against_last_processed(self, sync_receipt_repo, sequence, stale):
+        """Test sequences not above the last processed one are stale."""
+        sync_receipt_repo.get_last_sequence.return_value = 5
+        service = SyncReceiptService(sync_receipt_repo)
+        
+        assert service.check("user-1", "usage", None, sequence).stale is stale
+
+    def test_record_keeps_bounded_store(self, sync_receipt_repo):
+        """Test responses are saved with the per-endpoint and per-device bounds."""
+        service = SyncReceiptService(sync_receipt_repo, keep=10, keep_devices=3)
+        
+        service.record("user-1", "heartbeat", "key-1", 7, {"status": "success"})
+        
+        sync_receipt_repo.save_response.assert_called_once_with(
+            "user-1", "heartbeat", "key-1", 7, {"status": "success"}, 10, 3
+        )
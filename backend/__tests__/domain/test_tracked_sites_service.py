@@ -48,3 +48,39 @@ class TestTrackedSitesService:
         # Verify
         assert result == {"youtube.com": 60, "reddit.com": 30}
         tracked_sites_repo.get_tracked_sites.assert_called_once_with("user-1")
+
+    def test_get_tracked_sites_if_changed_returns_sites_on_mismatch(self):
+        """Test tracked sites are returned when the client hash differs."""
+        tracked_sites_repo = Mock(spec=TrackedSitesRepository)
+        tracked_sites_repo.get_tracked_sites.return_value = {"youtube.com": 60}
+        
+        service = TrackedSitesService(tracked_sites_repo)
+        
+        # Execute
+        server_hash, sites = service.get_tracked_sites_if_changed("user-1", "other")
+        
+        # Verify
+        assert sites == {"youtube.com": 60}
+        assert server_hash == TrackedSitesService.hash_tracked_sites({"youtube.com": 60})
+
+    def test_get_tracked_sites_if_changed_returns_none_on_match(self):
+        """Test tracked sites are omitted when the client hash matches."""
+        tracked_sites_repo = Mock(spec=TrackedSitesRepository)
+        tracked_sites_repo.get_tracked_sites.return_value = {"youtube.com": 60}
+        
+        service = TrackedSitesService(tracked_sites_repo)
+        client_hash = TrackedSitesService.hash_tracked_sites({"youtube.com": 60})
+        
+        # Execute
+        server_hash, sites = service.get_tracked_sites_if_changed("user-1", client_hash)
+        
+        # Verify
+        assert sites is None
+        assert server_hash == client_hash
+
+    def test_hash_tracked_sites_is_order_independent(self):
+        """Test hash does not depend on key insertion order."""
+        first = TrackedSitesService.hash_tracked_sites({"a.com": 1, "b.com": 2})
+        second = TrackedSitesService.hash_tracked_sites({"b.com": 2, "a.com": 1})
+        
+        assert first == second
@@ -0,0 +1,165 @@
+"""
+Tests for the usage trend domain service.
+"""
+import pytest
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from unittest.mock import Mock
+
+from website_tracker_backend.domain.services.trend_service import (
+    TrendCache,
+    TrendService,
+    limit_streaks,
+    rolling_means,
+)
+from website_tracker_backend.domain.services.usage_service import UsageService
+from website_tracker_backend.domain.interfaces.usage_repository import UsageRepository
+from website_tracker_backend.domain.interfaces.tracked_sites_repository import TrackedSitesRepository
+
+TODAY = date(2024, 6, 15)
+
+
+def _records(minutes_by_days_ago):
+    return [
+        {"domain": "youtube.com", "date": TODAY - timedelta(days=days_ago), "minutes": minutes}
+        for days_ago, minutes in minutes_by_days_ago.items()
+        if days_ago > 0
+    ]
+
+
+def _service(history, today_minutes=None, limit=60, cache=None):
+    usage_repo = Mock(spec=UsageRepository)
+    tracked_sites_repo = Mock(spec=TrackedSitesRepository)
+    usage_repo.get_usage_for_date_range.return_value = _records(history)
+    usage_repo.get_changed_dates.return_value = set()
+    usage_repo.get_usage_for_date.return_value = (
+        [{"domain": "youtube.com", "date": TODAY, "minutes": today_minutes}] if today_minutes is not None else []
+    )
+    tracked_sites_repo.get_tracked_sites.return_value = {"youtube.com": limit}
+    return TrendService(usage_repo, tracked_sites_repo, cache), usage_repo
+
+
+class TestWindowFunctions:
+    """Test the prefix-sum window helpers."""
+
+    def test_rolling_means(self):
+        """Test each window ending on a day is averaged."""
+        prefix = list(accumulate([1.0, 2.0, 3.0, 4.0], initial=0.0))
+
+        assert rolling_means(prefix, 2) == [1.5, 2.5, 3.5]
+
+    def test_limit_streaks(self):
+        """Test current and longest runs under the limit."""
+        assert limit_streaks([10, 70, 10, 10, 10, 60, 10, 10], 60) == (2, 3)
+        assert limit_streaks([10, 10, 10], 60) == (3, 3)
+        assert limit_streaks([10, 10, 90], 60) == (0, 2)
+
+
+class TestTrendService:
+    """Test trends per tracked domain."""
+
+    def test_averages_and_week_over_week(self):
+        """Test rolling averages and weekly totals over the daily series."""
+        history = {days_ago: 30.0 for days_ago in range(7, 14)}
+        service, _ = _service(history, today_minutes=14.0)
+
+        trend = service.get_trends("user-1", TODAY)["domains"][0]
+
+        assert trend["minutes"] == 14.0
+        assert trend["average7"] == 2.0
+        assert trend["average30"] == round((7 * 30 + 14) / 30, 1)
+        assert trend["weekTotal"] == 14.0
+        assert trend["previousWeekTotal"] == 210.0
+        assert trend["weekOverWeek"] == -196.0
+        assert trend["weekOverWeekPercent"] == -93.3
+
+    def test_streaks(self):
+        """Test streaks count days under the limit, missing days included."""
+        service, _ = _service({3: 90.0, 20: 60.0}, today_minutes=10.0, limit=60)
+
+        trend = service.get_trends("user-1", TODAY)["domains"][0]
+
+        assert trend["currentStreak"] == 3
+        assert trend["longestStreak"] == 365 - 21
+
+    def test_no_limit_has_no_streak(self):
+        """Test domains without a limit report no streak."""
+        service, _ = _service({}, limit=0)
+
+        trend = service.get_trends("user-1", TODAY)["domains"][0]
+
+        assert trend["currentStreak"] is None
+        assert trend["weekOverWeekPercent"] is None
+
+    def test_series(self):
+        """Test the daily series ends today with full windows."""
+        service, _ = _service({1: 70.0}, today_minutes=0.0)
+
+        series = service.get_trends("user-1", TODAY, days=3)["domains"][0]["series"]
+
+        assert [point["date"] for point in series] == ["2024-06-13", "2024-06-14", "2024-06-15"]
+        assert [point["minutes"] for point in series] == [0.0, 70.0, 0.0]
+        assert [point["average7"] for point in series] == [0.0, 10.0, 10.0]
+
+    def test_invalid_days(self):
+        """Test days outside 1-365 are rejected."""
+        service, _ = _service({})
+
+        with pytest.raises(ValueError):
+            service.get_trends("user-1", TODAY, days=400)
+
+    def test_cached_history_only_reads_today(self):
+        """Test a second request reuses the history and reads only today's usage."""
+        service, usage_repo = _service({1: 30.0}, today_minutes=5.0, cache=TrendCache())
+
+        service.get_trends("user-1", TODAY)
+        usage_repo.get_usage_for_date.return_value = [{"domain": "youtube.com", "date": TODAY, "minutes": 40.0}]
+        trend = service.get_trends("user-1", TODAY)["domains"][0]
+
+        assert usage_repo.get_usage_for_date_range.call_count == 1
+        assert usage_repo.get_usage_for_date.call_count == 2
+        assert trend["minutes"] == 40.0
+        assert trend["weekTotal"] == 70.0
+
+    def test_syncing_older_day_invalidates_cache(self):
+        """Test syncing a day before today drops the cached history, syncing today does not."""
+        cache = TrendCache()
+        service, usage_repo = _service({1: 30.0}, cache=cache)
+        usage_service = UsageService(usage_repo, Mock(spec=TrackedSitesRepository), cache)
+
+        service.get_trends("user-1", TODAY)
+        usage_service.sync_usage("user-1", TODAY, {"youtube.com": 10.0})
+        service.get_trends("user-1", TODAY)
+        assert usage_repo.get_usage_for_date_range.call_count == 1
+
+        usage_service.sync_usage("user-1", TODAY - timedelta(days=1), {"youtube.com": 50.0})
+        service.get_trends("user-1", TODAY)
+        assert usage_repo.get_usage_for_date_range.call_count == 2
+
+    def test_older_day_changed_elsewhere_refetches_history(self):
+        """Test a change the cache was not told about (e.g. another worker's sync) is picked up."""
+        service, usage_repo = _service({1: 30.0}, cache=TrendCache())
+
+        service.get_trends("user-1", TODAY)
+        usage_repo.get_changed_dates.return_value = {TODAY - timedelta(days=1)}
+        service.get_trends("user-1", TODAY)
+
+        assert usage_repo.get_usage_for_date_range.call_count == 2
+        user_id, start_date, end_date, since = usage_repo.get_changed_dates.call_args.args
+        assert (start_date, end_date) == (TODAY - timedelta(days=394), TODAY - timedelta(days=1))
+
+
+class TestTrendCache:
+    """Test cache eviction."""
+
+    def test_evicts_least_recently_used(self):
+        """Test entries beyond max_entries are evicted oldest first."""
+        since = datetime(2024, 6, 15)
+        cache = TrendCache(max_entries=2)
+        cache.put("a", TODAY, {}, since)
+        cache.put("b", TODAY, {}, since)
+        cache.get("a", TODAY)
+        cache.put("c", TODAY, {}, since)
+
+        assert cache.get("a", TODAY) == (since, {})
+        assert cache.get("b", TODAY) is None
@@ -32,6 +32,18 @@ class TestUsageService:
         usage_repo.upsert_usage.assert_any_call("user-1", "youtube.com", usage_date, 45.5)
         usage_repo.upsert_usage.assert_any_call("user-1", "reddit.com", usage_date, 30.0)
 
+    def test_sync_usage_with_device(self):
+        """Test a device ID writes the device's minutes instead of the user's."""
+        usage_repo = Mock(spec=UsageRepository)
+        service = UsageService(usage_repo, Mock(spec=TrackedSitesRepository))
+        
+        usage_date = date(2024, 1, 15)
+        synced_count = service.sync_usage("user-1", usage_date, {"youtube.com": 45.5}, device_id="laptop")
+        
+        assert synced_count == 1
+        usage_repo.upsert_device_usage.assert_called_once_with("user-1", "laptop", "youtube.com", usage_date, 45.5)
+        usage_repo.upsert_usage.assert_not_called()
+
     def test_get_calendar_month(self):
         """Test getting calendar month data."""
         # Setup mocks
@@ -65,6 +77,25 @@ class TestUsageService:
         assert len(day_15["domains"]) == 2
         assert day_15["limitReached"] is True  # youtube.com reached limit
 
+    def test_get_calendar_months_reads_once(self):
+        """Test several months are built from one usage query and one tracked sites lookup."""
+        usage_repo = Mock(spec=UsageRepository)
+        tracked_sites_repo = Mock(spec=TrackedSitesRepository)
+        usage_repo.get_usage_for_date_range.return_value = [
+            {"domain": "youtube.com", "date": date(2024, 2, 10), "minutes": 70.0},
+        ]
+        tracked_sites_repo.get_tracked_sites.return_value = {"youtube.com": 60}
+        service = UsageService(usage_repo, tracked_sites_repo)
+        
+        result = service.get_calendar_months("user-1", 2024, 1, 3)
+        
+        usage_repo.get_usage_for_date_range.assert_called_once_with("user-1", date(2024, 1, 1), date(2024, 3, 31))
+        tracked_sites_repo.get_tracked_sites.assert_called_once_with("user-1")
+        assert [month["month"] for month in result["months"]] == [1, 2, 3]
+        february = result["months"][1]["days"]
+        assert next(day for day in february if day["date"] == "2024-02-10")["limitReached"] is True
+        assert not any(day["limitReached"] for day in result["months"][0]["days"])
+
     def test_get_calendar_month_with_limit_reached(self):
         """Test calendar month correctly identifies limit reached."""
         # Setup mocks
@@ -0,0 +1,191 @@
+"""
+Tests for the keyset-paginated admin listings.
+"""
+import pytest
+from datetime import date
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from website_tracker_backend.app import create_app
+from website_tracker_backend.config import Settings
+from website_tracker_backend.infrastructure.adapters.usage_report_impl import SQLAlchemyUsageReport, encode_cursor
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.infrastructure.database.connection import Base, Database, ShardedDatabase
+from website_tracker_backend.infrastructure.database.models import UsageRollup, User
+
+USERS = ["alice", "bob", "carol", "dave", "erin"]
+
+
+def _shards(tmp_path, partitioning: str = "off") -> ShardedDatabase:
+    databases = []
+    for index in range(2):
+        database = Database(
+            f"sqlite:///{tmp_path / f'shard{index}.db'}", single_writer="off", usage_partitioning=partitioning
+        )
+        Base.metadata.create_all(bind=database.engine)
+        databases.append(database)
+    shards = ShardedDatabase(databases)
+    for user_id in USERS:
+        with shards.database_for(user_id).session() as session:
+            session.add(User(id=user_id))
+            session.commit()
+            repository = SQLAlchemyUsageRepository(session, partitioned=partitioning == "monthly")
+            for day in (date(2024, 1, 15), date(2024, 2, 1)):
+                repository.upsert_usage(user_id, "youtube.com", day, 10.0)
+            repository.upsert_usage(user_id, "reddit.com", date(2024, 1, 15), 5.0)
+    return shards
+
+
+def _all_pages(list_page, key: str, **options):
+    """Follow nextCursor until the last page, returning every item and the page count."""
+    items, cursor, pages = [], None, 0
+    while True:
+        page = list_page(cursor, **options)
+        items.extend(page[key])
+        pages += 1
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return items, pages
+
+
+@pytest.fixture(params=["off", "monthly"])
+def report(request, tmp_path):
+    shards = _shards(tmp_path, request.param)
+    yield SQLAlchemyUsageReport(shards, partitioned=request.param == "monthly")
+    shards.dispose()
+
+
+class TestListUsers:
+    """Test paging through users across shards."""
+
+    def test_pages_cover_every_user_once(self, report):
+        """Test pages are ordered by ID, without gaps or repeats."""
+        users, pages = _all_pages(report.list_users, "users", limit=2)
+
+        assert [user["userId"] for user in users] == sorted(USERS)
+        assert pages == 3
+        assert users[0]["totalMinutes"] == 25.0
+        assert users[0]["lastSeen"] is not None
+
+    def test_total_includes_rollups(self, report):
+        """Test usage rolled up by the retention job counts towards the total."""
+        with report._shards.database_for("alice").session() as session:
+            session.add(UsageRollup(
+                user_id="alice", domain="youtube.com", granularity="month",
+                period_start=date(2023, 1, 1), period_end=date(2023, 1, 31), minutes=100.0,
+            ))
+            session.commit()
+
+        page = report.list_users(None, 1)
+
+        assert page["users"][0]["totalMinutes"] == 125.0
+
+
+class TestListUsage:
+    """Test paging through raw usage rows."""
+
+    def test_pages_follow_index_order(self, report):
+        """Test rows come ordered by (user_id, domain, date) across shards and partitions."""
+        records, _ = _all_pages(report.list_usage, "records", limit=4)
+
+        keys = [(record["userId"], record["domain"], record["date"]) for record in records]
+        assert len(keys) == 3 * len(USERS)
+        assert keys == sorted(keys)
+        assert keys[:3] == [
+            ("alice", "reddit.com", "2024-01-15"),
+            ("alice", "youtube.com", "2024-01-15"),
+            ("alice", "youtube.com", "2024-02-01"),
+        ]
+
+    def test_filters_one_user(self, report):
+        """Test a user's rows are listed from the user's shard only."""
+        records, pages = _all_pages(report.list_usage, "records", limit=2, user_id="carol")
+
+        assert {record["userId"] for record in records} == {"carol"}
+        assert (len(records), pages) == (3, 2)
+
+    def test_cursor_continues_after_key(self, report):
+        """Test a cursor built from a row's key starts right after it."""
+        page = report.list_usage(encode_cursor(["alice", "youtube.com", date(2024, 2, 1)]), 1)
+
+        assert page["records"][0]["userId"] == "bob"
+
+    def test_invalid_cursor(self, report):
+        """Test malformed cursors are rejected."""
+        with pytest.raises(ValueError):
+            report.list_usage("not-a-cursor", 10)
+        with pytest.raises(ValueError):
+            report.list_users(encode_cursor(["a", "b"]), 10)
+
+
+def test_keyset_query_uses_index(tmp_path):
+    """Test the page query is an index range scan, not a scan of the table."""
+    database = Database(f"sqlite:///{tmp_path / 'plan.db'}", single_writer="off")
+    Base.metadata.create_all(bind=database.engine)
+
+    with database.engine.connect() as connection:
+        plan = connection.execute(text(
+            "EXPLAIN QUERY PLAN SELECT user_id, domain, date, minutes FROM usage_records "
+            "WHERE (user_id, domain, date) > ('alice', 'youtube.com', '2024-01-15') "
+            "ORDER BY user_id, domain, date LIMIT 101"
+        )).all()
+    database.dispose()
+
+    details = " ".join(row[-1] for row in plan)
+    assert "SEARCH usage_records USING INDEX" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_admin_endpoints(tmp_path):
+    """Test the listing endpoints page through users and validate parameters."""
+    app = create_app(Settings(
+        database_url=f"sqlite:///{tmp_path / 'app.db'}", single_writer="off", admin_token="secret",
+    ))
+
+    with TestClient(app, headers={"Authorization": "Bearer secret"}) as client:
+        database = app.state.shards.shards[0]
+        Base.metadata.create_all(bind=database.engine)
+        for user_id in ("alice", "bob"):
+            client.post(
+                "/api/usage/sync",
+                json={"date": "2024-01-15", "usage": {"youtube.com": 10.0}},
+                headers={"X-User-ID": user_id},
+            )
+
+        first = client.get("/api/admin/users", params={"limit": 1}).json()
+        second = client.get("/api/admin/users", params={"limit": 1, "cursor": first["nextCursor"]}).json()
+        usage = client.get("/api/admin/usage", params={"user_id": "bob"}).json()
+        invalid = client.get("/api/admin/usage", params={"cursor": "%%%"})
+        too_large = client.get("/api/admin/users", params={"limit": 5000})
+
+    assert [first["users"][0]["userId"], second["users"][0]["userId"]] == ["alice", "bob"]
+    assert second["nextCursor"] is None
+    assert usage["records"] == [{
+        "userId": "bob", "domain": "youtube.com", "date": "2024-01-15", "minutes": 10.0,
+        "updatedAt": usage["records"][0]["updatedAt"],
+    }]
+    assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+    assert too_large.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize("admin_token, authorization, expected", [
+    (None, "Bearer secret", status.HTTP_403_FORBIDDEN),
+    ("secret", None, status.HTTP_401_UNAUTHORIZED),
+    ("secret", "Bearer wrong", status.HTTP_401_UNAUTHORIZED),
+    ("secret", "secret", status.HTTP_401_UNAUTHORIZED),
+])
+def test_admin_endpoints_require_token(tmp_path, admin_token, authorization, expected):
+    """Test the admin API is refused without the configured bearer token, or if none is configured."""
+    app = create_app(Settings(
+        database_url=f"sqlite:///{tmp_path / 'app.db'}", single_writer="off", admin_token=admin_token,
+    ))
+    headers = {"Authorization": authorization} if authorization else {}
+
+    with TestClient(app) as client:
+        responses = [
+            client.get(path, headers=headers)
+            for path in ("/api/admin/users", "/api/admin/usage", "/api/admin/leaderboard")
+        ]
+
+    assert [response.status_code for response in responses] == [expected] * 3
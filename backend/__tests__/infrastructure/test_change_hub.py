@@ -0,0 +1,169 @@
+"""
+Tests for the in-process change hub and the tracked site event stream.
+"""
+import asyncio
+import threading
+import pytest
+from unittest.mock import Mock
+from fastapi import status
+
+from website_tracker_backend.application.routers.tracked_sites import _event_stream
+from website_tracker_backend.infrastructure.events.hub import ChangeHub, HubFullError
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestChangeHub:
+    """Test fan-out, coalescing and limits."""
+
+    def test_fans_out_to_user_subscriptions(self):
+        """Test every subscription of the user gets the event, other users none."""
+        async def scenario():
+            hub = ChangeHub()
+            phone, laptop, other = hub.subscribe("alice"), hub.subscribe("alice"), hub.subscribe("bob")
+            hub.publish("alice", "tracked_sites", {"trackedSites": {"youtube.com": 60}})
+
+            return (
+                await phone.next_event(1.0),
+                await laptop.next_event(1.0),
+                await other.next_event(0.01),
+            )
+
+        phone, laptop, other = _run(scenario())
+
+        assert phone == laptop == ("tracked_sites", {"trackedSites": {"youtube.com": 60}})
+        assert other is None
+
+    def test_keeps_only_latest_event(self):
+        """Test undelivered events are replaced, bounding memory per subscriber."""
+        async def scenario():
+            hub = ChangeHub()
+            subscription = hub.subscribe("alice")
+            for limit in (10, 20, 30):
+                hub.publish("alice", "tracked_sites", {"limit": limit})
+            await asyncio.sleep(0)
+            return hub, await subscription.next_event(1.0), await subscription.next_event(0.01)
+
+        hub, event, nothing = _run(scenario())
+
+        assert event == ("tracked_sites", {"limit": 30})
+        assert nothing is None
+        assert hub.metrics.coalesced == 2
+
+    def test_publishes_from_other_threads(self):
+        """Test events published from a worker thread reach the loop."""
+        async def scenario():
+            hub = ChangeHub()
+            subscription = hub.subscribe("alice")
+            thread = threading.Thread(target=hub.publish, args=("alice", "tracked_sites", {"ok": True}))
+            thread.start()
+            event = await subscription.next_event(1.0)
+            thread.join()
+            return event
+
+        assert _run(scenario()) == ("tracked_sites", {"ok": True})
+
+    def test_limits_subscriptions(self):
+        """Test per-user and per-process limits, and that unsubscribing frees a slot."""
+        async def scenario():
+            hub = ChangeHub(max_subscribers=3, max_subscribers_per_user=2)
+            first = hub.subscribe("alice")
+            hub.subscribe("alice")
+            with pytest.raises(HubFullError):
+                hub.subscribe("alice")
+            hub.subscribe("bob")
+            with pytest.raises(HubFullError):
+                hub.subscribe("carol")
+
+            hub.unsubscribe(first)
+            hub.subscribe("carol")
+            return hub.metrics_snapshot()
+
+        metrics = _run(scenario())
+
+        assert metrics["subscribers"] == 3
+        assert metrics["users"] == 3
+        assert metrics["rejected_subscriptions"] == 2
+
+
+class TestTrackedSiteEvents:
+    """Test the SSE endpoint."""
+
+    def test_stream_formats_events(self):
+        """Test events are written as SSE messages, with keepalives while idle."""
+        async def scenario():
+            hub = ChangeHub()
+            stream = _event_stream(hub, "alice", keepalive_seconds=0.01)
+            messages = [await stream.__anext__(), await stream.__anext__()]
+            hub.publish("alice", "tracked_sites", {"trackedSites": {"youtube.com": 45}})
+            messages.append(await stream.__anext__())
+            await stream.aclose()
+            return hub, messages
+
+        hub, messages = _run(scenario())
+
+        assert messages == [
+            "retry: 5000\n\n",
+            ": keepalive\n\n",
+            'event: tracked_sites\ndata: {"trackedSites":{"youtube.com":45}}\n\n',
+        ]
+        assert hub.metrics_snapshot()["subscribers"] == 0
+
+    def test_disconnect_before_first_chunk_leaves_no_subscription(self):
+        """Test a stream closed before it is iterated holds no subscription."""
+        async def scenario():
+            hub = ChangeHub()
+            stream = _event_stream(hub, "alice", keepalive_seconds=0.01)
+            subscribers = hub.metrics_snapshot()["subscribers"]
+            await stream.aclose()
+            return hub, subscribers
+
+        hub, subscribers = _run(scenario())
+
+        assert subscribers == 0
+        assert hub.metrics_snapshot()["subscribers"] == 0
+
+    def test_stream_ends_when_hub_fills_after_check(self):
+        """Test a stream that loses the last place to another one ends instead of hanging open."""
+        async def scenario():
+            hub = ChangeHub(max_subscribers_per_user=1)
+            stream = _event_stream(hub, "alice", keepalive_seconds=0.01)
+            hub.subscribe("alice")
+            return hub, [message async for message in stream]
+
+        hub, messages = _run(scenario())
+
+        assert messages == ["retry: 30000\n\n"]
+        assert hub.metrics_snapshot()["subscribers"] == 1
+
+    def test_rejects_when_hub_is_full(self, client, test_user_id):
+        """Test a stream over the per-user limit gets 503 instead of hanging open."""
+        hub = client.app.state.change_hub
+        client.app.state.change_hub = ChangeHub(max_subscribers_per_user=0)
+        try:
+            response = client.get("/api/tracked-sites/events", headers={"X-User-ID": test_user_id})
+        finally:
+            client.app.state.change_hub = hub
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["Retry-After"] == "30"
+
+    def test_sync_publishes_to_hub(self, client, test_user):
+        """Test a tracked sites sync publishes the canonical sites."""
+        hub = client.app.state.change_hub
+        client.app.state.change_hub = recording_hub = Mock(spec=ChangeHub)
+        try:
+            client.post(
+                "/api/tracked-sites/sync",
+                json={"trackedSites": {"www.youtube.com": 45}},
+                headers={"X-User-ID": test_user.id},
+            )
+        finally:
+            client.app.state.change_hub = hub
+
+        user_id, event_type, data = recording_hub.publish.call_args.args
+        assert (user_id, event_type) == (test_user.id, "tracked_sites")
+        assert data["trackedSites"] == {"youtube.com": 45}
+        assert len(data["trackedSitesHash"]) == 64
@@ -0,0 +1,147 @@
+"""
+Tests for the columnar usage archive and its memory-mapped queries.
+"""
+import pytest
+from datetime import date, timedelta
+
+np = pytest.importorskip("numpy")
+
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.infrastructure.analytics.archiver import ColumnarArchiver
+from website_tracker_backend.infrastructure.analytics.query import ColumnarArchive
+from website_tracker_backend.infrastructure.database.connection import Base, Database, ShardedDatabase
+from website_tracker_backend.infrastructure.database.models import UsageRecord, User
+
+
+def _shards(tmp_path, count: int = 2) -> ShardedDatabase:
+    databases = []
+    for index in range(count):
+        database = Database(f"sqlite:///{tmp_path / f'shard{index}.db'}", single_writer="off")
+        Base.metadata.create_all(bind=database.engine)
+        databases.append(database)
+    return ShardedDatabase(databases)
+
+
+def _add_usage(shards: ShardedDatabase, user_id: str, domain: str, day: date, minutes: float) -> None:
+    with shards.database_for(user_id).session() as session:
+        if session.get(User, user_id) is None:
+            session.add(User(id=user_id))
+        session.add(UsageRecord(user_id=user_id, domain=domain, date=day, minutes=minutes))
+        session.commit()
+
+
+@pytest.fixture
+def shards(tmp_path):
+    shards = _shards(tmp_path)
+    _add_usage(shards, "alice", "youtube.com", date(2024, 1, 5), 30.0)
+    _add_usage(shards, "alice", "github.com", date(2024, 1, 20), 10.0)
+    _add_usage(shards, "bob", "youtube.com", date(2024, 1, 20), 15.0)
+    _add_usage(shards, "bob", "reddit.com", date(2024, 2, 3), 25.0)
+    _add_usage(shards, "carol", "github.com", date(2024, 3, 1), 5.0)
+    yield shards
+    shards.dispose()
+
+
+class TestColumnarArchiver:
+    """Test exporting months from the shards."""
+
+    def test_export_month_writes_sorted_columns(self, shards, tmp_path):
+        """Test a month is written as day-sorted column files with shared dictionaries."""
+        archiver = ColumnarArchiver(tmp_path / "archive")
+
+        rows = archiver.export_month(shards, 2024, 1)
+
+        assert rows == 3
+        assert archiver.archived_months() == {"2024-01": 3}
+        days = np.load(tmp_path / "archive" / "2024-01" / "day.npy")
+        assert days.dtype == np.uint8
+        assert list(days) == [5, 20, 20]
+
+    def test_export_month_refuses_to_overwrite(self, shards, tmp_path):
+        """Test exporting an archived month again requires overwrite."""
+        archiver = ColumnarArchiver(tmp_path / "archive")
+        archiver.export_month(shards, 2024, 1)
+
+        with pytest.raises(FileExistsError):
+            archiver.export_month(shards, 2024, 1)
+        assert archiver.export_month(shards, 2024, 1, overwrite=True) == 3
+
+    def test_export_closed_months_skips_current_month(self, shards, tmp_path):
+        """Test only months before today are exported, each once."""
+        archiver = ColumnarArchiver(tmp_path / "archive")
+
+        exported = archiver.export_closed_months(shards, today=date(2024, 3, 10))
+
+        assert exported == ["2024-01", "2024-02"]
+        assert archiver.export_closed_months(shards, today=date(2024, 3, 10)) == []
+
+    def test_export_reads_partitions(self, tmp_path):
+        """Test rows in a monthly partition are archived."""
+        shards = _shards(tmp_path, count=1)
+        with shards.shards[0].session() as session:
+            session.add(User(id="alice"))
+            session.commit()
+            repository = SQLAlchemyUsageRepository(session, partitioned=True)
+            repository.upsert_usage("alice", "youtube.com", date(2024, 1, 9), 12.0)
+        _add_usage(shards, "alice", "github.com", date(2024, 1, 10), 3.0)
+
+        archiver = ColumnarArchiver(tmp_path / "archive")
+
+        assert archiver.export_month(shards, 2024, 1) == 2
+        assert ColumnarArchive(tmp_path / "archive").domain_totals(date(2024, 1, 1), date(2024, 1, 31)) == {
+            "youtube.com": 12.0,
+            "github.com": 3.0,
+        }
+        shards.dispose()
+
+
+class TestColumnarArchive:
+    """Test aggregate queries over the archive."""
+
+    @pytest.fixture
+    def archive(self, shards, tmp_path):
+        ColumnarArchiver(tmp_path / "archive").export_closed_months(shards, today=date(2024, 4, 1))
+        # Queries must not need the database
+        shards.dispose()
+        return ColumnarArchive(tmp_path / "archive")
+
+    def test_domain_totals_largest_first(self, archive):
+        """Test minutes are summed per domain across users and months."""
+        totals = archive.domain_totals(date(2024, 1, 1), date(2024, 3, 31))
+
+        assert totals == {"youtube.com": 45.0, "reddit.com": 25.0, "github.com": 15.0}
+        assert list(totals) == ["youtube.com", "reddit.com", "github.com"]
+
+    def test_domain_totals_top(self, archive):
+        """Test top limits the number of domains."""
+        assert archive.domain_totals(date(2024, 1, 1), date(2024, 3, 31), top=1) == {"youtube.com": 45.0}
+
+    def test_user_totals(self, archive):
+        """Test minutes are summed per user."""
+        assert archive.user_totals(date(2024, 1, 1), date(2024, 3, 31)) == {"bob": 40.0, "alice": 40.0, "carol": 5.0}
+        assert list(archive.user_totals(date(2024, 1, 1), date(2024, 3, 31)))[-1] == "carol"
+
+    def test_range_within_month(self, archive):
+        """Test only days inside the range are counted."""
+        assert archive.domain_totals(date(2024, 1, 6), date(2024, 1, 31)) == {"youtube.com": 15.0, "github.com": 10.0}
+        assert archive.domain_totals(date(2024, 1, 6), date(2024, 1, 19)) == {}
+
+    def test_daily_totals(self, archive):
+        """Test minutes are summed per day."""
+        assert archive.daily_totals(date(2024, 1, 1), date(2024, 2, 29)) == {
+            date(2024, 1, 5): 30.0,
+            date(2024, 1, 20): 25.0,
+            date(2024, 2, 3): 25.0,
+        }
+
+    def test_active_users(self, archive):
+        """Test distinct users with usage are counted."""
+        assert archive.active_users(date(2024, 1, 1), date(2024, 3, 31)) == 3
+        assert archive.active_users(date(2024, 2, 1), date(2024, 2, 29)) == 1
+
+    def test_unarchived_months_are_empty(self, archive):
+        """Test ranges outside the archive return nothing."""
+        start = date(2024, 5, 1)
+
+        assert archive.domain_totals(start, start + timedelta(days=30)) == {}
+        assert archive.active_users(start, start + timedelta(days=30)) == 0
@@ -0,0 +1,109 @@
+"""
+Tests for database connection management.
+"""
+import os
+import subprocess
+import sys
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from website_tracker_backend.infrastructure.database.connection import Base, Database
+
+
+class TestDatabase:
+    """Test lazy, per-process engine creation."""
+
+    def test_module_does_not_import_fastapi(self):
+        """Test the infrastructure layer has no web framework dependency."""
+        result = subprocess.run(
+            [
+                sys.executable, "-c",
+                "import sys, website_tracker_backend.infrastructure.database.connection; "
+                "print('fastapi' in sys.modules)",
+            ],
+            capture_output=True, text=True, check=True,
+        )
+        
+        assert result.stdout.strip() == "False"
+
+    def test_engine_is_created_lazily(self):
+        """Test no engine exists until first use."""
+        database = Database("sqlite:///:memory:")
+        
+        assert database._engine is None
+        with database.session() as session:
+            assert session.execute(text("SELECT 1")).scalar() == 1
+        assert database._engine is not None
+
+    def test_dispose_without_close_recreates_engine(self):
+        """Test a forked child drops the inherited engine and builds its own."""
+        database = Database("sqlite:///:memory:")
+        inherited_engine = database.engine
+        
+        database.dispose(close=False)
+        
+        assert database.engine is not inherited_engine
+
+    def test_file_database_uses_wal(self, tmp_path):
+        """Test file-backed SQLite connections enable WAL for multi-process access."""
+        database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+        
+        with database.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        database.dispose()
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+    def test_forked_child_gets_fresh_engine(self):
+        """Test the at-fork hook resets every database in the child."""
+        database = Database("sqlite:///:memory:")
+        parent_engine_id = id(database.engine)
+        
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # Child: engine must have been reset by the at-fork hook
+            os.close(read_fd)
+            os.write(write_fd, b"1" if database._engine is None else b"0")
+            os._exit(0)
+        
+        os.close(write_fd)
+        result = os.read(read_fd, 1)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+        
+        assert result == b"1"
+        assert id(database.engine) == parent_engine_id
+
+
+class TestReadWriteSplit:
+    """Test separate reader and writer engines."""
+
+    def test_file_database_reads_use_read_only_pool(self, tmp_path):
+        """Test SQLite files get a pool of read-only connections to the same file."""
+        database = Database(f"sqlite:///{tmp_path / 'split.db'}", read_pool_size=3)
+        Base.metadata.create_all(bind=database.engine)
+        with database.engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (id) VALUES ('user-1')"))
+        
+        assert database.read_engine is not database.engine
+        assert database.read_engine.pool.size() == 3
+        with database.read_session() as session:
+            assert session.execute(text("SELECT id FROM users")).scalar() == "user-1"
+            with pytest.raises(OperationalError):
+                session.execute(text("INSERT INTO users (id) VALUES ('user-2')"))
+        database.dispose()
+
+    def test_in_memory_database_reads_use_writer(self):
+        """Test in-memory SQLite shares the writer engine for reads."""
+        database = Database("sqlite:///:memory:")
+        
+        assert database.read_engine is database.engine
+
+    def test_replica_url_is_used_for_reads(self, tmp_path):
+        """Test an explicit read URL (replica) is used for the reader engine."""
+        replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+        database = Database(f"sqlite:///{tmp_path / 'primary.db'}", read_url=replica_url)
+        
+        assert str(database.read_engine.url) == replica_url
+        database.dispose()
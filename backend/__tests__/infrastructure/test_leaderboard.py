@@ -0,0 +1,214 @@
+"""
+Tests for the incrementally maintained domain leaderboard.
+"""
+import pytest
+import threading
+from datetime import date
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from website_tracker_backend.app import create_app
+from website_tracker_backend.config import Settings
+from website_tracker_backend.infrastructure.adapters.usage_report_impl import SQLAlchemyUsageReport
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.infrastructure.database.connection import Base, Database, ShardedDatabase
+from website_tracker_backend.infrastructure.database.leaderboard import reconcile, week_start
+from website_tracker_backend.infrastructure.database.models import DomainUsageTotal, UsageRecord, User
+
+MONDAY = date(2024, 1, 15)
+TUESDAY = date(2024, 1, 16)
+
+
+def _database(tmp_path, name: str = "leaderboard.db", **options) -> Database:
+    database = Database(f"sqlite:///{tmp_path / name}", single_writer="off", **options)
+    Base.metadata.create_all(bind=database.engine)
+    return database
+
+
+def _sync(database: Database, user_id: str, domain: str, usage_date: date, minutes: float) -> None:
+    with database.session() as session:
+        if session.get(User, user_id) is None:
+            session.add(User(id=user_id))
+            session.commit()
+        SQLAlchemyUsageRepository(
+            session, partitioned=database.usage_partitioning == "monthly"
+        ).upsert_usage(user_id, domain, usage_date, minutes)
+
+
+def _counter(database: Database, granularity: str, period_start: date, domain: str):
+    with database.read_session() as session:
+        total = (
+            session.query(DomainUsageTotal)
+            .filter_by(granularity=granularity, period_start=period_start, domain=domain)
+            .first()
+        )
+        return (total.minutes, total.users) if total else None
+
+
+@pytest.fixture(params=["off", "monthly"])
+def database(request, tmp_path):
+    database = _database(tmp_path, usage_partitioning=request.param)
+    yield database
+    database.dispose()
+
+
+class TestIncrementalCounters:
+    """Test counters follow usage upserts."""
+
+    def test_upserts_apply_deltas(self, database):
+        """Test repeated syncs add the difference, not the value."""
+        _sync(database, "alice", "youtube.com", MONDAY, 10.0)
+        _sync(database, "alice", "youtube.com", MONDAY, 25.0)
+        _sync(database, "bob", "youtube.com", MONDAY, 5.0)
+
+        assert _counter(database, "day", MONDAY, "youtube.com") == (30.0, 2)
+        assert _counter(database, "week", MONDAY, "youtube.com") == (30.0, 2)
+
+    def test_week_counts_each_user_once(self, database):
+        """Test a user active on several days of a week counts once for the week."""
+        _sync(database, "alice", "youtube.com", MONDAY, 10.0)
+        _sync(database, "alice", "youtube.com", TUESDAY, 20.0)
+
+        assert _counter(database, "day", TUESDAY, "youtube.com") == (20.0, 1)
+        assert _counter(database, "week", MONDAY, "youtube.com") == (30.0, 1)
+
+    def test_reset_to_zero_removes_user(self, database):
+        """Test a user whose minutes drop to zero is no longer counted."""
+        _sync(database, "alice", "youtube.com", MONDAY, 10.0)
+        _sync(database, "alice", "youtube.com", TUESDAY, 20.0)
+        _sync(database, "alice", "youtube.com", MONDAY, 0.0)
+
+        assert _counter(database, "day", MONDAY, "youtube.com") == (0.0, 0)
+        assert _counter(database, "week", MONDAY, "youtube.com") == (20.0, 1)
+
+        _sync(database, "alice", "youtube.com", TUESDAY, 0.0)
+        assert _counter(database, "week", MONDAY, "youtube.com") == (0.0, 0)
+
+    def test_counters_match_reconciliation(self, database):
+        """Test incrementally maintained counters equal the recomputed ones."""
+        for user_id, minutes in (("alice", 10.0), ("bob", 15.0)):
+            _sync(database, user_id, "youtube.com", MONDAY, minutes)
+            _sync(database, user_id, "reddit.com", TUESDAY, minutes * 2)
+        _sync(database, "alice", "youtube.com", MONDAY, 12.5)
+
+        assert reconcile(database, MONDAY, TUESDAY) == []
+
+    def test_device_syncs_are_summed(self, database):
+        """Test devices add up, a device's re-sync replaces only its own minutes."""
+        _sync(database, "alice", "youtube.com", MONDAY, 0.0)  # creates the user
+        with database.session() as session:
+            repository = SQLAlchemyUsageRepository(session, partitioned=database.usage_partitioning == "monthly")
+            repository.upsert_device_usage("alice", "laptop", "youtube.com", MONDAY, 10.0)
+            repository.upsert_device_usage("alice", "phone", "youtube.com", MONDAY, 5.0)
+            repository.upsert_device_usage("alice", "laptop", "youtube.com", MONDAY, 12.0)
+            repository.upsert_device_usage("alice", "laptop", "youtube.com", MONDAY, 12.0)
+            usage = repository.get_usage_for_date("alice", MONDAY)
+
+        assert [(record["domain"], record["minutes"]) for record in usage] == [("youtube.com", 17.0)]
+        assert _counter(database, "day", MONDAY, "youtube.com") == (17.0, 1)
+        assert reconcile(database, MONDAY, MONDAY) == []
+
+    def test_concurrent_first_device_syncs(self, database):
+        """Test devices syncing a new day at once, without the single writer, all add up."""
+        _sync(database, "alice", "youtube.com", TUESDAY, 1.0)  # creates the user
+        partitioned = database.usage_partitioning == "monthly"
+        errors = []
+
+        def sync(device_id: str) -> None:
+            try:
+                with database.session() as session:
+                    SQLAlchemyUsageRepository(session, partitioned=partitioned).upsert_device_usage(
+                        "alice", device_id, "youtube.com", MONDAY, 5.0
+                    )
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=sync, args=(f"device-{n}",)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert _counter(database, "day", MONDAY, "youtube.com") == (40.0, 1)
+        assert reconcile(database, MONDAY, MONDAY) == []
+
+
+class TestReconcile:
+    """Test checking and repairing counters against raw rows."""
+
+    def test_detects_and_repairs_drift(self, tmp_path):
+        """Test rows written outside the sync path are reported and repaired."""
+        database = _database(tmp_path)
+        _sync(database, "alice", "youtube.com", MONDAY, 10.0)
+        with database.session() as session:
+            session.add(User(id="bob"))
+            session.add(UsageRecord(user_id="bob", domain="youtube.com", date=TUESDAY, minutes=5.0))
+            session.commit()
+
+        mismatches = reconcile(database, MONDAY, TUESDAY, repair=True)
+
+        assert {(m.granularity, m.period_start) for m in mismatches} == {("day", TUESDAY), ("week", MONDAY)}
+        assert mismatches[0].expected_users == 1
+        assert _counter(database, "day", TUESDAY, "youtube.com") == (5.0, 1)
+        assert _counter(database, "week", MONDAY, "youtube.com") == (15.0, 2)
+        assert reconcile(database, MONDAY, TUESDAY) == []
+        database.dispose()
+
+    def test_removes_counters_without_rows(self, tmp_path):
+        """Test counters for deleted usage are removed on repair."""
+        database = _database(tmp_path)
+        _sync(database, "alice", "youtube.com", MONDAY, 10.0)
+        with database.session() as session:
+            session.query(UsageRecord).delete()
+            session.commit()
+
+        assert len(reconcile(database, MONDAY, MONDAY, repair=True)) == 2
+        assert _counter(database, "day", MONDAY, "youtube.com") is None
+        database.dispose()
+
+
+class TestTopDomains:
+    """Test the top-K report over the counters."""
+
+    def test_top_domains_across_shards(self, tmp_path):
+        """Test per-shard counters are merged and ranked."""
+        shards = ShardedDatabase([_database(tmp_path, "shard0.db"), _database(tmp_path, "shard1.db")])
+        for user_id in ("alice", "bob", "carol", "dave"):
+            database = shards.database_for(user_id)
+            _sync(database, user_id, "youtube.com", MONDAY, 10.0)
+            _sync(database, user_id, "reddit.com", TUESDAY, 30.0)
+        _sync(shards.database_for("alice"), "alice", "github.com", MONDAY, 5.0)
+        report = SQLAlchemyUsageReport(shards)
+
+        assert report.get_top_domains("day", MONDAY, 10) == [
+            {"domain": "youtube.com", "minutes": 40.0, "users": 4},
+            {"domain": "github.com", "minutes": 5.0, "users": 1},
+        ]
+        assert report.get_top_domains("week", week_start(TUESDAY), 1) == [
+            {"domain": "reddit.com", "minutes": 120.0, "users": 4},
+        ]
+        shards.dispose()
+
+    def test_leaderboard_endpoint(self, tmp_path):
+        """Test the admin endpoint serves the week's top domains."""
+        app = create_app(Settings(
+            database_url=f"sqlite:///{tmp_path / 'app.db'}", single_writer="off", admin_token="secret",
+        ))
+
+        with TestClient(app, headers={"Authorization": "Bearer secret"}) as client:
+            database = app.state.shards.shards[0]
+            Base.metadata.create_all(bind=database.engine)
+            _sync(database, "alice", "youtube.com", MONDAY, 10.0)
+            _sync(database, "alice", "reddit.com", TUESDAY, 30.0)
+
+            response = client.get("/api/admin/leaderboard?period=week&date_str=2024-01-17&limit=1")
+            invalid = client.get("/api/admin/leaderboard?period=year")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "period": "week",
+            "periodStart": "2024-01-15",
+            "domains": [{"domain": "reddit.com", "minutes": 30.0, "users": 1}],
+        }
+        assert invalid.status_code == status.HTTP_400_BAD_REQUEST
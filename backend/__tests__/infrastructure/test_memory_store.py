@@ -0,0 +1,80 @@
+"""
+Tests for the in-process store and its snapshots.
+"""
+import pickle
+import pytest
+from datetime import date, timedelta
+
+from website_tracker_backend.domain.services.change_cursor import utc_now
+from website_tracker_backend.infrastructure.adapters.memory_tracked_sites_repository_impl import MemoryTrackedSitesRepository
+from website_tracker_backend.infrastructure.adapters.memory_usage_repository_impl import MemoryUsageRepository
+from website_tracker_backend.infrastructure.memory.store import MemoryStore, SnapshotJob, UsageEntry, UserData
+
+DAY = date(2024, 1, 15)
+
+
+class TestUserData:
+    """Test the per-user date index."""
+
+    def test_dates_stay_sorted(self):
+        """Test days written out of order are indexed in date order."""
+        data = UserData(utc_now())
+        for offset in (3, 0, 2, 0):
+            data.set_usage("youtube.com", DAY + timedelta(days=offset), float(offset), utc_now())
+
+        assert data.dates == [DAY, DAY + timedelta(days=2), DAY + timedelta(days=3)]
+        assert [day for day, _ in data.days_between(DAY + timedelta(days=1), DAY + timedelta(days=3))] == [
+            DAY + timedelta(days=2), DAY + timedelta(days=3),
+        ]
+
+    def test_records_have_no_instance_dict(self):
+        """Test records are slotted."""
+        assert not hasattr(UsageEntry(1.0, utc_now()), "__dict__")
+        assert not hasattr(UserData(utc_now()), "__dict__")
+
+
+class TestSnapshots:
+    """Test saving and reloading the store."""
+
+    def test_round_trip(self, tmp_path):
+        """Test a reloaded store has the same data."""
+        path = tmp_path / "store.pickle"
+        store = MemoryStore()
+        MemoryUsageRepository(store).upsert_usage("alice", "youtube.com", DAY, 45.5)
+        MemoryTrackedSitesRepository(store).upsert_tracked_site("alice", "youtube.com", 60)
+
+        store.save(path)
+        loaded = MemoryStore.load(path)
+
+        assert MemoryUsageRepository(loaded).get_usage_for_date("alice", DAY)[0]["minutes"] == 45.5
+        assert MemoryTrackedSitesRepository(loaded).get_tracked_sites("alice") == {"youtube.com": 60}
+        assert not (tmp_path / "store.pickle.tmp").exists()
+
+    def test_missing_file_loads_empty_store(self, tmp_path):
+        """Test the first start has no snapshot yet."""
+        assert MemoryStore.load(tmp_path / "missing.pickle").users == {}
+
+    def test_incompatible_version_is_refused(self, tmp_path):
+        """Test snapshots of another layout are not loaded."""
+        path = tmp_path / "store.pickle"
+        path.write_bytes(pickle.dumps({"version": 0, "users": {}}))
+
+        with pytest.raises(ValueError):
+            MemoryStore.load(path)
+
+    def test_job_saves_only_changes(self, tmp_path):
+        """Test the job skips unchanged stores and saves once more on stop."""
+        path = tmp_path / "store.pickle"
+        store = MemoryStore()
+        job = SnapshotJob(store, path)
+
+        assert job.run_once() is False
+        MemoryUsageRepository(store).upsert_usage("alice", "youtube.com", DAY, 10.0)
+        assert job.run_once() is True
+        assert job.run_once() is False
+
+        job.start(3600)
+        MemoryUsageRepository(store).upsert_usage("alice", "youtube.com", DAY, 20.0)
+        job.stop(timeout=5)
+
+        assert MemoryUsageRepository(MemoryStore.load(path)).get_usage_for_date("alice", DAY)[0]["minutes"] == 20.0
@@ -0,0 +1,131 @@
+"""
+Tests for the versioned schema migrations.
+"""
+import pytest
+from datetime import date
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, event, inspect, select, text
+
+from website_tracker_backend.infrastructure.database.connection import Base, Database
+from website_tracker_backend.infrastructure.database.migrations import (
+    MIGRATIONS,
+    AddColumn,
+    Backfill,
+    BackfillOptions,
+    CreateIndex,
+    Migration,
+    applied_versions,
+    pending_migrations,
+    upgrade,
+)
+from website_tracker_backend.infrastructure.database.models import TrackedSite, UsageRecord, User
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(f"sqlite:///{tmp_path / 'migrations.db'}", single_writer="off")
+    yield database
+    database.dispose()
+
+
+def _indexes(database, table: str):
+    return {index["name"] for index in inspect(database.engine).get_indexes(table)}
+
+
+class TestUpgrade:
+    """Test applying the known migrations."""
+
+    def test_empty_database_gets_every_table(self, database):
+        """Test upgrading an empty database creates the full schema and records every version."""
+        applied = upgrade(database)
+
+        assert applied == [migration.version for migration in MIGRATIONS]
+        assert set(Base.metadata.tables) <= set(inspect(database.engine).get_table_names())
+        assert "idx_tracked_site_removals_user" in _indexes(database, "tracked_site_removals")
+        assert upgrade(database) == []
+
+    def test_existing_data_is_kept(self, database):
+        """Test a database created before later migrations is upgraded in place."""
+        for table in (User.__table__, TrackedSite.__table__, UsageRecord.__table__):
+            table.create(bind=database.engine)
+        with database.session() as session:
+            session.add(User(id="alice"))
+            session.add(UsageRecord(user_id="alice", domain="youtube.com", date=date(2024, 1, 15), minutes=10.0))
+            session.commit()
+
+        upgrade(database, target=1)
+        assert [migration.version for migration in pending_migrations(database.engine)] == [
+            migration.version for migration in MIGRATIONS[1:]
+        ]
+        upgrade(database)
+
+        with database.session() as session:
+            assert session.query(UsageRecord).one().minutes == 10.0
+        assert "usage_rollups" in inspect(database.engine).get_table_names()
+
+    def test_fresh_create_all_is_stamped(self, database):
+        """Test a database created from the models only records the versions."""
+        Base.metadata.create_all(bind=database.engine)
+
+        upgrade(database)
+
+        assert applied_versions(database.engine) == {migration.version for migration in MIGRATIONS}
+
+
+class TestColumnBackfill:
+    """Test adding a column and backfilling it in batches."""
+
+    @pytest.fixture
+    def items(self, database):
+        old = Table("items", MetaData(), Column("id", Integer, primary_key=True), Column("minutes", Float))
+        old.create(bind=database.engine)
+        with database.engine.begin() as connection:
+            connection.execute(old.insert(), [{"id": index, "minutes": float(index)} for index in range(25)])
+        return Table(
+            "items", MetaData(),
+            Column("id", Integer, primary_key=True), Column("minutes", Float), Column("hours", Float),
+            Column("label", String, server_default="none"),
+        )
+
+    def test_add_column_and_backfill(self, database, items):
+        """Test the column is added and every row backfilled in batches."""
+        migration = Migration(7, "hours", [
+            AddColumn(items, "hours"),
+            AddColumn(items, "label"),
+            CreateIndex("idx_items_hours", "items", ("hours",)),
+            Backfill(items, {"hours": items.c.minutes / 60}, lambda table: table.c.hours.is_(None)),
+        ])
+        batches = []
+        event.listen(
+            database.engine, "before_cursor_execute",
+            lambda connection, cursor, statement, *args: batches.append(statement)
+            if statement.startswith("UPDATE items") else None,
+        )
+
+        upgrade(database, options=BackfillOptions(batch_size=10, pause_ms=0), migrations=[migration])
+
+        with database.engine.connect() as connection:
+            rows = connection.execute(select(items.c.minutes, items.c.hours, items.c.label)).all()
+        assert all(hours == minutes / 60 for minutes, hours, _ in rows)
+        assert {label for _, _, label in rows} == {"none"}
+        assert "idx_items_hours" in _indexes(database, "items")
+        # 25 rows in transactions of at most 10
+        assert len(batches) == 3
+        assert applied_versions(database.engine) == {7}
+
+    def test_interrupted_migration_resumes(self, database, items):
+        """Test re-running a partly applied migration only does the remaining work."""
+        AddColumn(items, "hours").apply(database.engine, BackfillOptions())
+        with database.engine.begin() as connection:
+            connection.execute(text("UPDATE items SET hours = -1 WHERE id < 5"))
+
+        migration = Migration(7, "hours", [
+            AddColumn(items, "hours"),
+            Backfill(items, {"hours": items.c.minutes / 60}, lambda table: table.c.hours.is_(None)),
+        ])
+        upgrade(database, options=BackfillOptions(batch_size=4, pause_ms=0), migrations=[migration])
+
+        with database.engine.connect() as connection:
+            kept = connection.execute(select(items.c.hours).where(items.c.id < 5)).scalars().all()
+            missing = connection.execute(select(items.c.id).where(items.c.hours.is_(None))).all()
+        assert kept == [-1.0] * 5
+        assert missing == []
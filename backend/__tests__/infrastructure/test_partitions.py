@@ -0,0 +1,186 @@
+"""
+Tests for monthly usage partitions.
+"""
+import gzip
+import sqlite3
+import pytest
+from datetime import date
+from sqlalchemy import event
+
+from website_tracker_backend.infrastructure.adapters.usage_report_impl import SQLAlchemyUsageReport
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.infrastructure.database.connection import Base, Database, ShardedDatabase
+from website_tracker_backend.infrastructure.database.models import UsageRecord, User
+from website_tracker_backend.infrastructure.database.partitions import (
+    archive_partition,
+    migrate_to_partitions,
+    months_in_range,
+    parse_partition_name,
+    partition_name,
+    partition_row_counts,
+)
+
+
+@pytest.fixture
+def database(tmp_path):
+    """File-backed database storing usage in monthly partitions."""
+    database = Database(
+        f"sqlite:///{tmp_path / 'partitioned.db'}", single_writer="on", usage_partitioning="monthly"
+    )
+    Base.metadata.create_all(bind=database.engine)
+    yield database
+    database.dispose()
+
+
+def _repository(database: Database, session, read_session) -> SQLAlchemyUsageRepository:
+    return SQLAlchemyUsageRepository(session, read_session, database.writer, partitioned=True)
+
+
+class TestPartitionNames:
+    """Test partition naming and month ranges."""
+
+    def test_partition_name_round_trip(self):
+        """Test names encode and decode the month."""
+        assert partition_name(2024, 1) == "usage_records_2024_01"
+        assert parse_partition_name("usage_records_2024_01") == (2024, 1)
+        assert parse_partition_name("usage_records") is None
+
+    def test_months_in_range_spans_years(self):
+        """Test every overlapping month is listed once."""
+        assert months_in_range(date(2023, 11, 20), date(2024, 2, 1)) == [
+            (2023, 11), (2023, 12), (2024, 1), (2024, 2),
+        ]
+
+
+class TestPartitionedRepository:
+    """Test the usage repository with monthly partitions."""
+
+    def test_upsert_and_read_across_months(self, database):
+        """Test rows land in their month's partition and range reads combine them."""
+        with database.session() as session, database.read_session() as read_session:
+            repo = _repository(database, session, read_session)
+            repo.upsert_usage("user-1", "youtube.com", date(2024, 1, 31), 10.0)
+            repo.upsert_usage("user-1", "youtube.com", date(2024, 2, 1), 20.0)
+            repo.upsert_usage("user-1", "youtube.com", date(2024, 2, 1), 25.0)
+            
+            records = repo.get_usage_for_date_range("user-1", date(2024, 1, 1), date(2024, 2, 29))
+            day = repo.get_usage_for_date("user-1", date(2024, 2, 1))
+        
+        assert sorted((r["date"], r["minutes"]) for r in records) == [
+            (date(2024, 1, 31), 10.0), (date(2024, 2, 1), 25.0),
+        ]
+        assert [r["minutes"] for r in day] == [25.0]
+        assert partition_row_counts(database.engine) == {
+            "usage_records_2024_01": 1, "usage_records_2024_02": 1,
+        }
+
+    def test_range_query_only_reads_overlapping_partitions(self, database):
+        """Test partition pruning: other months are not queried."""
+        with database.session() as session, database.read_session() as read_session:
+            repo = _repository(database, session, read_session)
+            for month in range(1, 7):
+                repo.upsert_usage("user-1", "youtube.com", date(2024, month, 15), float(month))
+            
+            statements = []
+            event.listen(
+                database.read_engine, "before_cursor_execute",
+                lambda conn, cursor, statement, *args: statements.append(statement),
+            )
+            records = repo.get_usage_for_date_range("user-1", date(2024, 3, 1), date(2024, 3, 31))
+        
+        assert [r["minutes"] for r in records] == [3.0]
+        queried = " ".join(statements)
+        assert "usage_records_2024_03" in queried
+        assert "usage_records_2024_02" not in queried
+        assert "usage_records_2024_04" not in queried
+
+    def test_missing_partition_returns_empty(self, database):
+        """Test months without a partition read as no usage."""
+        with database.session() as session, database.read_session() as read_session:
+            repo = _repository(database, session, read_session)
+            
+            assert repo.get_usage_for_date_range("user-1", date(2020, 1, 1), date(2020, 12, 31)) == []
+
+    def test_missing_past_months_do_not_query_schema_each_read(self, database):
+        """Test a range of past months without partitions looks up the schema only once."""
+        with database.session() as session, database.read_session() as read_session:
+            repo = _repository(database, session, read_session)
+            repo.get_usage_for_date_range("user-1", date(2020, 1, 1), date(2020, 12, 31))
+            
+            statements = []
+            event.listen(
+                database.read_engine, "before_cursor_execute",
+                lambda conn, cursor, statement, *args: statements.append(statement),
+            )
+            for _ in range(3):
+                repo.get_usage_for_date_range("user-1", date(2020, 1, 1), date(2020, 12, 31))
+        
+        assert not any("sqlite_master" in statement for statement in statements)
+
+    def test_current_month_created_elsewhere_is_read_at_once(self, database, tmp_path):
+        """Test a partition for this month created by another process is found on the next read."""
+        today = date.today()
+        with database.session() as session, database.read_session() as read_session:
+            repo = _repository(database, session, read_session)
+            assert repo.get_usage_for_date_range("user-1", today, today) == []
+            
+            other = Database(
+                f"sqlite:///{tmp_path / 'partitioned.db'}", single_writer="off", usage_partitioning="monthly"
+            )
+            with other.session() as other_session:
+                _repository(other, other_session, other_session).upsert_usage("user-1", "youtube.com", today, 5.0)
+            other.dispose()
+            
+            records = repo.get_usage_for_date_range("user-1", today, today)
+        
+        assert [r["minutes"] for r in records] == [5.0]
+
+    def test_report_reads_partitions(self, database):
+        """Test cross-shard totals are computed from the partitions."""
+        with database.session() as session, database.read_session() as read_session:
+            repo = _repository(database, session, read_session)
+            repo.upsert_usage("user-1", "youtube.com", date(2024, 1, 15), 10.0)
+            repo.upsert_usage("user-2", "youtube.com", date(2024, 2, 15), 5.0)
+            repo.upsert_usage("user-2", "reddit.com", date(2024, 3, 15), 7.0)
+        report = SQLAlchemyUsageReport(ShardedDatabase([database]), partitioned=True)
+        
+        assert report.get_domain_totals(date(2024, 1, 1), date(2024, 2, 29)) == {"youtube.com": 15.0}
+
+
+class TestPartitionMaintenance:
+    """Test migrating into and archiving partitions."""
+
+    def test_migrate_moves_rows_into_partitions(self, database):
+        """Test existing usage_records rows are moved month by month."""
+        with database.session() as session:
+            session.add(User(id="user-1"))
+            session.add(UsageRecord(user_id="user-1", domain="a.com", date=date(2023, 12, 31), minutes=1.0))
+            session.add(UsageRecord(user_id="user-1", domain="a.com", date=date(2024, 1, 1), minutes=2.0))
+            session.commit()
+        
+        assert migrate_to_partitions(database.engine) == 2
+        
+        with database.read_session() as session:
+            assert session.query(UsageRecord).count() == 0
+            repo = SQLAlchemyUsageRepository(session, partitioned=True)
+            records = repo.get_usage_for_date_range("user-1", date(2023, 12, 1), date(2024, 1, 31))
+        assert sorted(r["minutes"] for r in records) == [1.0, 2.0]
+
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_archive_drops_only_that_month(self, database, tmp_path, compress):
+        """Test a month is copied to its own file and dropped, other months untouched."""
+        with database.session() as session, database.read_session() as read_session:
+            repo = _repository(database, session, read_session)
+            repo.upsert_usage("user-1", "youtube.com", date(2024, 1, 15), 10.0)
+            repo.upsert_usage("user-1", "youtube.com", date(2024, 2, 15), 20.0)
+        
+        path = archive_partition(database.engine, 2024, 1, tmp_path / "archive", compress=compress)
+        
+        assert partition_row_counts(database.engine) == {"usage_records_2024_02": 1}
+        if compress:
+            archive_db = tmp_path / "restored.db"
+            archive_db.write_bytes(gzip.decompress(path.read_bytes()))
+        else:
+            archive_db = path
+        with sqlite3.connect(archive_db) as conn:
+            assert conn.execute("SELECT minutes FROM usage_records_2024_01").fetchall() == [(10.0,)]
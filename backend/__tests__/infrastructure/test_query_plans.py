@@ -0,0 +1,157 @@
+"""
+Tests that every repository query is served by an index.
+
+Each repository method runs against a schema built from the models while
+the executed statements are recorded; EXPLAIN QUERY PLAN must then show
+an index SEARCH, never a SCAN, for every table they read.
+"""
+import logging
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import event, text
+
+from website_tracker_backend.domain.services.change_cursor import utc_now
+from website_tracker_backend.infrastructure.adapters.sync_receipt_repository_impl import SQLAlchemySyncReceiptRepository
+from website_tracker_backend.infrastructure.adapters.tracked_sites_repository_impl import SQLAlchemyTrackedSitesRepository
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.infrastructure.adapters.user_repository_impl import SQLAlchemyUserRepository
+from website_tracker_backend.infrastructure.database.connection import Base, Database
+from website_tracker_backend.infrastructure.database.migrations import check_indexes, missing_indexes
+from website_tracker_backend.infrastructure.database.partitions import PARTITION_PREFIX
+
+DAY = date(2024, 1, 15)
+
+
+def _record_statements(database):
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    event.listen(database.engine, "before_cursor_execute", record)
+    return statements
+
+
+def _exercise_repositories(database, partitioned: bool) -> None:
+    with database.session() as session:
+        SQLAlchemyUserRepository(session).get_or_create_user("alice")
+        SQLAlchemyUserRepository(session).get_or_create_user("alice")
+
+        tracked_sites = SQLAlchemyTrackedSitesRepository(session)
+        tracked_sites.upsert_tracked_site("alice", "youtube.com", 60)
+        tracked_sites.upsert_tracked_site("alice", "reddit.com", 30)
+        tracked_sites.upsert_tracked_site("alice", "youtube.com", 45)
+        tracked_sites.get_tracked_sites("alice")
+        tracked_sites.remove_tracked_sites_not_in_list("alice", ["youtube.com"])
+        tracked_sites.get_tracked_sites_changed_since("alice", utc_now() - timedelta(hours=1))
+
+        usage = SQLAlchemyUsageRepository(session, partitioned=partitioned)
+        usage.upsert_usage("alice", "youtube.com", DAY, 10.0)
+        usage.upsert_usage("alice", "youtube.com", DAY, 20.0)
+        usage.upsert_device_usage("alice", "laptop", "reddit.com", DAY, 5.0)
+        usage.upsert_device_usage("alice", "laptop", "reddit.com", DAY, 6.0)
+        usage.get_usage_for_date_range("alice", DAY - timedelta(days=30), DAY)
+        usage.get_usage_for_date("alice", DAY)
+        usage.get_changed_dates("alice", DAY - timedelta(days=30), DAY, utc_now() - timedelta(hours=1))
+
+        receipts = SQLAlchemySyncReceiptRepository(session)
+        for sequence in range(4):
+            receipts.save_response(
+                "alice", "usage", f"key-{sequence}", sequence, {"status": "ok"}, keep=2, keep_devices=10
+            )
+        receipts.get_response("alice", "usage", "key-3", None)
+        receipts.get_response("alice", "usage", None, 3)
+        receipts.get_last_sequence("alice", "usage")
+
+
+def _table_scans(database, statements):
+    known = set(Base.metadata.tables)
+    scans = []
+    raw = database.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        for statement, parameters in statements:
+            plan = cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            for row in plan:
+                detail = row[-1]
+                words = detail.split()
+                if words[0] == "SCAN" and (words[1] in known or words[1].startswith(PARTITION_PREFIX)):
+                    scans.append(f"{detail}: {statement}")
+    finally:
+        raw.close()
+    return scans
+
+
+@pytest.fixture(params=["off", "monthly"])
+def database(request, tmp_path):
+    database = Database(f"sqlite:///{tmp_path / 'plans.db'}", single_writer="off", usage_partitioning=request.param)
+    Base.metadata.create_all(bind=database.engine)
+    yield database, request.param == "monthly"
+    database.dispose()
+
+
+def test_repository_queries_use_indexes(database):
+    """Test no repository statement scans a table."""
+    database, partitioned = database
+    statements = _record_statements(database)
+
+    _exercise_repositories(database, partitioned)
+
+    assert len(statements) > 20
+    assert _table_scans(database, statements) == []
+
+
+def test_calendar_range_read_is_covered(database):
+    """Test the calendar range read is answered from the covering index alone."""
+    database, partitioned = database
+    _exercise_repositories(database, partitioned)
+    statements = _record_statements(database)
+
+    with database.session() as session:
+        SQLAlchemyUsageRepository(session, partitioned=partitioned).get_usage_for_date_range(
+            "alice", DAY - timedelta(days=30), DAY
+        )
+
+    with database.engine.connect() as connection:
+        statement, parameters = next(
+            (statement, parameters) for statement, parameters in statements
+            if "usage_records" in statement and "minutes" in statement
+        )
+        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    assert any("USING COVERING INDEX idx_" in row[-1] for row in plan)
+
+
+class TestIndexCheck:
+    """Test the startup check of declared indexes."""
+
+    @pytest.fixture
+    def stripped(self, tmp_path):
+        database = Database(f"sqlite:///{tmp_path / 'stripped.db'}", single_writer="off")
+        Base.metadata.create_all(bind=database.engine)
+        with database.engine.begin() as connection:
+            connection.execute(text("DROP INDEX idx_usage_records_user_date_cover"))
+        yield database
+        database.dispose()
+
+    def test_fresh_schema_has_every_index(self, tmp_path):
+        """Test create_all builds every declared index."""
+        database = Database(f"sqlite:///{tmp_path / 'fresh.db'}", single_writer="off")
+        Base.metadata.create_all(bind=database.engine)
+
+        assert missing_indexes(database.engine) == []
+        database.dispose()
+
+    def test_warn(self, stripped, caplog):
+        """Test a missing index is logged and left missing."""
+        with caplog.at_level(logging.WARNING):
+            assert check_indexes(stripped) == ["idx_usage_records_user_date_cover"]
+
+        assert "idx_usage_records_user_date_cover" in caplog.text
+        assert [index.name for index in missing_indexes(stripped.engine)] == ["idx_usage_records_user_date_cover"]
+
+    def test_create(self, stripped):
+        """Test a missing index is created."""
+        check_indexes(stripped, create=True)
+
+        assert missing_indexes(stripped.engine) == []
@@ -0,0 +1,82 @@
+"""
+Tests for the parallel fleet report.
+"""
+import pytest
+from datetime import date
+
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.infrastructure.database.connection import Base, Database, ShardedDatabase
+from website_tracker_backend.infrastructure.database.models import TrackedSite, User
+from website_tracker_backend.infrastructure.database.report import daily_rows, run_report, user_ranges
+
+DAY = date(2024, 1, 15)
+NEXT_DAY = date(2024, 2, 1)
+
+
+def _shards(tmp_path, partitioning: str) -> ShardedDatabase:
+    databases = []
+    for index in range(2):
+        database = Database(
+            f"sqlite:///{tmp_path / f'shard{index}.db'}", single_writer="off", usage_partitioning=partitioning
+        )
+        Base.metadata.create_all(bind=database.engine)
+        databases.append(database)
+    shards = ShardedDatabase(databases)
+    for index in range(10):
+        user_id = f"user-{index:02d}"
+        with shards.database_for(user_id).session() as session:
+            session.add(User(id=user_id))
+            session.add(TrackedSite(user_id=user_id, domain="youtube.com", daily_limit=30))
+            session.commit()
+            repository = SQLAlchemyUsageRepository(session, partitioned=partitioning == "monthly")
+            # Even users reach their limit on DAY
+            repository.upsert_usage(user_id, "youtube.com", DAY, 40.0 if index % 2 == 0 else 10.0)
+            repository.upsert_usage(user_id, "reddit.com", DAY, 5.0)
+            if index < 3:
+                repository.upsert_usage(user_id, "youtube.com", NEXT_DAY, 1.0)
+    return shards
+
+
+@pytest.fixture(params=["off", "monthly"])
+def shards(request, tmp_path):
+    shards = _shards(tmp_path, request.param)
+    yield shards
+    shards.dispose()
+
+
+def test_daily_statistics(shards):
+    """Test active users, minutes per domain and share over limit per day."""
+    rows = daily_rows(run_report(shards.shards, DAY, NEXT_DAY))
+
+    assert rows[0] == {
+        "date": "2024-01-15",
+        "activeUsers": 10,
+        "overLimitUsers": 5,
+        "shareOverLimit": 0.5,
+        "totalMinutes": 300.0,
+        "domains": {"youtube.com": 250.0, "reddit.com": 50.0},
+    }
+    assert (rows[1]["date"], rows[1]["activeUsers"], rows[1]["overLimitUsers"]) == ("2024-02-01", 3, 0)
+
+
+def test_ranges_cover_every_user_once(shards):
+    """Test the ranges of a shard split its users without gaps or overlaps."""
+    database = shards.shards[0]
+    ranges = user_ranges(database, 2)
+
+    assert ranges[0].low == min(r.low for r in ranges)
+    assert ranges[-1].high is None
+    assert all(current.high == following.low for current, following in zip(ranges, ranges[1:]))
+
+
+def test_parallel_matches_single_range(shards):
+    """Test merging small ranges from a process pool gives the single-process result."""
+    single = daily_rows(run_report(shards.shards, DAY, NEXT_DAY, workers=1, users_per_task=1000))
+    parallel = daily_rows(run_report(shards.shards, DAY, NEXT_DAY, workers=2, users_per_task=2))
+
+    assert parallel == single
+
+
+def test_range_outside_data(shards):
+    """Test days without usage are left out."""
+    assert daily_rows(run_report(shards.shards, date(2023, 1, 1), date(2023, 1, 31))) == []
@@ -0,0 +1,233 @@
+"""
+Behaviour shared by every repository backend.
+
+The same tests run against the SQLAlchemy adapters and the in-memory ones
+(STORAGE_BACKEND=memory), through the domain interfaces only.
+"""
+import pytest
+import time
+from datetime import date, timedelta
+
+from website_tracker_backend.domain.services.change_cursor import utc_now
+from website_tracker_backend.infrastructure.adapters.memory_sync_receipt_repository_impl import MemorySyncReceiptRepository
+from website_tracker_backend.infrastructure.adapters.memory_tracked_sites_repository_impl import MemoryTrackedSitesRepository
+from website_tracker_backend.infrastructure.adapters.memory_usage_repository_impl import MemoryUsageRepository
+from website_tracker_backend.infrastructure.adapters.memory_user_repository_impl import MemoryUserRepository
+from website_tracker_backend.infrastructure.adapters.sync_receipt_repository_impl import SQLAlchemySyncReceiptRepository
+from website_tracker_backend.infrastructure.adapters.tracked_sites_repository_impl import SQLAlchemyTrackedSitesRepository
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.infrastructure.adapters.user_repository_impl import SQLAlchemyUserRepository
+from website_tracker_backend.infrastructure.memory.store import MemoryStore
+
+DAY = date(2024, 1, 15)
+
+
+class Repositories:
+    def __init__(self, users, usage, tracked_sites, receipts):
+        self.users = users
+        self.usage = usage
+        self.tracked_sites = tracked_sites
+        self.receipts = receipts
+
+
+@pytest.fixture(params=["sqlalchemy", "memory"])
+def repositories(request):
+    if request.param == "sqlalchemy":
+        db_session = request.getfixturevalue("db_session")
+        repositories = Repositories(
+            SQLAlchemyUserRepository(db_session),
+            SQLAlchemyUsageRepository(db_session),
+            SQLAlchemyTrackedSitesRepository(db_session),
+            SQLAlchemySyncReceiptRepository(db_session),
+        )
+    else:
+        store = MemoryStore()
+        repositories = Repositories(
+            MemoryUserRepository(store),
+            MemoryUsageRepository(store),
+            MemoryTrackedSitesRepository(store),
+            MemorySyncReceiptRepository(store),
+        )
+    repositories.users.get_or_create_user("alice")
+    repositories.users.get_or_create_user("bob")
+    return repositories
+
+
+class TestUserRepository:
+    """Test creating users."""
+
+    def test_get_or_create_is_idempotent(self, repositories):
+        """Test creating an existing user again is harmless."""
+        repositories.users.get_or_create_user("alice")
+        repositories.users.get_or_create_user("carol")
+
+        assert repositories.tracked_sites.get_tracked_sites("carol") == {}
+
+
+class TestUsageRepository:
+    """Test usage reads and writes."""
+
+    def test_upsert_and_read_range(self, repositories):
+        """Test upserts replace minutes and range reads are inclusive and per user."""
+        usage = repositories.usage
+        usage.upsert_usage("alice", "youtube.com", DAY, 10.0)
+        usage.upsert_usage("alice", "youtube.com", DAY, 45.5)
+        usage.upsert_usage("alice", "reddit.com", DAY, 30.0)
+        usage.upsert_usage("alice", "youtube.com", DAY + timedelta(days=5), 20.0)
+        usage.upsert_usage("alice", "youtube.com", DAY + timedelta(days=6), 99.0)
+        usage.upsert_usage("bob", "youtube.com", DAY, 5.0)
+
+        result = usage.get_usage_for_date_range("alice", DAY, DAY + timedelta(days=5))
+
+        assert sorted((row["date"], row["domain"], row["minutes"]) for row in result) == [
+            (DAY, "reddit.com", 30.0),
+            (DAY, "youtube.com", 45.5),
+            (DAY + timedelta(days=5), "youtube.com", 20.0),
+        ]
+
+    def test_dates_written_out_of_order(self, repositories):
+        """Test range reads find days written in any order."""
+        usage = repositories.usage
+        for offset in (9, 2, 5, 0, 7):
+            usage.upsert_usage("alice", "youtube.com", DAY + timedelta(days=offset), float(offset))
+
+        result = usage.get_usage_for_date_range("alice", DAY + timedelta(days=1), DAY + timedelta(days=7))
+
+        assert sorted(row["minutes"] for row in result) == [2.0, 5.0, 7.0]
+
+    def test_get_usage_for_date(self, repositories):
+        """Test a single day's usage."""
+        usage = repositories.usage
+        usage.upsert_usage("alice", "youtube.com", DAY, 45.5)
+        usage.upsert_usage("alice", "reddit.com", DAY - timedelta(days=1), 30.0)
+
+        result = usage.get_usage_for_date("alice", DAY)
+
+        assert [(row["domain"], row["minutes"]) for row in result] == [("youtube.com", 45.5)]
+        assert usage.get_usage_for_date("nobody", DAY) == []
+
+    def test_device_usage_is_summed(self, repositories):
+        """Test each device's minutes are kept and the user's usage is their sum."""
+        usage = repositories.usage
+        usage.upsert_device_usage("alice", "laptop", "youtube.com", DAY, 10.0)
+        usage.upsert_device_usage("alice", "phone", "youtube.com", DAY, 5.0)
+        usage.upsert_device_usage("alice", "laptop", "youtube.com", DAY, 12.0)
+
+        result = usage.get_usage_for_date("alice", DAY)
+
+        assert [row["minutes"] for row in result] == [17.0]
+
+    def test_sync_without_device_is_kept_next_to_devices(self, repositories):
+        """Test syncs with and without a device ID add up instead of replacing each other."""
+        usage = repositories.usage
+        usage.upsert_usage("alice", "youtube.com", DAY, 30.0)
+        usage.upsert_device_usage("alice", "laptop", "youtube.com", DAY, 10.0)
+        usage.upsert_device_usage("alice", "laptop", "youtube.com", DAY, 12.0)
+        assert usage.get_usage_for_date("alice", DAY)[0]["minutes"] == 42.0
+
+        usage.upsert_usage("alice", "youtube.com", DAY, 35.0)
+
+        assert usage.get_usage_for_date("alice", DAY)[0]["minutes"] == 47.0
+
+    def test_get_changed_dates(self, repositories):
+        """Test only dates written after the cursor are reported."""
+        usage = repositories.usage
+        usage.upsert_usage("alice", "youtube.com", DAY, 10.0)
+        since = utc_now()
+        usage.upsert_usage("alice", "reddit.com", DAY + timedelta(days=1), 5.0)
+        usage.upsert_usage("alice", "reddit.com", DAY + timedelta(days=40), 5.0)
+
+        changed = usage.get_changed_dates("alice", DAY, DAY + timedelta(days=30), since)
+
+        assert changed == {DAY + timedelta(days=1)}
+        assert usage.get_changed_dates("nobody", DAY, DAY, since) == set()
+
+
+class TestTrackedSitesRepository:
+    """Test tracked site reads and writes."""
+
+    def test_upsert_and_get(self, repositories):
+        """Test upserts create and update limits per user."""
+        tracked_sites = repositories.tracked_sites
+        tracked_sites.upsert_tracked_site("alice", "youtube.com", 30)
+        tracked_sites.upsert_tracked_site("alice", "youtube.com", 60)
+        tracked_sites.upsert_tracked_site("alice", "reddit.com", 30)
+        tracked_sites.upsert_tracked_site("bob", "news.com", 10)
+
+        assert tracked_sites.get_tracked_sites("alice") == {"youtube.com": 60, "reddit.com": 30}
+
+    def test_remove_not_in_list(self, repositories):
+        """Test sites missing from the list are removed."""
+        tracked_sites = repositories.tracked_sites
+        tracked_sites.upsert_tracked_site("alice", "youtube.com", 60)
+        tracked_sites.upsert_tracked_site("alice", "reddit.com", 30)
+
+        tracked_sites.remove_tracked_sites_not_in_list("alice", ["youtube.com"])
+
+        assert tracked_sites.get_tracked_sites("alice") == {"youtube.com": 60}
+
+    def test_changed_since_reports_removals(self, repositories):
+        """Test removals are reported, unless the site was added again."""
+        tracked_sites = repositories.tracked_sites
+        tracked_sites.upsert_tracked_site("alice", "youtube.com", 60)
+        tracked_sites.upsert_tracked_site("alice", "reddit.com", 30)
+        tracked_sites.upsert_tracked_site("alice", "news.com", 15)
+        since = utc_now()
+
+        tracked_sites.remove_tracked_sites_not_in_list("alice", ["news.com"])
+        tracked_sites.upsert_tracked_site("alice", "youtube.com", 45)
+        tracked_sites.upsert_tracked_site("alice", "news.com", 15)
+
+        changed, removed = tracked_sites.get_tracked_sites_changed_since("alice", since)
+
+        assert changed == {"youtube.com": 45}
+        assert removed == ["reddit.com"]
+
+
+class TestSyncReceiptRepository:
+    """Test stored sync responses."""
+
+    def test_lookup_by_key_or_sequence(self, repositories):
+        """Test responses are found by idempotency key or sequence, per endpoint."""
+        receipts = repositories.receipts
+        receipts.save_response("alice", "usage", "key-1", 1, {"status": "ok", "n": 1}, keep=10, keep_devices=10)
+
+        assert receipts.get_response("alice", "usage", "key-1", None) == {"status": "ok", "n": 1}
+        assert receipts.get_response("alice", "usage", None, 1) == {"status": "ok", "n": 1}
+        assert receipts.get_response("alice", "tracked_sites", "key-1", None) is None
+        assert receipts.get_response("alice", "usage", None, None) is None
+        assert receipts.get_last_sequence("alice", "usage") == 1
+        assert receipts.get_last_sequence("bob", "usage") is None
+
+    def test_duplicate_key_keeps_first_response(self, repositories):
+        """Test a second save with the same key is ignored."""
+        receipts = repositories.receipts
+        receipts.save_response("alice", "usage", "key-1", None, {"n": 1}, keep=10, keep_devices=10)
+        receipts.save_response("alice", "usage", "key-1", None, {"n": 2}, keep=10, keep_devices=10)
+
+        assert receipts.get_response("alice", "usage", "key-1", None) == {"n": 1}
+
+    def test_oldest_receipts_are_dropped(self, repositories):
+        """Test only the newest receipts are kept."""
+        receipts = repositories.receipts
+        for sequence in range(5):
+            receipts.save_response("alice", "usage", f"key-{sequence}", sequence, {"n": sequence}, keep=2, keep_devices=10)
+
+        assert receipts.get_response("alice", "usage", "key-0", None) is None
+        assert receipts.get_response("alice", "usage", "key-4", None) == {"n": 4}
+        assert receipts.get_last_sequence("alice", "usage") == 4
+
+    def test_least_recent_devices_are_dropped(self, repositories):
+        """Test only the most recently written device endpoints are kept."""
+        receipts = repositories.receipts
+        receipts.save_response("alice", "usage", None, 1, {"n": 0}, keep=10, keep_devices=2)
+        for number, device in enumerate(["laptop", "phone", "laptop", "tablet"], start=1):
+            receipts.save_response("alice", f"usage:{device}", None, number, {"n": number}, keep=10, keep_devices=2)
+            time.sleep(0.001)
+        receipts.save_response("alice", "heartbeat:phone", None, 1, {"n": 5}, keep=10, keep_devices=2)
+
+        assert receipts.get_last_sequence("alice", "usage:phone") is None
+        assert receipts.get_last_sequence("alice", "usage:laptop") == 3
+        assert receipts.get_last_sequence("alice", "usage:tablet") == 4
+        assert receipts.get_last_sequence("alice", "heartbeat:phone") == 1
+        assert receipts.get_last_sequence("alice", "usage") == 1
@@ -0,0 +1,170 @@
+"""
+Tests for the usage retention and downsampling job.
+"""
+import pytest
+import threading
+from datetime import date, timedelta
+
+from website_tracker_backend.domain.services.usage_service import UsageService
+from website_tracker_backend.infrastructure.adapters.tracked_sites_repository_impl import SQLAlchemyTrackedSitesRepository
+from website_tracker_backend.infrastructure.adapters.usage_report_impl import SQLAlchemyUsageReport
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.infrastructure.database.connection import Base, Database, ShardedDatabase
+from website_tracker_backend.infrastructure.database.models import DeviceUsageRecord, UsageRecord, UsageRollup, User
+from website_tracker_backend.infrastructure.database.partitions import partition_row_counts
+from website_tracker_backend.infrastructure.database.retention import RetentionJob, period_bounds
+
+TODAY = date(2024, 6, 15)
+
+
+def _database(tmp_path, **options) -> Database:
+    database = Database(f"sqlite:///{tmp_path / 'retention.db'}", **options)
+    Base.metadata.create_all(bind=database.engine)
+    return database
+
+
+def _add_daily_usage(database: Database, start: date, days: int, minutes: float = 10.0) -> None:
+    """Add one user's usage for one domain on consecutive days."""
+    with database.session() as session:
+        if session.get(User, "user-1") is None:
+            session.add(User(id="user-1"))
+        for offset in range(days):
+            session.add(UsageRecord(
+                user_id="user-1", domain="youtube.com", date=start + timedelta(days=offset), minutes=minutes,
+            ))
+        session.commit()
+
+
+class TestPeriodBounds:
+    """Test week and month periods."""
+
+    def test_week_runs_monday_to_sunday(self):
+        """Test weeks start on Monday."""
+        assert period_bounds(date(2024, 1, 17), "week") == (date(2024, 1, 15), date(2024, 1, 21))
+
+    def test_month_bounds(self):
+        """Test month periods cover the whole month."""
+        assert period_bounds(date(2024, 2, 10), "month") == (date(2024, 2, 1), date(2024, 2, 29))
+
+
+class TestRetentionJob:
+    """Test rolling up and deleting old daily rows."""
+
+    def test_rolls_up_whole_periods_before_cutoff(self, tmp_path):
+        """Test old months become one rollup each and recent days stay daily."""
+        database = _database(tmp_path, single_writer="off")
+        _add_daily_usage(database, date(2024, 1, 1), 60)  # Jan 1 - Feb 29
+        _add_daily_usage(database, date(2024, 5, 1), 10)
+        job = RetentionJob(database, max_age_days=100, granularity="month", chunk_size=7)
+        
+        rolled = job.run_once(today=TODAY)
+        
+        assert job.cutoff(TODAY) == date(2024, 3, 1)
+        assert rolled == 60
+        with database.read_session() as session:
+            assert session.query(UsageRecord).count() == 10
+            rollups = {r.period_start: r.minutes for r in session.query(UsageRollup)}
+        assert rollups == {date(2024, 1, 1): 310.0, date(2024, 2, 1): 290.0}
+        metrics = job.metrics_snapshot()
+        assert metrics["rows_rolled_up"] == 60
+        assert metrics["runs"] == 1
+        assert metrics["last_cutoff"] == "2024-03-01"
+        database.dispose()
+
+    def test_rerun_is_idempotent(self, tmp_path):
+        """Test a second run finds nothing left to roll up."""
+        database = _database(tmp_path, single_writer="on")
+        _add_daily_usage(database, date(2024, 1, 1), 14)
+        job = RetentionJob(database, max_age_days=30, granularity="week")
+        
+        job.run_once(today=TODAY)
+        
+        assert job.run_once(today=TODAY) == 0
+        with database.read_session() as session:
+            assert sum(r.minutes for r in session.query(UsageRollup)) == 140.0
+        database.dispose()
+
+    def test_concurrent_jobs_count_each_row_once(self, tmp_path):
+        """Test jobs of several workers on the same shard do not double count."""
+        database = _database(tmp_path, single_writer="off")
+        _add_daily_usage(database, date(2024, 1, 1), 60)
+        jobs = [RetentionJob(database, max_age_days=100, chunk_size=3) for _ in range(4)]
+        threads = [threading.Thread(target=job.run_once, kwargs={"today": TODAY}) for job in jobs]
+        
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert sum(job.metrics_snapshot()["rows_rolled_up"] for job in jobs) == 60
+        with database.read_session() as session:
+            assert session.query(UsageRecord).count() == 0
+            assert sum(r.minutes for r in session.query(UsageRollup)) == 600.0
+        database.dispose()
+
+    def test_late_resync_of_rolled_up_day_is_dropped(self, tmp_path):
+        """Test a day synced again after its period was rolled up is not added twice."""
+        database = _database(tmp_path, single_writer="off")
+        _add_daily_usage(database, date(2024, 1, 1), 31)
+        job = RetentionJob(database, max_age_days=60)
+        job.run_once(today=TODAY)
+        with database.session() as session:
+            SQLAlchemyUsageRepository(session).upsert_usage("user-1", "youtube.com", date(2024, 1, 5), 10.0)
+        
+        assert job.run_once(today=TODAY) == 1
+        
+        with database.read_session() as session:
+            assert session.query(UsageRecord).count() == 0
+            assert session.query(UsageRollup).one().minutes == 310.0
+        assert job.metrics_snapshot()["late_rows_dropped"] == 1
+        database.dispose()
+
+    def test_deletes_device_rows_before_cutoff(self, tmp_path):
+        """Test per-device rows go once their merged days are rolled up."""
+        database = _database(tmp_path, single_writer="off")
+        _add_daily_usage(database, date(2024, 1, 1), 1)
+        with database.session() as session:
+            repository = SQLAlchemyUsageRepository(session)
+            for offset in range(5):
+                repository.upsert_device_usage("user-1", "laptop", "reddit.com", date(2024, 1, 10 + offset), 3.0)
+            repository.upsert_device_usage("user-1", "laptop", "reddit.com", date(2024, 6, 1), 3.0)
+        
+        RetentionJob(database, max_age_days=60, chunk_size=2).run_once(today=TODAY)
+        
+        with database.read_session() as session:
+            assert [r.date for r in session.query(DeviceUsageRecord)] == [date(2024, 6, 1)]
+            assert session.query(UsageRollup).filter_by(domain="reddit.com").one().minutes == 15.0
+        database.dispose()
+
+    def test_service_serves_coarse_days_for_rolled_up_ranges(self, tmp_path):
+        """Test the calendar spreads a monthly rollup over its days and flags them."""
+        database = _database(tmp_path, single_writer="off")
+        _add_daily_usage(database, date(2024, 1, 1), 31, minutes=20.0)
+        RetentionJob(database, max_age_days=60).run_once(today=TODAY)
+        
+        with database.read_session() as session:
+            service = UsageService(
+                SQLAlchemyUsageRepository(session), SQLAlchemyTrackedSitesRepository(session)
+            )
+            calendar = service.get_calendar_month("user-1", 2024, 1)
+        
+        assert all(day["coarse"] for day in calendar["days"])
+        assert sum(day["totalUsage"] for day in calendar["days"]) == pytest.approx(620.0)
+        report = SQLAlchemyUsageReport(ShardedDatabase([database]))
+        assert report.get_domain_totals(date(2024, 1, 1), date(2024, 1, 31)) == pytest.approx({"youtube.com": 620.0})
+        database.dispose()
+
+    def test_partitions_are_rolled_up_and_dropped(self, tmp_path):
+        """Test closed month partitions are emptied and dropped."""
+        database = _database(tmp_path, single_writer="on", usage_partitioning="monthly")
+        with database.session() as session:
+            repo = SQLAlchemyUsageRepository(session, writer=database.writer, partitioned=True)
+            repo.upsert_usage("user-1", "youtube.com", date(2024, 1, 10), 5.0)
+            repo.upsert_usage("user-1", "youtube.com", date(2024, 6, 10), 7.0)
+        job = RetentionJob(database, max_age_days=60)
+        
+        job.run_once(today=TODAY)
+        
+        assert partition_row_counts(database.engine) == {"usage_records_2024_06": 1}
+        assert job.metrics_snapshot()["partitions_dropped"] == 1
+        database.dispose()
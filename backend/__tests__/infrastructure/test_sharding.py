@@ -0,0 +1,221 @@
+"""
+Tests for hash sharding, resharding and cross-shard reports.
+"""
+import pytest
+from datetime import date
+from types import SimpleNamespace
+
+from website_tracker_backend.application import dependencies
+from website_tracker_backend.config import Settings
+from website_tracker_backend.infrastructure.adapters.sync_receipt_repository_impl import SQLAlchemySyncReceiptRepository
+from website_tracker_backend.infrastructure.adapters.usage_report_impl import SQLAlchemyUsageReport
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.infrastructure.database.connection import Base, Database, ShardedDatabase
+from website_tracker_backend.infrastructure.database.models import (
+    DomainUsageTotal, SyncReceipt, TrackedSite, UsageRecord, UsageRollup, User,
+)
+from website_tracker_backend.infrastructure.database.migrations import pending_migrations
+from website_tracker_backend.infrastructure.database.partitions import existing_partitions, partition_table
+from website_tracker_backend.infrastructure.database.resharding import reshard
+from website_tracker_backend.infrastructure.database.sharding import shard_index
+
+
+def _shards(tmp_path, names) -> ShardedDatabase:
+    """File-backed shards with tables created."""
+    shards = ShardedDatabase([
+        Database(f"sqlite:///{tmp_path / f'{name}.db'}", single_writer="off") for name in names
+    ])
+    for database in shards.shards:
+        Base.metadata.create_all(bind=database.engine)
+    return shards
+
+
+def _add_user(shards: ShardedDatabase, user_id: str, minutes: float = 10.0) -> None:
+    """Create a user with one tracked site and one usage record on its shard."""
+    with shards.database_for(user_id).session() as session:
+        session.add(User(id=user_id))
+        session.add(TrackedSite(user_id=user_id, domain="youtube.com", daily_limit=60))
+        session.add(UsageRecord(user_id=user_id, domain="youtube.com", date=date(2024, 1, 15), minutes=minutes))
+        session.commit()
+
+
+def _user_ids(database: Database) -> set:
+    with database.read_session() as session:
+        return {user_id for (user_id,) in session.query(User.id)}
+
+
+class TestShardRouting:
+    """Test mapping users to shards."""
+
+    def test_shard_index_is_stable_and_spread(self):
+        """Test placement is deterministic and uses every shard."""
+        placements = [shard_index(f"user-{i}", 4) for i in range(200)]
+        
+        assert placements == [shard_index(f"user-{i}", 4) for i in range(200)]
+        assert set(placements) == {0, 1, 2, 3}
+
+    def test_database_for_routes_by_user(self, tmp_path):
+        """Test a user's rows land on, and only on, their shard."""
+        shards = _shards(tmp_path, ["a", "b", "c"])
+        for i in range(30):
+            _add_user(shards, f"user-{i}")
+        
+        for index, database in enumerate(shards.shards):
+            assert all(shards.shard_for(user_id) == index for user_id in _user_ids(database))
+        assert sum(len(_user_ids(database)) for database in shards.shards) == 30
+        shards.dispose()
+
+    def test_request_dependency_uses_user_shard(self, tmp_path):
+        """Test get_user_database picks the app's shard from the X-User-ID header."""
+        shards = _shards(tmp_path, ["a", "b"])
+        request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(settings=Settings(), shards=shards)))
+        
+        assert dependencies.get_user_database(request, "user-7") is shards.database_for("user-7")
+        assert dependencies.get_user_database(request, None) is shards.shards[0]
+        shards.dispose()
+
+
+class TestFanOut:
+    """Test cross-shard reports."""
+
+    def test_report_merges_all_shards(self, tmp_path):
+        """Test totals are summed over every shard."""
+        shards = _shards(tmp_path, ["a", "b", "c"])
+        for i in range(12):
+            _add_user(shards, f"user-{i}", minutes=float(i))
+        report = SQLAlchemyUsageReport(shards)
+        
+        assert report.get_user_count() == 12
+        assert report.get_domain_totals(date(2024, 1, 1), date(2024, 1, 31)) == {"youtube.com": 66.0}
+        assert shards.fan_out(lambda session: 1) == [1, 1, 1]
+        shards.dispose()
+
+
+class TestReshard:
+    """Test moving users between shard layouts."""
+
+    def test_reshard_copies_and_deletes(self, tmp_path):
+        """Test growing from one to three shards moves users to their new shard."""
+        source = _shards(tmp_path, ["a"])
+        for i in range(20):
+            _add_user(source, f"user-{i}", minutes=float(i))
+        target = ShardedDatabase([
+            Database(source.shards[0].url, single_writer="off"),
+            Database(f"sqlite:///{tmp_path / 'b.db'}", single_writer="off"),
+            Database(f"sqlite:///{tmp_path / 'c.db'}", single_writer="off"),
+        ])
+        
+        moved = reshard(source, target)
+        
+        assert moved == len([i for i in range(20) if target.shard_for(f"user-{i}") != 0])
+        assert len(_user_ids(source.shards[0])) == 20
+        
+        reshard(source, target, delete_source=True)
+        
+        for index, database in enumerate(target.shards):
+            assert all(target.shard_for(user_id) == index for user_id in _user_ids(database))
+        report = SQLAlchemyUsageReport(target)
+        assert report.get_user_count() == 20
+        assert report.get_domain_totals(date(2024, 1, 1), date(2024, 1, 31)) == {"youtube.com": 190.0}
+        source.dispose()
+        target.dispose()
+
+    def test_reshard_migrates_new_shards(self, tmp_path):
+        """Test new target shards get the migrated schema and its recorded versions."""
+        source = _shards(tmp_path, ["a"])
+        target = ShardedDatabase([Database(f"sqlite:///{tmp_path / 'b.db'}", single_writer="off")])
+        
+        reshard(source, target)
+        
+        assert pending_migrations(target.shards[0].engine) == []
+        source.dispose()
+        target.dispose()
+
+    def test_reshard_moves_rollups(self, tmp_path):
+        """Test rolled-up history moves with the user and is removed from the old shard."""
+        source = _shards(tmp_path, ["a"])
+        target = _shards(tmp_path, ["b"])
+        _add_user(source, "user-1")
+        with source.shards[0].session() as session:
+            session.add(UsageRollup(
+                user_id="user-1", domain="youtube.com", granularity="month",
+                period_start=date(2023, 1, 1), period_end=date(2023, 1, 31), minutes=600.0,
+            ))
+            session.commit()
+        
+        reshard(source, target, delete_source=True)
+        
+        with target.shards[0].read_session() as session:
+            rollup = session.query(UsageRollup).one()
+        with source.shards[0].read_session() as session:
+            assert session.query(UsageRollup).count() == 0
+        assert (rollup.user_id, rollup.period_start, rollup.minutes) == ("user-1", date(2023, 1, 1), 600.0)
+        assert SQLAlchemyUsageReport(target).get_domain_totals(date(2023, 1, 1), date(2023, 1, 31)) == {
+            "youtube.com": 600.0,
+        }
+        source.dispose()
+        target.dispose()
+
+    def test_reshard_moves_partitions_receipts_and_counters(self, tmp_path):
+        """Test monthly partitions, sync receipts and leaderboard counters follow the user."""
+        source = ShardedDatabase([
+            Database(f"sqlite:///{tmp_path / 'a.db'}", single_writer="off", usage_partitioning="monthly"),
+        ])
+        target = ShardedDatabase([
+            Database(f"sqlite:///{tmp_path / 'b.db'}", single_writer="off", usage_partitioning="monthly"),
+        ])
+        Base.metadata.create_all(bind=source.shards[0].engine)
+        with source.shards[0].session() as session:
+            session.add(User(id="user-1"))
+            session.commit()
+            usage = SQLAlchemyUsageRepository(session, partitioned=True)
+            usage.upsert_usage("user-1", "youtube.com", date(2024, 1, 15), 30.0)
+            usage.upsert_usage("user-1", "youtube.com", date(2024, 2, 1), 10.0)
+            SQLAlchemySyncReceiptRepository(session).save_response(
+                "user-1", "usage", "key-1", 1, {"n": 1}, keep=50, keep_devices=10
+            )
+        
+        reshard(source, target, delete_source=True)
+        
+        def state(database):
+            with database.read_session() as session:
+                connection = session.connection()
+                names = sorted(existing_partitions(connection, refresh=True))
+                rows = {
+                    name: session.execute(partition_table(name).select()).all() for name in names
+                }
+                day = {
+                    (total.period_start, total.minutes, total.users)
+                    for total in session.query(DomainUsageTotal).filter(DomainUsageTotal.granularity == "day")
+                }
+                return rows, day, session.query(SyncReceipt).count()
+        
+        target_rows, target_days, target_receipts = state(target.shards[0])
+        source_rows, source_days, source_receipts = state(source.shards[0])
+        assert {name: len(rows) for name, rows in target_rows.items()} == {
+            "usage_records_2024_01": 1, "usage_records_2024_02": 1,
+        }
+        assert target_days == {(date(2024, 1, 15), 30.0, 1), (date(2024, 2, 1), 10.0, 1)}
+        assert target_receipts == 1
+        assert all(not rows for rows in source_rows.values())
+        assert source_days == {(date(2024, 1, 15), 0.0, 0), (date(2024, 2, 1), 0.0, 0)}
+        assert source_receipts == 0
+        source.dispose()
+        target.dispose()
+
+    def test_reshard_catch_up_keeps_newest_usage(self, tmp_path):
+        """Test re-running after more writes updates the copied rows."""
+        source = _shards(tmp_path, ["a"])
+        target = _shards(tmp_path, ["b"])
+        _add_user(source, "user-1", minutes=5.0)
+        reshard(source, target)
+        
+        with source.shards[0].session() as session:
+            session.query(UsageRecord).one().minutes = 25.0
+            session.commit()
+        reshard(source, target)
+        
+        with target.shards[0].read_session() as session:
+            assert session.query(UsageRecord).one().minutes == 25.0
+        source.dispose()
+        target.dispose()
@@ -2,7 +2,10 @@
 Tests for tracked sites repository implementation.
 """
 import pytest
+from datetime import timedelta
+from unittest.mock import Mock
 
+from website_tracker_backend.domain.services.change_cursor import utc_now
 from website_tracker_backend.infrastructure.adapters.tracked_sites_repository_impl import SQLAlchemyTrackedSitesRepository
 from website_tracker_backend.infrastructure.database.models import TrackedSite
 
@@ -91,3 +94,25 @@ class TestSQLAlchemyTrackedSitesRepository:
             TrackedSite.domain == "youtube.com",
         ).first()
         assert youtube_site is not None
+
+    def test_get_tracked_sites_uses_read_session(self, db_session, test_user, test_tracked_sites):
+        """Test tracked sites are read from the read session, not the writer."""
+        writer = Mock()
+        repo = SQLAlchemyTrackedSitesRepository(writer, read_db=db_session)
+        
+        result = repo.get_tracked_sites(test_user.id)
+        
+        assert result == {"youtube.com": 60, "reddit.com": 30}
+        writer.query.assert_not_called()
+
+    def test_changed_since_reports_removals(self, db_session, test_user, test_tracked_sites):
+        """Test removals are reported, unless the site was added again."""
+        since = utc_now() - timedelta(seconds=1)
+        repo = SQLAlchemyTrackedSitesRepository(db_session)
+        repo.remove_tracked_sites_not_in_list(test_user.id, [])
+        repo.upsert_tracked_site(test_user.id, "youtube.com", 45)
+        
+        changed, removed = repo.get_tracked_sites_changed_since(test_user.id, since)
+        
+        assert changed == {"youtube.com": 45}
+        assert removed == ["reddit.com"]
@@ -2,10 +2,12 @@
 Tests for usage repository implementation.
 """
 import pytest
-from datetime import date
+from datetime import date, timedelta
+from unittest.mock import Mock
 
+from website_tracker_backend.domain.services.change_cursor import utc_now
 from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
-from website_tracker_backend.infrastructure.database.models import UsageRecord
+from website_tracker_backend.infrastructure.database.models import UsageRecord, UsageRollup
 
 
 class TestSQLAlchemyUsageRepository:
@@ -119,3 +121,33 @@ class TestSQLAlchemyUsageRepository:
         assert len(result) == 2
         assert any(r["domain"] == "youtube.com" for r in result)
         assert any(r["domain"] == "reddit.com" for r in result)
+
+    def test_reads_use_read_session(self, db_session, test_user, test_usage_records):
+        """Test queries go to the read session, not the writer."""
+        writer = Mock()
+        repo = SQLAlchemyUsageRepository(writer, read_db=db_session)
+        
+        result = repo.get_usage_for_date_range(test_user.id, date(2024, 1, 1), date(2024, 1, 31))
+        day = repo.get_usage_for_date(test_user.id, date(2024, 1, 15))
+        
+        assert len(result) == 2
+        assert len(day) == 2
+        writer.query.assert_not_called()
+
+    def test_get_changed_dates(self, db_session, test_user):
+        """Test changed dates come from rows and rollups updated after the cursor."""
+        since = utc_now() - timedelta(minutes=30)
+        db_session.add_all([
+            UsageRecord(user_id=test_user.id, domain="youtube.com", date=date(2024, 1, 15), minutes=10.0,
+                        updated_at=since - timedelta(hours=1)),
+            UsageRecord(user_id=test_user.id, domain="youtube.com", date=date(2024, 1, 16), minutes=10.0),
+            UsageRecord(user_id=test_user.id, domain="reddit.com", date=date(2024, 1, 16), minutes=5.0),
+            UsageRollup(user_id=test_user.id, domain="youtube.com", granularity="week",
+                        period_start=date(2023, 12, 25), period_end=date(2023, 12, 31), minutes=70.0),
+        ])
+        db_session.commit()
+        repo = SQLAlchemyUsageRepository(db_session)
+        
+        changed = repo.get_changed_dates(test_user.id, date(2023, 12, 30), date(2024, 1, 31), since)
+        
+        assert changed == {date(2023, 12, 30), date(2023, 12, 31), date(2024, 1, 16)}
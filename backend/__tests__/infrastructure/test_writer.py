@@ -0,0 +1,126 @@
+"""
+Tests for the single-writer thread with group commit.
+"""
+import threading
+import pytest
+from datetime import date
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.infrastructure.database.connection import Base, Database
+from website_tracker_backend.infrastructure.database.models import UsageRecord, User
+from website_tracker_backend.infrastructure.database.writer import SingleWriter
+
+
+@pytest.fixture
+def database(tmp_path):
+    """File-backed database with the single writer enabled."""
+    database = Database(f"sqlite:///{tmp_path / 'writer.db'}", single_writer="on")
+    Base.metadata.create_all(bind=database.engine)
+    yield database
+    database.dispose()
+
+
+def _count_commits(database: Database) -> list:
+    """Record every commit on the writer engine."""
+    commits = []
+    event.listen(database.engine, "commit", lambda conn: commits.append(1))
+    return commits
+
+
+class TestSingleWriter:
+    """Test queued writes and group commit."""
+
+    def test_execute_commits_and_returns_result(self, database):
+        """Test an operation is committed before execute returns."""
+        def write(session):
+            session.add(User(id="user-1"))
+            return "done"
+        
+        assert database.writer.execute(write) == "done"
+        with database.read_session() as session:
+            assert session.execute(text("SELECT id FROM users")).scalar() == "user-1"
+
+    def test_concurrent_writes_are_group_committed(self, database):
+        """Test writes queued within the commit window share one transaction."""
+        writer = SingleWriter(database.session_factory, commit_interval_ms=50)
+        commits = _count_commits(database)
+        barrier = threading.Barrier(20)
+        
+        def worker(index):
+            barrier.wait()
+            writer.execute(lambda session: session.add(User(id=f"user-{index}")))
+        
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.stop()
+        
+        with database.read_session() as session:
+            assert session.execute(text("SELECT COUNT(*) FROM users")).scalar() == 20
+        assert len(commits) < 20
+
+    def test_failing_operation_does_not_fail_batch(self, database):
+        """Test one bad write in a group only fails its own caller."""
+        writer = SingleWriter(database.session_factory, commit_interval_ms=50)
+        writer.execute(lambda session: session.add(User(id="existing")))
+        
+        good = writer.submit(lambda session: session.add(User(id="new")))
+        bad = writer.submit(lambda session: session.add(User(id="existing")))
+        
+        assert good.result(5) is None
+        with pytest.raises(IntegrityError):
+            bad.result(5)
+        writer.stop()
+        with database.read_session() as session:
+            assert session.execute(text("SELECT COUNT(*) FROM users")).scalar() == 2
+
+    def test_stop_applies_queued_writes(self, database):
+        """Test stop drains the queue and later submits are rejected."""
+        writer = SingleWriter(database.session_factory, commit_interval_ms=50)
+        futures = [
+            writer.submit(lambda session, i=i: session.add(User(id=f"user-{i}")))
+            for i in range(5)
+        ]
+        
+        writer.stop()
+        
+        assert all(future.done() for future in futures)
+        with pytest.raises(RuntimeError):
+            writer.submit(lambda session: None)
+
+    def test_repository_writes_through_writer(self, database):
+        """Test repositories given a writer queue upserts on it."""
+        database.writer.execute(lambda session: session.add(User(id="user-1")))
+        with database.session() as db:
+            repo = SQLAlchemyUsageRepository(db, writer=database.writer)
+            repo.upsert_usage("user-1", "youtube.com", date(2024, 1, 15), 10.0)
+            repo.upsert_usage("user-1", "youtube.com", date(2024, 1, 15), 12.5)
+        
+        with database.read_session() as session:
+            records = session.query(UsageRecord).all()
+        assert [(r.domain, r.minutes) for r in records] == [("youtube.com", 12.5)]
+
+
+class TestDatabaseWriter:
+    """Test when Database enables the single writer."""
+
+    def test_auto_enables_for_sqlite_file(self, tmp_path):
+        """Test file-backed SQLite gets a single writer by default."""
+        database = Database(f"sqlite:///{tmp_path / 'auto.db'}", single_writer="auto")
+        
+        assert isinstance(database.writer, SingleWriter)
+        assert database.writer is database.writer
+
+    def test_auto_disabled_for_in_memory(self):
+        """Test in-memory SQLite commits directly."""
+        assert Database("sqlite:///:memory:", single_writer="auto").writer is None
+
+    def test_off_disables_writer(self, tmp_path):
+        """Test the writer can be turned off explicitly."""
+        database = Database(f"sqlite:///{tmp_path / 'off.db'}", single_writer="off")
+        
+        assert database.writer is None
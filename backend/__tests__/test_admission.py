@@ -0,0 +1,116 @@
+"""
+Tests for per-user rate limiting and load shedding.
+"""
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from website_tracker_backend.app import create_app
+from website_tracker_backend.config import Settings
+from website_tracker_backend.application.middleware.admission import (
+    BACKGROUND,
+    INTERACTIVE,
+    STREAM,
+    AdmissionController,
+    classify,
+)
+from website_tracker_backend.infrastructure.database.connection import Base
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestClassify:
+    """Test request priorities."""
+
+    @pytest.mark.parametrize("method, path, priority", [
+        ("GET", "/api/usage/calendar", INTERACTIVE),
+        ("GET", "/api/usage/calendar/batch", INTERACTIVE),
+        ("GET", "/api/tracked-sites", INTERACTIVE),
+        ("POST", "/api/usage/sync", BACKGROUND),
+        ("POST", "/api/heartbeat", BACKGROUND),
+        ("GET", "/api/admin/leaderboard", BACKGROUND),
+        ("GET", "/api/tracked-sites/events", STREAM),
+        ("GET", "/api/maintenance/admission", None),
+        ("OPTIONS", "/api/usage/sync", None),
+    ])
+    def test_priorities(self, method, path, priority):
+        """Test reads a user waits on are interactive, syncs are background."""
+        assert classify(method, path) == priority
+
+
+class TestAdmissionController:
+    """Test token buckets and the concurrency limit."""
+
+    def test_bucket_refills_at_rate(self):
+        """Test a user is limited after the burst until tokens refill."""
+        clock = FakeClock()
+        controller = AdmissionController(rate_per_second=0.5, burst=2, max_concurrent=0, clock=clock)
+
+        assert controller.admit("alice", BACKGROUND) == (True, 0)
+        assert controller.admit("alice", BACKGROUND) == (True, 0)
+        assert controller.admit("alice", BACKGROUND) == (False, 2)
+        assert controller.admit("bob", BACKGROUND) == (True, 0)
+
+        clock.now = 2.0
+        assert controller.admit("alice", BACKGROUND) == (True, 0)
+        assert controller.metrics.rate_limited[BACKGROUND] == 1
+
+    def test_background_is_shed_before_interactive(self):
+        """Test syncs are rejected once they use their share, reads still run."""
+        controller = AdmissionController(rate_per_second=0, max_concurrent=4, background_share=0.5)
+
+        assert controller.admit("alice", BACKGROUND)[0]
+        assert controller.admit("bob", BACKGROUND)[0]
+        assert controller.admit("carol", BACKGROUND) == (False, 1)
+        assert controller.admit("carol", INTERACTIVE)[0]
+        assert controller.admit("dave", INTERACTIVE)[0]
+        assert controller.admit("erin", INTERACTIVE) == (False, 1)
+
+        controller.release()
+        assert controller.admit("erin", INTERACTIVE)[0]
+        assert controller.metrics.shed == {INTERACTIVE: 1, BACKGROUND: 1, STREAM: 0}
+        assert controller.metrics.peak_in_flight == 4
+
+    def test_forgets_least_recent_clients(self):
+        """Test the number of buckets kept is bounded."""
+        controller = AdmissionController(max_tracked_clients=2)
+        for client in ("alice", "bob", "carol"):
+            controller.admit(client, BACKGROUND)
+            controller.release()
+
+        assert controller.metrics_snapshot()["tracked_clients"] == 2
+
+
+class TestAdmissionMiddleware:
+    """Test rejected requests and the metrics endpoint."""
+
+    def test_rejects_with_retry_after(self, tmp_path):
+        """Test requests over the user's budget get 429 without reaching the endpoint."""
+        app = create_app(Settings(
+            database_url=f"sqlite:///{tmp_path / 'app.db'}",
+            single_writer="off",
+            rate_limit_per_second=0.1,
+            rate_limit_burst=1,
+        ))
+        body = {"date": "2024-01-15", "usage": {"youtube.com": 5.0}}
+
+        with TestClient(app) as client:
+            Base.metadata.create_all(bind=app.state.shards.shards[0].engine)
+            first = client.post("/api/heartbeat", json=body, headers={"X-User-ID": "alice"})
+            second = client.post("/api/heartbeat", json=body, headers={"X-User-ID": "alice"})
+            other = client.post("/api/heartbeat", json=body, headers={"X-User-ID": "bob"})
+            metrics = client.get("/api/maintenance/admission").json()
+
+        assert first.status_code == status.HTTP_200_OK
+        assert second.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert second.headers["Retry-After"] == "10"
+        assert other.status_code == status.HTTP_200_OK
+        assert metrics["admitted"] == {"interactive": 0, "background": 2, "stream": 0}
+        assert metrics["rate_limited"]["background"] == 1
+        assert metrics["in_flight"] == 0
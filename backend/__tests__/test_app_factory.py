@@ -0,0 +1,190 @@
+"""
+Tests for the application factory and settings.
+"""
+import subprocess
+import sys
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from website_tracker_backend.app import create_app
+from website_tracker_backend.config import Settings
+
+
+class TestCreateApp:
+    """Test create_app and lazy initialization."""
+
+    def test_package_import_has_no_side_effects(self):
+        """Test importing the package does not load the web or database stack."""
+        result = subprocess.run(
+            [
+                sys.executable, "-c",
+                "import sys, website_tracker_backend; "
+                "print(sorted(m for m in ('fastapi', 'sqlalchemy') if m in sys.modules))",
+            ],
+            capture_output=True, text=True, check=True,
+        )
+        
+        assert result.stdout.strip() == "[]"
+
+    def test_lifespan_configures_database_from_settings(self, tmp_path):
+        """Test the database is configured on startup, not at import."""
+        database_url = f"sqlite:///{tmp_path / 'factory.db'}"
+        app = create_app(Settings(database_url=database_url, index_check="off"))
+        
+        with TestClient(app) as client:
+            response = client.get("/")
+            assert response.status_code == status.HTTP_200_OK
+            assert app.state.shards.shards[0].url == database_url
+            # Engine is only created once something needs it
+            assert app.state.shards.shards[0]._engine is None
+
+    def test_apps_keep_their_own_databases(self, tmp_path):
+        """Test two apps built with different settings do not share databases."""
+        first = create_app(Settings(database_url=f"sqlite:///{tmp_path / 'first.db'}", index_check="off"))
+        second = create_app(Settings(database_url=f"sqlite:///{tmp_path / 'second.db'}", index_check="off"))
+        
+        with TestClient(first), TestClient(second):
+            assert first.state.shards.shards[0].url.endswith("first.db")
+            assert second.state.shards.shards[0].url.endswith("second.db")
+
+    def test_apps_keep_their_own_trend_caches(self, tmp_path):
+        """Test two apps on different databases do not serve each other's cached trends."""
+        from datetime import date, timedelta
+        from sqlalchemy import text
+        from website_tracker_backend.domain.services.change_cursor import utc_now
+        from website_tracker_backend.infrastructure.database.connection import Base
+        
+        headers = {"X-User-ID": "trend-user"}
+        an_hour_ago = utc_now() - timedelta(hours=1)
+        today = date.today()
+        yesterday = (today - timedelta(days=1)).isoformat()
+        apps = [
+            create_app(Settings(database_url=f"sqlite:///{tmp_path / f'{name}.db'}", index_check="off"))
+            for name in ("first", "second")
+        ]
+        
+        with TestClient(apps[0]) as first, TestClient(apps[1]) as second:
+            # Both databases hold their usage, unchanged for an hour, before
+            # either app reads trends
+            for app, client, minutes in ((apps[0], first, 10.0), (apps[1], second, 99.0)):
+                Base.metadata.create_all(bind=app.state.shards.shards[0].engine)
+                client.post("/api/tracked-sites/sync", json={"trackedSites": {"youtube.com": 60}}, headers=headers)
+                client.post("/api/usage/sync", json={"date": yesterday, "usage": {"youtube.com": minutes}}, headers=headers)
+                with app.state.shards.shards[0].engine.begin() as conn:
+                    conn.execute(text("UPDATE usage_records SET updated_at = :an_hour_ago"), {"an_hour_ago": an_hour_ago})
+            trends = [
+                client.get("/api/usage/trends", params={"date_str": today.isoformat()}, headers=headers)
+                .json()["domains"][0]["weekTotal"]
+                for client in (first, second)
+            ]
+        
+        assert trends == [10.0, 99.0]
+
+    def test_apps_keep_their_own_public_suffix_rules(self, tmp_path):
+        """Test PUBLIC_SUFFIX_LIST of one app does not change how another app stores domains."""
+        from website_tracker_backend.infrastructure.database.connection import Base
+        
+        suffix_list = tmp_path / "public_suffix_list.dat"
+        suffix_list.write_text("com\nexample.com\n", encoding="utf-8")
+        headers = {"X-User-ID": "suffix-user"}
+        apps = [
+            create_app(Settings(
+                database_url=f"sqlite:///{tmp_path / 'custom.db'}", index_check="off",
+                public_suffix_list=str(suffix_list),
+            )),
+            create_app(Settings(database_url=f"sqlite:///{tmp_path / 'default.db'}", index_check="off")),
+        ]
+        
+        sites = []
+        with TestClient(apps[0]) as custom, TestClient(apps[1]) as default:
+            for app, client in ((apps[0], custom), (apps[1], default)):
+                Base.metadata.create_all(bind=app.state.shards.shards[0].engine)
+                client.post("/api/tracked-sites/sync", json={"trackedSites": {"www.blog.example.com": 30}}, headers=headers)
+                sites.append(client.get("/api/tracked-sites", headers=headers).json()["trackedSites"])
+        
+        assert sites == [{"blog.example.com": 30}, {"example.com": 30}]
+
+    def test_startup_creates_missing_indexes(self, tmp_path):
+        """Test INDEX_CHECK=create builds declared indexes missing from the database."""
+        from sqlalchemy import inspect, text
+        from website_tracker_backend.infrastructure.database.connection import Base
+        
+        database_url = f"sqlite:///{tmp_path / 'indexes.db'}"
+        app = create_app(Settings(database_url=database_url, index_check="create", single_writer="off"))
+        
+        with TestClient(app):
+            engine = app.state.shards.shards[0].engine
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX idx_usage_records_user_date_cover"))
+        
+        with TestClient(app):
+            indexes = inspect(app.state.shards.shards[0].engine).get_indexes("usage_records")
+        
+        assert "idx_usage_records_user_date_cover" in {index["name"] for index in indexes}
+
+    def test_settings_configure_compression(self, test_user_id):
+        """Test compression threshold comes from settings."""
+        app = create_app(Settings(database_url="sqlite:///:memory:", compression_minimum_size=1))
+        
+        with TestClient(app) as client:
+            response = client.get("/", headers={"Accept-Encoding": "gzip"})
+        
+        assert response.headers["content-encoding"] == "gzip"
+
+    def test_retention_metrics_endpoint(self, tmp_path):
+        """Test retention jobs start with the app and expose their metrics."""
+        settings = Settings(
+            database_url=f"sqlite:///{tmp_path / 'retention.db'}",
+            retention_max_age_days=90,
+            retention_interval_seconds=3600,
+        )
+        
+        with TestClient(create_app(settings)) as client:
+            response = client.get("/api/maintenance/retention")
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["enabled"] is True
+        assert data["shards"][0]["runs"] == 0
+
+    def test_memory_storage_serves_api_and_persists(self, tmp_path):
+        """Test STORAGE_BACKEND=memory serves syncs and reads, and reloads its snapshot."""
+        settings = Settings(
+            database_url=f"sqlite:///{tmp_path / 'unused.db'}",
+            storage_backend="memory",
+            memory_snapshot_path=str(tmp_path / "store.pickle"),
+            admin_token="secret",
+        )
+        headers = {"X-User-ID": "memory-user"}
+        
+        with TestClient(create_app(settings)) as client:
+            client.post("/api/tracked-sites/sync", json={"trackedSites": {"youtube.com": 60}}, headers=headers)
+            client.post("/api/usage/sync", json={"date": "2024-01-15", "usage": {"youtube.com": 75.0}}, headers=headers)
+            report = client.get("/api/admin/users", headers={"Authorization": "Bearer secret"})
+        with TestClient(create_app(settings)) as client:
+            response = client.get("/api/usage/calendar", params={"year": 2024, "month": 1}, headers=headers)
+        
+        assert report.status_code == status.HTTP_501_NOT_IMPLEMENTED
+        assert response.status_code == status.HTTP_200_OK
+        day = next(day for day in response.json()["days"] if day["date"] == "2024-01-15")
+        assert day["totalUsage"] == 75.0
+        assert day["limitReached"] is True
+        assert not (tmp_path / "unused.db").exists()
+
+    def test_settings_from_env(self, monkeypatch):
+        """Test settings are read from environment variables."""
+        monkeypatch.setenv("DATABASE_URL", "sqlite:///./other.db")
+        monkeypatch.setenv("CORS_ALLOW_ORIGINS", "chrome-extension://a, chrome-extension://b")
+        monkeypatch.setenv("COMPRESSION_GZIP_LEVEL", "9")
+        monkeypatch.setenv("STORAGE_BACKEND", "Memory")
+        monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+        
+        settings = Settings.from_env()
+        
+        assert settings.database_url == "sqlite:///./other.db"
+        assert settings.cors_allow_origins == ["chrome-extension://a", "chrome-extension://b"]
+        assert settings.compression_gzip_level == 9
+        assert settings.storage_backend == "memory"
+        assert settings.admin_token is None
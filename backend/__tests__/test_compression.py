@@ -0,0 +1,192 @@
+"""
+Tests for response compression and compressed request bodies.
+"""
+import gzip
+import json
+import pytest
+from fastapi import status
+
+from website_tracker_backend.application.middleware.compression import (
+    decode_request_body,
+    select_encoding,
+)
+from website_tracker_backend.infrastructure.database.models import UsageRecord
+
+
+class TestSelectEncoding:
+    """Test Accept-Encoding negotiation."""
+
+    def test_prefers_brotli_when_available(self):
+        """Test brotli is chosen over gzip when both are accepted."""
+        assert select_encoding("gzip, deflate, br", brotli_available=True) == "br"
+
+    def test_falls_back_to_gzip_without_brotli(self):
+        """Test gzip is chosen when brotli is not installed."""
+        assert select_encoding("gzip, br", brotli_available=False) == "gzip"
+
+    def test_respects_quality_values(self):
+        """Test q=0 disables an encoding."""
+        assert select_encoding("br;q=0, gzip;q=0.5", brotli_available=True) == "gzip"
+        assert select_encoding("gzip;q=0", brotli_available=False) is None
+
+    def test_no_supported_encoding(self):
+        """Test identity is used when nothing supported is accepted."""
+        assert select_encoding("deflate", brotli_available=True) is None
+        assert select_encoding("", brotli_available=True) is None
+
+
+class TestDecodeRequestBody:
+    """Test request body decoding."""
+
+    def test_decodes_gzip(self):
+        """Test gzip bodies are decoded."""
+        assert decode_request_body(gzip.compress(b"hello"), ["gzip"]) == b"hello"
+
+    def test_rejects_oversized_body(self):
+        """Test bodies that expand beyond the limit are rejected."""
+        from fastapi import HTTPException
+        
+        with pytest.raises(HTTPException) as exc_info:
+            decode_request_body(gzip.compress(b"a" * 1000), ["gzip"], max_size=100)
+        assert exc_info.value.status_code == 413
+
+    def test_rejects_unsupported_encoding(self):
+        """Test unknown encodings are rejected."""
+        from fastapi import HTTPException
+        
+        with pytest.raises(HTTPException) as exc_info:
+            decode_request_body(b"data", ["compress"])
+        assert exc_info.value.status_code == 415
+
+
+class TestResponseCompression:
+    """Test response compression on API endpoints."""
+
+    def test_calendar_response_is_gzipped(self, client, test_user, test_tracked_sites, test_usage_records):
+        """Test large calendar responses are compressed when gzip is accepted."""
+        response = client.get(
+            "/api/usage/calendar",
+            params={"year": 2024, "month": 1},
+            headers={"X-User-ID": test_user.id, "Accept-Encoding": "gzip"},
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        # Test client decodes the body transparently
+        assert len(response.json()["days"]) == 31
+
+    def test_calendar_response_uses_brotli_when_installed(self, client, test_user, test_tracked_sites, test_usage_records):
+        """Test brotli is negotiated when the optional package is installed."""
+        pytest.importorskip("brotli")
+        
+        response = client.get(
+            "/api/usage/calendar",
+            params={"year": 2024, "month": 1},
+            headers={"X-User-ID": test_user.id, "Accept-Encoding": "gzip, br"},
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-encoding"] == "br"
+        assert len(response.json()["days"]) == 31
+
+    def test_small_response_is_not_compressed(self, client, test_user):
+        """Test responses below the minimum size are sent uncompressed."""
+        response = client.get(
+            "/api/tracked-sites",
+            headers={"X-User-ID": test_user.id, "Accept-Encoding": "gzip"},
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert "content-encoding" not in response.headers
+
+    def test_no_compression_without_accept_encoding(self, client, test_user):
+        """Test responses are not compressed when the client does not ask for it."""
+        response = client.get(
+            "/api/usage/calendar",
+            params={"year": 2024, "month": 1},
+            headers={"X-User-ID": test_user.id, "Accept-Encoding": "identity"},
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert "content-encoding" not in response.headers
+
+
+class TestCompressedRequests:
+    """Test gzip-compressed request bodies on sync endpoints."""
+
+    def test_sync_usage_accepts_gzip_body(self, client, test_user_id, db_session):
+        """Test usage sync decodes a gzip request body."""
+        body = gzip.compress(json.dumps({
+            "date": "2024-01-15",
+            "usage": {"youtube.com": 45.5},
+        }).encode())
+        
+        response = client.post(
+            "/api/usage/sync",
+            content=body,
+            headers={
+                "X-User-ID": test_user_id,
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+            },
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["synced"] == 1
+        record = db_session.query(UsageRecord).filter(UsageRecord.user_id == test_user_id).first()
+        assert record.minutes == 45.5
+
+    def test_sync_tracked_sites_accepts_gzip_body(self, client, test_user_id):
+        """Test tracked sites sync decodes a gzip request body."""
+        body = gzip.compress(json.dumps({"trackedSites": {"youtube.com": 60}}).encode())
+        
+        response = client.post(
+            "/api/tracked-sites/sync",
+            content=body,
+            headers={
+                "X-User-ID": test_user_id,
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+            },
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["synced"] == 1
+
+    def test_sync_usage_rejects_corrupt_gzip(self, client, test_user_id):
+        """Test corrupt gzip bodies return 400."""
+        response = client.post(
+            "/api/usage/sync",
+            content=b"not gzip at all",
+            headers={
+                "X-User-ID": test_user_id,
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+            },
+        )
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_body_limit_comes_from_app_settings(self, monkeypatch, test_user_id):
+        """Test the decoded body limit is the app's setting, not the environment."""
+        from fastapi.testclient import TestClient
+        from website_tracker_backend.app import create_app
+        from website_tracker_backend.config import Settings
+        
+        monkeypatch.setenv("MAX_DECOMPRESSED_BODY_SIZE", str(10 * 1024 * 1024))
+        app = create_app(Settings(database_url="sqlite:///:memory:", max_decompressed_body_size=100))
+        body = gzip.compress(json.dumps({"trackedSites": {f"site-{n}.com": 60 for n in range(20)}}).encode())
+        
+        with TestClient(app) as client:
+            response = client.post(
+                "/api/tracked-sites/sync",
+                content=body,
+                headers={
+                    "X-User-ID": test_user_id,
+                    "Content-Type": "application/json",
+                    "Content-Encoding": "gzip",
+                },
+            )
+        
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
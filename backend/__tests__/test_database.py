@@ -3,6 +3,7 @@ Tests for database utilities and models.
 """
 import pytest
 from datetime import date, datetime
+from unittest.mock import Mock
 from sqlalchemy.exc import IntegrityError
 
 from website_tracker_backend.infrastructure.adapters.user_repository_impl import SQLAlchemyUserRepository
@@ -43,6 +44,15 @@ class TestDatabase:
         assert user.created_at is not None
         assert isinstance(user.created_at, datetime)
 
+    def test_get_or_create_user_existing_user_skips_writer(self, db_session, test_user):
+        """Test an existing user is found on the read session without using the writer."""
+        writer = Mock()
+        user_repo = SQLAlchemyUserRepository(writer, read_db=db_session)
+        user_repo.get_or_create_user(test_user.id)
+        
+        writer.query.assert_not_called()
+        writer.add.assert_not_called()
+
 
 class TestModels:
     """Test database models."""
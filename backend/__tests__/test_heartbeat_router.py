@@ -0,0 +1,104 @@
+"""
+Tests for heartbeat API router.
+"""
+import pytest
+from datetime import date
+from fastapi import status
+
+from website_tracker_backend.domain.services.tracked_sites_service import TrackedSitesService
+from website_tracker_backend.infrastructure.database.models import UsageRecord
+
+
+class TestHeartbeat:
+    """Test heartbeat endpoint."""
+
+    def test_heartbeat_syncs_usage(self, client, test_user, db_session):
+        """Test heartbeat writes usage records."""
+        response = client.post(
+            "/api/heartbeat",
+            json={
+                "date": "2024-01-15",
+                "usage": {"youtube.com": 45.5, "reddit.com": 30.0},
+            },
+            headers={"X-User-ID": test_user.id},
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["status"] == "success"
+        assert data["synced"] == 2
+        assert data["date"] == "2024-01-15"
+        
+        record = db_session.query(UsageRecord).filter(
+            UsageRecord.user_id == test_user.id,
+            UsageRecord.domain == "youtube.com",
+            UsageRecord.date == date(2024, 1, 15),
+        ).first()
+        assert record.minutes == 45.5
+
+    def test_heartbeat_returns_tracked_sites_when_hash_differs(self, client, test_user, test_tracked_sites):
+        """Test heartbeat returns tracked sites when client hash is stale."""
+        response = client.post(
+            "/api/heartbeat",
+            json={"date": "2024-01-15", "usage": {}, "trackedSitesHash": "stale"},
+            headers={"X-User-ID": test_user.id},
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["trackedSites"] == {"youtube.com": 60, "reddit.com": 30}
+        assert data["trackedSitesHash"] == TrackedSitesService.hash_tracked_sites(
+            {"youtube.com": 60, "reddit.com": 30}
+        )
+
+    def test_heartbeat_omits_tracked_sites_when_hash_matches(self, client, test_user, test_tracked_sites):
+        """Test heartbeat omits tracked sites when client is up to date."""
+        client_hash = TrackedSitesService.hash_tracked_sites({"reddit.com": 30, "youtube.com": 60})
+        response = client.post(
+            "/api/heartbeat",
+            json={"date": "2024-01-15", "usage": {}, "trackedSitesHash": client_hash},
+            headers={"X-User-ID": test_user.id},
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["trackedSites"] is None
+        assert data["trackedSitesHash"] == client_hash
+
+    def test_heartbeat_missing_user_id(self, client):
+        """Test heartbeat without user ID returns 400."""
+        response = client.post(
+            "/api/heartbeat",
+            json={"date": "2024-01-15", "usage": {}},
+        )
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_heartbeat_invalid_date_format(self, client, test_user_id):
+        """Test heartbeat with invalid date format returns 400."""
+        response = client.post(
+            "/api/heartbeat",
+            json={"date": "invalid-date", "usage": {"youtube.com": 45.5}},
+            headers={"X-User-ID": test_user_id},
+        )
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_stale_heartbeat_skips_usage_but_checks_tracked_sites(self, client, test_user, test_tracked_sites, db_session):
+        """Test a heartbeat with an old sequence does not write but still returns tracked sites."""
+        for sequence, minutes in (("2", 20.0), ("1", 10.0)):
+            response = client.post(
+                "/api/heartbeat",
+                json={"date": "2024-01-15", "usage": {"youtube.com": minutes}, "trackedSitesHash": "stale"},
+                headers={"X-User-ID": test_user.id, "X-Sync-Sequence": sequence},
+            )
+        
+        data = response.json()
+        assert data["status"] == "stale"
+        assert data["synced"] == 0
+        assert data["trackedSites"] == {"youtube.com": 60, "reddit.com": 30}
+        db_session.expire_all()
+        assert db_session.query(UsageRecord.minutes).filter(
+            UsageRecord.user_id == test_user.id,
+            UsageRecord.domain == "youtube.com",
+        ).scalar() == 20.0
@@ -0,0 +1,46 @@
+"""
+Tests for the production server entry point.
+"""
+import pytest
+
+from website_tracker_backend import server
+
+
+class TestServerOptions:
+    """Test translation of command line arguments to uvicorn options."""
+
+    def test_explicit_options(self):
+        """Test explicit arguments are passed through."""
+        args = server.build_parser().parse_args(
+            ["--workers", "4", "--loop", "asyncio", "--http", "h11", "--port", "9000"]
+        )
+        
+        options = server.build_uvicorn_options(args)
+        
+        assert options["workers"] == 4
+        assert options["loop"] == "asyncio"
+        assert options["http"] == "h11"
+        assert options["port"] == 9000
+        assert options["timeout_graceful_shutdown"] == 30
+
+    def test_default_workers_from_web_concurrency(self, monkeypatch):
+        """Test WEB_CONCURRENCY sets the default worker count."""
+        monkeypatch.setenv("WEB_CONCURRENCY", "3")
+        
+        options = server.build_uvicorn_options(server.build_parser().parse_args([]))
+        
+        assert options["workers"] == 3
+
+    def test_memory_storage_defaults_to_one_worker(self, monkeypatch):
+        """Test the in-process store is not split across workers by default."""
+        monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+        monkeypatch.setenv("STORAGE_BACKEND", "memory")
+
+        assert server.default_workers() == 1
+
+    def test_auto_loop_resolves_to_installed_implementation(self, monkeypatch):
+        """Test auto selection falls back when uvloop/httptools are missing."""
+        monkeypatch.setattr(server.importlib.util, "find_spec", lambda name: None)
+        
+        assert server.resolve_loop("auto") == "asyncio"
+        assert server.resolve_http("auto") == "h11"
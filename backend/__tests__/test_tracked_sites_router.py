@@ -2,8 +2,10 @@
 Tests for tracked sites API router.
 """
 import pytest
+from datetime import datetime, timedelta
 from fastapi import status
 
+from website_tracker_backend.domain.services.change_cursor import utc_now
 from website_tracker_backend.infrastructure.database.models import TrackedSite
 
 
@@ -126,3 +128,62 @@ class TestGetTrackedSites:
         response = client.get("/api/tracked-sites")
         
         assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestTrackedSitesDelta:
+    """Test ?since=<cursor> on the get tracked sites endpoint."""
+
+    def _age_sites(self, db_session, user_id):
+        """Move the sites' last change an hour into the past."""
+        db_session.query(TrackedSite).filter(TrackedSite.user_id == user_id).update(
+            {TrackedSite.updated_at: utc_now() - timedelta(hours=1)}
+        )
+        db_session.commit()
+
+    def _get(self, client, user_id, since=None):
+        return client.get(
+            "/api/tracked-sites",
+            params={"since": since} if since else {},
+            headers={"X-User-ID": user_id},
+        )
+
+    def test_full_response_has_cursor(self, client, test_user, test_tracked_sites):
+        """Test a read without a cursor returns every site and a cursor."""
+        data = self._get(client, test_user.id).json()
+        
+        assert data["full"] is True
+        assert data["removed"] == []
+        assert len(data["trackedSites"]) == 2
+        assert datetime.fromisoformat(data["cursor"]) < utc_now()
+
+    def test_since_returns_changed_and_removed_sites(self, client, test_user, test_tracked_sites, db_session):
+        """Test only sites changed after the cursor are returned, plus removals."""
+        self._age_sites(db_session, test_user.id)
+        since = (utc_now() - timedelta(minutes=30)).isoformat()
+        assert self._get(client, test_user.id, since).json()["trackedSites"] == {}
+        
+        client.post(
+            "/api/tracked-sites/sync",
+            json={"trackedSites": {"youtube.com": 45, "github.com": 20}},
+            headers={"X-User-ID": test_user.id},
+        )
+        data = self._get(client, test_user.id, since).json()
+        
+        assert data["full"] is False
+        assert data["trackedSites"] == {"youtube.com": 45, "github.com": 20}
+        assert data["removed"] == ["reddit.com"]
+
+    def test_expired_cursor_returns_all_sites(self, client, test_user, test_tracked_sites, db_session):
+        """Test a cursor older than the removal history gets a full response."""
+        self._age_sites(db_session, test_user.id)
+        
+        data = self._get(client, test_user.id, "2020-01-01T00:00:00").json()
+        
+        assert data["full"] is True
+        assert data["trackedSites"] == {"youtube.com": 60, "reddit.com": 30}
+
+    def test_invalid_cursor(self, client, test_user):
+        """Test a malformed cursor returns 400."""
+        response = self._get(client, test_user.id, "yesterday")
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
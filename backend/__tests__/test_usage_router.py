@@ -2,10 +2,12 @@
 Tests for usage API router.
 """
 import pytest
-from datetime import date, datetime
+from datetime import date, timedelta
 from fastapi import status
 
-from website_tracker_backend.infrastructure.database.models import UsageRecord, TrackedSite
+from website_tracker_backend.domain.services.change_cursor import utc_now
+from website_tracker_backend.domain.services.sync_receipt_service import RECEIPTS_PER_ENDPOINT
+from website_tracker_backend.infrastructure.database.models import SyncReceipt, UsageRecord, TrackedSite
 
 
 class TestUsageSync:
@@ -154,6 +156,33 @@ class TestCalendarMonth:
         
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
+    def test_get_calendar_months_batch(self, client, test_user, test_tracked_sites, test_usage_records):
+        """Test consecutive months, across a year boundary, come in one response."""
+        response = client.get(
+            "/api/usage/calendar/batch",
+            params={"year": 2023, "month": 12, "months": 3},
+            headers={"X-User-ID": test_user.id},
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [(m["year"], m["month"], len(m["days"])) for m in data["months"]] == [
+            (2023, 12, 31), (2024, 1, 31), (2024, 2, 29),
+        ]
+        day_15 = next(d for d in data["months"][1]["days"] if d["date"] == "2024-01-15")
+        assert day_15["totalUsage"] == 75.5
+        assert data["months"][1]["cursor"] == data["cursor"]
+
+    def test_get_calendar_months_batch_too_many(self, client, test_user_id):
+        """Test more than a year of months returns 400."""
+        response = client.get(
+            "/api/usage/calendar/batch",
+            params={"year": 2024, "month": 1, "months": 13},
+            headers={"X-User-ID": test_user_id},
+        )
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
     def test_get_calendar_month_missing_user_id(self, client):
         """Test getting calendar without user ID returns 400."""
         response = client.get(
@@ -230,3 +259,199 @@ class TestDayDetails:
         )
         
         assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestTrends:
+    """Test usage trends endpoint."""
+
+    def test_get_trends(self, client, test_user, test_tracked_sites, db_session):
+        """Test trends are returned for every tracked domain."""
+        for days_ago in range(7):
+            db_session.add(UsageRecord(
+                user_id=test_user.id,
+                domain="youtube.com",
+                date=date(2024, 1, 15) - timedelta(days=days_ago),
+                minutes=14.0,
+            ))
+        db_session.commit()
+        
+        response = client.get(
+            "/api/usage/trends?date_str=2024-01-15&days=7",
+            headers={"X-User-ID": test_user.id},
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["date"] == "2024-01-15"
+        trends = {trend["domain"]: trend for trend in data["domains"]}
+        assert set(trends) == {site.domain for site in test_tracked_sites}
+        assert trends["youtube.com"]["average7"] == 14.0
+        assert trends["youtube.com"]["weekOverWeek"] == 98.0
+        assert len(trends["youtube.com"]["series"]) == 7
+
+    def test_get_trends_invalid_days(self, client, test_user_id):
+        """Test days outside 1-365 is rejected."""
+        response = client.get(
+            "/api/usage/trends?days=0",
+            headers={"X-User-ID": test_user_id},
+        )
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_get_trends_missing_user_id(self, client):
+        """Test trends require user ID header."""
+        response = client.get("/api/usage/trends")
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestIdempotentSync:
+    """Test Idempotency-Key and X-Sync-Sequence on usage sync."""
+
+    def _sync(self, client, user_id, minutes, **headers):
+        return client.post(
+            "/api/usage/sync",
+            json={"date": "2024-01-15", "usage": {"youtube.com": minutes}},
+            headers={"X-User-ID": user_id, **headers},
+        )
+
+    def _minutes(self, db_session, user_id):
+        db_session.expire_all()
+        return db_session.query(UsageRecord.minutes).filter(
+            UsageRecord.user_id == user_id,
+            UsageRecord.domain == "youtube.com",
+        ).scalar()
+
+    def test_retry_with_same_key_is_replayed(self, client, test_user, db_session):
+        """Test a retried key returns the first response without writing."""
+        first = self._sync(client, test_user.id, 10.0, **{"Idempotency-Key": "key-1"})
+        retry = self._sync(client, test_user.id, 99.0, **{"Idempotency-Key": "key-1"})
+        
+        assert retry.status_code == status.HTTP_200_OK
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+        assert self._minutes(db_session, test_user.id) == 10.0
+
+    def test_out_of_order_sequence_is_dropped(self, client, test_user, db_session):
+        """Test an older snapshot arriving late does not overwrite newer usage."""
+        self._sync(client, test_user.id, 20.0, **{"X-Sync-Sequence": "2"})
+        late = self._sync(client, test_user.id, 10.0, **{"X-Sync-Sequence": "1"})
+        
+        assert late.json() == {"status": "stale", "synced": 0, "date": "2024-01-15"}
+        assert self._minutes(db_session, test_user.id) == 20.0
+        
+        newer = self._sync(client, test_user.id, 30.0, **{"X-Sync-Sequence": "3"})
+        assert newer.json()["status"] == "success"
+        assert self._minutes(db_session, test_user.id) == 30.0
+
+    def test_receipts_are_bounded(self, client, test_user, db_session):
+        """Test only the newest receipts per user and endpoint are kept."""
+        for sequence in range(RECEIPTS_PER_ENDPOINT + 5):
+            self._sync(client, test_user.id, float(sequence), **{"X-Sync-Sequence": str(sequence)})
+        
+        assert db_session.query(SyncReceipt).filter_by(user_id=test_user.id).count() == RECEIPTS_PER_ENDPOINT
+
+
+class TestDeviceSync:
+    """Test usage syncs from several devices of one user."""
+
+    def _sync(self, client, user_id, device_id, minutes, sequence):
+        return client.post(
+            "/api/usage/sync",
+            json={"date": "2024-01-15", "usage": {"youtube.com": minutes}},
+            headers={"X-User-ID": user_id, "X-Device-ID": device_id, "X-Sync-Sequence": str(sequence)},
+        )
+
+    def test_devices_do_not_overwrite_each_other(self, client, test_user, test_tracked_sites):
+        """Test the day's usage is the sum of each device's latest minutes."""
+        self._sync(client, test_user.id, "laptop", 10.0, 1)
+        self._sync(client, test_user.id, "phone", 5.0, 1)
+        self._sync(client, test_user.id, "laptop", 12.0, 2)
+        
+        response = client.get(
+            "/api/usage/day",
+            params={"date_str": "2024-01-15"},
+            headers={"X-User-ID": test_user.id},
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        youtube = next(site for site in response.json()["domains"] if site["domain"] == "youtube.com")
+        assert youtube["minutes"] == 17.0
+
+    def test_sequences_are_per_device(self, client, test_user):
+        """Test one device's sequence does not make another device's syncs stale."""
+        self._sync(client, test_user.id, "laptop", 10.0, 40)
+        
+        response = self._sync(client, test_user.id, "phone", 5.0, 1)
+        
+        assert response.json()["status"] == "success"
+
+    @pytest.mark.parametrize("device_id", ["d" * 65, "laptop/../phone", "phone:1", ""])
+    def test_invalid_device_id_is_rejected(self, client, test_user, device_id):
+        """Test device IDs are limited in length and characters."""
+        response = self._sync(client, test_user.id, device_id, 5.0, 1)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestCalendarDelta:
+    """Test ?since=<cursor> on the calendar endpoint."""
+
+    def _age(self, db_session, user_id):
+        """Move the user's last usage and site changes an hour into the past."""
+        an_hour_ago = utc_now() - timedelta(hours=1)
+        db_session.query(UsageRecord).filter(UsageRecord.user_id == user_id).update(
+            {UsageRecord.updated_at: an_hour_ago}
+        )
+        db_session.query(TrackedSite).filter(TrackedSite.user_id == user_id).update(
+            {TrackedSite.updated_at: an_hour_ago}
+        )
+        db_session.commit()
+
+    def _calendar(self, client, user_id, since):
+        return client.get(
+            "/api/usage/calendar",
+            params={"year": 2024, "month": 1, "since": since},
+            headers={"X-User-ID": user_id},
+        )
+
+    def test_since_returns_changed_days(self, client, test_user, test_tracked_sites, test_usage_records, db_session):
+        """Test only days with usage synced after the cursor are returned."""
+        self._age(db_session, test_user.id)
+        since = (utc_now() - timedelta(minutes=30)).isoformat()
+        unchanged = self._calendar(client, test_user.id, since).json()
+        
+        client.post(
+            "/api/usage/sync",
+            json={"date": "2024-01-20", "usage": {"youtube.com": 70.0}},
+            headers={"X-User-ID": test_user.id},
+        )
+        data = self._calendar(client, test_user.id, since).json()
+        
+        assert unchanged["days"] == [] and unchanged["full"] is False
+        assert data["full"] is False
+        assert [day["date"] for day in data["days"]] == ["2024-01-20"]
+        assert data["days"][0]["limitReached"] is True
+        assert data["cursor"] > since
+
+    def test_tracked_site_change_returns_whole_month(self, client, test_user, test_tracked_sites, test_usage_records, db_session):
+        """Test a limit change since the cursor returns every day."""
+        self._age(db_session, test_user.id)
+        since = (utc_now() - timedelta(minutes=30)).isoformat()
+        client.post(
+            "/api/tracked-sites/sync",
+            json={"trackedSites": {"youtube.com": 40, "reddit.com": 30}},
+            headers={"X-User-ID": test_user.id},
+        )
+        
+        data = self._calendar(client, test_user.id, since).json()
+        
+        assert data["full"] is True
+        assert len(data["days"]) == 31
+
+    def test_invalid_cursor(self, client, test_user):
+        """Test a malformed cursor returns 400."""
+        response = self._calendar(client, test_user.id, "not-a-cursor")
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
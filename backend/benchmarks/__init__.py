@@ -0,0 +1,3 @@
+"""
+Benchmark scripts for the backend. Run with: uv run python -m benchmarks.<name>
+"""
@@ -0,0 +1,70 @@
+"""
+Benchmark historical domain totals: SQLite report versus the columnar archive.
+
+Builds a usage history, archives its closed months with ColumnarArchiver,
+and times the same "minutes per domain over a quarter" aggregate both ways:
+
+    sqlite     SQLAlchemyUsageReport.get_domain_totals (GROUP BY over usage_records)
+    columnar   ColumnarArchive.domain_totals (memory-mapped NumPy columns)
+
+Requires numpy (pip install 'website-tracker-backend[analytics]').
+
+Usage:
+    uv run python -m benchmarks.bench_analytics [--users 200] [--years 2] [--domains 8] [--queries 50]
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from website_tracker_backend.infrastructure.adapters.usage_report_impl import SQLAlchemyUsageReport
+from website_tracker_backend.infrastructure.analytics.archiver import ColumnarArchiver
+from website_tracker_backend.infrastructure.analytics.query import ColumnarArchive
+from website_tracker_backend.infrastructure.database.connection import Database, ShardedDatabase
+
+from .bench_partitions import populate, timed
+
+
+def quarter_queries(years: int, count: int) -> list:
+    """Random (first day, last day) 90-day ranges within the archived months."""
+    rng = random.Random(42)
+    first_closed = date.today().replace(day=1) - timedelta(days=1)
+    queries = []
+    for _ in range(count):
+        end = first_closed - timedelta(days=rng.randrange(365 * years - 120))
+        queries.append((end - timedelta(days=89), end))
+    return queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--domains", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    queries = quarter_queries(args.years, args.queries)
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(f"sqlite:///{Path(tmp) / 'usage.db'}", single_writer="off")
+        rows = populate(database, args.users, args.years, args.domains)
+        shards = ShardedDatabase([database])
+        print(f"{rows} usage rows ({args.users} users x {args.years} years x {args.domains} domains)")
+
+        start = time.perf_counter()
+        exported = ColumnarArchiver(Path(tmp) / "archive").export_closed_months(shards)
+        print(f"archived {len(exported)} months in {time.perf_counter() - start:.2f}s\n")
+
+        report = SQLAlchemyUsageReport(shards)
+        timed("sqlite", report.get_domain_totals, queries)
+
+        archive = ColumnarArchive(Path(tmp) / "archive")
+        timed("columnar", archive.domain_totals, queries)
+
+        shards.dispose()
+
+
+if __name__ == "__main__":
+    main()
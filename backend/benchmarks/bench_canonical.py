@@ -0,0 +1,58 @@
+"""
+Benchmark canonical domain lookups, with and without the LRU memo.
+
+Generates hostnames spread over a number of registrable domains (some under
+multi-label suffixes such as co.uk) and reports lookups per second:
+
+    uncached   every lookup walks the public suffix trie
+    memoized   repeated hostnames, as in real sync traffic
+
+Usage:
+    uv run python -m benchmarks.bench_canonical [--lookups 500000] [--hostnames 5000]
+"""
+import argparse
+import random
+import time
+
+from website_tracker_backend.domain.services.domain_canonicalizer import DomainCanonicalizer
+
+SUFFIXES = ["com", "org", "io", "co.uk", "com.au", "github.io", "de", "co.jp"]
+PREFIXES = ["", "www.", "m.", "app.", "static.cdn."]
+
+
+def hostnames(count: int) -> list:
+    """Distinct hostnames such as www.site42.co.uk."""
+    rng = random.Random(42)
+    return [
+        f"{rng.choice(PREFIXES)}site{index}.{rng.choice(SUFFIXES)}"
+        for index in range(count)
+    ]
+
+
+def timed(name: str, lookup, values: list) -> None:
+    """Run every lookup and print the rate."""
+    start = time.perf_counter()
+    for value in values:
+        lookup(value)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {len(values) / elapsed:12,.0f} lookups/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lookups", type=int, default=500_000)
+    parser.add_argument("--hostnames", type=int, default=5000)
+    args = parser.parse_args()
+
+    canonicalizer = DomainCanonicalizer()
+    distinct = hostnames(args.lookups)
+    rng = random.Random(7)
+    repeated = [rng.choice(distinct[:args.hostnames]) for _ in range(args.lookups)]
+
+    timed("uncached", DomainCanonicalizer(cache_size=0).canonicalize, distinct)
+    timed("memoized", canonicalizer.canonicalize, repeated)
+    print(canonicalizer.cache_info())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark response compression: bytes on the wire and CPU time per request.
+
+Builds a representative calendar month payload and measures each encoding
+and level supported by CompressionMiddleware.
+
+Usage:
+    uv run python -m benchmarks.bench_compression [--domains 10] [--iterations 500]
+"""
+import argparse
+import json
+import time
+import zlib
+from datetime import date, timedelta
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def build_calendar_payload(domain_count: int) -> bytes:
+    """
+    Build a calendar month response body similar to GET /api/usage/calendar.
+
+    Args:
+        domain_count: Number of tracked domains with usage every day
+
+    Returns:
+        JSON-encoded response body
+    """
+    domains = [f"site-{i}.example.com" for i in range(domain_count)]
+    days = []
+    current = date(2024, 1, 1)
+    while current.month == 1:
+        usage = {domain: float((i * 7 + current.day) % 90) for i, domain in enumerate(domains)}
+        days.append({
+            "date": current.strftime("%Y-%m-%d"),
+            "totalUsage": round(sum(usage.values()), 1),
+            "domainUsage": usage,
+            "limitReached": any(minutes >= 60 for minutes in usage.values()),
+            "domains": [
+                {
+                    "domain": domain,
+                    "minutes": minutes,
+                    "limit": 60,
+                    "limitReached": minutes >= 60,
+                    "percentage": round(minutes / 60 * 100, 1),
+                }
+                for domain, minutes in usage.items()
+            ],
+        })
+        current += timedelta(days=1)
+    return json.dumps({"year": 2024, "month": 1, "days": days}).encode()
+
+
+def measure(name: str, compress, body: bytes, iterations: int) -> None:
+    """Compress body repeatedly and print size and CPU time per request."""
+    start = time.process_time()
+    for _ in range(iterations):
+        compressed = compress(body)
+    cpu_us = (time.process_time() - start) / iterations * 1_000_000
+    ratio = len(compressed) / len(body) * 100
+    print(f"{name:<16} {len(compressed):>10} B  {ratio:6.1f}%  {cpu_us:10.1f} us/request")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--domains", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    body = build_calendar_payload(args.domains)
+    print(f"Calendar payload: {args.domains} domains x 31 days = {len(body)} bytes\n")
+
+    measure("identity", lambda b: b, body, args.iterations)
+    for level in (1, 6, 9):
+        measure(
+            f"gzip level {level}",
+            lambda b, level=level: _gzip(b, level),
+            body,
+            args.iterations,
+        )
+    if brotli is None:
+        print("brotli not installed, skipping (pip install brotli)")
+        return
+    for quality in (1, 4, 11):
+        iterations = args.iterations if quality < 10 else max(1, args.iterations // 20)
+        measure(
+            f"brotli q{quality}",
+            lambda b, quality=quality: brotli.compress(b, quality=quality),
+            body,
+            iterations,
+        )
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark idle event stream subscriptions: memory per subscriber and fan-out time.
+
+Opens N subscriptions, each with a task waiting for its next event (as an
+idle GET /api/tracked-sites/events connection does), and reports the
+Python memory they hold and how long publishing to every user takes.
+Socket buffers of real connections are not included.
+
+Usage:
+    uv run python -m benchmarks.bench_event_hub [--subscribers 20000]
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from website_tracker_backend.infrastructure.events.hub import ChangeHub
+
+
+async def run(subscribers: int) -> None:
+    hub = ChangeHub(max_subscribers=subscribers)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+
+    subscriptions = [hub.subscribe(f"user-{index}") for index in range(subscribers)]
+    waiters = [asyncio.create_task(subscription.next_event(3600)) for subscription in subscriptions]
+    await asyncio.sleep(0)
+
+    after = tracemalloc.take_snapshot()
+    used = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    tracemalloc.stop()
+    print(f"{subscribers} idle subscribers: {used / subscribers:,.0f} bytes each ({used / 2**20:.1f} MiB)")
+
+    start = time.perf_counter()
+    for index in range(subscribers):
+        hub.publish(f"user-{index}", "tracked_sites", {"trackedSites": {"youtube.com": 60}})
+    await asyncio.gather(*waiters)
+    elapsed = time.perf_counter() - start
+    print(f"published and delivered to all: {elapsed * 1000:.0f} ms ({subscribers / elapsed:,.0f} events/s)")
+    print(hub.metrics_snapshot())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subscribers", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.subscribers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark calendar month reads on a multi-year dataset, with and without partition pruning.
+
+Builds the same usage history three ways and times the month range query
+behind GET /api/usage/calendar for random users and months:
+
+    single table   usage_records with the (user_id, date) index from migrate.py
+    no pruning     monthly partitions, every partition queried
+    pruning        monthly partitions, only the requested month queried
+
+Usage:
+    uv run python -m benchmarks.bench_partitions [--users 200] [--years 3] [--domains 8] [--queries 500]
+"""
+import argparse
+import calendar
+import random
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import and_
+
+from website_tracker_backend.domain.services.change_cursor import utc_now
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.infrastructure.database.connection import Base, Database
+from website_tracker_backend.infrastructure.database.models import UsageRecord
+from website_tracker_backend.infrastructure.database.partitions import (
+    existing_partitions,
+    migrate_to_partitions,
+    partition_table,
+    usage_select,
+)
+
+
+def populate(database: Database, users: int, years: int, domains: int) -> int:
+    """Insert daily usage for every user and domain over the given years."""
+    Base.metadata.create_all(bind=database.engine)
+    start = date.today().replace(day=1) - timedelta(days=365 * years)
+    days = (date.today() - start).days
+    now = utc_now()
+    rows = 0
+    with database.engine.begin() as conn:
+        for user in range(users):
+            batch = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "user_id": f"user-{user}",
+                    "domain": f"site-{d}.example.com",
+                    "date": start + timedelta(days=day),
+                    "minutes": float((user + day + d) % 90),
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for day in range(days)
+                for d in range(domains)
+            ]
+            conn.execute(UsageRecord.__table__.insert(), batch)
+            rows += len(batch)
+    return rows
+
+
+def month_queries(users: int, years: int, count: int) -> list:
+    """Random (user, first day, last day) month queries within the dataset."""
+    rng = random.Random(42)
+    today = date.today()
+    queries = []
+    for _ in range(count):
+        months_back = rng.randrange(years * 12)
+        year, month = divmod(today.year * 12 + today.month - 1 - months_back, 12)
+        month += 1
+        last = calendar.monthrange(year, month)[1]
+        queries.append((f"user-{rng.randrange(users)}", date(year, month, 1), date(year, month, last)))
+    return queries
+
+
+def timed(name: str, run, queries: list) -> None:
+    """Run each query and print latency percentiles."""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        run(*query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"{name:<14} p50 {p50:8.3f} ms  p99 {p99:8.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--domains", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    queries = month_queries(args.users, args.years, args.queries)
+    with tempfile.TemporaryDirectory() as tmp:
+        single = Database(f"sqlite:///{Path(tmp) / 'single.db'}", single_writer="off")
+        rows = populate(single, args.users, args.years, args.domains)
+        print(f"{rows} usage rows ({args.users} users x {args.years} years x {args.domains} domains)\n")
+
+        partitioned = Database(
+            f"sqlite:///{Path(tmp) / 'partitioned.db'}", single_writer="off", usage_partitioning="monthly"
+        )
+        populate(partitioned, args.users, args.years, args.domains)
+        migrate_to_partitions(partitioned.engine)
+
+        with single.read_session() as session:
+            repo = SQLAlchemyUsageRepository(session)
+            timed("single table", repo.get_usage_for_date_range, queries)
+
+        with partitioned.read_session() as session:
+            tables = [partition_table(name) for name in sorted(existing_partitions(session.connection()))]
+
+            def unpruned(user_id, start_date, end_date):
+                statement = usage_select(
+                    tables,
+                    ["domain", "date", "minutes"],
+                    lambda table: and_(
+                        table.c.user_id == user_id, table.c.date >= start_date, table.c.date <= end_date
+                    ),
+                )
+                return session.execute(statement).all()
+
+            timed("no pruning", unpruned, queries)
+
+            repo = SQLAlchemyUsageRepository(session, partitioned=True)
+            timed("pruning", repo.get_usage_for_date_range, queries)
+
+        single.dispose()
+        partitioned.dispose()
+
+
+if __name__ == "__main__":
+    main()
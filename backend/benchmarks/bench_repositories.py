@@ -0,0 +1,129 @@
+"""
+Benchmark the SQLAlchemy repositories against the in-memory ones (STORAGE_BACKEND=memory).
+
+Loads the same usage history into a SQLite file and into a MemoryStore,
+then times the calls behind a usage sync and GET /api/usage/calendar. The
+memory numbers are the ceiling for the repository layer: no SQL, no
+connection, only dictionary lookups under one lock.
+
+Usage:
+    uv run python -m benchmarks.bench_repositories [--users 200] [--days 365] [--domains 8] [--queries 2000]
+"""
+import argparse
+import calendar
+import random
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+from website_tracker_backend.domain.services.change_cursor import utc_now
+from website_tracker_backend.infrastructure.adapters.memory_usage_repository_impl import MemoryUsageRepository
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.infrastructure.database.connection import Base, Database
+from website_tracker_backend.infrastructure.database.models import UsageRecord
+from website_tracker_backend.infrastructure.memory.store import MemoryStore
+
+
+def history(users: int, days: int, domains: int):
+    """Daily usage rows for every user and domain, ending today."""
+    start = date.today() - timedelta(days=days)
+    for user in range(users):
+        yield [
+            (f"user-{user}", f"site-{d}.example.com", start + timedelta(days=day), float((user + day + d) % 90))
+            for day in range(days)
+            for d in range(domains)
+        ]
+
+
+def populate_sql(database: Database, users: int, days: int, domains: int) -> int:
+    """Insert the history into usage_records."""
+    Base.metadata.create_all(bind=database.engine)
+    now = utc_now()
+    rows = 0
+    with database.engine.begin() as conn:
+        for batch in history(users, days, domains):
+            conn.execute(UsageRecord.__table__.insert(), [
+                {
+                    "id": str(uuid.uuid4()), "user_id": user_id, "domain": domain, "date": usage_date,
+                    "minutes": minutes, "created_at": now, "updated_at": now,
+                }
+                for user_id, domain, usage_date, minutes in batch
+            ])
+            rows += len(batch)
+    return rows
+
+
+def populate_memory(store: MemoryStore, users: int, days: int, domains: int) -> None:
+    """Load the history into the store."""
+    repo = MemoryUsageRepository(store)
+    for batch in history(users, days, domains):
+        for user_id, domain, usage_date, minutes in batch:
+            repo.upsert_usage(user_id, domain, usage_date, minutes)
+
+
+def month_queries(users: int, days: int, count: int) -> list:
+    """Random (user, first day, last day) month queries within the history."""
+    rng = random.Random(42)
+    today = date.today()
+    queries = []
+    for _ in range(count):
+        day = today - timedelta(days=rng.randrange(days))
+        last = calendar.monthrange(day.year, day.month)[1]
+        queries.append((f"user-{rng.randrange(users)}", day.replace(day=1), day.replace(day=last)))
+    return queries
+
+
+def timed(name: str, run, calls: list) -> None:
+    """Run each call and print latency percentiles."""
+    latencies = []
+    for call in calls:
+        start = time.perf_counter()
+        run(*call)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1_000_000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1_000_000
+    print(f"{name:<22} p50 {p50:10.1f} us  p99 {p99:10.1f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--domains", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    queries = month_queries(args.users, args.days, args.queries)
+    rng = random.Random(7)
+    writes = [
+        (f"user-{rng.randrange(args.users)}", f"site-{rng.randrange(args.domains)}.example.com", date.today(), 1.0)
+        for _ in range(args.queries)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(f"sqlite:///{Path(tmp) / 'bench.db'}", single_writer="off")
+        rows = populate_sql(database, args.users, args.days, args.domains)
+        store = MemoryStore()
+        populate_memory(store, args.users, args.days, args.domains)
+        print(f"{rows} usage rows ({args.users} users x {args.days} days x {args.domains} domains)\n")
+
+        with database.session() as session:
+            repo = SQLAlchemyUsageRepository(session)
+            timed("sql calendar month", repo.get_usage_for_date_range, queries)
+            timed("sql upsert", repo.upsert_usage, writes)
+
+        repo = MemoryUsageRepository(store)
+        timed("memory calendar month", repo.get_usage_for_date_range, queries)
+        timed("memory upsert", repo.upsert_usage, writes)
+
+        start = time.perf_counter()
+        store.save(Path(tmp) / "store.pickle")
+        print(f"\nsnapshot of {rows} rows: {time.perf_counter() - start:.3f}s, "
+              f"{(Path(tmp) / 'store.pickle').stat().st_size / 1e6:.1f} MB")
+        database.dispose()
+
+
+if __name__ == "__main__":
+    main()
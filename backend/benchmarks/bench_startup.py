@@ -0,0 +1,119 @@
+"""
+Measure cold start: module import time (-X importtime) and import-to-first-request.
+
+Each measurement runs in a fresh interpreter so nothing is cached in
+sys.modules. Exits non-zero if a threshold is given and exceeded, so it can
+be used as a CI check.
+
+Usage:
+    uv run python -m benchmarks.bench_startup [--runs 5] [--top 15]
+        [--max-import-ms 800] [--max-first-request-ms 1500]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+FIRST_REQUEST_SCRIPT = """
+import time
+start = time.perf_counter()
+from website_tracker_backend.app import create_app
+from website_tracker_backend.config import Settings
+from fastapi.testclient import TestClient
+app = create_app(Settings(database_url="sqlite:///:memory:"))
+with TestClient(app) as client:
+    client.get("/")
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, str]]:
+    """
+    Parse -X importtime output.
+
+    Args:
+        stderr: stderr of a python -X importtime run
+
+    Returns:
+        List of (self_us, cumulative_us, module) tuples
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        entries.append((int(self_us), int(cumulative_us), module.rstrip()))
+    return entries
+
+
+def measure_import(module: str) -> Tuple[float, List[Tuple[int, int, str]]]:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module: Module to import
+
+    Returns:
+        Tuple of (total cumulative milliseconds, parsed entries)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    entries = parse_importtime(result.stderr)
+    # The module and each parent package are listed as separate top-level
+    # imports; interpreter startup modules (site, encodings) are excluded
+    parts = module.split(".")
+    targets = {".".join(parts[:i]) for i in range(1, len(parts) + 1)}
+    total_us = sum(cumulative for _, cumulative, name in entries if name.strip() in targets)
+    return total_us / 1000, entries
+
+
+def measure_first_request() -> float:
+    """
+    Time from interpreter start of import to the first served request.
+
+    Returns:
+        Milliseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_REQUEST_SCRIPT],
+        capture_output=True, text=True, check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure backend cold start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-first-request-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    package_ms = statistics.median(measure_import("website_tracker_backend")[0] for _ in range(args.runs))
+    app_runs = [measure_import("website_tracker_backend.app") for _ in range(args.runs)]
+    app_ms = statistics.median(total for total, _ in app_runs)
+    first_request_ms = statistics.median(measure_first_request() for _ in range(args.runs))
+
+    print(f"import website_tracker_backend      {package_ms:8.1f} ms")
+    print(f"import website_tracker_backend.app  {app_ms:8.1f} ms")
+    print(f"import to first request             {first_request_ms:8.1f} ms")
+
+    print(f"\nSlowest imports by cumulative time (website_tracker_backend.app):")
+    for _, cumulative, name in sorted(app_runs[-1][1], key=lambda e: e[1], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name.strip()}")
+
+    failed = False
+    if args.max_import_ms is not None and app_ms > args.max_import_ms:
+        print(f"\nFAIL: app import {app_ms:.1f} ms > {args.max_import_ms} ms")
+        failed = True
+    if args.max_first_request_ms is not None and first_request_ms > args.max_first_request_ms:
+        print(f"\nFAIL: first request {first_request_ms:.1f} ms > {args.max_first_request_ms} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Benchmark Python-side statement overhead of the hot repository queries.
+
+Compares the previous per-call query().filter() chains with the statements
+prebuilt in the repositories, for the three queries behind every sync and
+calendar request:
+
+    build      constructing the statement and its cache key, no database work
+    execute    full call against a small in-memory SQLite database, where
+               Python overhead dominates
+
+Usage:
+    uv run python -m benchmarks.bench_statements [--calls 20000]
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from website_tracker_backend.infrastructure.adapters import tracked_sites_repository_impl, usage_repository_impl
+from website_tracker_backend.infrastructure.adapters.tracked_sites_repository_impl import SQLAlchemyTrackedSitesRepository
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.config import Settings
+from website_tracker_backend.infrastructure.database.connection import Base
+from website_tracker_backend.infrastructure.database.models import TrackedSite, UsageRecord, UsageRollup, User
+
+USER_ID = "user-1"
+DAY = date(2024, 1, 15)
+
+
+def legacy_minutes_query(session: Session):
+    """Upsert lookup as built per call before."""
+    return session.query(UsageRecord).filter(
+        UsageRecord.user_id == USER_ID,
+        UsageRecord.domain == "site-1.example.com",
+        UsageRecord.date == DAY,
+    )
+
+
+def legacy_range_query(session: Session):
+    """Month range read as built per call before."""
+    return session.query(UsageRecord).filter(
+        UsageRecord.user_id == USER_ID,
+        UsageRecord.date >= DAY - timedelta(days=30),
+        UsageRecord.date <= DAY,
+    )
+
+
+def legacy_range_read(session: Session) -> None:
+    """Month range read plus rollup lookup, as the repository did before."""
+    legacy_range_query(session).all()
+    session.query(UsageRollup).filter(
+        UsageRollup.user_id == USER_ID,
+        UsageRollup.period_start <= DAY,
+        UsageRollup.period_end >= DAY - timedelta(days=30),
+    ).all()
+
+
+def legacy_tracked_sites_query(session: Session):
+    """Tracked sites read as built per call before."""
+    return session.query(TrackedSite).filter(TrackedSite.user_id == USER_ID)
+
+
+def timed(name: str, run, calls: int) -> float:
+    """Run a call repeatedly and print microseconds per call."""
+    for _ in range(100):
+        run()
+    start = time.perf_counter()
+    for _ in range(calls):
+        run()
+    per_call = (time.perf_counter() - start) / calls * 1e6
+    print(f"{name:<34} {per_call:8.1f} us/call")
+    return per_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+        query_cache_size=Settings.sql_query_cache_size,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = Session(bind=engine)
+    session.add(User(id=USER_ID))
+    for index in range(8):
+        session.add(TrackedSite(user_id=USER_ID, domain=f"site-{index}.example.com", daily_limit=60))
+        for days_ago in range(30):
+            session.add(UsageRecord(
+                user_id=USER_ID,
+                domain=f"site-{index}.example.com",
+                date=DAY - timedelta(days=days_ago),
+                minutes=float(days_ago),
+            ))
+    session.commit()
+
+    print("build (statement + cache key)")
+    timed(
+        "  upsert lookup, query chain",
+        lambda: legacy_minutes_query(session).statement._generate_cache_key(),
+        args.calls,
+    )
+    timed(
+        "  upsert lookup, prebuilt",
+        lambda: usage_repository_impl._SELECT_MINUTES._generate_cache_key(),
+        args.calls,
+    )
+    timed(
+        "  tracked sites, query chain",
+        lambda: legacy_tracked_sites_query(session).statement._generate_cache_key(),
+        args.calls,
+    )
+    timed(
+        "  tracked sites, prebuilt",
+        lambda: tracked_sites_repository_impl._SELECT_TRACKED_SITES._generate_cache_key(),
+        args.calls,
+    )
+
+    usage_repository = SQLAlchemyUsageRepository(session)
+    tracked_sites_repository = SQLAlchemyTrackedSitesRepository(session)
+    start = DAY - timedelta(days=30)
+    print("execute")
+    timed("  upsert lookup, query chain", lambda: legacy_minutes_query(session).first(), args.calls)
+    timed(
+        "  upsert lookup, prebuilt",
+        lambda: session.execute(
+            usage_repository_impl._SELECT_MINUTES,
+            {"user_id": USER_ID, "domain": "site-1.example.com", "usage_date": DAY},
+        ).scalar(),
+        args.calls,
+    )
+    timed("  month range, query chain", lambda: legacy_range_read(session), args.calls // 10)
+    timed(
+        "  month range, repository",
+        lambda: usage_repository.get_usage_for_date_range(USER_ID, start, DAY),
+        args.calls // 10,
+    )
+    timed("  tracked sites, query chain", lambda: legacy_tracked_sites_query(session).all(), args.calls)
+    timed(
+        "  tracked sites, repository",
+        lambda: tracked_sites_repository.get_tracked_sites(USER_ID),
+        args.calls,
+    )
+    print(f"compiled cache entries: {len(engine._compiled_cache)} (size {engine._compiled_cache.capacity})")
+    session.close()
+
+
+if __name__ == "__main__":
+    main()
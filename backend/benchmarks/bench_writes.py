@@ -0,0 +1,84 @@
+"""
+Benchmark concurrent usage upserts: direct commits vs the single writer.
+
+Each thread plays one extension syncing usage for its own user. "direct"
+gives every thread its own session and commit (contending for the SQLite
+write lock); "single-writer" queues the same upserts on a SingleWriter that
+group-commits them.
+
+Usage:
+    uv run python -m benchmarks.bench_writes [--threads 16] [--writes 200]
+"""
+import argparse
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+from website_tracker_backend.infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
+from website_tracker_backend.infrastructure.database.connection import Base, Database
+from website_tracker_backend.infrastructure.database.models import User
+
+
+def run(database: Database, threads: int, writes: int) -> None:
+    """Run concurrent upserts and print throughput and latency percentiles."""
+    Base.metadata.create_all(bind=database.engine)
+    with database.session() as session:
+        session.add_all(User(id=f"user-{i}") for i in range(threads))
+        session.commit()
+
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(index: int) -> None:
+        user_id = f"user-{index}"
+        own = []
+        with database.session() as db:
+            repo = SQLAlchemyUsageRepository(db, writer=database.writer)
+            barrier.wait()
+            for i in range(writes):
+                start = time.perf_counter()
+                repo.upsert_usage(user_id, f"site-{i % 10}.example.com", date(2024, 1, 15), float(i))
+                own.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(own)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    database.dispose()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    mode = "single-writer" if database.single_writer_enabled else "direct"
+    print(f"{mode:<14} {len(latencies) / elapsed:10.0f} writes/s  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--commit-interval-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads x {args.writes} upserts\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        for single_writer in ("off", "on"):
+            url = f"sqlite:///{Path(tmp) / f'bench-{single_writer}.db'}"
+            database = Database(
+                url,
+                single_writer=single_writer,
+                group_commit_interval_ms=args.commit_interval_ms,
+            )
+            run(database, args.threads, args.writes)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,15 @@
 """
 Website Tracker Backend - FastAPI application for tracking website usage.
+
+The application is loaded lazily: importing this package has no side
+effects, and ``app`` / ``create_app`` are imported on first access.
 """
-from website_tracker_backend.app import app
 
-__all__ = ["app"]
+__all__ = ["app", "create_app"]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        from website_tracker_backend import app as app_module
+        return getattr(app_module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,57 @@
 """
 Entry point for running the package as a module: python -m website_tracker_backend
+
+    python -m website_tracker_backend          # single-process development server
+    python -m website_tracker_backend serve    # multi-process production server
+    python -m website_tracker_backend reshard  # move users between database shards
+    python -m website_tracker_backend partitions  # manage monthly usage partitions
+    python -m website_tracker_backend migrations  # apply additive schema migrations in place
+    python -m website_tracker_backend retention   # roll old daily usage into aggregates
+    python -m website_tracker_backend columnar    # columnar archive for analytics (needs numpy)
+    python -m website_tracker_backend leaderboard # reconcile leaderboard counters with raw usage
+    python -m website_tracker_backend report      # fleet-wide daily statistics, in parallel
 """
-from website_tracker_backend import app
-import uvicorn
+import sys
 
-if __name__ == "__main__":
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from website_tracker_backend.server import main as serve
+        serve(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "reshard":
+        from website_tracker_backend.infrastructure.database.resharding import main as reshard
+        reshard(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "partitions":
+        from website_tracker_backend.infrastructure.database.partitions import main as partitions
+        partitions(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "migrations":
+        from website_tracker_backend.infrastructure.database.migrations import main as migrations
+        migrations(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "retention":
+        from website_tracker_backend.infrastructure.database.retention import main as retention
+        retention(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "columnar":
+        from website_tracker_backend.infrastructure.analytics.archiver import main as columnar
+        columnar(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "leaderboard":
+        from website_tracker_backend.infrastructure.database.leaderboard import main as leaderboard
+        leaderboard(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "report":
+        from website_tracker_backend.infrastructure.database.report import main as report
+        report(sys.argv[2:])
+        return
+
+    from website_tracker_backend import app
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
+
+
+if __name__ == "__main__":
+    main()
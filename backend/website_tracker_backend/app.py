@@ -1,40 +1,25 @@
 """
-FastAPI application with all routes and endpoints.
+FastAPI application factory with all routes and endpoints.
+
+create_app(settings) builds an application instance. Its databases are
+built from its settings in the lifespan handler and kept on app.state, so
+several apps with different settings can coexist; engines are created
+lazily on first use, so importing this module does not touch the database. With
+STORAGE_BACKEND=memory no database is used: the services are built on an
+in-process store loaded from its snapshot instead. ``app`` is the default
+instance built from environment variables.
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from datetime import datetime
+from contextlib import asynccontextmanager
+from typing import Optional
 import logging
 
-from .infrastructure.database.connection import init_db
-from .application.routers import usage, tracked_sites
+from .config import Settings
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Website Time Tracker API")
-
-# CORS configuration to allow Chrome extension requests
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify exact extension ID
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Note: Database initialization is now manual via migrate.sh script
-# This prevents automatic recreation of tables on every startup
-
-# Include routers
-app.include_router(usage.router)
-app.include_router(tracked_sites.router)
-
 
 class LimitReachedPayload(BaseModel):
     domain: str
@@ -42,19 +27,164 @@ class LimitReachedPayload(BaseModel):
     timestamp: str
 
 
-@app.get("/")
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Create a FastAPI application.
+
+    Args:
+        settings: Application settings (defaults to Settings.from_env())
+
+    Returns:
+        Configured FastAPI application
+    """
+    if settings is None:
+        settings = Settings.from_env()
+
+    # Routers and middleware are imported here so that importing the
+    # package stays cheap until an application is actually built
+    from .application.routers import usage, tracked_sites, heartbeat, maintenance, admin
+    from .application.middleware.admission import AdmissionControlMiddleware, AdmissionController
+    from .application.middleware.compression import CompressionMiddleware
+    from .infrastructure.events.hub import ChangeHub
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Configure logging, the database and maintenance jobs on startup, stop them on shutdown."""
+        from .infrastructure.database.connection import shards_from_settings
+        from .domain.services.domain_canonicalizer import DomainCanonicalizer, get_default_canonicalizer
+        from .domain.services.trend_service import TrendCache
+
+        logging.basicConfig(
+            level=settings.log_level,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        # History before today for GET /api/usage/trends, shared by the
+        # requests of this app only (it is read from this app's storage)
+        app.state.trend_cache = TrendCache()
+        # Each app canonicalizes domains with its own public suffix rules
+        if settings.public_suffix_list:
+            app.state.canonicalizer = DomainCanonicalizer.from_file(settings.public_suffix_list)
+        else:
+            app.state.canonicalizer = get_default_canonicalizer()
+        if memory_storage:
+            async with memory_lifespan(app):
+                yield
+            return
+        # Each app has its own databases; dependencies find them on app.state
+        shards = app.state.shards = shards_from_settings(settings)
+        if settings.index_check != "off":
+            from .infrastructure.database.migrations import check_indexes
+
+            for database in shards.shards:
+                check_indexes(database, create=settings.index_check == "create")
+        retention_jobs = []
+        if settings.retention_max_age_days > 0:
+            from .infrastructure.database.retention import RetentionJob
+
+            for database in shards.shards:
+                job = RetentionJob(
+                    database,
+                    settings.retention_max_age_days,
+                    settings.retention_granularity,
+                    settings.retention_chunk_size,
+                )
+                job.start(settings.retention_interval_seconds)
+                retention_jobs.append(job)
+        app.state.retention_jobs = retention_jobs
+        try:
+            yield
+        finally:
+            for job in retention_jobs:
+                job.stop()
+            shards.dispose()
+
+    @asynccontextmanager
+    async def memory_lifespan(app: FastAPI):
+        """Load the in-process store from its snapshot and keep saving it (STORAGE_BACKEND=memory)."""
+        from pathlib import Path
+        from .infrastructure.memory.store import MemoryStore, SnapshotJob
+
+        snapshot_job = None
+        if settings.memory_snapshot_path:
+            path = Path(settings.memory_snapshot_path)
+            app.state.memory_store = MemoryStore.load(path)
+            logger.info(f"Loaded {len(app.state.memory_store.users)} users from {path}")
+            snapshot_job = SnapshotJob(app.state.memory_store, path)
+            snapshot_job.start(settings.memory_snapshot_interval_seconds)
+        else:
+            app.state.memory_store = MemoryStore()
+        app.state.retention_jobs = []
+        try:
+            yield
+        finally:
+            if snapshot_job is not None:
+                snapshot_job.stop()
+
+    memory_storage = settings.storage_backend == "memory"
+    app = FastAPI(title="Website Time Tracker API", lifespan=lifespan)
+    # Dependency providers read the storage backend from here
+    app.state.settings = settings
+
+    # Per-user rate limits and load shedding; added first so CORS headers
+    # are also set on 429 responses
+    app.state.admission = AdmissionController(
+        rate_per_second=settings.rate_limit_per_second,
+        burst=settings.rate_limit_burst,
+        max_concurrent=settings.max_concurrent_requests,
+        background_share=settings.background_concurrency_share,
+    )
+    app.add_middleware(AdmissionControlMiddleware, controller=app.state.admission)
+
+    # Pushes tracked site changes to GET /api/tracked-sites/events streams
+    app.state.change_hub = ChangeHub(
+        max_subscribers=settings.sse_max_subscribers,
+        max_subscribers_per_user=settings.sse_max_subscribers_per_user,
+    )
+
+    # CORS configuration to allow Chrome extension requests
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_allow_origins,  # In production, specify exact extension ID
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Negotiated gzip/brotli compression for larger responses (e.g. calendar months)
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+    )
+
+    # Note: Database initialization is manual via migrate.sh script
+    # This prevents automatic recreation of tables on every startup
+
+    # Include routers
+    app.include_router(usage.router)
+    app.include_router(tracked_sites.router)
+    app.include_router(heartbeat.router)
+    app.include_router(maintenance.router)
+    app.include_router(admin.router)
+
+    app.get("/")(root)
+    app.post("/limit-reached")(limit_reached)
+
+    return app
+
+
 async def root():
     return {"status": "Website Time Tracker API is running"}
 
 
-@app.post("/limit-reached")
 async def limit_reached(payload: LimitReachedPayload):
     """
     Receive notification when a website time limit is reached.
-    
+
     Args:
         payload: Contains domain, minutes, and timestamp
-        
+
     Returns:
         Confirmation response
     """
@@ -63,12 +193,12 @@ async def limit_reached(payload: LimitReachedPayload):
             f"Limit reached for {payload.domain}: "
             f"{payload.minutes} minutes at {payload.timestamp}"
         )
-        
+
         # Here you could add additional logic:
         # - Store in database
         # - Send email notification
         # - Trigger other actions
-        
+
         return {
             "status": "received",
             "domain": payload.domain,
@@ -78,3 +208,7 @@ async def limit_reached(payload: LimitReachedPayload):
     except Exception as e:
         logger.error(f"Error processing limit-reached notification: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+# Default application instance, configured from environment variables
+app = create_app()
@@ -1,54 +1,389 @@
 """
 Dependency injection for application layer.
+
+Repositories receive two sessions: the writer session from get_db and a
+read-only session from get_read_db. Read-only service methods
+(get_calendar_month, get_day_details, get_tracked_sites) only use the
+read session, so they are served from the reader pool (or replica).
+Writes go through the single writer (group commit) when it is enabled.
+Sessions and the writer belong to the shard of the requesting user (see
+get_user_database), so every repository built here is a per-shard
+repository. Cross-user reports fan out to all shards instead. The shards
+are the application's own (app.state.shards, built from its settings).
+
+With STORAGE_BACKEND=memory (app.state.settings.storage_backend), the
+providers build the same services on the in-process store kept on
+app.state instead, and no database or session is opened. Routers only
+see the services and the domain repository interfaces.
 """
-from fastapi import Depends
+from typing import Generator, Optional
+import re
+import secrets
+
+from fastapi import Depends, Header, HTTPException, Request
 from sqlalchemy.orm import Session
 
-from ..infrastructure.database.connection import get_db
+from ..infrastructure.database.connection import Database
+from ..infrastructure.database.writer import SingleWriter
+from ..infrastructure.events.hub import ChangeHub
 from ..infrastructure.adapters.user_repository_impl import SQLAlchemyUserRepository
 from ..infrastructure.adapters.usage_repository_impl import SQLAlchemyUsageRepository
 from ..infrastructure.adapters.tracked_sites_repository_impl import SQLAlchemyTrackedSitesRepository
+from ..infrastructure.adapters.usage_report_impl import SQLAlchemyUsageReport
+from ..infrastructure.adapters.sync_receipt_repository_impl import SQLAlchemySyncReceiptRepository
+from ..infrastructure.adapters.memory_user_repository_impl import MemoryUserRepository
+from ..infrastructure.adapters.memory_usage_repository_impl import MemoryUsageRepository
+from ..infrastructure.adapters.memory_tracked_sites_repository_impl import MemoryTrackedSitesRepository
+from ..infrastructure.adapters.memory_sync_receipt_repository_impl import MemorySyncReceiptRepository
+from ..infrastructure.memory.store import MemoryStore
+from ..domain.interfaces.user_repository import UserRepository
+from ..domain.services.domain_canonicalizer import DomainCanonicalizer
 from ..domain.services.usage_service import UsageService
+from ..domain.services.trend_service import TrendCache, TrendService
 from ..domain.services.tracked_sites_service import TrackedSitesService
+from ..domain.services.sync_receipt_service import SyncReceiptService
+
+# X-Device-ID values accepted (e.g. a UUID); each device gets its own rows
+# and receipt endpoint, so the header must not carry arbitrary data
+_DEVICE_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+def get_memory_store(request: Request) -> Optional[MemoryStore]:
+    """
+    Get the application's in-process store, if it serves the API.
+    
+    Args:
+        request: Incoming request (the settings and store are kept on app.state)
+        
+    Returns:
+        MemoryStore with STORAGE_BACKEND=memory, otherwise None
+    """
+    if request.app.state.settings.storage_backend != "memory":
+        return None
+    return request.app.state.memory_store
+
+
+def get_user_database(
+    request: Request, x_user_id: Optional[str] = Header(None, alias="X-User-ID")
+) -> Optional[Database]:
+    """
+    Get the database of the requesting user's shard.
+    
+    Args:
+        request: Incoming request (the shards are kept on app.state)
+        x_user_id: User ID from the X-User-ID header
+        
+    Returns:
+        Database holding the user's data, or None with STORAGE_BACKEND=memory
+    """
+    if get_memory_store(request) is not None:
+        return None
+    return request.app.state.shards.database_for(x_user_id)
+
+
+def get_db(database: Optional[Database] = Depends(get_user_database)) -> Generator[Optional[Session], None, None]:
+    """
+    Get a database session on the user's shard.
+    
+    Args:
+        database: Database of the user's shard
+        
+    Yields:
+        Database session, or None with STORAGE_BACKEND=memory
+    """
+    if database is None:
+        yield None
+        return
+    db = database.session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(
+    database: Optional[Database] = Depends(get_user_database),
+) -> Generator[Optional[Session], None, None]:
+    """
+    Get a read-only database session on the user's shard.
+    
+    Args:
+        database: Database of the user's shard
+        
+    Yields:
+        Database session on the reader engine, or None with STORAGE_BACKEND=memory
+    """
+    if database is None:
+        yield None
+        return
+    db = database.read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_writer(database: Optional[Database] = Depends(get_user_database)) -> Optional[SingleWriter]:
+    """
+    Get the single writer of the user's shard, if enabled.
+    
+    Args:
+        database: Database of the user's shard
+        
+    Returns:
+        SingleWriter, or None if repositories should commit directly
+    """
+    return database.writer if database is not None else None
+
+
+def get_canonicalizer(request: Request) -> DomainCanonicalizer:
+    """
+    Get the application's domain canonicalizer (its public suffix rules).
+    
+    Args:
+        request: Incoming request (the canonicalizer is kept on app.state)
+        
+    Returns:
+        DomainCanonicalizer instance
+    """
+    return request.app.state.canonicalizer
+
+
+def get_trend_cache(request: Request) -> TrendCache:
+    """
+    Get the application's cache of trend history (GET /api/usage/trends).
+    
+    Args:
+        request: Incoming request (the cache is kept on app.state)
+        
+    Returns:
+        TrendCache instance
+    """
+    return request.app.state.trend_cache
 
 
-def get_usage_service(db: Session = Depends(get_db)) -> UsageService:
+def get_usage_service(
+    store: Optional[MemoryStore] = Depends(get_memory_store),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+    writer: Optional[SingleWriter] = Depends(get_writer),
+    database: Database = Depends(get_user_database),
+    trend_cache: TrendCache = Depends(get_trend_cache),
+    canonicalizer: DomainCanonicalizer = Depends(get_canonicalizer),
+) -> UsageService:
     """
     Get usage service with dependencies injected.
     
     Args:
-        db: Database session
+        store: In-process store, if it serves the API
+        db: Database session for writes
+        read_db: Read-only database session
+        writer: Single writer, or None to commit on db
+        database: Database of the user's shard (for its storage options)
+        trend_cache: The application's trend history cache
+        canonicalizer: The application's domain canonicalizer
         
     Returns:
         UsageService instance
     """
-    usage_repository = SQLAlchemyUsageRepository(db)
-    tracked_sites_repository = SQLAlchemyTrackedSitesRepository(db)
-    return UsageService(usage_repository, tracked_sites_repository)
+    if store is not None:
+        return UsageService(
+            MemoryUsageRepository(store), MemoryTrackedSitesRepository(store), trend_cache, canonicalizer
+        )
+    
+    usage_repository = SQLAlchemyUsageRepository(
+        db, read_db, writer, partitioned=database.usage_partitioning == "monthly"
+    )
+    tracked_sites_repository = SQLAlchemyTrackedSitesRepository(db, read_db, writer)
+    return UsageService(usage_repository, tracked_sites_repository, trend_cache, canonicalizer)
+
+
+def get_trend_service(
+    store: Optional[MemoryStore] = Depends(get_memory_store),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+    database: Database = Depends(get_user_database),
+    trend_cache: TrendCache = Depends(get_trend_cache),
+) -> TrendService:
+    """
+    Get trend service with dependencies injected.
+    
+    Args:
+        store: In-process store, if it serves the API
+        db: Database session for writes
+        read_db: Read-only database session
+        database: Database of the user's shard (for its storage options)
+        trend_cache: The application's trend history cache
+        
+    Returns:
+        TrendService instance sharing the application's history cache
+    """
+    if store is not None:
+        return TrendService(MemoryUsageRepository(store), MemoryTrackedSitesRepository(store), trend_cache)
+    
+    usage_repository = SQLAlchemyUsageRepository(
+        db, read_db, partitioned=database.usage_partitioning == "monthly"
+    )
+    tracked_sites_repository = SQLAlchemyTrackedSitesRepository(db, read_db)
+    return TrendService(usage_repository, tracked_sites_repository, trend_cache)
+
+
+def get_change_hub(request: Request) -> ChangeHub:
+    """
+    Get the application's change hub (pushes tracked site changes to event streams).
+    
+    Args:
+        request: Incoming request (the hub is kept on app.state)
+        
+    Returns:
+        ChangeHub instance
+    """
+    return request.app.state.change_hub
 
 
-def get_tracked_sites_service(db: Session = Depends(get_db)) -> TrackedSitesService:
+def get_tracked_sites_service(
+    store: Optional[MemoryStore] = Depends(get_memory_store),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+    writer: Optional[SingleWriter] = Depends(get_writer),
+    change_hub: ChangeHub = Depends(get_change_hub),
+    canonicalizer: DomainCanonicalizer = Depends(get_canonicalizer),
+) -> TrackedSitesService:
     """
     Get tracked sites service with dependencies injected.
     
     Args:
-        db: Database session
+        store: In-process store, if it serves the API
+        db: Database session for writes
+        read_db: Read-only database session
+        writer: Single writer, or None to commit on db
+        change_hub: Hub publishing synced tracked sites to event streams
+        canonicalizer: The application's domain canonicalizer
         
     Returns:
         TrackedSitesService instance
     """
-    tracked_sites_repository = SQLAlchemyTrackedSitesRepository(db)
-    return TrackedSitesService(tracked_sites_repository)
+    if store is not None:
+        tracked_sites_repository = MemoryTrackedSitesRepository(store)
+    else:
+        tracked_sites_repository = SQLAlchemyTrackedSitesRepository(db, read_db, writer)
+    return TrackedSitesService(tracked_sites_repository, canonicalizer, change_publisher=change_hub)
+
+
+def get_sync_receipt_service(
+    store: Optional[MemoryStore] = Depends(get_memory_store),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+    writer: Optional[SingleWriter] = Depends(get_writer),
+) -> SyncReceiptService:
+    """
+    Get sync receipt service with dependencies injected.
+    
+    Args:
+        store: In-process store, if it serves the API
+        db: Database session for writes
+        read_db: Read-only database session
+        writer: Single writer, or None to commit on db
+        
+    Returns:
+        SyncReceiptService instance
+    """
+    if store is not None:
+        return SyncReceiptService(MemorySyncReceiptRepository(store))
+    
+    sync_receipt_repository = SQLAlchemySyncReceiptRepository(db, read_db, writer)
+    return SyncReceiptService(sync_receipt_repository)
 
 
-def get_user_repository(db: Session = Depends(get_db)) -> SQLAlchemyUserRepository:
+def get_user_repository(
+    store: Optional[MemoryStore] = Depends(get_memory_store),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+    writer: Optional[SingleWriter] = Depends(get_writer),
+) -> UserRepository:
     """
     Get user repository with dependencies injected.
     
     Args:
-        db: Database session
+        store: In-process store, if it serves the API
+        db: Database session for writes
+        read_db: Read-only database session
+        writer: Single writer, or None to commit on db
+        
+    Returns:
+        UserRepository on the in-process store or the user's shard
+    """
+    if store is not None:
+        return MemoryUserRepository(store)
+    return SQLAlchemyUserRepository(db, read_db, writer)
+
+
+def get_usage_report(request: Request) -> SQLAlchemyUsageReport:
+    """
+    Get the cross-shard usage report.
+    
+    Args:
+        request: Incoming request (the shards are kept on app.state)
+        
+    Returns:
+        SQLAlchemyUsageReport over all shards
+        
+    Raises:
+        HTTPException: 501 with STORAGE_BACKEND=memory (reports query the database directly)
+    """
+    if get_memory_store(request) is not None:
+        raise HTTPException(status_code=501, detail="Not available with STORAGE_BACKEND=memory")
+    
+    shards = request.app.state.shards
+    return SQLAlchemyUsageReport(
+        shards, partitioned=shards.shards[0].usage_partitioning == "monthly"
+    )
+
+
+def get_device_id(x_device_id: Optional[str] = Header(None, alias="X-Device-ID")) -> Optional[str]:
+    """
+    Extract and validate the device ID header of a sync request.
+    
+    Args:
+        x_device_id: Device ID from X-Device-ID header
         
     Returns:
-        SQLAlchemyUserRepository instance
+        Device ID, or None if the header is not sent
+        
+    Raises:
+        HTTPException: 400 if the device ID is longer than 64 characters or
+            has characters other than letters, digits, ".", "_" and "-"
+    """
+    if x_device_id is None:
+        return None
+    if not _DEVICE_ID_PATTERN.fullmatch(x_device_id):
+        raise HTTPException(
+            status_code=400,
+            detail="X-Device-ID must be 1-64 letters, digits, '.', '_' or '-'",
+        )
+    return x_device_id
+
+
+def require_admin(
+    request: Request, authorization: Optional[str] = Header(None, alias="Authorization")
+) -> None:
     """
-    return SQLAlchemyUserRepository(db)
+    Check the admin credential of a request to /api/admin/*.
+    
+    Args:
+        request: Incoming request (the settings are kept on app.state)
+        authorization: "Bearer <ADMIN_TOKEN>" from the Authorization header
+        
+    Raises:
+        HTTPException: 403 if ADMIN_TOKEN is not configured, 401 if the
+            token is missing or wrong
+    """
+    admin_token = request.app.state.settings.admin_token
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin API is disabled (set ADMIN_TOKEN)")
+    
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), admin_token.encode()):
+        raise HTTPException(
+            status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"}
+        )
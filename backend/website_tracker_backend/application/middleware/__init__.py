@@ -0,0 +1,3 @@
+"""
+Application middleware - ASGI middleware and custom route classes.
+"""
@@ -0,0 +1,260 @@
+"""
+Admission control: per-user rate limiting and load shedding.
+
+Every request takes a token from the bucket of its X-User-ID (or client
+address if the header is missing); buckets refill at a steady rate up to a
+burst size. A global limit bounds the requests in progress. Background
+work (syncs, heartbeats) may only use part of that limit, so when the
+server is busy syncs are shed first and interactive reads (calendar, day
+details, trends, tracked sites) still get through. Long-lived event
+streams are rate limited when they connect but do not count towards the
+concurrency limit. Rejected requests get 429 with a Retry-After header.
+
+Limits are per process: with several workers (server.py), each worker
+keeps its own buckets and concurrency count.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+import math
+import time
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+STREAM = "stream"
+
+# GET endpoints a user is waiting on
+INTERACTIVE_PATHS = (
+    "/api/usage/calendar",
+    "/api/usage/calendar/batch",
+    "/api/usage/day",
+    "/api/usage/trends",
+    "/api/tracked-sites",
+)
+
+# Long-lived responses (Server-Sent Events)
+STREAM_PATHS = ("/api/tracked-sites/events",)
+
+# Never limited: health check and metrics (needed to diagnose overload)
+EXEMPT_PATHS = ("/", "/api/maintenance/admission", "/api/maintenance/events", "/api/maintenance/retention")
+
+# Buckets kept in memory; the least recently seen client is forgotten first
+DEFAULT_MAX_TRACKED_CLIENTS = 100_000
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """
+    Get the priority of a request.
+
+    Args:
+        method: HTTP method
+        path: Request path
+
+    Returns:
+        INTERACTIVE, BACKGROUND, STREAM, or None if the request is not limited
+    """
+    if path in EXEMPT_PATHS or method == "OPTIONS":
+        return None
+    if path in STREAM_PATHS:
+        return STREAM
+    if method in ("GET", "HEAD") and path.rstrip("/") in INTERACTIVE_PATHS:
+        return INTERACTIVE
+    return BACKGROUND
+
+
+class TokenBucket:
+    """Token bucket refilling continuously at a fixed rate."""
+
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated_at = now
+
+    def take(self, rate: float, burst: float, now: float) -> float:
+        """
+        Take one token if available.
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+            now: Current monotonic time
+
+        Returns:
+            0 if a token was taken, else seconds until one is available
+        """
+        self.tokens = min(burst, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / rate
+
+
+@dataclass
+class AdmissionMetrics:
+    """Counters of the admission controller."""
+
+    admitted: Dict[str, int]
+    rate_limited: Dict[str, int]
+    shed: Dict[str, int]
+    in_flight: int = 0
+    peak_in_flight: int = 0
+
+
+class AdmissionController:
+    """Decides whether a request may run. Used from the event loop only."""
+
+    def __init__(
+        self,
+        rate_per_second: float = 5.0,
+        burst: int = 100,
+        max_concurrent: int = 64,
+        background_share: float = 0.75,
+        max_tracked_clients: int = DEFAULT_MAX_TRACKED_CLIENTS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize admission controller.
+
+        Args:
+            rate_per_second: Requests per second refilled per user (0 disables rate limiting)
+            burst: Requests a user may make at once
+            max_concurrent: Requests in progress at once (0 disables load shedding)
+            background_share: Fraction of max_concurrent background requests may use
+            max_tracked_clients: Buckets kept in memory
+            clock: Monotonic time source
+        """
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.background_limit = max(1, int(max_concurrent * background_share)) if max_concurrent > 0 else 0
+        self._max_tracked_clients = max_tracked_clients
+        self._clock = clock
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.metrics = AdmissionMetrics(
+            admitted={INTERACTIVE: 0, BACKGROUND: 0, STREAM: 0},
+            rate_limited={INTERACTIVE: 0, BACKGROUND: 0, STREAM: 0},
+            shed={INTERACTIVE: 0, BACKGROUND: 0, STREAM: 0},
+        )
+
+    def admit(self, client: str, priority: str) -> Tuple[bool, int]:
+        """
+        Admit a request, counting it as in progress until release() is called.
+
+        STREAM requests are not counted as in progress and need no release().
+
+        Args:
+            client: User ID (or address) the request is limited by
+            priority: INTERACTIVE, BACKGROUND or STREAM
+
+        Returns:
+            (admitted, seconds the client should wait before retrying)
+        """
+        limit = self.max_concurrent if priority == INTERACTIVE else self.background_limit
+        if priority != STREAM and limit and self.metrics.in_flight >= limit:
+            self.metrics.shed[priority] += 1
+            return False, 1
+
+        wait = self._take_token(client)
+        if wait > 0:
+            self.metrics.rate_limited[priority] += 1
+            return False, math.ceil(wait)
+
+        self.metrics.admitted[priority] += 1
+        if priority == STREAM:
+            return True, 0
+        self.metrics.in_flight += 1
+        self.metrics.peak_in_flight = max(self.metrics.peak_in_flight, self.metrics.in_flight)
+        return True, 0
+
+    def release(self) -> None:
+        """Mark an admitted request as finished."""
+        self.metrics.in_flight -= 1
+
+    def _take_token(self, client: str) -> float:
+        """Take a token from a client's bucket, returning the wait if it is empty."""
+        if self.rate_per_second <= 0:
+            return 0.0
+        now = self._clock()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.burst, now)
+            if len(self._buckets) > self._max_tracked_clients:
+                # A forgotten client starts again with a full bucket
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket.take(self.rate_per_second, self.burst, now)
+
+    def metrics_snapshot(self) -> Dict:
+        """
+        Get the limits and counters.
+
+        Returns:
+            Dictionary matching AdmissionMetricsResponse
+        """
+        return {
+            "rate_per_second": self.rate_per_second,
+            "burst": self.burst,
+            "max_concurrent": self.max_concurrent,
+            "background_limit": self.background_limit,
+            "in_flight": self.metrics.in_flight,
+            "peak_in_flight": self.metrics.peak_in_flight,
+            "tracked_clients": len(self._buckets),
+            "admitted": dict(self.metrics.admitted),
+            "rate_limited": dict(self.metrics.rate_limited),
+            "shed": dict(self.metrics.shed),
+        }
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware rejecting requests the AdmissionController does not admit."""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        """
+        Initialize admission control middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            controller: Controller holding the limits and counters
+        """
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = classify(scope["method"], scope["path"])
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+
+        client = Headers(scope=scope).get("x-user-id")
+        if not client:
+            address = scope.get("client")
+            client = f"address:{address[0] if address else 'unknown'}"
+
+        admitted, retry_after = self.controller.admit(client, priority)
+        if not admitted:
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        if priority == STREAM:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
@@ -0,0 +1,277 @@
+"""
+Negotiated response compression and compressed request body decoding.
+
+Responses are compressed with brotli (if the optional ``brotli`` package is
+installed) or gzip, based on the client's Accept-Encoding header. Request
+bodies sent with ``Content-Encoding: gzip`` are decoded transparently by
+routers that use GzipRequestRoute.
+"""
+from typing import Callable, List, Optional, Tuple
+import zlib
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    # brotli not installed, only gzip is offered
+    brotli = None
+
+# Default upper bound for a decoded request body, protects against
+# compression bombs; apps use Settings.max_decompressed_body_size
+MAX_DECOMPRESSED_BODY_SIZE = 10 * 1024 * 1024
+
+# Responses with these media types are never compressed
+EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream",
+    "image/png",
+    "image/jpeg",
+    "image/gif",
+    "image/webp",
+    "application/gzip",
+    "application/zip",
+)
+
+
+def select_encoding(accept_encoding: str, brotli_available: bool) -> Optional[str]:
+    """
+    Pick the response encoding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+        brotli_available: Whether brotli compression can be used
+
+    Returns:
+        "br", "gzip", or None if no supported encoding is accepted
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token] = quality
+
+    candidates = ["br", "gzip"] if brotli_available else ["gzip"]
+    best = None
+    best_quality = 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _StreamCompressor:
+    """Incremental compressor for a single response body."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress = self._compressor.process
+            self._sync_flush = self._compressor.flush
+            self._finish = self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._compress = self._compressor.compress
+            self._sync_flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._compressor.flush
+
+    def compress(self, chunk: bytes, final: bool) -> bytes:
+        """
+        Compress a chunk of the body.
+
+        Args:
+            chunk: Raw body bytes
+            final: Whether this is the last chunk of the body
+
+        Returns:
+            Compressed bytes ready to be sent
+        """
+        data = self._compress(chunk)
+        return data + (self._finish() if final else self._sync_flush())
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses above a size threshold."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        exclude_content_types: Tuple[str, ...] = EXCLUDED_CONTENT_TYPES,
+    ):
+        """
+        Initialize compression middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            minimum_size: Bodies smaller than this many bytes are sent as-is
+            gzip_level: zlib compression level (1-9)
+            brotli_quality: Brotli quality (0-11), used only if brotli is installed
+            exclude_content_types: Media types that are never compressed
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.exclude_content_types = exclude_content_types
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), brotli is not None
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-request state for CompressionMiddleware."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self._middleware = middleware
+        self._encoding = encoding
+        self._send = send
+        self._start_message: Optional[Message] = None
+        self._compressor: Optional[_StreamCompressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+            self._passthrough = (
+                "content-encoding" in headers
+                or media_type in self._middleware.exclude_content_types
+            )
+            if self._passthrough:
+                await self._send(message)
+            else:
+                # Hold the start message until we know whether to compress
+                self._start_message = message
+            return
+
+        if message_type != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._start_message is not None:
+            start_message, self._start_message = self._start_message, None
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body and len(body) < self._middleware.minimum_size:
+                # Small complete response, not worth compressing
+                self._passthrough = True
+                await self._send(start_message)
+                await self._send(message)
+                return
+
+            self._compressor = _StreamCompressor(
+                self._encoding, self._middleware.gzip_level, self._middleware.brotli_quality
+            )
+            headers["Content-Encoding"] = self._encoding
+            if more_body:
+                del headers["Content-Length"]
+            body = self._compressor.compress(body, final=not more_body)
+            if not more_body:
+                headers["Content-Length"] = str(len(body))
+            await self._send(start_message)
+            await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        # Remaining chunks of a streaming response
+        body = self._compressor.compress(body, final=not more_body)
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+
+def decode_request_body(
+    body: bytes, content_encodings: List[str], max_size: int = MAX_DECOMPRESSED_BODY_SIZE
+) -> bytes:
+    """
+    Decode a request body according to its Content-Encoding header(s).
+
+    Args:
+        body: Raw request body
+        content_encodings: Content-Encoding values in the order they were applied
+        max_size: Maximum decoded size in bytes
+
+    Returns:
+        Decoded body
+
+    Raises:
+        HTTPException: 415 for unsupported encodings, 400 for corrupt data,
+            413 if the decoded body exceeds max_size
+    """
+    codings = [
+        coding.strip().lower()
+        for value in content_encodings
+        for coding in value.split(",")
+        if coding.strip() and coding.strip().lower() != "identity"
+    ]
+    # Encodings are listed in the order applied, so decode in reverse
+    for coding in reversed(codings):
+        if coding not in ("gzip", "x-gzip"):
+            raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding: {coding}")
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            decoded = decompressor.decompress(body, max_size + 1)
+        except zlib.error:
+            raise HTTPException(status_code=400, detail="Invalid gzip request body")
+        if len(decoded) > max_size or decompressor.unconsumed_tail:
+            raise HTTPException(status_code=413, detail="Decompressed request body too large")
+        if not decompressor.eof:
+            raise HTTPException(status_code=400, detail="Invalid gzip request body")
+        body = decoded
+    return body
+
+
+class GzipRequest(Request):
+    """Request whose body is transparently decoded from Content-Encoding: gzip."""
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            content_encodings = self.headers.getlist("content-encoding")
+            if content_encodings:
+                max_size = self.app.state.settings.max_decompressed_body_size
+                body = decode_request_body(body, content_encodings, max_size)
+            self._body = body
+        return self._body
+
+
+class GzipRequestRoute(APIRoute):
+    """Route class that accepts gzip-compressed request bodies."""
+
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            request = GzipRequest(request.scope, request.receive)
+            return await original_route_handler(request)
+
+        return route_handler
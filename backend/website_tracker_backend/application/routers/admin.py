@@ -0,0 +1,137 @@
+"""
+API router for admin views across all users (Application layer).
+
+Every endpoint requires "Authorization: Bearer <ADMIN_TOKEN>" (see
+require_admin); without ADMIN_TOKEN configured the router answers 403.
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, datetime
+from typing import Optional
+import logging
+
+from ..schemas import AdminUsageResponse, AdminUsersResponse, LeaderboardResponse
+from ..dependencies import get_usage_report, require_admin
+from ...infrastructure.adapters.usage_report_impl import MAX_PAGE_SIZE, SQLAlchemyUsageReport
+from ...infrastructure.database.leaderboard import GRANULARITIES, week_start
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+# Plain def: runs in the threadpool, the report fans out to every shard
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+def get_leaderboard(
+    period: str = "day",
+    date_str: Optional[str] = None,  # Query parameter, defaults to today
+    limit: int = 10,
+    usage_report: SQLAlchemyUsageReport = Depends(get_usage_report),
+):
+    """
+    Get the most-used domains across all users for a day or week.
+    
+    Args:
+        period: "day" or "week"
+        date_str: Day in YYYY-MM-DD format; for weeks, any day of the week
+        limit: Number of domains to return (1-100)
+        usage_report: Cross-shard usage report (injected)
+        
+    Returns:
+        Top domains with total minutes and user counts
+    """
+    try:
+        if period not in GRANULARITIES:
+            raise HTTPException(status_code=400, detail=f"period must be one of {', '.join(GRANULARITIES)}")
+        if limit < 1 or limit > 100:
+            raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+        
+        # Parse date
+        day = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else date.today()
+        period_start = week_start(day) if period == "week" else day
+        
+        domains = usage_report.get_top_domains(period, period_start, limit)
+        
+        return LeaderboardResponse(
+            period=period,
+            periodStart=period_start.strftime("%Y-%m-%d"),
+            domains=domains,
+        )
+    except HTTPException:
+        # Re-raise HTTP exceptions (like validation errors) as-is
+        raise
+    except ValueError as e:
+        logger.error(f"Invalid date format: {e}")
+        raise HTTPException(status_code=400, detail=f"Invalid date format: {date_str}")
+    except Exception as e:
+        logger.error(f"Error getting leaderboard: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+# Plain def: runs in the threadpool, the report fans out to every shard
+@router.get("/users", response_model=AdminUsersResponse)
+def list_users(
+    cursor: Optional[str] = None,  # Query parameter, nextCursor of the previous page
+    limit: int = 100,
+    usage_report: SQLAlchemyUsageReport = Depends(get_usage_report),
+):
+    """
+    List users with their last-seen time and total usage, one page at a time.
+    
+    Args:
+        cursor: nextCursor of the previous page, omitted for the first page
+        limit: Users per page (1-1000)
+        usage_report: Cross-shard usage report (injected)
+        
+    Returns:
+        Page of users and the cursor of the next page
+    """
+    try:
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        
+        return AdminUsersResponse(**usage_report.list_users(cursor, limit))
+    except HTTPException:
+        # Re-raise HTTP exceptions (like validation errors) as-is
+        raise
+    except ValueError as e:
+        logger.error(f"Invalid cursor: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error listing users: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+# Plain def: runs in the threadpool, the report fans out to every shard
+@router.get("/usage", response_model=AdminUsageResponse)
+def list_usage(
+    cursor: Optional[str] = None,  # Query parameter, nextCursor of the previous page
+    limit: int = 100,
+    user_id: Optional[str] = None,  # Query parameter, only list this user's rows
+    usage_report: SQLAlchemyUsageReport = Depends(get_usage_report),
+):
+    """
+    List raw daily usage rows ordered by user, domain and date, one page at a time.
+    
+    Args:
+        cursor: nextCursor of the previous page, omitted for the first page
+        limit: Rows per page (1-1000)
+        user_id: Only list this user's rows
+        usage_report: Cross-shard usage report (injected)
+        
+    Returns:
+        Page of usage rows and the cursor of the next page
+    """
+    try:
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        
+        return AdminUsageResponse(**usage_report.list_usage(cursor, limit, user_id))
+    except HTTPException:
+        # Re-raise HTTP exceptions (like validation errors) as-is
+        raise
+    except ValueError as e:
+        logger.error(f"Invalid cursor: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error listing usage: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
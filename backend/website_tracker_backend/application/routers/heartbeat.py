@@ -0,0 +1,132 @@
+"""
+API router for the combined heartbeat endpoint (Application layer).
+"""
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
+from datetime import datetime
+from typing import Optional
+import logging
+
+from ..schemas import HeartbeatRequest, HeartbeatResponse
+from ..middleware.compression import GzipRequestRoute
+from ..dependencies import (
+    get_device_id,
+    get_usage_service,
+    get_tracked_sites_service,
+    get_sync_receipt_service,
+    get_user_repository,
+)
+from ...domain.services.sync_receipt_service import SyncReceiptService
+from ...domain.services.usage_service import UsageService
+from ...domain.services.tracked_sites_service import TrackedSitesService
+from ...domain.interfaces.user_repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+# Sync bodies may be sent gzip-compressed (Content-Encoding: gzip)
+router = APIRouter(prefix="/api/heartbeat", tags=["heartbeat"], route_class=GzipRequestRoute)
+
+
+def get_user_id(x_user_id: Optional[str] = Header(None, alias="X-User-ID")) -> str:
+    """
+    Extract user ID from header.
+
+    Args:
+        x_user_id: User ID from X-User-ID header
+
+    Returns:
+        User ID string
+
+    Raises:
+        HTTPException: If user ID is missing
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=400, detail="X-User-ID header is required")
+    return x_user_id
+
+
+# Plain def: waiting for the single writer's commit must not block the event loop
+@router.post("", response_model=HeartbeatResponse)
+def heartbeat(
+    request: HeartbeatRequest,
+    response: Response,
+    user_id: str = Depends(get_user_id),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    sequence: Optional[int] = Header(None, alias="X-Sync-Sequence"),
+    device_id: Optional[str] = Depends(get_device_id),
+    usage_service: UsageService = Depends(get_usage_service),
+    tracked_sites_service: TrackedSitesService = Depends(get_tracked_sites_service),
+    sync_receipt_service: SyncReceiptService = Depends(get_sync_receipt_service),
+    user_repository: UserRepository = Depends(get_user_repository),
+):
+    """
+    Sync today's usage and check tracked sites in a single request.
+
+    Replaces the separate usage sync and tracked sites GET calls. All
+    dependencies share the request's database session. Tracked sites are
+    only returned when the client's hash differs from the server's.
+
+    A retry with an Idempotency-Key or X-Sync-Sequence already processed
+    gets the first response back. A stale sequence (lower than the last
+    processed one) does not write usage, but still gets the tracked sites
+    check.
+
+    With an X-Device-ID header the minutes are this device's, and the
+    stored usage is the sum over the user's devices. Sequences are then
+    tracked per device.
+
+    Args:
+        request: Heartbeat request with date, usage and tracked sites hash
+        response: Response (for the Idempotent-Replayed header)
+        user_id: User ID from header
+        idempotency_key: Idempotency-Key header
+        sequence: X-Sync-Sequence header
+        device_id: X-Device-ID header
+        usage_service: Usage service (injected)
+        tracked_sites_service: Tracked sites service (injected)
+        sync_receipt_service: Sync receipt service (injected)
+        user_repository: User repository (injected)
+
+    Returns:
+        Heartbeat response with sync count and, if changed, tracked sites
+    """
+    try:
+        # Parse date
+        usage_date = datetime.strptime(request.date, "%Y-%m-%d").date()
+
+        # Each device numbers its own syncs
+        receipt_endpoint = f"heartbeat:{device_id}" if device_id else "heartbeat"
+        check = sync_receipt_service.check(user_id, receipt_endpoint, idempotency_key, sequence)
+        if check.replay is not None:
+            response.headers["Idempotent-Replayed"] = "true"
+            return HeartbeatResponse(**check.replay)
+
+        # Ensure user exists
+        user_repository.get_or_create_user(user_id)
+
+        # Delegate to services
+        synced_count = 0
+        if not check.stale:
+            synced_count = usage_service.sync_usage(user_id, usage_date, request.usage, device_id)
+        server_hash, tracked_sites = tracked_sites_service.get_tracked_sites_if_changed(
+            user_id, request.trackedSitesHash
+        )
+
+        result = HeartbeatResponse(
+            status="stale" if check.stale else "success",
+            synced=synced_count,
+            date=request.date,
+            trackedSitesHash=server_hash,
+            trackedSites=tracked_sites,
+        )
+        if not check.stale:
+            sync_receipt_service.record(user_id, receipt_endpoint, idempotency_key, sequence, result.model_dump())
+        return result
+    except HTTPException:
+        # Re-raise HTTP exceptions (like validation errors) as-is
+        raise
+    except ValueError as e:
+        logger.error(f"Invalid date format: {e}")
+        raise HTTPException(status_code=400, detail=f"Invalid date format: {request.date}")
+    except Exception as e:
+        logger.error(f"Error processing heartbeat: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
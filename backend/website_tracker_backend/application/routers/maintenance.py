@@ -0,0 +1,54 @@
+"""
+API router for maintenance job, admission control and event stream metrics (Application layer).
+"""
+from fastapi import APIRouter, Request
+
+from ..schemas import AdmissionMetricsResponse, EventHubMetricsResponse, RetentionMetricsResponse
+
+router = APIRouter(prefix="/api/maintenance", tags=["maintenance"])
+
+
+@router.get("/retention", response_model=RetentionMetricsResponse)
+async def get_retention_metrics(request: Request):
+    """
+    Get metrics of the retention jobs running in this server process.
+    
+    Args:
+        request: Incoming request (jobs are kept on app.state)
+        
+    Returns:
+        Whether retention is enabled and per-shard job metrics
+    """
+    jobs = getattr(request.app.state, "retention_jobs", [])
+    return {
+        "enabled": bool(jobs),
+        "shards": [job.metrics_snapshot() for job in jobs],
+    }
+
+
+@router.get("/admission", response_model=AdmissionMetricsResponse)
+async def get_admission_metrics(request: Request):
+    """
+    Get the rate limits, concurrency limits and rejection counts of this server process.
+    
+    Args:
+        request: Incoming request (the controller is kept on app.state)
+        
+    Returns:
+        Admission limits and counters
+    """
+    return request.app.state.admission.metrics_snapshot()
+
+
+@router.get("/events", response_model=EventHubMetricsResponse)
+async def get_event_hub_metrics(request: Request):
+    """
+    Get the open tracked site event streams of this server process.
+    
+    Args:
+        request: Incoming request (the hub is kept on app.state)
+        
+    Returns:
+        Stream limits and event counters
+    """
+    return request.app.state.change_hub.metrics_snapshot()
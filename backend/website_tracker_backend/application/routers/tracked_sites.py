@@ -1,8 +1,10 @@
 """
 API router for tracked sites endpoints (Application layer).
 """
-from fastapi import APIRouter, Depends, HTTPException, Header
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
+import json
 import logging
 
 from ..schemas import (
@@ -10,13 +12,22 @@ from ..schemas import (
     TrackedSitesSyncResponse,
     TrackedSitesResponse,
 )
-from ..dependencies import get_tracked_sites_service, get_user_repository
+from ..middleware.compression import GzipRequestRoute
+from ..dependencies import (
+    get_change_hub,
+    get_sync_receipt_service,
+    get_tracked_sites_service,
+    get_user_repository,
+)
+from ...domain.services.sync_receipt_service import SyncReceiptService
 from ...domain.services.tracked_sites_service import TrackedSitesService
-from ...infrastructure.adapters.user_repository_impl import SQLAlchemyUserRepository
+from ...domain.interfaces.user_repository import UserRepository
+from ...infrastructure.events.hub import ChangeHub, HubFullError
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/tracked-sites", tags=["tracked-sites"])
+# Sync bodies may be sent gzip-compressed (Content-Encoding: gzip)
+router = APIRouter(prefix="/api/tracked-sites", tags=["tracked-sites"], route_class=GzipRequestRoute)
 
 
 def get_user_id(x_user_id: Optional[str] = Header(None, alias="X-User-ID")) -> str:
@@ -37,26 +48,45 @@ def get_user_id(x_user_id: Optional[str] = Header(None, alias="X-User-ID")) -> s
     return x_user_id
 
 
+# Plain def: waiting for the single writer's commit must not block the event loop
 @router.post("/sync", response_model=TrackedSitesSyncResponse)
-async def sync_tracked_sites(
+def sync_tracked_sites(
     request: TrackedSitesSyncRequest,
+    response: Response,
     user_id: str = Depends(get_user_id),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    sequence: Optional[int] = Header(None, alias="X-Sync-Sequence"),
     tracked_sites_service: TrackedSitesService = Depends(get_tracked_sites_service),
-    user_repository: SQLAlchemyUserRepository = Depends(get_user_repository),
+    sync_receipt_service: SyncReceiptService = Depends(get_sync_receipt_service),
+    user_repository: UserRepository = Depends(get_user_repository),
 ):
     """
     Sync tracked sites from extension to backend.
     
+    Retries and stale sequences are handled as for the usage sync.
+    
     Args:
         request: Tracked sites sync request
+        response: Response (for the Idempotent-Replayed header)
         user_id: User ID from header
+        idempotency_key: Idempotency-Key header
+        sequence: X-Sync-Sequence header
         tracked_sites_service: Tracked sites service (injected)
+        sync_receipt_service: Sync receipt service (injected)
         user_repository: User repository (injected)
         
     Returns:
         Sync response with status and count
     """
     try:
+        check = sync_receipt_service.check(user_id, "tracked_sites", idempotency_key, sequence)
+        if check.replay is not None:
+            response.headers["Idempotent-Replayed"] = "true"
+            return TrackedSitesSyncResponse(**check.replay)
+        if check.stale:
+            logger.info(f"Dropped stale tracked sites sync {sequence} for user {user_id}")
+            return TrackedSitesSyncResponse(status="stale", synced=0)
+        
         # Ensure user exists
         user_repository.get_or_create_user(user_id)
         
@@ -65,10 +95,12 @@ async def sync_tracked_sites(
         
         logger.info(f"Synced {synced_count} tracked sites for user {user_id}")
         
-        return TrackedSitesSyncResponse(
+        result = TrackedSitesSyncResponse(
             status="success",
             synced=synced_count,
         )
+        sync_receipt_service.record(user_id, "tracked_sites", idempotency_key, sequence, result.model_dump())
+        return result
     except HTTPException:
         # Re-raise HTTP exceptions (like validation errors) as-is
         raise
@@ -77,16 +109,22 @@ async def sync_tracked_sites(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+# Plain def: runs in the threadpool so concurrent reads use separate reader connections
 @router.get("", response_model=TrackedSitesResponse)
-async def get_tracked_sites(
+def get_tracked_sites(
+    since: Optional[str] = None,  # Query parameter, cursor of an earlier response
     user_id: str = Depends(get_user_id),
     tracked_sites_service: TrackedSitesService = Depends(get_tracked_sites_service),
-    user_repository: SQLAlchemyUserRepository = Depends(get_user_repository),
+    user_repository: UserRepository = Depends(get_user_repository),
 ):
     """
     Get all tracked sites for a user.
     
+    With ?since=<cursor> from an earlier response, only the sites added,
+    updated or removed since then are returned (full is false).
+    
     Args:
+        since: Cursor of an earlier response
         user_id: User ID from header
         tracked_sites_service: Tracked sites service (injected)
         user_repository: User repository (injected)
@@ -99,12 +137,92 @@ async def get_tracked_sites(
         user_repository.get_or_create_user(user_id)
         
         # Delegate to service
-        tracked_sites = tracked_sites_service.get_tracked_sites(user_id)
+        tracked_sites_data = tracked_sites_service.get_tracked_sites_since(user_id, since)
         
-        return TrackedSitesResponse(trackedSites=tracked_sites)
+        return TrackedSitesResponse(**tracked_sites_data)
     except HTTPException:
         # Re-raise HTTP exceptions (like validation errors) as-is
         raise
+    except ValueError as e:
+        logger.error(f"Invalid cursor: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting tracked sites: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/events")
+async def stream_tracked_site_events(
+    request: Request,
+    user_id: str = Depends(get_user_id),
+    change_hub: ChangeHub = Depends(get_change_hub),
+):
+    """
+    Stream tracked site changes as Server-Sent Events.
+    
+    Each tracked sites sync of the user (from any device) sends a
+    "tracked_sites" event with the new sites and their hash. Comment lines
+    are sent while idle so proxies keep the connection open. No database
+    session is held while streaming.
+    
+    Args:
+        request: Incoming request (for the keepalive setting)
+        user_id: User ID from header
+        change_hub: Hub the stream subscribes to (injected)
+        
+    Returns:
+        text/event-stream response
+    """
+    try:
+        # The subscription itself is opened by the stream, so nothing is left
+        # open if the client disconnects before the first chunk is sent
+        change_hub.check_room(user_id)
+    except HubFullError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail="Too many event streams open", headers={"Retry-After": "30"})
+    
+    settings = getattr(request.app.state, "settings", None)
+    keepalive_seconds = settings.sse_keepalive_seconds if settings is not None else 30.0
+    return StreamingResponse(
+        _event_stream(change_hub, user_id, keepalive_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _event_stream(change_hub: ChangeHub, user_id: str, keepalive_seconds: float) -> AsyncIterator[str]:
+    """
+    Subscribe a user to the hub and format the events as SSE messages until
+    the client disconnects.
+    
+    The subscription is opened on the first iteration and closed when the
+    stream ends, so a response that is never iterated holds no subscription.
+    
+    Args:
+        change_hub: Hub to subscribe to
+        user_id: User whose events are streamed
+        keepalive_seconds: Idle time before a keepalive comment is sent
+        
+    Yields:
+        SSE messages
+    """
+    try:
+        subscription = change_hub.subscribe(user_id)
+    except HubFullError as e:
+        # Another stream took the last place after the endpoint's check
+        logger.warning(str(e))
+        yield "retry: 30000\n\n"
+        return
+    try:
+        # Reconnect delay for EventSource clients, and an immediate first
+        # chunk so the client knows the stream is open
+        yield "retry: 5000\n\n"
+        while True:
+            event = await subscription.next_event(keepalive_seconds)
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            event_type, data = event
+            yield f"event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+    finally:
+        change_hub.unsubscribe(subscription)
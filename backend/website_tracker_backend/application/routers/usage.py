@@ -1,25 +1,37 @@
 """
 API router for usage-related endpoints (Application layer).
 """
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 import logging
 
 from ..schemas import (
     UsageSyncRequest,
     UsageSyncResponse,
+    CalendarBatchResponse,
     CalendarMonthResponse,
     DayUsageDetail,
+    UsageTrendsResponse,
 )
-from ..dependencies import get_usage_service, get_user_repository
+from ..middleware.compression import GzipRequestRoute
+from ..dependencies import (
+    get_device_id,
+    get_sync_receipt_service,
+    get_trend_service,
+    get_usage_service,
+    get_user_repository,
+)
+from ...domain.services.sync_receipt_service import SyncReceiptService
+from ...domain.services.trend_service import TrendService
 from ...domain.services.usage_service import UsageService
-from ...infrastructure.adapters.user_repository_impl import SQLAlchemyUserRepository
+from ...domain.interfaces.user_repository import UserRepository
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/usage", tags=["usage"])
+# Sync bodies may be sent gzip-compressed (Content-Encoding: gzip)
+router = APIRouter(prefix="/api/usage", tags=["usage"], route_class=GzipRequestRoute)
 
 
 def get_user_id(x_user_id: Optional[str] = Header(None, alias="X-User-ID")) -> str:
@@ -40,26 +52,55 @@ def get_user_id(x_user_id: Optional[str] = Header(None, alias="X-User-ID")) -> s
     return x_user_id
 
 
+# Plain def: waiting for the single writer's commit must not block the event loop
 @router.post("/sync", response_model=UsageSyncResponse)
-async def sync_usage(
+def sync_usage(
     request: UsageSyncRequest,
+    response: Response,
     user_id: str = Depends(get_user_id),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    sequence: Optional[int] = Header(None, alias="X-Sync-Sequence"),
+    device_id: Optional[str] = Depends(get_device_id),
     usage_service: UsageService = Depends(get_usage_service),
-    user_repository: SQLAlchemyUserRepository = Depends(get_user_repository),
+    sync_receipt_service: SyncReceiptService = Depends(get_sync_receipt_service),
+    user_repository: UserRepository = Depends(get_user_repository),
 ):
     """
     Sync daily usage data from extension to backend.
     
+    A retry with an Idempotency-Key or X-Sync-Sequence already processed
+    gets the first response back; a sequence lower than the last processed
+    one is stale and is not written.
+    
+    With an X-Device-ID header the minutes are this device's, and the
+    stored usage is the sum over the user's devices. Sequences are then
+    tracked per device.
+    
     Args:
         request: Usage sync request with date and usage data
+        response: Response (for the Idempotent-Replayed header)
         user_id: User ID from header
+        idempotency_key: Idempotency-Key header
+        sequence: X-Sync-Sequence header
+        device_id: X-Device-ID header
         usage_service: Usage service (injected)
+        sync_receipt_service: Sync receipt service (injected)
         user_repository: User repository (injected)
         
     Returns:
         Sync response with status and count
     """
     try:
+        # Each device numbers its own syncs
+        receipt_endpoint = f"usage:{device_id}" if device_id else "usage"
+        check = sync_receipt_service.check(user_id, receipt_endpoint, idempotency_key, sequence)
+        if check.replay is not None:
+            response.headers["Idempotent-Replayed"] = "true"
+            return UsageSyncResponse(**check.replay)
+        if check.stale:
+            logger.info(f"Dropped stale usage sync {sequence} for user {user_id}")
+            return UsageSyncResponse(status="stale", synced=0, date=request.date)
+        
         # Ensure user exists
         user_repository.get_or_create_user(user_id)
         
@@ -67,15 +108,17 @@ async def sync_usage(
         usage_date = datetime.strptime(request.date, "%Y-%m-%d").date()
         
         # Delegate to service
-        synced_count = usage_service.sync_usage(user_id, usage_date, request.usage)
+        synced_count = usage_service.sync_usage(user_id, usage_date, request.usage, device_id)
         
         logger.info(f"Synced {synced_count} usage records for user {user_id} on {request.date}")
         
-        return UsageSyncResponse(
+        result = UsageSyncResponse(
             status="success",
             synced=synced_count,
             date=request.date,
         )
+        sync_receipt_service.record(user_id, receipt_endpoint, idempotency_key, sequence, result.model_dump())
+        return result
     except HTTPException:
         # Re-raise HTTP exceptions (like validation errors) as-is
         raise
@@ -87,20 +130,26 @@ async def sync_usage(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+# Plain def: runs in the threadpool so concurrent reads use separate reader connections
 @router.get("/calendar", response_model=CalendarMonthResponse)
-async def get_calendar_month(
+def get_calendar_month(
     year: int,
     month: int,
+    since: Optional[str] = None,  # Query parameter, cursor of an earlier response
     user_id: str = Depends(get_user_id),
     usage_service: UsageService = Depends(get_usage_service),
-    user_repository: SQLAlchemyUserRepository = Depends(get_user_repository),
+    user_repository: UserRepository = Depends(get_user_repository),
 ):
     """
     Get calendar month data with usage information.
     
+    With ?since=<cursor> from an earlier response, only the days changed
+    since then are returned (full is false).
+    
     Args:
         year: Year (e.g., 2024)
         month: Month (1-12)
+        since: Cursor of an earlier response
         user_id: User ID from header
         usage_service: Usage service (injected)
         user_repository: User repository (injected)
@@ -117,7 +166,7 @@ async def get_calendar_month(
         user_repository.get_or_create_user(user_id)
         
         # Delegate to service
-        calendar_data = usage_service.get_calendar_month(user_id, year, month)
+        calendar_data = usage_service.get_calendar_month(user_id, year, month, since)
         
         return CalendarMonthResponse(**calendar_data)
     except HTTPException:
@@ -131,12 +180,63 @@ async def get_calendar_month(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+# Plain def: runs in the threadpool so concurrent reads use separate reader connections
+@router.get("/calendar/batch", response_model=CalendarBatchResponse)
+def get_calendar_months(
+    year: int,
+    month: int,
+    months: int = 3,  # Query parameter, number of consecutive months
+    user_id: str = Depends(get_user_id),
+    usage_service: UsageService = Depends(get_usage_service),
+    user_repository: UserRepository = Depends(get_user_repository),
+):
+    """
+    Get several consecutive calendar months in one request.
+    
+    Lets the popup prefetch the months around the one shown with one
+    usage query and one tracked sites lookup.
+    
+    Args:
+        year: Year of the first month
+        month: First month (1-12)
+        months: Number of months (1-12)
+        user_id: User ID from header
+        usage_service: Usage service (injected)
+        user_repository: User repository (injected)
+        
+    Returns:
+        Calendar batch response with one entry per month
+    """
+    try:
+        # Validate month
+        if month < 1 or month > 12:
+            raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
+        
+        # Ensure user exists
+        user_repository.get_or_create_user(user_id)
+        
+        # Delegate to service
+        batch_data = usage_service.get_calendar_months(user_id, year, month, months)
+        
+        return CalendarBatchResponse(**batch_data)
+    except HTTPException:
+        # Re-raise HTTP exceptions (like validation errors) as-is
+        raise
+    except ValueError as e:
+        logger.error(f"Invalid date parameters: {e}")
+        raise HTTPException(status_code=400, detail=f"Invalid date parameters: {e}")
+    except Exception as e:
+        logger.error(f"Error getting calendar months: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+# Plain def: runs in the threadpool so concurrent reads use separate reader connections
 @router.get("/day", response_model=DayUsageDetail)
-async def get_day_details(
+def get_day_details(
     date_str: str,  # Query parameter
     user_id: str = Depends(get_user_id),
     usage_service: UsageService = Depends(get_usage_service),
-    user_repository: SQLAlchemyUserRepository = Depends(get_user_repository),
+    user_repository: UserRepository = Depends(get_user_repository),
 ):
     """
     Get detailed usage information for a specific day.
@@ -170,3 +270,47 @@ async def get_day_details(
     except Exception as e:
         logger.error(f"Error getting day details: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+# Plain def: runs in the threadpool so concurrent reads use separate reader connections
+@router.get("/trends", response_model=UsageTrendsResponse)
+def get_trends(
+    date_str: Optional[str] = None,  # Query parameter, defaults to today
+    days: int = 30,
+    user_id: str = Depends(get_user_id),
+    trend_service: TrendService = Depends(get_trend_service),
+    user_repository: UserRepository = Depends(get_user_repository),
+):
+    """
+    Get rolling averages, week-over-week change and limit streaks per tracked domain.
+    
+    Args:
+        date_str: Last day of the trends in YYYY-MM-DD format (the client's today)
+        days: Number of days in each domain's daily series (1-365)
+        user_id: User ID from header
+        trend_service: Trend service (injected)
+        user_repository: User repository (injected)
+        
+    Returns:
+        Trends for each tracked domain
+    """
+    try:
+        # Parse date
+        today = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else date.today()
+        
+        # Ensure user exists
+        user_repository.get_or_create_user(user_id)
+        
+        # Delegate to service
+        trends = trend_service.get_trends(user_id, today, days)
+        
+        return UsageTrendsResponse(**trends)
+    except HTTPException:
+        # Re-raise HTTP exceptions (like validation errors) as-is
+        raise
+    except ValueError as e:
+        logger.error(f"Invalid trend parameters: {e}")
+        raise HTTPException(status_code=400, detail=f"Invalid trend parameters: {e}")
+    except Exception as e:
+        logger.error(f"Error getting trends: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -44,6 +44,7 @@ class CalendarDay(BaseModel):
     domainUsage: Dict[str, float]
     limitReached: bool
     domains: List[DomainUsageDetail]
+    coarse: bool = False  # usage estimated from a weekly/monthly rollup
 
 
 class CalendarMonthResponse(BaseModel):
@@ -51,6 +52,44 @@ class CalendarMonthResponse(BaseModel):
     year: int
     month: int
     days: List[CalendarDay]
+    cursor: Optional[str] = None  # pass as ?since= to get only later changes
+    full: bool = True  # False if days only holds the days changed since the cursor
+
+
+class CalendarBatchResponse(BaseModel):
+    """Response schema for several consecutive calendar months."""
+    months: List[CalendarMonthResponse]
+    cursor: str
+
+
+class TrendPoint(BaseModel):
+    """Usage and rolling averages for one day."""
+    date: str
+    minutes: float
+    average7: float
+    average30: float
+
+
+class DomainTrend(BaseModel):
+    """Rolling-window trends for one tracked domain."""
+    domain: str
+    limit: int
+    minutes: float  # usage on the last day
+    average7: float
+    average30: float
+    weekTotal: float  # last 7 days
+    previousWeekTotal: float  # the 7 days before
+    weekOverWeek: float
+    weekOverWeekPercent: Optional[float] = None  # None when the previous week is empty
+    currentStreak: Optional[int] = None  # days under the limit, None without a limit
+    longestStreak: Optional[int] = None  # over the last year
+    series: List[TrendPoint]
+
+
+class UsageTrendsResponse(BaseModel):
+    """Response schema for usage trends."""
+    date: str
+    domains: List[DomainTrend]
 
 
 class TrackedSitesSyncRequest(BaseModel):
@@ -67,3 +106,112 @@ class TrackedSitesSyncResponse(BaseModel):
 class TrackedSitesResponse(BaseModel):
     """Response schema for getting tracked sites."""
     trackedSites: Dict[str, int]
+    removed: List[str] = []  # domains removed since the cursor
+    cursor: Optional[str] = None  # pass as ?since= to get only later changes
+    full: bool = True  # False if trackedSites only holds the sites changed since the cursor
+
+
+class HeartbeatRequest(BaseModel):
+    """Request schema for the combined usage/tracked sites heartbeat."""
+    date: str  # YYYY-MM-DD
+    usage: Dict[str, float]  # domain -> minutes
+    trackedSitesHash: Optional[str] = None  # hash of client's domain -> limit map
+
+
+class HeartbeatResponse(BaseModel):
+    """Response schema for the heartbeat."""
+    status: str
+    synced: int
+    date: str
+    trackedSitesHash: str
+    trackedSites: Optional[Dict[str, int]] = None  # only set when hashes differ
+
+
+class LeaderboardEntry(BaseModel):
+    """Usage of one domain across all users."""
+    domain: str
+    minutes: float
+    users: int  # users with usage of the domain in the period
+
+
+class LeaderboardResponse(BaseModel):
+    """Response schema for the domain leaderboard."""
+    period: str  # "day" or "week"
+    periodStart: str  # the day, or Monday of the week
+    domains: List[LeaderboardEntry]
+
+
+class AdminUser(BaseModel):
+    """One user in the admin user listing."""
+    userId: str
+    createdAt: Optional[str] = None
+    lastSeen: Optional[str] = None  # last usage update
+    totalMinutes: float  # all daily and rolled-up usage
+
+
+class AdminUsersResponse(BaseModel):
+    """Response schema for one page of the admin user listing."""
+    users: List[AdminUser]
+    nextCursor: Optional[str] = None  # None on the last page
+
+
+class AdminUsageRecord(BaseModel):
+    """One raw daily usage row."""
+    userId: str
+    domain: str
+    date: str
+    minutes: float
+    updatedAt: Optional[str] = None
+
+
+class AdminUsageResponse(BaseModel):
+    """Response schema for one page of the admin usage listing."""
+    records: List[AdminUsageRecord]
+    nextCursor: Optional[str] = None  # None on the last page
+
+
+class RetentionJobMetrics(BaseModel):
+    """Counters of the retention job for one shard."""
+    runs: int
+    rows_rolled_up: int
+    rollups_written: int
+    late_rows_dropped: int
+    partitions_dropped: int
+    seconds_total: float
+    last_run_rows: int
+    last_run_seconds: float
+    last_run_at: Optional[str] = None
+    last_cutoff: Optional[str] = None
+    last_error: Optional[str] = None
+
+
+class RetentionMetricsResponse(BaseModel):
+    """Response model for retention job metrics."""
+    enabled: bool
+    shards: List[RetentionJobMetrics]
+
+
+class EventHubMetricsResponse(BaseModel):
+    """Open event streams and event counters (per process)."""
+    subscribers: int
+    users: int
+    max_subscribers: int
+    max_subscribers_per_user: int
+    published: int
+    delivered: int
+    coalesced: int  # replaced by a newer event before the client read it
+    rejected_subscriptions: int
+
+
+class AdmissionMetricsResponse(BaseModel):
+    """Limits and counters of the admission controller (per process)."""
+    rate_per_second: float  # per user; 0 = no rate limit
+    burst: int
+    max_concurrent: int  # 0 = no load shedding
+    background_limit: int  # concurrent requests background work may use
+    in_flight: int
+    peak_in_flight: int
+    tracked_clients: int
+    admitted: Dict[str, int]  # by priority: interactive, background, stream
+    rate_limited: Dict[str, int]
+    shed: Dict[str, int]
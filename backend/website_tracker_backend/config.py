@@ -0,0 +1,110 @@
+"""
+Application settings, read from environment variables.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional
+import os
+
+
+def _env_list(name: str, default: str) -> List[str]:
+    """Read a comma-separated environment variable as a list."""
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Configuration for one application instance (see create_app)."""
+
+    database_url: str = "sqlite:///./website_tracker.db"
+    database_read_url: Optional[str] = None  # replica; defaults to read-only SQLite connections
+    database_read_pool_size: int = 8
+    database_shard_urls: List[str] = field(default_factory=list)  # hash-sharded users; replaces database_url
+    environment: str = "prod"
+    log_level: str = "INFO"
+    cors_allow_origins: List[str] = field(default_factory=lambda: ["*"])
+    sqlite_busy_timeout_ms: int = 5000
+    single_writer: str = "auto"  # group-commit writer thread: auto (file SQLite), on, off
+    group_commit_interval_ms: float = 2.0
+    usage_partitioning: str = "off"  # "monthly" stores usage in per-month tables
+    sql_query_cache_size: int = 1200  # compiled statements cached per engine
+    public_suffix_list: Optional[str] = None  # public_suffix_list.dat for canonical domains; built-in rules if unset
+    index_check: str = "warn"  # indexes declared on the models missing at startup: warn, create, off
+    admin_token: Optional[str] = None  # bearer token for /api/admin/*; the admin API is disabled if unset
+
+    # In-process storage instead of the database (see infrastructure/memory/store.py)
+    storage_backend: str = "sql"  # "memory" keeps all data in the server process; run one worker
+    memory_snapshot_path: Optional[str] = None  # snapshot file reloaded on startup; no persistence if unset
+    memory_snapshot_interval_seconds: float = 60.0
+
+    # Retention job rolling old daily usage into aggregates (0 days disables it)
+    retention_max_age_days: int = 0
+    retention_granularity: str = "month"
+    retention_chunk_size: int = 1000
+    retention_interval_seconds: float = 3600.0
+
+    # Admission control (see application/middleware/admission.py); 0 disables a limit
+    rate_limit_per_second: float = 5.0
+    rate_limit_burst: int = 100
+    max_concurrent_requests: int = 64
+    background_concurrency_share: float = 0.75
+
+    # Tracked site event streams (see infrastructure/events/hub.py)
+    sse_max_subscribers: int = 50_000
+    sse_max_subscribers_per_user: int = 8
+    sse_keepalive_seconds: float = 30.0
+
+    # Response compression (see application/middleware/compression.py)
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    max_decompressed_body_size: int = 10 * 1024 * 1024
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """
+        Build settings from environment variables.
+
+        Returns:
+            Settings instance
+        """
+        return cls(
+            database_url=os.getenv("DATABASE_URL", cls.database_url),
+            database_read_url=os.getenv("DATABASE_READ_URL") or None,
+            database_read_pool_size=int(os.getenv("DATABASE_READ_POOL_SIZE", str(cls.database_read_pool_size))),
+            database_shard_urls=_env_list("DATABASE_SHARD_URLS", ""),
+            environment=os.getenv("ENVIRONMENT", cls.environment).lower(),
+            log_level=os.getenv("LOG_LEVEL", cls.log_level).upper(),
+            cors_allow_origins=_env_list("CORS_ALLOW_ORIGINS", "*"),
+            sqlite_busy_timeout_ms=int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", str(cls.sqlite_busy_timeout_ms))),
+            single_writer=os.getenv("SINGLE_WRITER", cls.single_writer).lower(),
+            group_commit_interval_ms=float(os.getenv("GROUP_COMMIT_INTERVAL_MS", str(cls.group_commit_interval_ms))),
+            usage_partitioning=os.getenv("USAGE_PARTITIONING", cls.usage_partitioning).lower(),
+            sql_query_cache_size=int(os.getenv("SQL_QUERY_CACHE_SIZE", str(cls.sql_query_cache_size))),
+            public_suffix_list=os.getenv("PUBLIC_SUFFIX_LIST") or None,
+            index_check=os.getenv("INDEX_CHECK", cls.index_check).lower(),
+            admin_token=os.getenv("ADMIN_TOKEN") or None,
+            storage_backend=os.getenv("STORAGE_BACKEND", cls.storage_backend).lower(),
+            memory_snapshot_path=os.getenv("MEMORY_SNAPSHOT_PATH") or None,
+            memory_snapshot_interval_seconds=float(
+                os.getenv("MEMORY_SNAPSHOT_INTERVAL_SECONDS", str(cls.memory_snapshot_interval_seconds))
+            ),
+            retention_max_age_days=int(os.getenv("RETENTION_MAX_AGE_DAYS", str(cls.retention_max_age_days))),
+            retention_granularity=os.getenv("RETENTION_GRANULARITY", cls.retention_granularity).lower(),
+            retention_chunk_size=int(os.getenv("RETENTION_CHUNK_SIZE", str(cls.retention_chunk_size))),
+            retention_interval_seconds=float(os.getenv("RETENTION_INTERVAL_SECONDS", str(cls.retention_interval_seconds))),
+            rate_limit_per_second=float(os.getenv("RATE_LIMIT_PER_SECOND", str(cls.rate_limit_per_second))),
+            rate_limit_burst=int(os.getenv("RATE_LIMIT_BURST", str(cls.rate_limit_burst))),
+            max_concurrent_requests=int(os.getenv("MAX_CONCURRENT_REQUESTS", str(cls.max_concurrent_requests))),
+            background_concurrency_share=float(
+                os.getenv("BACKGROUND_CONCURRENCY_SHARE", str(cls.background_concurrency_share))
+            ),
+            sse_max_subscribers=int(os.getenv("SSE_MAX_SUBSCRIBERS", str(cls.sse_max_subscribers))),
+            sse_max_subscribers_per_user=int(
+                os.getenv("SSE_MAX_SUBSCRIBERS_PER_USER", str(cls.sse_max_subscribers_per_user))
+            ),
+            sse_keepalive_seconds=float(os.getenv("SSE_KEEPALIVE_SECONDS", str(cls.sse_keepalive_seconds))),
+            compression_minimum_size=int(os.getenv("COMPRESSION_MINIMUM_SIZE", str(cls.compression_minimum_size))),
+            compression_gzip_level=int(os.getenv("COMPRESSION_GZIP_LEVEL", str(cls.compression_gzip_level))),
+            compression_brotli_quality=int(os.getenv("COMPRESSION_BROTLI_QUALITY", str(cls.compression_brotli_quality))),
+            max_decompressed_body_size=int(os.getenv("MAX_DECOMPRESSED_BODY_SIZE", str(cls.max_decompressed_body_size))),
+        )
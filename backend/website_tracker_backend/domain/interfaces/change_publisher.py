@@ -0,0 +1,21 @@
+"""
+Interface for publishing changes to connected clients (port).
+"""
+from abc import ABC, abstractmethod
+from typing import Dict
+
+
+class ChangePublisher(ABC):
+    """Interface for notifying a user's other devices about changes."""
+    
+    @abstractmethod
+    def publish(self, user_id: str, event_type: str, data: Dict) -> None:
+        """
+        Publish a change to the user's subscribers. Must not block.
+        
+        Args:
+            user_id: User identifier
+            event_type: Event name (e.g. "tracked_sites")
+            data: JSON-serializable event payload
+        """
+        pass
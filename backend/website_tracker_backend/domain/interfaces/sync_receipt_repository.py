@@ -0,0 +1,70 @@
+"""
+Interface for sync receipt repository (port).
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+
+class SyncReceiptRepository(ABC):
+    """Interface for the recent sync requests of each user (idempotency keys and sequences)."""
+    
+    @abstractmethod
+    def get_response(
+        self, user_id: str, endpoint: str, idempotency_key: Optional[str], sequence: Optional[int]
+    ) -> Optional[Dict]:
+        """
+        Get the stored response of an earlier request with the same key or sequence.
+        
+        Args:
+            user_id: User identifier
+            endpoint: Sync endpoint name
+            idempotency_key: Idempotency-Key of the request, if any
+            sequence: Sequence number of the request, if any
+            
+        Returns:
+            Response body of the earlier request, or None
+        """
+        pass
+    
+    @abstractmethod
+    def get_last_sequence(self, user_id: str, endpoint: str) -> Optional[int]:
+        """
+        Get the highest sequence number processed for a user and endpoint.
+        
+        Args:
+            user_id: User identifier
+            endpoint: Sync endpoint name
+            
+        Returns:
+            Sequence number, or None if no request carried one
+        """
+        pass
+    
+    @abstractmethod
+    def save_response(
+        self,
+        user_id: str,
+        endpoint: str,
+        idempotency_key: Optional[str],
+        sequence: Optional[int],
+        response: Dict,
+        keep: int,
+        keep_devices: int,
+    ) -> None:
+        """
+        Store a processed request's response and drop the user's oldest receipts.
+        
+        For a device endpoint ("<endpoint>:<device ID>"), the receipts of the
+        user's devices on that endpoint that were written least recently are
+        dropped as well, so that device IDs cannot grow the store without bound.
+        
+        Args:
+            user_id: User identifier
+            endpoint: Sync endpoint name
+            idempotency_key: Idempotency-Key of the request, if any
+            sequence: Sequence number of the request, if any
+            response: Response body
+            keep: Number of receipts kept per user and endpoint
+            keep_devices: Number of device endpoints kept per user and endpoint
+        """
+        pass
@@ -2,7 +2,8 @@
 Interface for tracked sites repository (port).
 """
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from datetime import datetime
+from typing import Dict, List, Tuple
 
 
 class TrackedSitesRepository(ABC):
@@ -33,6 +34,22 @@ class TrackedSitesRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    def get_tracked_sites_changed_since(
+        self, user_id: str, since: datetime
+    ) -> Tuple[Dict[str, int], List[str]]:
+        """
+        Get the tracked sites added, updated or removed after a time.
+        
+        Args:
+            user_id: User identifier
+            since: Changes at or before this time are left out
+            
+        Returns:
+            Tuple of (changed sites mapping domain to daily limit, removed domains)
+        """
+        pass
+    
     @abstractmethod
     def remove_tracked_sites_not_in_list(self, user_id: str, domains: List[str]) -> None:
         """
@@ -2,8 +2,8 @@
 Interface for usage data repository (port).
 """
 from abc import ABC, abstractmethod
-from datetime import date
-from typing import Dict, List, Optional
+from datetime import date, datetime
+from typing import Dict, List, Optional, Set
 
 
 class UsageRepository(ABC):
@@ -14,6 +14,9 @@ class UsageRepository(ABC):
         """
         Create or update a usage record.
         
+        Minutes synced by devices with a device ID for the same day are
+        kept and added to these.
+        
         Args:
             user_id: User identifier
             domain: Domain name
@@ -22,6 +25,26 @@ class UsageRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    def upsert_device_usage(
+        self, user_id: str, device_id: str, domain: str, usage_date: date, minutes: float
+    ) -> None:
+        """
+        Create or update one device's usage record.
+        
+        The user's usage for the domain and date becomes the sum over
+        their devices plus the minutes synced without a device ID, so
+        devices syncing the same day do not overwrite each other.
+        
+        Args:
+            user_id: User identifier
+            device_id: Device identifier
+            domain: Domain name
+            usage_date: Date of usage
+            minutes: Minutes used on this device
+        """
+        pass
+    
     @abstractmethod
     def get_usage_for_date_range(
         self, user_id: str, start_date: date, end_date: date
@@ -52,3 +75,21 @@ class UsageRepository(ABC):
             List of usage records with domain, date, and minutes
         """
         pass
+    
+    @abstractmethod
+    def get_changed_dates(
+        self, user_id: str, start_date: date, end_date: date, since: datetime
+    ) -> Set[date]:
+        """
+        Get the dates in a range whose usage changed after a time.
+        
+        Args:
+            user_id: User identifier
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+            since: Changes at or before this time are left out
+            
+        Returns:
+            Set of changed dates
+        """
+        pass
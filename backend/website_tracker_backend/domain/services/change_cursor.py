@@ -0,0 +1,87 @@
+"""
+Change cursors for delta reads (?since=<cursor>).
+
+A cursor is the server time (UTC, ISO 8601) at which a read started, minus
+a short overlap. A later read with that cursor returns only rows whose
+updated_at is after it. The overlap covers writes that picked their
+updated_at just before the read but committed after it (e.g. while queued
+on the single writer); clients may receive such rows twice, which is
+harmless since they replace their local copy.
+
+A row is only guaranteed to be returned if it is visible to reads within
+CURSOR_OVERLAP of its updated_at. Reads from the default read-only
+connections to the same SQLite file see every commit at once, but with
+DATABASE_READ_URL pointing at a replica that lags by more than the
+overlap, a change can be missed until the row changes again; clients of
+such deployments should do a full read (without since) now and then.
+
+Removed tracked sites are remembered for CHANGE_HISTORY. A cursor older
+than that gets a full response.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+CURSOR_OVERLAP = timedelta(seconds=5)
+
+# How long removals are kept; older cursors get a full response
+CHANGE_HISTORY = timedelta(days=30)
+
+
+def utc_now() -> datetime:
+    """
+    Current time as naive UTC, the form of every stored timestamp.
+
+    Returns:
+        Current UTC time without tzinfo
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def new_cursor(now: Optional[datetime] = None) -> str:
+    """
+    Create the cursor returned with a read.
+
+    Args:
+        now: Time the read started (defaults to the current UTC time)
+
+    Returns:
+        Cursor string
+    """
+    return ((now or utc_now()) - CURSOR_OVERLAP).isoformat()
+
+
+def parse_cursor(cursor: str) -> datetime:
+    """
+    Read a cursor sent by a client.
+
+    Args:
+        cursor: Cursor returned by an earlier read
+
+    Returns:
+        Time after which changes are returned
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        since = datetime.fromisoformat(cursor)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if since.tzinfo is not None:
+        # Stored timestamps are naive UTC
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+
+def is_expired(since: datetime, now: Optional[datetime] = None) -> bool:
+    """
+    Whether a cursor is too old for removals to be known.
+
+    Args:
+        since: Parsed cursor
+        now: Current UTC time
+
+    Returns:
+        True if the client needs a full response
+    """
+    return since < (now or utc_now()) - CHANGE_HISTORY
@@ -0,0 +1,234 @@
+"""
+Canonical domains: reduce hostnames to their registrable domain (eTLD+1).
+
+www.youtube.com, m.youtube.com and youtube.com are all stored as
+youtube.com, while bbc.co.uk stays bbc.co.uk and alice.github.io stays
+alice.github.io, following the Public Suffix List (PSL) algorithm:
+https://github.com/publicsuffix/list/wiki/Format
+
+Rules are compiled once into a trie keyed by label from the right (a dict per
+label, with "" marking the end of a rule, "*" a wildcard and "!label" an
+exception), so a lookup walks at most as many dicts as the hostname has
+labels. Results are memoized in an LRU cache, since the same few hostnames
+are synced over and over.
+
+The built-in rules cover the multi-label suffixes of common country and
+hosting domains; single-label TLDs need no rule (the PSL's implicit "*"
+rule). Set PUBLIC_SUFFIX_LIST to a downloaded public_suffix_list.dat to use
+the full list.
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+# Multi-label public suffixes (ICANN and private sections of the PSL)
+DEFAULT_RULES = (
+    # United Kingdom
+    "co.uk", "org.uk", "me.uk", "ltd.uk", "plc.uk", "net.uk", "ac.uk", "gov.uk", "sch.uk", "nhs.uk", "police.uk",
+    # Australia / New Zealand
+    "com.au", "net.au", "org.au", "edu.au", "gov.au", "asn.au", "id.au",
+    "co.nz", "net.nz", "org.nz", "ac.nz", "govt.nz", "geek.nz", "school.nz",
+    # Asia
+    "co.jp", "ne.jp", "or.jp", "ac.jp", "go.jp", "ad.jp", "ed.jp", "gr.jp", "lg.jp",
+    "com.cn", "net.cn", "org.cn", "gov.cn", "edu.cn", "ac.cn",
+    "com.hk", "net.hk", "org.hk", "edu.hk", "gov.hk",
+    "com.tw", "net.tw", "org.tw", "edu.tw", "gov.tw",
+    "co.kr", "or.kr", "ne.kr", "ac.kr", "go.kr", "re.kr",
+    "co.in", "net.in", "org.in", "firm.in", "gen.in", "ind.in", "ac.in", "edu.in", "gov.in", "res.in",
+    "com.sg", "net.sg", "org.sg", "edu.sg", "gov.sg",
+    "com.my", "net.my", "org.my", "edu.my", "gov.my",
+    "co.id", "or.id", "ac.id", "go.id", "web.id",
+    "com.ph", "net.ph", "org.ph", "edu.ph", "gov.ph",
+    "com.vn", "net.vn", "org.vn", "edu.vn", "gov.vn",
+    "co.th", "in.th", "or.th", "ac.th", "go.th",
+    "com.pk", "net.pk", "org.pk", "edu.pk", "gov.pk",
+    "co.il", "org.il", "net.il", "ac.il", "gov.il",
+    "com.tr", "net.tr", "org.tr", "edu.tr", "gov.tr",
+    "com.sa", "net.sa", "org.sa", "edu.sa", "gov.sa",
+    "*.bd", "*.np", "*.ck", "!www.ck", "*.kawasaki.jp", "!city.kawasaki.jp",
+    # Americas
+    "com.br", "net.br", "org.br", "edu.br", "gov.br", "art.br", "blog.br",
+    "com.mx", "net.mx", "org.mx", "edu.mx", "gob.mx",
+    "com.ar", "net.ar", "org.ar", "edu.ar", "gob.ar",
+    "com.co", "net.co", "org.co", "edu.co", "gov.co",
+    "com.pe", "net.pe", "org.pe", "edu.pe", "gob.pe",
+    "gc.ca", "qc.ca", "on.ca", "bc.ca", "ab.ca",
+    # Europe / Africa
+    "com.ua", "net.ua", "org.ua", "in.ua", "kiev.ua",
+    "com.pl", "net.pl", "org.pl", "edu.pl", "gov.pl",
+    "co.at", "or.at", "ac.at", "gv.at",
+    "com.es", "nom.es", "org.es", "edu.es", "gob.es",
+    "com.gr", "net.gr", "org.gr", "edu.gr", "gov.gr",
+    "co.za", "org.za", "net.za", "web.za", "gov.za", "ac.za",
+    "com.ng", "net.ng", "org.ng", "edu.ng", "gov.ng",
+    "co.ke", "or.ke", "ne.ke", "ac.ke", "go.ke",
+    "com.eg", "net.eg", "org.eg", "edu.eg", "gov.eg",
+    # Hosting platforms (PSL private section)
+    "github.io", "gitlab.io", "githubusercontent.com", "blogspot.com", "appspot.com", "herokuapp.com",
+    "netlify.app", "vercel.app", "pages.dev", "workers.dev", "web.app", "firebaseapp.com",
+    "azurewebsites.net", "cloudfront.net", "s3.amazonaws.com", "fly.dev", "onrender.com",
+    "glitch.me", "repl.co", "ngrok.io", "readthedocs.io", "myshopify.com", "wixsite.com",
+)
+
+# Hostnames memoized per canonicalizer
+DEFAULT_CACHE_SIZE = 65536
+
+_END = ""
+_WILDCARD = "*"
+_EXCEPTION = "!"
+
+
+def compile_rules(rules: Iterable[str]) -> Dict:
+    """
+    Compile public suffix rules into a trie.
+
+    Args:
+        rules: Rules in PSL format (e.g. "co.uk", "*.ck", "!www.ck")
+
+    Returns:
+        Nested dictionaries keyed by label, rightmost label first
+    """
+    root: Dict = {}
+    for rule in rules:
+        rule = rule.strip().lower()
+        exception = rule.startswith(_EXCEPTION)
+        labels = rule.lstrip(_EXCEPTION).split(".")
+        node = root
+        # The exception's leftmost label is stored as "!label" on its parent
+        for label in reversed(labels[1:] if exception else labels):
+            node = node.setdefault(label, {})
+        if exception:
+            node[_EXCEPTION + labels[0]] = True
+        else:
+            node[_END] = True
+    return root
+
+
+def parse_public_suffix_list(text: str) -> Iterable[str]:
+    """
+    Read the rules of a public_suffix_list.dat file.
+
+    Args:
+        text: File contents
+
+    Returns:
+        Rules, without comments and blank lines
+    """
+    for line in text.splitlines():
+        # Only the first whitespace-separated token of a line is the rule
+        rule = line.strip().split(" ", 1)[0]
+        if not rule or rule.startswith("//"):
+            continue
+        if not rule.isascii():
+            # Hostnames are looked up in their ASCII (punycode) form
+            prefix = _EXCEPTION if rule.startswith(_EXCEPTION) else ""
+            rule = prefix + rule[len(prefix):].encode("idna").decode("ascii")
+        yield rule
+
+
+class DomainCanonicalizer:
+    """Maps hostnames (or URLs) to their registrable domain."""
+
+    def __init__(self, rules: Iterable[str] = DEFAULT_RULES, cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Compile the rules.
+
+        Args:
+            rules: Public suffix rules in PSL format
+            cache_size: Number of hostnames memoized (LRU)
+        """
+        self._trie = compile_rules(rules)
+        self._memo = lru_cache(maxsize=cache_size)(self._canonicalize)
+
+    @classmethod
+    def from_file(cls, path: Path, cache_size: int = DEFAULT_CACHE_SIZE) -> "DomainCanonicalizer":
+        """
+        Build a canonicalizer from a public_suffix_list.dat file.
+
+        Args:
+            path: Path of the file
+            cache_size: Number of hostnames memoized (LRU)
+
+        Returns:
+            DomainCanonicalizer using the file's rules
+        """
+        return cls(parse_public_suffix_list(Path(path).read_text(encoding="utf-8")), cache_size)
+
+    def canonicalize(self, value: str) -> str:
+        """
+        Get the canonical domain of a hostname.
+
+        Args:
+            value: Hostname, domain or URL (e.g. "https://m.youtube.com/watch")
+
+        Returns:
+            Registrable domain (e.g. "youtube.com"); public suffixes, IP
+            addresses and single-label names are returned normalized but
+            otherwise unchanged
+        """
+        return self._memo(value)
+
+    def _canonicalize(self, value: str) -> str:
+        host = value.strip().lower()
+        if "://" in host:
+            host = host.split("://", 1)[1]
+        host = host.split("/", 1)[0].split("?", 1)[0].rsplit("@", 1)[-1]
+        if host.startswith("["):
+            return host  # IPv6 literal
+        host = host.split(":", 1)[0].strip(".")
+
+        if not host.isascii():
+            try:
+                host = host.encode("idna").decode("ascii")
+            except UnicodeError:
+                return host
+        labels = host.split(".")
+        if len(labels) < 2 or labels[-1].isdigit():
+            return host  # single label or IPv4 address
+
+        # Number of labels in the public suffix; the implicit "*" rule makes it at least 1
+        suffix_length = 1
+        node = self._trie
+        for depth, label in enumerate(reversed(labels)):
+            if _EXCEPTION + label in node:
+                suffix_length = depth
+                break
+            if _WILDCARD in node:
+                suffix_length = depth + 1
+            node = node.get(label)
+            if node is None:
+                break
+            if _END in node:
+                suffix_length = depth + 1
+
+        if len(labels) <= suffix_length:
+            return ".".join(labels)
+        return ".".join(labels[-suffix_length - 1:])
+
+    def cache_info(self):
+        """
+        Get the memo's hit/miss statistics.
+
+        Returns:
+            functools cache info (hits, misses, maxsize, currsize)
+        """
+        return self._memo.cache_info()
+
+
+_default_canonicalizer: Optional[DomainCanonicalizer] = None
+
+
+def get_default_canonicalizer() -> DomainCanonicalizer:
+    """
+    Get the shared canonicalizer with the built-in rules, built on first use.
+
+    Applications configured with PUBLIC_SUFFIX_LIST build their own instead.
+
+    Returns:
+        DomainCanonicalizer
+    """
+    global _default_canonicalizer
+    if _default_canonicalizer is None:
+        _default_canonicalizer = DomainCanonicalizer()
+    return _default_canonicalizer
+
@@ -0,0 +1,103 @@
+"""
+Domain service for idempotent and ordered sync requests.
+
+Clients may send an Idempotency-Key (the same key on every retry of one
+request) and/or a sequence number that increases with every sync request
+the client makes. A retry is answered with the stored response of the
+first attempt, and a request whose sequence is lower than one already
+processed is stale (an older snapshot overtaken by a newer one) and is
+dropped. Neither touches the usage tables.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from ..interfaces.sync_receipt_repository import SyncReceiptRepository
+
+# Receipts kept per user and endpoint; retries arrive within seconds
+RECEIPTS_PER_ENDPOINT = 50
+
+# Devices (X-Device-ID) whose receipts are kept per user and endpoint; a
+# device not seen among the most recent ones starts without receipts
+DEVICES_PER_ENDPOINT = 10
+
+
+@dataclass
+class SyncCheck:
+    """Outcome of checking a sync request against earlier ones."""
+
+    replay: Optional[Dict] = None  # stored response of the same request
+    stale: bool = False  # overtaken by a request with a higher sequence
+
+
+class SyncReceiptService:
+    """Service recognizing repeated and out-of-order sync requests."""
+    
+    def __init__(
+        self,
+        sync_receipt_repository: SyncReceiptRepository,
+        keep: int = RECEIPTS_PER_ENDPOINT,
+        keep_devices: int = DEVICES_PER_ENDPOINT,
+    ):
+        """
+        Initialize sync receipt service.
+        
+        Args:
+            sync_receipt_repository: Repository for sync receipts
+            keep: Number of receipts kept per user and endpoint
+            keep_devices: Number of devices whose receipts are kept per user and endpoint
+        """
+        self._sync_receipt_repository = sync_receipt_repository
+        self._keep = keep
+        self._keep_devices = keep_devices
+    
+    def check(
+        self, user_id: str, endpoint: str, idempotency_key: Optional[str], sequence: Optional[int]
+    ) -> SyncCheck:
+        """
+        Check whether a sync request was already processed or is stale.
+        
+        Args:
+            user_id: User identifier
+            endpoint: Sync endpoint name
+            idempotency_key: Idempotency-Key header, if sent
+            sequence: Sequence header, if sent
+            
+        Returns:
+            SyncCheck; process the request only if it has no replay and is not stale
+        """
+        if idempotency_key is None and sequence is None:
+            return SyncCheck()
+        
+        replay = self._sync_receipt_repository.get_response(user_id, endpoint, idempotency_key, sequence)
+        if replay is not None:
+            return SyncCheck(replay=replay)
+        
+        if sequence is not None:
+            last_sequence = self._sync_receipt_repository.get_last_sequence(user_id, endpoint)
+            if last_sequence is not None and sequence <= last_sequence:
+                return SyncCheck(stale=True)
+        return SyncCheck()
+    
+    def record(
+        self,
+        user_id: str,
+        endpoint: str,
+        idempotency_key: Optional[str],
+        sequence: Optional[int],
+        response: Dict,
+    ) -> None:
+        """
+        Remember a processed request so retries can be answered from its response.
+        
+        Args:
+            user_id: User identifier
+            endpoint: Sync endpoint name
+            idempotency_key: Idempotency-Key header, if sent
+            sequence: Sequence header, if sent
+            response: Response body returned to the client
+        """
+        if idempotency_key is None and sequence is None:
+            return
+        self._sync_receipt_repository.save_response(
+            user_id, endpoint, idempotency_key, sequence, response, self._keep, self._keep_devices
+        )
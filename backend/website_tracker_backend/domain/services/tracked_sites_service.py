@@ -1,27 +1,47 @@
 """
 Domain service for tracked sites business logic.
 """
-from typing import Dict
+from typing import Dict, Optional, Tuple
+import hashlib
+import json
 
+from ..interfaces.change_publisher import ChangePublisher
 from ..interfaces.tracked_sites_repository import TrackedSitesRepository
+from .change_cursor import is_expired, new_cursor, parse_cursor
+from .domain_canonicalizer import DomainCanonicalizer, get_default_canonicalizer
 
 
 class TrackedSitesService:
     """Service for tracked sites business logic."""
     
-    def __init__(self, tracked_sites_repository: TrackedSitesRepository):
+    def __init__(
+        self,
+        tracked_sites_repository: TrackedSitesRepository,
+        canonicalizer: Optional[DomainCanonicalizer] = None,
+        change_publisher: Optional[ChangePublisher] = None,
+    ):
         """
         Initialize tracked sites service.
         
         Args:
             tracked_sites_repository: Repository for tracked sites
+            canonicalizer: Maps synced hostnames to canonical domains
+                (defaults to the built-in rules)
+            change_publisher: Optional publisher notifying the user's
+                other devices after a sync
         """
         self._tracked_sites_repository = tracked_sites_repository
+        self._canonicalizer = canonicalizer or get_default_canonicalizer()
+        self._change_publisher = change_publisher
     
     def sync_tracked_sites(self, user_id: str, tracked_sites: Dict[str, int]) -> int:
         """
         Sync tracked sites for a user.
         
+        Hostnames are reduced to their canonical domain first; when several
+        map to the same domain, the lowest limit is kept. The stored sites
+        are then published as a "tracked_sites" event.
+        
         Args:
             user_id: User identifier
             tracked_sites: Dictionary mapping domain to daily limit
@@ -29,17 +49,29 @@ class TrackedSitesService:
         Returns:
             Number of sites synced
         """
+        canonical_sites: Dict[str, int] = {}
+        for hostname, limit in tracked_sites.items():
+            domain = self._canonicalizer.canonicalize(hostname)
+            if domain:
+                canonical_sites[domain] = min(limit, canonical_sites.get(domain, limit))
+        
         synced_count = 0
-        for domain, limit in tracked_sites.items():
+        for domain, limit in canonical_sites.items():
             self._tracked_sites_repository.upsert_tracked_site(user_id, domain, limit)
             synced_count += 1
         
         # Remove sites not in the request
-        existing_domains = list(tracked_sites.keys())
+        existing_domains = list(canonical_sites.keys())
         self._tracked_sites_repository.remove_tracked_sites_not_in_list(
             user_id, existing_domains
         )
         
+        if self._change_publisher is not None:
+            self._change_publisher.publish(user_id, "tracked_sites", {
+                "trackedSitesHash": self.hash_tracked_sites(canonical_sites),
+                "trackedSites": canonical_sites,
+            })
+        
         return synced_count
     
     def get_tracked_sites(self, user_id: str) -> Dict[str, int]:
@@ -53,3 +85,71 @@ class TrackedSitesService:
             Dictionary mapping domain to daily limit
         """
         return self._tracked_sites_repository.get_tracked_sites(user_id)
+    
+    def get_tracked_sites_since(self, user_id: str, since: Optional[str]) -> Dict:
+        """
+        Get the tracked sites changed since a cursor, or all of them.
+        
+        Args:
+            user_id: User identifier
+            since: Cursor returned by an earlier call, or None for all sites
+            
+        Returns:
+            Dictionary with trackedSites (changed or all), removed domains,
+            the cursor for the next call, and full (True if trackedSites
+            holds every site)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        cursor = new_cursor()
+        if since:
+            since_time = parse_cursor(since)
+            if not is_expired(since_time):
+                changed, removed = self._tracked_sites_repository.get_tracked_sites_changed_since(
+                    user_id, since_time
+                )
+                return {'trackedSites': changed, 'removed': removed, 'cursor': cursor, 'full': False}
+        
+        return {
+            'trackedSites': self._tracked_sites_repository.get_tracked_sites(user_id),
+            'removed': [],
+            'cursor': cursor,
+            'full': True,
+        }
+    
+    def get_tracked_sites_if_changed(
+        self, user_id: str, client_hash: Optional[str]
+    ) -> Tuple[str, Optional[Dict[str, int]]]:
+        """
+        Get tracked sites only if they differ from the client's copy.
+        
+        Args:
+            user_id: User identifier
+            client_hash: Hash of the client's tracked sites (see hash_tracked_sites)
+            
+        Returns:
+            Tuple of (server hash, tracked sites or None if the hashes match)
+        """
+        tracked_sites = self._tracked_sites_repository.get_tracked_sites(user_id)
+        server_hash = self.hash_tracked_sites(tracked_sites)
+        if client_hash == server_hash:
+            return server_hash, None
+        return server_hash, tracked_sites
+    
+    @staticmethod
+    def hash_tracked_sites(tracked_sites: Dict[str, int]) -> str:
+        """
+        Compute a stable hash of a tracked sites map.
+        
+        The hash is the SHA-256 hex digest of the map serialized as compact
+        JSON with sorted keys, e.g. {"reddit.com":30,"youtube.com":60}.
+        
+        Args:
+            tracked_sites: Dictionary mapping domain to daily limit
+            
+        Returns:
+            Hex digest string
+        """
+        canonical = json.dumps(tracked_sites, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
@@ -0,0 +1,258 @@
+"""
+Domain service for rolling-window usage trends.
+
+Trends are computed over dense daily series (one value per calendar day,
+zero when nothing was synced) using prefix sums: every rolling window sum is
+the difference of two prefix sums, so a window average costs the same for a
+7-day or a 365-day history and no window is summed day by day.
+
+The history before today only changes when an older day is synced again, so
+it is cached per user and day (TrendCache). A request then reads just
+today's usage and the days of the history changed since it was read
+(get_changed_dates, one indexed query), and appends today to the cached
+series unless a day changed. Changes made by other worker processes are
+seen the same way, within the change cursor's overlap.
+"""
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from itertools import accumulate, compress, repeat
+from operator import ge, mul, sub
+from typing import Dict, List, Optional, Tuple
+import threading
+
+from ..interfaces.usage_repository import UsageRepository
+from ..interfaces.tracked_sites_repository import TrackedSitesRepository
+from .change_cursor import CURSOR_OVERLAP, utc_now
+
+# Days of history behind today used for averages and streaks
+HISTORY_DAYS = 365
+
+# Longest rolling window; the history is fetched this much further back so
+# the first reported day has a full window
+MAX_WINDOW = 30
+
+
+def window_sums(prefix: List[float], window: int) -> List[float]:
+    """
+    Sum every window of consecutive days.
+
+    Args:
+        prefix: Prefix sums of the daily series, starting with 0
+        window: Window length in days
+
+    Returns:
+        Sums of the windows ending on each day from day window - 1 on
+    """
+    return list(map(sub, prefix[window:], prefix[:-window]))
+
+
+def rolling_means(prefix: List[float], window: int) -> List[float]:
+    """
+    Average every window of consecutive days.
+
+    Args:
+        prefix: Prefix sums of the daily series, starting with 0
+        window: Window length in days
+
+    Returns:
+        Averages of the windows ending on each day from day window - 1 on
+    """
+    return list(map(mul, window_sums(prefix, window), repeat(1 / window)))
+
+
+def limit_streaks(values: List[float], limit: int) -> Tuple[int, int]:
+    """
+    Find runs of consecutive days under a limit.
+
+    Args:
+        values: Daily minutes, oldest first
+        limit: Daily limit in minutes
+
+    Returns:
+        (current streak ending on the last day, longest streak)
+    """
+    over = list(compress(range(len(values)), map(ge, values, repeat(limit))))
+    # Runs are the gaps between days at or over the limit
+    bounds = [-1, *over, len(values)]
+    longest = max(map(sub, bounds[1:], bounds[:-1])) - 1
+    return len(values) - 1 - bounds[-2], longest
+
+
+class TrendCache:
+    """Daily series before today, per user and day, shared between requests."""
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Least recently used entries beyond this are evicted
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, date], Tuple[datetime, Dict[str, List[float]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, today: date) -> Optional[Tuple[datetime, Dict[str, List[float]]]]:
+        """
+        Get a user's cached history.
+
+        Args:
+            user_id: User identifier
+            today: Day the history ends before
+
+        Returns:
+            (time changes are checked from, dictionary mapping domain to
+            daily minutes), or None if not cached
+        """
+        key = (user_id, today)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, user_id: str, today: date, series: Dict[str, List[float]], since: datetime) -> None:
+        """
+        Cache a user's history.
+
+        Args:
+            user_id: User identifier
+            today: Day the history ends before
+            series: Dictionary mapping domain to daily minutes
+            since: Usage changed after this time may be missing from series
+        """
+        with self._lock:
+            self._entries[(user_id, today)] = (since, series)
+            self._entries.move_to_end((user_id, today))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str, usage_date: date) -> None:
+        """
+        Drop a user's cached histories that include a day.
+
+        Args:
+            user_id: User identifier
+            usage_date: Day whose usage changed
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id and usage_date < key[1]]:
+                del self._entries[key]
+
+
+class TrendService:
+    """Service for rolling-window usage trends."""
+
+    def __init__(
+        self,
+        usage_repository: UsageRepository,
+        tracked_sites_repository: TrackedSitesRepository,
+        cache: Optional[TrendCache] = None,
+    ):
+        """
+        Initialize trend service.
+
+        Args:
+            usage_repository: Repository for usage data
+            tracked_sites_repository: Repository for tracked sites
+            cache: Cache of history before today (None disables caching)
+        """
+        self._usage_repository = usage_repository
+        self._tracked_sites_repository = tracked_sites_repository
+        self._cache = cache
+
+    def get_trends(self, user_id: str, today: date, days: int = 30) -> Dict:
+        """
+        Get rolling averages, week-over-week change and limit streaks per tracked domain.
+
+        Args:
+            user_id: User identifier
+            today: Last day of the trends
+            days: Number of days in each domain's daily series (1-365)
+
+        Returns:
+            Dictionary with date and per-domain trends
+        """
+        if not 1 <= days <= HISTORY_DAYS:
+            raise ValueError(f"days must be between 1 and {HISTORY_DAYS}")
+
+        domain_limits = self._tracked_sites_repository.get_tracked_sites(user_id)
+        history = self._history(user_id, today)
+        today_usage = {
+            record['domain']: record['minutes']
+            for record in self._usage_repository.get_usage_for_date(user_id, today)
+        }
+        length = HISTORY_DAYS + MAX_WINDOW
+        first_day = today - timedelta(days=length - 1)
+
+        domains = []
+        for domain, limit in domain_limits.items():
+            values = history.get(domain, [0.0] * (length - 1)) + [today_usage.get(domain, 0.0)]
+            prefix = list(accumulate(values, initial=0.0))
+            averages7 = rolling_means(prefix, 7)
+            averages30 = rolling_means(prefix, 30)
+            week, previous_week = prefix[-1] - prefix[-8], prefix[-8] - prefix[-15]
+            current_streak, longest_streak = limit_streaks(values[MAX_WINDOW:], limit) if limit > 0 else (None, None)
+
+            series_start = length - days
+            series = [
+                {
+                    'date': (first_day + timedelta(days=index)).strftime('%Y-%m-%d'),
+                    'minutes': values[index],
+                    'average7': round(average7, 1),
+                    'average30': round(average30, 1),
+                }
+                for index, average7, average30 in zip(
+                    range(series_start, length), averages7[series_start - 6:], averages30[series_start - 29:]
+                )
+            ]
+            domains.append({
+                'domain': domain,
+                'limit': limit,
+                'minutes': values[-1],
+                'average7': round(averages7[-1], 1),
+                'average30': round(averages30[-1], 1),
+                'weekTotal': round(week, 1),
+                'previousWeekTotal': round(previous_week, 1),
+                'weekOverWeek': round(week - previous_week, 1),
+                'weekOverWeekPercent': (
+                    round((week - previous_week) / previous_week * 100, 1) if previous_week > 0 else None
+                ),
+                'currentStreak': current_streak,
+                'longestStreak': longest_streak,
+                'series': series,
+            })
+
+        return {
+            'date': today.strftime('%Y-%m-%d'),
+            'domains': domains,
+        }
+
+    def _history(self, user_id: str, today: date) -> Dict[str, List[float]]:
+        """Dense daily series per domain for the days before today, from the cache if possible."""
+        length = HISTORY_DAYS + MAX_WINDOW - 1
+        start_date = today - timedelta(days=length)
+        if self._cache is not None:
+            cached = self._cache.get(user_id, today)
+            # Any process may have synced an older day since the history was read
+            if cached is not None and not self._usage_repository.get_changed_dates(
+                user_id, start_date, today - timedelta(days=1), cached[0]
+            ):
+                return cached[1]
+
+        # Writes queued before the read may commit after it (see change_cursor.py)
+        since = utc_now() - CURSOR_OVERLAP
+        records = self._usage_repository.get_usage_for_date_range(
+            user_id, start_date, today - timedelta(days=1)
+        )
+        history: Dict[str, List[float]] = {}
+        for record in records:
+            values = history.get(record['domain'])
+            if values is None:
+                values = history[record['domain']] = [0.0] * length
+            values[(record['date'] - start_date).days] += record['minutes']
+
+        if self._cache is not None:
+            self._cache.put(user_id, today, history, since)
+        return history
@@ -2,11 +2,17 @@
 Domain service for usage-related business logic.
 """
 from datetime import date, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 import calendar
 
 from ..interfaces.usage_repository import UsageRepository
 from ..interfaces.tracked_sites_repository import TrackedSitesRepository
+from .change_cursor import is_expired, new_cursor, parse_cursor
+from .domain_canonicalizer import DomainCanonicalizer, get_default_canonicalizer
+from .trend_service import TrendCache
+
+# Months returned by one get_calendar_months call
+MAX_CALENDAR_MONTHS = 12
 
 
 class UsageService:
@@ -16,6 +22,8 @@ class UsageService:
         self,
         usage_repository: UsageRepository,
         tracked_sites_repository: TrackedSitesRepository,
+        trend_cache: Optional[TrendCache] = None,
+        canonicalizer: Optional[DomainCanonicalizer] = None,
     ):
         """
         Initialize usage service.
@@ -23,47 +31,103 @@ class UsageService:
         Args:
             usage_repository: Repository for usage data
             tracked_sites_repository: Repository for tracked sites
+            trend_cache: Trend history cache to invalidate when older days are synced
+            canonicalizer: Maps synced hostnames to canonical domains
+                (defaults to the built-in rules)
         """
         self._usage_repository = usage_repository
         self._tracked_sites_repository = tracked_sites_repository
+        self._trend_cache = trend_cache
+        self._canonicalizer = canonicalizer or get_default_canonicalizer()
     
-    def sync_usage(self, user_id: str, usage_date: date, usage_data: Dict[str, float]) -> int:
+    def sync_usage(
+        self,
+        user_id: str,
+        usage_date: date,
+        usage_data: Dict[str, float],
+        device_id: Optional[str] = None,
+    ) -> int:
         """
         Sync usage data for a specific date.
         
+        Hostnames are reduced to their canonical domain first, and the
+        minutes of hostnames sharing one (e.g. www.youtube.com and
+        m.youtube.com) are added up.
+        
+        With a device ID the minutes are stored for that device and the
+        user's usage becomes the sum over their devices; without one they
+        are the share of devices that send no ID, added to that sum.
+        
         Args:
             user_id: User identifier
             usage_date: Date of usage
             usage_data: Dictionary mapping domain to minutes
+            device_id: Identifier of the syncing device, if sent
             
         Returns:
             Number of records synced
         """
+        canonical_usage: Dict[str, float] = {}
+        for hostname, minutes in usage_data.items():
+            domain = self._canonicalizer.canonicalize(hostname)
+            if domain:
+                canonical_usage[domain] = canonical_usage.get(domain, 0.0) + minutes
+        
         synced_count = 0
-        for domain, minutes in usage_data.items():
-            self._usage_repository.upsert_usage(user_id, domain, usage_date, minutes)
+        for domain, minutes in canonical_usage.items():
+            if device_id:
+                self._usage_repository.upsert_device_usage(user_id, device_id, domain, usage_date, minutes)
+            else:
+                self._usage_repository.upsert_usage(user_id, domain, usage_date, minutes)
             synced_count += 1
+        if self._trend_cache is not None and usage_data:
+            self._trend_cache.invalidate(user_id, usage_date)
         return synced_count
     
     def get_calendar_month(
-        self, user_id: str, year: int, month: int
+        self, user_id: str, year: int, month: int, since: Optional[str] = None
     ) -> Dict:
         """
         Get calendar month data with usage information.
         
+        With a cursor from an earlier call, only the days whose usage
+        changed since are returned. If tracked sites changed (limits decide
+        each day's status) or the cursor is too old, every day is returned.
+        
         Args:
             user_id: User identifier
             year: Year (e.g., 2024)
             month: Month (1-12)
+            since: Cursor returned by an earlier call, or None for all days
             
         Returns:
-            Dictionary with year, month, and days list
+            Dictionary with year, month, days list, the cursor for the next
+            call, and full (True if days holds every day of the month)
+            
+        Raises:
+            ValueError: If the date or cursor is invalid
         """
+        cursor = new_cursor()
+        
         # Get date range for the month
         first_day = date(year, month, 1)
         last_day_num = calendar.monthrange(year, month)[1]
         last_day = date(year, month, last_day_num)
         
+        changed_dates = None
+        if since:
+            since_time = parse_cursor(since)
+            if not is_expired(since_time):
+                changed_sites, removed_sites = self._tracked_sites_repository.get_tracked_sites_changed_since(
+                    user_id, since_time
+                )
+                if not changed_sites and not removed_sites:
+                    changed_dates = self._usage_repository.get_changed_dates(
+                        user_id, first_day, last_day, since_time
+                    )
+        if changed_dates is not None and not changed_dates:
+            return {'year': year, 'month': month, 'days': [], 'cursor': cursor, 'full': False}
+        
         # Get usage records for the month
         usage_records = self._usage_repository.get_usage_for_date_range(
             user_id, first_day, last_day
@@ -72,19 +136,113 @@ class UsageService:
         # Get tracked sites
         domain_limits = self._tracked_sites_repository.get_tracked_sites(user_id)
         
+        return {
+            'year': year,
+            'month': month,
+            'days': self._build_calendar_days(first_day, last_day, usage_records, domain_limits, changed_dates),
+            'cursor': cursor,
+            'full': changed_dates is None,
+        }
+    
+    def get_calendar_months(self, user_id: str, year: int, month: int, count: int) -> Dict:
+        """
+        Get several consecutive calendar months at once.
+        
+        Reads usage for the whole span with one range query and the tracked
+        sites once, instead of once per month.
+        
+        Args:
+            user_id: User identifier
+            year: Year of the first month
+            month: First month (1-12)
+            count: Number of months (1 to MAX_CALENDAR_MONTHS)
+            
+        Returns:
+            Dictionary with the months (each as returned by
+            get_calendar_month) and the cursor for later delta reads
+            
+        Raises:
+            ValueError: If the date or count is invalid
+        """
+        if count < 1 or count > MAX_CALENDAR_MONTHS:
+            raise ValueError(f"months must be between 1 and {MAX_CALENDAR_MONTHS}")
+        cursor = new_cursor()
+        
+        first_day = date(year, month, 1)
+        last_index = year * 12 + month - 1 + count - 1
+        last_year, last_month = divmod(last_index, 12)
+        last_day = date(last_year, last_month + 1, calendar.monthrange(last_year, last_month + 1)[1])
+        
+        usage_records = self._usage_repository.get_usage_for_date_range(user_id, first_day, last_day)
+        domain_limits = self._tracked_sites_repository.get_tracked_sites(user_id)
+        
+        records_by_month: Dict[Tuple[int, int], List[Dict]] = {}
+        for record in usage_records:
+            key = (record['date'].year, record['date'].month)
+            records_by_month.setdefault(key, []).append(record)
+        
+        months = []
+        for index in range(year * 12 + month - 1, last_index + 1):
+            month_year, month_number = divmod(index, 12)
+            month_number += 1
+            month_first = date(month_year, month_number, 1)
+            month_last = date(month_year, month_number, calendar.monthrange(month_year, month_number)[1])
+            months.append({
+                'year': month_year,
+                'month': month_number,
+                'days': self._build_calendar_days(
+                    month_first,
+                    month_last,
+                    records_by_month.get((month_year, month_number), []),
+                    domain_limits,
+                ),
+                'cursor': cursor,
+                'full': True,
+            })
+        
+        return {'months': months, 'cursor': cursor}
+    
+    @staticmethod
+    def _build_calendar_days(
+        first_day: date,
+        last_day: date,
+        usage_records: List[Dict],
+        domain_limits: Dict[str, int],
+        changed_dates: Optional[Set[date]] = None,
+    ) -> List[Dict]:
+        """
+        Build the calendar days of a date range.
+        
+        Args:
+            first_day: First day (inclusive)
+            last_day: Last day (inclusive)
+            usage_records: Usage records of the range
+            domain_limits: Dictionary mapping domain to daily limit
+            changed_dates: Only build these days if given
+            
+        Returns:
+            List of calendar day dictionaries
+        """
         # Group usage by date
         usage_by_date: Dict[date, Dict[str, float]] = {}
+        coarse_dates = set()
         for record in usage_records:
             record_date = record['date']
             if record_date not in usage_by_date:
                 usage_by_date[record_date] = {}
             usage_by_date[record_date][record['domain']] = record['minutes']
+            if record.get('coarse'):
+                # Estimated from a weekly/monthly rollup of old data
+                coarse_dates.add(record_date)
         
         # Build calendar days
         days = []
         current_date = first_day
         
         while current_date <= last_day:
+            if changed_dates is not None and current_date not in changed_dates:
+                current_date += timedelta(days=1)
+                continue
             day_usage = usage_by_date.get(current_date, {})
             total_usage = sum(day_usage.values())
             
@@ -114,15 +272,12 @@ class UsageService:
                 'domainUsage': day_usage,
                 'limitReached': limit_reached,
                 'domains': domain_details,
+                'coarse': current_date in coarse_dates,
             })
             
             current_date += timedelta(days=1)
         
-        return {
-            'year': year,
-            'month': month,
-            'days': days,
-        }
+        return days
     
     def get_day_details(self, user_id: str, usage_date: date) -> Dict:
         """
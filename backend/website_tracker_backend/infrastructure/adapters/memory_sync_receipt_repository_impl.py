@@ -0,0 +1,113 @@
+"""
+In-memory implementation of SyncReceiptRepository (see infrastructure/memory/store.py).
+"""
+from typing import Dict, Optional
+import json
+
+from ...domain.interfaces.sync_receipt_repository import SyncReceiptRepository
+from ..memory.store import MemoryStore, Receipt
+
+
+class MemorySyncReceiptRepository(SyncReceiptRepository):
+    """Sync receipt repository backed by a MemoryStore."""
+    
+    def __init__(self, store: MemoryStore):
+        """
+        Initialize repository with a store.
+        
+        Args:
+            store: Store holding every user's data
+        """
+        self._store = store
+    
+    def get_response(
+        self, user_id: str, endpoint: str, idempotency_key: Optional[str], sequence: Optional[int]
+    ) -> Optional[Dict]:
+        """
+        Get the stored response of an earlier request with the same key or sequence.
+        
+        Args:
+            user_id: User identifier
+            endpoint: Sync endpoint name
+            idempotency_key: Idempotency-Key of the request, if any
+            sequence: Sequence number of the request, if any
+            
+        Returns:
+            Response body of the earlier request, or None
+        """
+        if idempotency_key is None and sequence is None:
+            return None
+        
+        with self._store.lock:
+            data = self._store.find(user_id)
+            receipts = data.receipts.get(endpoint, []) if data is not None else []
+            for receipt in receipts:
+                if (
+                    (idempotency_key is not None and receipt.idempotency_key == idempotency_key)
+                    or (sequence is not None and receipt.sequence == sequence)
+                ):
+                    return json.loads(receipt.response)
+        return None
+    
+    def get_last_sequence(self, user_id: str, endpoint: str) -> Optional[int]:
+        """
+        Get the highest sequence number processed for a user and endpoint.
+        
+        Args:
+            user_id: User identifier
+            endpoint: Sync endpoint name
+            
+        Returns:
+            Sequence number, or None if no request carried one
+        """
+        with self._store.lock:
+            data = self._store.find(user_id)
+            receipts = data.receipts.get(endpoint, []) if data is not None else []
+            return max(
+                (receipt.sequence for receipt in receipts if receipt.sequence is not None),
+                default=None,
+            )
+    
+    def save_response(
+        self,
+        user_id: str,
+        endpoint: str,
+        idempotency_key: Optional[str],
+        sequence: Optional[int],
+        response: Dict,
+        keep: int,
+        keep_devices: int,
+    ) -> None:
+        """
+        Store a processed request's response and drop the user's oldest receipts.
+        
+        Args:
+            user_id: User identifier
+            endpoint: Sync endpoint name
+            idempotency_key: Idempotency-Key of the request, if any
+            sequence: Sequence number of the request, if any
+            response: Response body
+            keep: Number of receipts kept per user and endpoint
+            keep_devices: Number of device endpoints kept per user and endpoint
+        """
+        with self._store.lock:
+            endpoints = self._store.for_write(user_id).receipts
+            receipts = endpoints.setdefault(endpoint, [])
+            if idempotency_key is not None and any(
+                receipt.idempotency_key == idempotency_key for receipt in receipts
+            ):
+                # A concurrent retry of the same request got here first
+                return
+            receipts.append(Receipt(idempotency_key, sequence, json.dumps(response)))
+            # Bounded store: keep the newest receipts only
+            del receipts[:-keep]
+            
+            # Keep the most recently written device endpoints only; endpoints
+            # are in the order they were last written
+            name, device_separator, _ = endpoint.partition(":")
+            if not device_separator:
+                return
+            endpoints[endpoint] = endpoints.pop(endpoint)
+            device_endpoints = [other for other in endpoints if other.startswith(f"{name}:")]
+            for expired in device_endpoints[:-keep_devices]:
+                del endpoints[expired]
@@ -0,0 +1,115 @@
+"""
+In-memory implementation of TrackedSitesRepository (see infrastructure/memory/store.py).
+
+Removed sites leave a tombstone for CHANGE_HISTORY, as in the SQL
+implementation.
+"""
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from ...domain.interfaces.tracked_sites_repository import TrackedSitesRepository
+from ...domain.services.change_cursor import CHANGE_HISTORY, utc_now
+from ..memory.store import MemoryStore, SiteEntry
+
+
+class MemoryTrackedSitesRepository(TrackedSitesRepository):
+    """Tracked sites repository backed by a MemoryStore."""
+    
+    def __init__(self, store: MemoryStore):
+        """
+        Initialize repository with a store.
+        
+        Args:
+            store: Store holding every user's data
+        """
+        self._store = store
+    
+    def upsert_tracked_site(self, user_id: str, domain: str, daily_limit: int) -> None:
+        """
+        Create or update a tracked site.
+        
+        Args:
+            user_id: User identifier
+            domain: Domain name
+            daily_limit: Daily limit in minutes
+        """
+        with self._store.lock:
+            sites = self._store.for_write(user_id).sites
+            site = sites.get(domain)
+            if site is None:
+                sites[domain] = SiteEntry(daily_limit, utc_now())
+            elif site.daily_limit != daily_limit:
+                # Like the SQL row, updated_at only moves when the limit does
+                site.daily_limit = daily_limit
+                site.updated_at = utc_now()
+    
+    def get_tracked_sites(self, user_id: str) -> Dict[str, int]:
+        """
+        Get all tracked sites for a user.
+        
+        Args:
+            user_id: User identifier
+            
+        Returns:
+            Dictionary mapping domain to daily limit
+        """
+        with self._store.lock:
+            data = self._store.find(user_id)
+            if data is None:
+                return {}
+            return {domain: site.daily_limit for domain, site in data.sites.items()}
+    
+    def get_tracked_sites_changed_since(
+        self, user_id: str, since: datetime
+    ) -> Tuple[Dict[str, int], List[str]]:
+        """
+        Get the tracked sites added, updated or removed after a time.
+        
+        Args:
+            user_id: User identifier
+            since: Changes at or before this time are left out
+            
+        Returns:
+            Tuple of (changed sites mapping domain to daily limit, removed domains)
+        """
+        with self._store.lock:
+            data = self._store.find(user_id)
+            if data is None:
+                return {}, []
+            changed = {
+                domain: site.daily_limit
+                for domain, site in data.sites.items()
+                if site.updated_at > since
+            }
+            # A site removed and added again is reported as changed only
+            removed = [
+                domain for domain, removed_at in data.removals.items()
+                if removed_at > since and domain not in changed
+            ]
+        return changed, sorted(removed)
+    
+    def remove_tracked_sites_not_in_list(self, user_id: str, domains: List[str]) -> None:
+        """
+        Remove tracked sites that are not in the provided list.
+        
+        Args:
+            user_id: User identifier
+            domains: List of domains to keep
+        """
+        keep = set(domains)
+        with self._store.lock:
+            data = self._store.find(user_id)
+            if data is None:
+                return
+            removed = [domain for domain in data.sites if domain not in keep]
+            if not removed:
+                return
+            data = self._store.for_write(user_id)
+            now = utc_now()
+            for domain in removed:
+                del data.sites[domain]
+                data.removals[domain] = now
+            data.removals = {
+                domain: removed_at for domain, removed_at in data.removals.items()
+                if removed_at >= now - CHANGE_HISTORY
+            }
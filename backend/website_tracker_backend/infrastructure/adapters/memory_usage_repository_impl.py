@@ -0,0 +1,134 @@
+"""
+In-memory implementation of UsageRepository (see infrastructure/memory/store.py).
+
+Rollups and leaderboard counters are not kept: the retention job and
+GET /api/admin/leaderboard need the SQL backend.
+"""
+from datetime import date, datetime
+from typing import Dict, List, Set
+
+from ...domain.interfaces.usage_repository import UsageRepository
+from ...domain.services.change_cursor import utc_now
+from ..memory.store import MemoryStore
+
+
+class MemoryUsageRepository(UsageRepository):
+    """Usage repository backed by a MemoryStore."""
+    
+    def __init__(self, store: MemoryStore):
+        """
+        Initialize repository with a store.
+        
+        Args:
+            store: Store holding every user's data
+        """
+        self._store = store
+    
+    def upsert_usage(self, user_id: str, domain: str, usage_date: date, minutes: float) -> None:
+        """
+        Create or update a usage record.
+        
+        Minutes synced by devices with a device ID for the same day are
+        kept and added to these.
+        
+        Args:
+            user_id: User identifier
+            domain: Domain name
+            usage_date: Date of usage
+            minutes: Minutes used
+        """
+        with self._store.lock:
+            data = self._store.for_write(user_id)
+            devices = data.devices.get((domain, usage_date), {})
+            data.set_usage(domain, usage_date, minutes + sum(devices.values()), utc_now())
+    
+    def upsert_device_usage(
+        self, user_id: str, device_id: str, domain: str, usage_date: date, minutes: float
+    ) -> None:
+        """
+        Create or update one device's usage record.
+        
+        The user's usage for the domain and date changes by the difference
+        to the device's previous minutes, so devices syncing the same day
+        do not overwrite each other (or a sync without device ID).
+        
+        Args:
+            user_id: User identifier
+            device_id: Device identifier
+            domain: Domain name
+            usage_date: Date of usage
+            minutes: Minutes used on this device
+        """
+        with self._store.lock:
+            data = self._store.for_write(user_id)
+            devices = data.devices.setdefault((domain, usage_date), {})
+            entry = data.usage.get(usage_date, {}).get(domain)
+            total = (entry.minutes if entry else 0.0) + minutes - devices.get(device_id, 0.0)
+            devices[device_id] = minutes
+            data.set_usage(domain, usage_date, total, utc_now())
+    
+    def get_usage_for_date_range(
+        self, user_id: str, start_date: date, end_date: date
+    ) -> List[Dict]:
+        """
+        Get usage records for a date range.
+        
+        Args:
+            user_id: User identifier
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+            
+        Returns:
+            List of usage records with domain, date, and minutes
+        """
+        with self._store.lock:
+            data = self._store.find(user_id)
+            if data is None:
+                return []
+            return [
+                {
+                    'domain': domain,
+                    'date': usage_date,
+                    'minutes': entry.minutes,
+                }
+                for usage_date, entries in data.days_between(start_date, end_date)
+                for domain, entry in entries.items()
+            ]
+    
+    def get_usage_for_date(self, user_id: str, usage_date: date) -> List[Dict]:
+        """
+        Get usage records for a specific date.
+        
+        Args:
+            user_id: User identifier
+            usage_date: Date to query
+            
+        Returns:
+            List of usage records with domain, date, and minutes
+        """
+        return self.get_usage_for_date_range(user_id, usage_date, usage_date)
+    
+    def get_changed_dates(
+        self, user_id: str, start_date: date, end_date: date, since: datetime
+    ) -> Set[date]:
+        """
+        Get the dates in a range whose usage changed after a time.
+        
+        Args:
+            user_id: User identifier
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+            since: Changes at or before this time are left out
+            
+        Returns:
+            Set of changed dates
+        """
+        with self._store.lock:
+            data = self._store.find(user_id)
+            if data is None:
+                return set()
+            return {
+                usage_date
+                for usage_date, entries in data.days_between(start_date, end_date)
+                if any(entry.updated_at > since for entry in entries.values())
+            }
@@ -0,0 +1,29 @@
+"""
+In-memory implementation of UserRepository (see infrastructure/memory/store.py).
+"""
+from ...domain.interfaces.user_repository import UserRepository
+from ..memory.store import MemoryStore
+
+
+class MemoryUserRepository(UserRepository):
+    """User repository backed by a MemoryStore."""
+    
+    def __init__(self, store: MemoryStore):
+        """
+        Initialize repository with a store.
+        
+        Args:
+            store: Store holding every user's data
+        """
+        self._store = store
+    
+    def get_or_create_user(self, user_id: str) -> None:
+        """
+        Get existing user or create new one if not exists.
+        
+        Args:
+            user_id: User identifier
+        """
+        with self._store.lock:
+            if self._store.find(user_id) is None:
+                self._store.for_write(user_id)
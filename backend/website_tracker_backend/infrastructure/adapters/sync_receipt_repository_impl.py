@@ -0,0 +1,173 @@
+"""
+SQLAlchemy implementation of SyncReceiptRepository.
+"""
+from typing import Callable, Dict, Optional
+import json
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from ...domain.interfaces.sync_receipt_repository import SyncReceiptRepository
+from ..database.writer import SingleWriter
+from ..database.models import SyncReceipt
+
+
+class SQLAlchemySyncReceiptRepository(SyncReceiptRepository):
+    """SQLAlchemy implementation of sync receipt repository."""
+    
+    def __init__(
+        self,
+        db: Session,
+        read_db: Optional[Session] = None,
+        writer: Optional[SingleWriter] = None,
+    ):
+        """
+        Initialize repository with database sessions.
+        
+        Args:
+            db: SQLAlchemy database session used for writes
+            read_db: Optional read-only session used for queries that do not
+                write (defaults to db)
+            writer: Optional single writer; if given, writes are queued on it
+                and group-committed instead of committed on db
+        """
+        self._db = db
+        self._read_db = read_db if read_db is not None else db
+        self._writer = writer
+    
+    def _write(self, operation: Callable[[Session], None]) -> None:
+        """
+        Apply a write operation and commit it.
+        
+        Args:
+            operation: Callable performing the write on a session, without committing
+        """
+        if self._writer is not None:
+            self._writer.execute(operation)
+        else:
+            operation(self._db)
+            self._db.commit()
+    
+    def get_response(
+        self, user_id: str, endpoint: str, idempotency_key: Optional[str], sequence: Optional[int]
+    ) -> Optional[Dict]:
+        """
+        Get the stored response of an earlier request with the same key or sequence.
+        
+        Args:
+            user_id: User identifier
+            endpoint: Sync endpoint name
+            idempotency_key: Idempotency-Key of the request, if any
+            sequence: Sequence number of the request, if any
+            
+        Returns:
+            Response body of the earlier request, or None
+        """
+        matches = []
+        if idempotency_key is not None:
+            matches.append(SyncReceipt.idempotency_key == idempotency_key)
+        if sequence is not None:
+            matches.append(SyncReceipt.sequence == sequence)
+        if not matches:
+            return None
+        
+        receipt = (
+            self._read_db.query(SyncReceipt.response)
+            .filter(
+                SyncReceipt.user_id == user_id,
+                SyncReceipt.endpoint == endpoint,
+                or_(*matches),
+            )
+            .first()
+        )
+        return json.loads(receipt.response) if receipt else None
+    
+    def get_last_sequence(self, user_id: str, endpoint: str) -> Optional[int]:
+        """
+        Get the highest sequence number processed for a user and endpoint.
+        
+        Args:
+            user_id: User identifier
+            endpoint: Sync endpoint name
+            
+        Returns:
+            Sequence number, or None if no request carried one
+        """
+        return (
+            self._read_db.query(func.max(SyncReceipt.sequence))
+            .filter(SyncReceipt.user_id == user_id, SyncReceipt.endpoint == endpoint)
+            .scalar()
+        )
+    
+    def save_response(
+        self,
+        user_id: str,
+        endpoint: str,
+        idempotency_key: Optional[str],
+        sequence: Optional[int],
+        response: Dict,
+        keep: int,
+        keep_devices: int,
+    ) -> None:
+        """
+        Store a processed request's response and drop the user's oldest receipts.
+        
+        Args:
+            user_id: User identifier
+            endpoint: Sync endpoint name
+            idempotency_key: Idempotency-Key of the request, if any
+            sequence: Sequence number of the request, if any
+            response: Response body
+            keep: Number of receipts kept per user and endpoint
+            keep_devices: Number of device endpoints kept per user and endpoint
+        """
+        def write(session: Session) -> None:
+            receipts = session.query(SyncReceipt).filter(
+                SyncReceipt.user_id == user_id,
+                SyncReceipt.endpoint == endpoint,
+            )
+            if idempotency_key is not None and receipts.filter(
+                SyncReceipt.idempotency_key == idempotency_key
+            ).first() is not None:
+                # A concurrent retry of the same request got here first
+                return
+            session.add(SyncReceipt(
+                user_id=user_id,
+                endpoint=endpoint,
+                idempotency_key=idempotency_key,
+                sequence=sequence,
+                response=json.dumps(response),
+            ))
+            session.flush()
+            
+            # Bounded store: keep the newest receipts only
+            expired = [
+                row.id for row in receipts
+                .with_entities(SyncReceipt.id)
+                .order_by(SyncReceipt.created_at.desc(), SyncReceipt.sequence.desc())
+                .offset(keep)
+            ]
+            if expired:
+                session.query(SyncReceipt).filter(SyncReceipt.id.in_(expired)).delete(synchronize_session=False)
+            
+            # Keep the most recently written device endpoints only
+            name, device_separator, _ = endpoint.partition(":")
+            if not device_separator:
+                return
+            device_endpoints = session.query(SyncReceipt.endpoint).filter(
+                SyncReceipt.user_id == user_id,
+                SyncReceipt.endpoint.startswith(f"{name}:", autoescape=True),
+            )
+            expired_endpoints = [
+                row.endpoint for row in device_endpoints
+                .group_by(SyncReceipt.endpoint)
+                .order_by(func.max(SyncReceipt.created_at).desc())
+                .offset(keep_devices)
+            ]
+            if expired_endpoints:
+                session.query(SyncReceipt).filter(
+                    SyncReceipt.user_id == user_id,
+                    SyncReceipt.endpoint.in_(expired_endpoints),
+                ).delete(synchronize_session=False)
+        
+        self._write(write)
@@ -1,24 +1,74 @@
 """
 SQLAlchemy implementation of TrackedSitesRepository.
+
+Removed sites leave a tombstone in tracked_site_removals for
+CHANGE_HISTORY, so delta reads can report them.
 """
-from typing import Dict, List
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 
 from ...domain.interfaces.tracked_sites_repository import TrackedSitesRepository
-from ..database.models import TrackedSite
+from ...domain.services.change_cursor import CHANGE_HISTORY, utc_now
+from ..database.writer import SingleWriter
+from ..database.models import TrackedSite, TrackedSiteRemoval
+
+_tracked_sites = TrackedSite.__table__
+_removals = TrackedSiteRemoval.__table__
+
+# Read on every heartbeat; built once (see usage_repository_impl.py)
+_SELECT_TRACKED_SITES = select(_tracked_sites.c.domain, _tracked_sites.c.daily_limit).where(
+    _tracked_sites.c.user_id == bindparam("user_id")
+)
+
+# Served by idx_tracked_sites_user_updated
+_SELECT_TRACKED_SITES_SINCE = select(_tracked_sites.c.domain, _tracked_sites.c.daily_limit).where(
+    _tracked_sites.c.user_id == bindparam("user_id"),
+    _tracked_sites.c.updated_at > bindparam("since"),
+)
+
+_SELECT_REMOVALS_SINCE = select(_removals.c.domain).where(
+    _removals.c.user_id == bindparam("user_id"),
+    _removals.c.removed_at > bindparam("since"),
+)
 
 
 class SQLAlchemyTrackedSitesRepository(TrackedSitesRepository):
     """SQLAlchemy implementation of tracked sites repository."""
     
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        read_db: Optional[Session] = None,
+        writer: Optional[SingleWriter] = None,
+    ):
         """
-        Initialize repository with database session.
+        Initialize repository with database sessions.
         
         Args:
-            db: SQLAlchemy database session
+            db: SQLAlchemy database session used for writes
+            read_db: Optional read-only session used for queries that do not
+                write (defaults to db)
+            writer: Optional single writer; if given, writes are queued on it
+                and group-committed instead of committed on db
         """
         self._db = db
+        self._read_db = read_db if read_db is not None else db
+        self._writer = writer
+    
+    def _write(self, operation: Callable[[Session], None]) -> None:
+        """
+        Apply a write operation and commit it.
+        
+        Args:
+            operation: Callable performing the write on a session, without committing
+        """
+        if self._writer is not None:
+            self._writer.execute(operation)
+        else:
+            operation(self._db)
+            self._db.commit()
     
     def upsert_tracked_site(self, user_id: str, domain: str, daily_limit: int) -> None:
         """
@@ -29,28 +79,28 @@ class SQLAlchemyTrackedSitesRepository(TrackedSitesRepository):
             domain: Domain name
             daily_limit: Daily limit in minutes
         """
-        tracked_site = (
-            self._db.query(TrackedSite)
-            .filter(
-                TrackedSite.user_id == user_id,
-                TrackedSite.domain == domain,
+        def write(session: Session) -> None:
+            tracked_site = (
+                session.query(TrackedSite)
+                .filter(
+                    TrackedSite.user_id == user_id,
+                    TrackedSite.domain == domain,
+                )
+                .first()
             )
-            .first()
-        )
-        
-        if tracked_site:
-            # Update existing site
-            tracked_site.daily_limit = daily_limit
-        else:
-            # Create new site
-            tracked_site = TrackedSite(
-                user_id=user_id,
-                domain=domain,
-                daily_limit=daily_limit,
-            )
-            self._db.add(tracked_site)
+            
+            if tracked_site:
+                # Update existing site
+                tracked_site.daily_limit = daily_limit
+            else:
+                # Create new site
+                session.add(TrackedSite(
+                    user_id=user_id,
+                    domain=domain,
+                    daily_limit=daily_limit,
+                ))
         
-        self._db.commit()
+        self._write(write)
     
     def get_tracked_sites(self, user_id: str) -> Dict[str, int]:
         """
@@ -62,14 +112,35 @@ class SQLAlchemyTrackedSitesRepository(TrackedSitesRepository):
         Returns:
             Dictionary mapping domain to daily limit
         """
-        tracked_sites = (
-            self._db.query(TrackedSite)
-            .filter(TrackedSite.user_id == user_id)
-            .all()
-        )
+        tracked_sites = self._read_db.execute(_SELECT_TRACKED_SITES, {"user_id": user_id})
         
         return {site.domain: site.daily_limit for site in tracked_sites}
     
+    def get_tracked_sites_changed_since(
+        self, user_id: str, since: datetime
+    ) -> Tuple[Dict[str, int], List[str]]:
+        """
+        Get the tracked sites added, updated or removed after a time.
+        
+        Args:
+            user_id: User identifier
+            since: Changes at or before this time are left out
+            
+        Returns:
+            Tuple of (changed sites mapping domain to daily limit, removed domains)
+        """
+        params = {"user_id": user_id, "since": since}
+        changed = {
+            site.domain: site.daily_limit
+            for site in self._read_db.execute(_SELECT_TRACKED_SITES_SINCE, params)
+        }
+        # A site removed and added again is reported as changed only
+        removed = [
+            domain for domain in self._read_db.execute(_SELECT_REMOVALS_SINCE, params).scalars()
+            if domain not in changed
+        ]
+        return changed, sorted(removed)
+    
     def remove_tracked_sites_not_in_list(self, user_id: str, domains: List[str]) -> None:
         """
         Remove tracked sites that are not in the provided list.
@@ -78,16 +149,42 @@ class SQLAlchemyTrackedSitesRepository(TrackedSitesRepository):
             user_id: User identifier
             domains: List of domains to keep
         """
-        sites_to_remove = (
-            self._db.query(TrackedSite)
-            .filter(
-                TrackedSite.user_id == user_id,
-                ~TrackedSite.domain.in_(domains),
+        def write(session: Session) -> None:
+            sites_to_remove = (
+                session.query(TrackedSite)
+                .filter(
+                    TrackedSite.user_id == user_id,
+                    ~TrackedSite.domain.in_(domains),
+                )
+                .all()
             )
-            .all()
-        )
+            
+            now = utc_now()
+            for site in sites_to_remove:
+                session.delete(site)
+                self._record_removal(session, user_id, site.domain, now)
+            if sites_to_remove:
+                session.execute(_removals.delete().where(
+                    _removals.c.user_id == user_id,
+                    _removals.c.removed_at < now - CHANGE_HISTORY,
+                ))
         
-        for site in sites_to_remove:
-            self._db.delete(site)
+        self._write(write)
+    
+    def _record_removal(self, session: Session, user_id: str, domain: str, now: datetime) -> None:
+        """
+        Write or refresh the tombstone of a removed site, without committing.
         
-        self._db.commit()
+        Args:
+            session: Session of the write transaction
+            user_id: User identifier
+            domain: Removed domain
+            now: Time of the removal
+        """
+        updated = session.execute(
+            _removals.update()
+            .where(_removals.c.user_id == user_id, _removals.c.domain == domain)
+            .values(removed_at=now)
+        ).rowcount
+        if not updated:
+            session.execute(_removals.insert().values(user_id=user_id, domain=domain, removed_at=now))
@@ -0,0 +1,383 @@
+"""
+Aggregate usage reports across all users and shards.
+
+The admin listings (users, raw usage rows) are paginated by keyset: a page
+continues after the key of the previous page's last row (users.id, or
+(user_id, domain, date) for usage rows) instead of skipping rows with
+OFFSET, so every page is one index range scan of at most limit + 1 rows
+per shard, however deep the page is. Reads use the shards' read sessions
+and never hold a transaction across pages, so listing a large database
+does not block syncs.
+"""
+from collections import Counter
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+import base64
+import heapq
+import json
+
+from sqlalchemy import Table, and_, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from ..database.partitions import existing_partitions, partition_table, partitions_for_range, usage_select
+from ..database.sharding import ShardedDatabase
+from ..database.models import DomainUsageTotal, UsageRecord, UsageRollup, User
+
+# Largest page of the admin listings
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(key: Sequence) -> str:
+    """
+    Encode the key of a page's last row as an opaque cursor.
+    
+    Args:
+        key: Column values of the row's sort key
+        
+    Returns:
+        URL-safe cursor string
+    """
+    values = [value.isoformat() if isinstance(value, date) else value for value in key]
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, size: int) -> List:
+    """
+    Decode a cursor made by encode_cursor.
+    
+    Args:
+        cursor: Cursor string
+        size: Number of key columns expected
+        
+    Returns:
+        Key values, as strings
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(v, str) for v in values):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+
+class SQLAlchemyUsageReport:
+    """Admin reports that fan out to every shard and merge the results."""
+    
+    def __init__(self, shards: ShardedDatabase, partitioned: bool = False):
+        """
+        Initialize report with the shards to query.
+        
+        Args:
+            shards: All shard databases
+            partitioned: Usage is stored in monthly partitions (see partitions.py)
+        """
+        self._shards = shards
+        self._partitioned = partitioned
+    
+    def get_user_count(self) -> int:
+        """
+        Count users across all shards.
+        
+        Returns:
+            Number of users
+        """
+        counts = self._shards.fan_out(lambda session: session.query(func.count(User.id)).scalar())
+        return sum(counts)
+    
+    def get_domain_totals(self, start_date: date, end_date: date) -> Dict[str, float]:
+        """
+        Get total minutes per domain over all users.
+        
+        Args:
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+            
+        Returns:
+            Dictionary mapping domain to total minutes, largest first
+        """
+        def query(session: Session) -> Counter:
+            if self._partitioned:
+                shard_totals = Counter(self._get_partitioned_domain_totals(session, start_date, end_date))
+            else:
+                rows = (
+                    session.query(UsageRecord.domain, func.sum(UsageRecord.minutes))
+                    .filter(UsageRecord.date >= start_date, UsageRecord.date <= end_date)
+                    .group_by(UsageRecord.domain)
+                    .all()
+                )
+                shard_totals = Counter({domain: minutes for domain, minutes in rows})
+            # Ranges older than the retention age were rolled up
+            shard_totals.update(self._get_rolled_up_domain_totals(session, start_date, end_date))
+            return shard_totals
+        
+        totals: Counter = Counter()
+        for shard_totals in self._shards.fan_out(query):
+            totals.update(shard_totals)
+        return dict(totals.most_common())
+    
+    def get_top_domains(self, granularity: str, period_start: date, limit: int) -> List[Dict]:
+        """
+        Get the most-used domains of a day or week from the leaderboard counters.
+        
+        Counters are kept up to date by the sync path (see leaderboard.py), so
+        no usage rows are read. With one shard the top rows come straight off
+        the (granularity, period_start, minutes) index; with several, every
+        shard's counters for the period are merged.
+        
+        Args:
+            granularity: "day" or "week"
+            period_start: The day, or Monday of the week
+            limit: Number of domains to return
+            
+        Returns:
+            List of dictionaries with domain, minutes and users, largest first
+        """
+        single_shard = len(self._shards.shards) == 1
+        
+        def query(session: Session) -> List:
+            statement = (
+                select(DomainUsageTotal.domain, DomainUsageTotal.minutes, DomainUsageTotal.users)
+                .where(
+                    DomainUsageTotal.granularity == granularity,
+                    DomainUsageTotal.period_start == period_start,
+                    DomainUsageTotal.minutes > 0,
+                )
+                .order_by(DomainUsageTotal.minutes.desc())
+            )
+            if single_shard:
+                statement = statement.limit(limit)
+            return session.execute(statement).all()
+        
+        minutes: Counter = Counter()
+        users: Counter = Counter()
+        for rows in self._shards.fan_out(query):
+            for domain, domain_minutes, domain_users in rows:
+                minutes[domain] += domain_minutes
+                # A user lives on one shard, so per-shard counts add up
+                users[domain] += domain_users
+        return [
+            {'domain': domain, 'minutes': round(total, 1), 'users': users[domain]}
+            for domain, total in minutes.most_common(limit)
+        ]
+    
+    def list_users(self, after: Optional[str], limit: int) -> Dict:
+        """
+        List users ordered by ID, one page at a time.
+        
+        Each shard returns its next limit + 1 users from the primary key
+        index; the smallest IDs across shards form the page. Last-seen time
+        and total usage are then read for the page's users only.
+        
+        Args:
+            after: Cursor of the previous page, or None for the first page
+            limit: Users per page
+            
+        Returns:
+            Dictionary with users (userId, createdAt, lastSeen, totalMinutes)
+            and nextCursor (None on the last page)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        after_id = decode_cursor(after, 1)[0] if after else None
+        
+        def query(session: Session) -> List:
+            statement = select(User.id, User.created_at).order_by(User.id).limit(limit + 1)
+            if after_id is not None:
+                statement = statement.where(User.id > after_id)
+            return session.execute(statement).all()
+        
+        rows = heapq.nsmallest(
+            limit + 1, (row for shard_rows in self._shards.fan_out(query) for row in shard_rows),
+            key=lambda row: row.id,
+        )
+        page = rows[:limit]
+        
+        ids_by_shard: Dict[int, List[str]] = {}
+        for row in page:
+            ids_by_shard.setdefault(self._shards.shard_for(row.id), []).append(row.id)
+        stats: Dict[str, Tuple] = {}
+        for shard, user_ids in ids_by_shard.items():
+            with self._shards.shards[shard].read_session() as session:
+                stats.update(self._get_user_stats(session, user_ids))
+        
+        users = []
+        for row in page:
+            last_seen, total = stats.get(row.id, (None, 0.0))
+            users.append({
+                'userId': row.id,
+                'createdAt': row.created_at.isoformat() if row.created_at else None,
+                'lastSeen': last_seen.isoformat() if last_seen else None,
+                'totalMinutes': round(total, 1),
+            })
+        return {
+            'users': users,
+            'nextCursor': encode_cursor([page[-1].id]) if len(rows) > limit else None,
+        }
+    
+    def list_usage(self, after: Optional[str], limit: int, user_id: Optional[str] = None) -> Dict:
+        """
+        List raw daily usage rows ordered by (user_id, domain, date), one page at a time.
+        
+        The order matches the (user_id, domain, date) unique index, so each
+        table (and each monthly partition) serves the next limit + 1 rows
+        from an index range scan; the smallest keys across them form the page.
+        
+        Args:
+            after: Cursor of the previous page, or None for the first page
+            limit: Rows per page
+            user_id: Only list this user's rows (reads only the user's shard)
+            
+        Returns:
+            Dictionary with records (userId, domain, date, minutes, updatedAt)
+            and nextCursor (None on the last page)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        key = None
+        if after:
+            after_user, after_domain, after_date = decode_cursor(after, 3)
+            key = (after_user, after_domain, date.fromisoformat(after_date))
+        
+        def query(session: Session) -> List:
+            rows = []
+            for table in self._usage_tables(session):
+                statement = select(
+                    table.c.user_id, table.c.domain, table.c.date, table.c.minutes, table.c.updated_at
+                )
+                if user_id is not None:
+                    statement = statement.where(table.c.user_id == user_id)
+                if key is not None:
+                    # Row-value comparison, served by the unique index
+                    statement = statement.where(
+                        tuple_(table.c.user_id, table.c.domain, table.c.date) > tuple_(*key)
+                    )
+                statement = statement.order_by(table.c.user_id, table.c.domain, table.c.date).limit(limit + 1)
+                rows.extend(session.execute(statement).all())
+            return rows
+        
+        if user_id is not None:
+            with self._shards.database_for(user_id).read_session() as session:
+                results = [query(session)]
+        else:
+            results = self._shards.fan_out(query)
+        rows = heapq.nsmallest(
+            limit + 1, (row for shard_rows in results for row in shard_rows),
+            key=lambda row: (row.user_id, row.domain, row.date),
+        )
+        page = rows[:limit]
+        
+        last = page[-1] if page else None
+        return {
+            'records': [
+                {
+                    'userId': row.user_id,
+                    'domain': row.domain,
+                    'date': row.date.strftime('%Y-%m-%d'),
+                    'minutes': row.minutes,
+                    'updatedAt': row.updated_at.isoformat() if row.updated_at else None,
+                }
+                for row in page
+            ],
+            'nextCursor': encode_cursor([last.user_id, last.domain, last.date]) if len(rows) > limit else None,
+        }
+    
+    def _usage_tables(self, session: Session) -> List[Table]:
+        """Tables holding daily usage rows on one shard."""
+        if not self._partitioned:
+            return [UsageRecord.__table__]
+        return [partition_table(name) for name in sorted(existing_partitions(session.connection()))]
+    
+    def _get_user_stats(self, session: Session, user_ids: List[str]) -> Dict[str, Tuple]:
+        """
+        Get last-seen time and total minutes for some users of one shard.
+        
+        Args:
+            session: Read session on the users' shard
+            user_ids: User identifiers
+            
+        Returns:
+            Dictionary mapping user ID to (last usage update or None, total minutes)
+        """
+        tables = self._usage_tables(session)
+        usage = usage_select(
+            tables,
+            ["user_id", "updated_at", "minutes"],
+            lambda table: table.c.user_id.in_(user_ids),
+        )
+        stats: Dict[str, Tuple] = {}
+        if usage is not None:
+            usage = usage.subquery()
+            rows = session.execute(
+                select(usage.c.user_id, func.max(usage.c.updated_at), func.sum(usage.c.minutes))
+                .group_by(usage.c.user_id)
+            )
+            stats = {row[0]: (row[1], row[2] or 0.0) for row in rows}
+        
+        # Usage older than the retention age was rolled up
+        rollups = session.execute(
+            select(UsageRollup.user_id, func.sum(UsageRollup.minutes))
+            .where(UsageRollup.user_id.in_(user_ids))
+            .group_by(UsageRollup.user_id)
+        )
+        for rollup_user, minutes in rollups:
+            last_seen, total = stats.get(rollup_user, (None, 0.0))
+            stats[rollup_user] = (last_seen, total + minutes)
+        return stats
+    
+    @staticmethod
+    def _get_rolled_up_domain_totals(session: Session, start_date: date, end_date: date) -> Dict[str, float]:
+        """
+        Get total minutes per domain from rollups, prorated to the overlapping days.
+        
+        Args:
+            session: Read session on one shard
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+            
+        Returns:
+            Dictionary mapping domain to total minutes
+        """
+        rollups = (
+            session.query(UsageRollup)
+            .filter(UsageRollup.period_start <= end_date, UsageRollup.period_end >= start_date)
+            .all()
+        )
+        totals: Counter = Counter()
+        for rollup in rollups:
+            period_days = (rollup.period_end - rollup.period_start).days + 1
+            overlap_days = (min(rollup.period_end, end_date) - max(rollup.period_start, start_date)).days + 1
+            totals[rollup.domain] += rollup.minutes * overlap_days / period_days
+        return dict(totals)
+    
+    @staticmethod
+    def _get_partitioned_domain_totals(session: Session, start_date: date, end_date: date) -> Dict[str, float]:
+        """
+        Get total minutes per domain from the partitions overlapping a range.
+        
+        Args:
+            session: Read session on one shard
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+            
+        Returns:
+            Dictionary mapping domain to total minutes
+        """
+        tables = partitions_for_range(session.connection(), start_date, end_date)
+        usage = usage_select(
+            tables,
+            ["domain", "minutes"],
+            lambda table: and_(table.c.date >= start_date, table.c.date <= end_date),
+        )
+        if usage is None:
+            return {}
+        usage = usage.subquery()
+        rows = session.execute(
+            select(usage.c.domain, func.sum(usage.c.minutes)).group_by(usage.c.domain)
+        )
+        return {domain: minutes for domain, minutes in rows}
@@ -1,63 +1,293 @@
 """
 SQLAlchemy implementation of UsageRepository.
+
+The queries run on every sync and calendar request are built once at import
+time with bind parameters, instead of a new query().filter() chain per
+call. Each execution then only binds values; the compiled SQL is reused
+from the engine's compiled cache (SQL_QUERY_CACHE_SIZE, see config.py).
+
+Syncs sent with a device ID are stored per device in device_usage_records,
+so devices never overwrite each other's minutes. Both rows are written
+with INSERT ... ON CONFLICT DO UPDATE: the merged row in usage_records
+first, by the difference between the device's new and stored minutes
+(read by the statement itself, which takes the write lock before it
+reads), then the device row. Concurrent first writes of a row update it
+instead of failing on the unique constraint.
+
+A sync without a device ID is the share of the devices that do not send
+one (older extension versions): the merged row becomes those minutes
+plus the sum over the device rows, and device syncs change the merged row
+by their difference only, so neither replaces the other. An extension
+updated mid-day reports that day under both until the day ends. Reads
+keep using the merged rows only.
 """
-from datetime import date
-from typing import Dict, List
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+from sqlalchemy import Table, and_, bindparam, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from ...domain.interfaces.usage_repository import UsageRepository
-from ..database.models import UsageRecord
+from ...domain.services.change_cursor import utc_now
+from ..database.leaderboard import apply_usage_delta
+from ..database.partitions import ensure_partition, partitions_for_range, usage_select
+from ..database.writer import SingleWriter
+from ..database.models import DeviceUsageRecord, UsageRecord, UsageRollup
+
+_usage = UsageRecord.__table__
+_rollups = UsageRollup.__table__
+_device_usage = DeviceUsageRecord.__table__
+
+_SELECT_MINUTES = select(_usage.c.minutes).where(
+    _usage.c.user_id == bindparam("user_id"),
+    _usage.c.domain == bindparam("domain"),
+    _usage.c.date == bindparam("usage_date"),
+)
+
+# Bind names must differ from the inserted column names
+_MATCHES_DEVICE = and_(
+    _device_usage.c.user_id == bindparam("match_user_id"),
+    _device_usage.c.domain == bindparam("match_domain"),
+    _device_usage.c.date == bindparam("match_date"),
+)
+
+_DEVICE_MINUTES = select(_device_usage.c.minutes).where(
+    _MATCHES_DEVICE, _device_usage.c.device_id == bindparam("match_device_id")
+).scalar_subquery()
+
+# Served by the (user_id, domain, date, device_id) unique index
+_DEVICE_TOTAL = select(func.coalesce(func.sum(_device_usage.c.minutes), 0.0)).where(
+    _MATCHES_DEVICE
+).scalar_subquery()
+
+
+def _merged_upsert(table: Table, minutes, on_conflict_minutes):
+    """
+    Build an upsert of one merged usage row.
+    
+    Args:
+        table: usage_records or a monthly partition
+        minutes: Value of a new row
+        on_conflict_minutes: Callable giving the value of an existing row
+            from the statement's excluded pseudo-table
+    
+    Returns:
+        INSERT ... ON CONFLICT DO UPDATE statement
+    """
+    statement = sqlite_insert(table).values(
+        id=bindparam("new_id"),
+        user_id=bindparam("match_user_id"),
+        domain=bindparam("match_domain"),
+        date=bindparam("match_date"),
+        minutes=minutes,
+        created_at=bindparam("now"),
+        updated_at=bindparam("now"),
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.domain, table.c.date],
+        set_={"minutes": on_conflict_minutes(statement.excluded), "updated_at": statement.excluded.updated_at},
+    )
+
+
+def _legacy_upsert(table: Table):
+    """Set a merged row to the minutes of a sync without device ID plus the device rows."""
+    return _merged_upsert(
+        table, bindparam("new_minutes") + _DEVICE_TOTAL, lambda excluded: excluded.minutes
+    ).returning(table.c.minutes)
+
+
+def _device_delta_upsert(table: Table):
+    """
+    Add a device's change to a merged row.
+    
+    Returns the new merged minutes and the device's stored minutes: the
+    device row is written after this statement, so its subquery still
+    reads the previous value.
+    """
+    return _merged_upsert(
+        table,
+        bindparam("new_minutes") - func.coalesce(_DEVICE_MINUTES, 0.0),
+        lambda excluded: table.c.minutes + excluded.minutes,
+    ).returning(table.c.minutes, _DEVICE_MINUTES)
+
+
+_UPSERT_LEGACY_USAGE = _legacy_upsert(_usage)
+
+_UPSERT_DEVICE_DELTA = _device_delta_upsert(_usage)
+
+_NEW_DEVICE_USAGE = sqlite_insert(_device_usage).values(
+    id=bindparam("new_id"),
+    user_id=bindparam("match_user_id"),
+    device_id=bindparam("match_device_id"),
+    domain=bindparam("match_domain"),
+    date=bindparam("match_date"),
+    minutes=bindparam("new_minutes"),
+    updated_at=bindparam("now"),
+)
+
+_UPSERT_DEVICE_USAGE = _NEW_DEVICE_USAGE.on_conflict_do_update(
+    index_elements=[
+        _device_usage.c.user_id, _device_usage.c.domain, _device_usage.c.date, _device_usage.c.device_id,
+    ],
+    set_={"minutes": _NEW_DEVICE_USAGE.excluded.minutes, "updated_at": _NEW_DEVICE_USAGE.excluded.updated_at},
+)
+
+_SELECT_RANGE = select(_usage.c.domain, _usage.c.date, _usage.c.minutes).where(
+    _usage.c.user_id == bindparam("user_id"),
+    _usage.c.date >= bindparam("start_date"),
+    _usage.c.date <= bindparam("end_date"),
+)
+
+# Served by idx_usage_records_user_updated
+_SELECT_CHANGED_DATES = select(_usage.c.date).distinct().where(
+    _usage.c.user_id == bindparam("user_id"),
+    _usage.c.updated_at > bindparam("since"),
+    _usage.c.date >= bindparam("start_date"),
+    _usage.c.date <= bindparam("end_date"),
+)
+
+_SELECT_CHANGED_ROLLUPS = select(_rollups.c.period_start, _rollups.c.period_end).where(
+    _rollups.c.user_id == bindparam("user_id"),
+    _rollups.c.updated_at > bindparam("since"),
+    _rollups.c.period_start <= bindparam("end_date"),
+    _rollups.c.period_end >= bindparam("start_date"),
+)
+
+_SELECT_ROLLUPS = select(
+    _rollups.c.domain, _rollups.c.period_start, _rollups.c.period_end, _rollups.c.minutes
+).where(
+    _rollups.c.user_id == bindparam("user_id"),
+    _rollups.c.period_start <= bindparam("end_date"),
+    _rollups.c.period_end >= bindparam("start_date"),
+)
 
 
 class SQLAlchemyUsageRepository(UsageRepository):
     """SQLAlchemy implementation of usage repository."""
     
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        read_db: Optional[Session] = None,
+        writer: Optional[SingleWriter] = None,
+        partitioned: bool = False,
+    ):
         """
-        Initialize repository with database session.
+        Initialize repository with database sessions.
         
         Args:
-            db: SQLAlchemy database session
+            db: SQLAlchemy database session used for writes
+            read_db: Optional read-only session used for queries that do not
+                write (defaults to db)
+            writer: Optional single writer; if given, writes are queued on it
+                and group-committed instead of committed on db
+            partitioned: Store usage in monthly partitions (see partitions.py)
         """
         self._db = db
+        self._read_db = read_db if read_db is not None else db
+        self._writer = writer
+        self._partitioned = partitioned
+    
+    def _write(self, operation: Callable[[Session], None]) -> None:
+        """
+        Apply a write operation and commit it.
+        
+        Args:
+            operation: Callable performing the write on a session, without committing
+        """
+        if self._writer is not None:
+            self._writer.execute(operation)
+        else:
+            operation(self._db)
+            self._db.commit()
     
     def upsert_usage(self, user_id: str, domain: str, usage_date: date, minutes: float) -> None:
         """
         Create or update a usage record.
         
+        Minutes synced by devices with a device ID for the same day are
+        kept and added to these.
+        
         Args:
             user_id: User identifier
             domain: Domain name
             usage_date: Date of usage
             minutes: Minutes used
         """
-        from datetime import datetime
+        def write(session: Session) -> None:
+            table = self._merged_table(session, usage_date)
+            matches = {"match_user_id": user_id, "match_domain": domain, "match_date": usage_date}
+            if table is _usage:
+                previous = session.execute(
+                    _SELECT_MINUTES, {"user_id": user_id, "domain": domain, "usage_date": usage_date}
+                ).scalar()
+                statement = _UPSERT_LEGACY_USAGE
+            else:
+                previous = session.execute(select(table.c.minutes).where(
+                    table.c.user_id == user_id, table.c.domain == domain, table.c.date == usage_date,
+                )).scalar()
+                statement = _legacy_upsert(table)
+            total = session.execute(statement, {
+                **matches, "new_id": str(uuid.uuid4()), "new_minutes": minutes, "now": utc_now(),
+            }).scalar()
+            # Leaderboard counters change in the same transaction
+            apply_usage_delta(session, user_id, domain, usage_date, previous, total, self._partitioned)
         
-        usage_record = (
-            self._db.query(UsageRecord)
-            .filter(
-                UsageRecord.user_id == user_id,
-                UsageRecord.domain == domain,
-                UsageRecord.date == usage_date,
-            )
-            .first()
-        )
+        self._write(write)
+    
+    def upsert_device_usage(
+        self, user_id: str, device_id: str, domain: str, usage_date: date, minutes: float
+    ) -> None:
+        """
+        Create or update one device's usage record.
         
-        if usage_record:
-            # Update existing record
-            usage_record.minutes = minutes
-            usage_record.updated_at = datetime.utcnow()
-        else:
-            # Create new record
-            usage_record = UsageRecord(
-                user_id=user_id,
-                domain=domain,
-                date=usage_date,
-                minutes=minutes,
-            )
-            self._db.add(usage_record)
+        The user's usage for the domain and date changes by the difference
+        to the device's previous minutes, so devices syncing the same day
+        do not overwrite each other (or a sync without device ID).
+        
+        Args:
+            user_id: User identifier
+            device_id: Device identifier
+            domain: Domain name
+            usage_date: Date of usage
+            minutes: Minutes used on this device
+        """
+        def write(session: Session) -> None:
+            table = self._merged_table(session, usage_date)
+            statement = _UPSERT_DEVICE_DELTA if table is _usage else _device_delta_upsert(table)
+            parameters = {
+                "match_user_id": user_id,
+                "match_domain": domain,
+                "match_date": usage_date,
+                "match_device_id": device_id,
+                "new_id": str(uuid.uuid4()),
+                "new_minutes": minutes,
+                "now": utc_now(),
+            }
+            total, device_previous = session.execute(statement, parameters).one()
+            parameters["new_id"] = str(uuid.uuid4())
+            session.execute(_UPSERT_DEVICE_USAGE, parameters)
+            previous = total - (minutes - (device_previous or 0.0))
+            # Leaderboard counters change in the same transaction
+            apply_usage_delta(session, user_id, domain, usage_date, previous, total, self._partitioned)
         
-        self._db.commit()
+        self._write(write)
+    
+    def _merged_table(self, session: Session, usage_date: date) -> Table:
+        """
+        Get the table holding the merged usage of a date.
+        
+        Args:
+            session: Session of the write transaction
+            usage_date: Date of usage
+            
+        Returns:
+            usage_records, or the date's monthly partition (created if needed)
+        """
+        if self._partitioned:
+            return ensure_partition(session, usage_date.year, usage_date.month)
+        return _usage
     
     def get_usage_for_date_range(
         self, user_id: str, start_date: date, end_date: date
@@ -73,50 +303,164 @@ class SQLAlchemyUsageRepository(UsageRepository):
         Returns:
             List of usage records with domain, date, and minutes
         """
-        usage_records = (
-            self._db.query(UsageRecord)
-            .filter(
-                UsageRecord.user_id == user_id,
-                UsageRecord.date >= start_date,
-                UsageRecord.date <= end_date,
+        if self._partitioned:
+            records = self._get_partitioned_usage(user_id, start_date, end_date)
+        else:
+            records = self._get_usage(user_id, start_date, end_date)
+        
+        return records + self._get_rolled_up_usage(user_id, start_date, end_date)
+    
+    def get_usage_for_date(self, user_id: str, usage_date: date) -> List[Dict]:
+        """
+        Get usage records for a specific date.
+        
+        Args:
+            user_id: User identifier
+            usage_date: Date to query
+            
+        Returns:
+            List of usage records with domain, date, and minutes
+        """
+        if self._partitioned:
+            records = self._get_partitioned_usage(user_id, usage_date, usage_date)
+        else:
+            records = self._get_usage(user_id, usage_date, usage_date)
+        
+        return records + self._get_rolled_up_usage(user_id, usage_date, usage_date)
+    
+    def get_changed_dates(
+        self, user_id: str, start_date: date, end_date: date, since: datetime
+    ) -> Set[date]:
+        """
+        Get the dates in a range whose usage changed after a time.
+        
+        Args:
+            user_id: User identifier
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+            since: Changes at or before this time are left out
+            
+        Returns:
+            Set of changed dates
+        """
+        if self._partitioned:
+            tables = partitions_for_range(self._read_db.connection(), start_date, end_date)
+            statement = usage_select(
+                tables,
+                ["date"],
+                lambda table: and_(
+                    table.c.user_id == user_id,
+                    table.c.updated_at > since,
+                    table.c.date >= start_date,
+                    table.c.date <= end_date,
+                ),
             )
-            .all()
-        )
+            dates = set(self._read_db.execute(statement).scalars()) if statement is not None else set()
+        else:
+            dates = set(self._read_db.execute(_SELECT_CHANGED_DATES, {
+                "user_id": user_id, "since": since, "start_date": start_date, "end_date": end_date,
+            }).scalars())
+        
+        # Days rolled up by the retention job changed to coarse estimates
+        rollups = self._read_db.execute(_SELECT_CHANGED_ROLLUPS, {
+            "user_id": user_id, "since": since, "start_date": start_date, "end_date": end_date,
+        })
+        for rollup in rollups:
+            day = max(rollup.period_start, start_date)
+            while day <= min(rollup.period_end, end_date):
+                dates.add(day)
+                day += timedelta(days=1)
+        return dates
+    
+    def _get_usage(self, user_id: str, start_date: date, end_date: date) -> List[Dict]:
+        """
+        Read usage from the usage_records table.
         
+        Args:
+            user_id: User identifier
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+            
+        Returns:
+            List of usage records with domain, date, and minutes
+        """
+        rows = self._read_db.execute(
+            _SELECT_RANGE, {"user_id": user_id, "start_date": start_date, "end_date": end_date}
+        )
         return [
             {
-                'domain': record.domain,
-                'date': record.date,
-                'minutes': record.minutes,
+                'domain': row.domain,
+                'date': row.date,
+                'minutes': row.minutes,
             }
-            for record in usage_records
+            for row in rows
         ]
     
-    def get_usage_for_date(self, user_id: str, usage_date: date) -> List[Dict]:
+    def _get_partitioned_usage(self, user_id: str, start_date: date, end_date: date) -> List[Dict]:
         """
-        Get usage records for a specific date.
+        Read usage from the monthly partitions overlapping a date range.
         
         Args:
             user_id: User identifier
-            usage_date: Date to query
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
             
         Returns:
             List of usage records with domain, date, and minutes
         """
-        usage_records = (
-            self._db.query(UsageRecord)
-            .filter(
-                UsageRecord.user_id == user_id,
-                UsageRecord.date == usage_date,
-            )
-            .all()
+        tables = partitions_for_range(self._read_db.connection(), start_date, end_date)
+        statement = usage_select(
+            tables,
+            ["domain", "date", "minutes"],
+            lambda table: and_(
+                table.c.user_id == user_id,
+                table.c.date >= start_date,
+                table.c.date <= end_date,
+            ),
         )
+        if statement is None:
+            return []
         
         return [
             {
-                'domain': record.domain,
-                'date': record.date,
-                'minutes': record.minutes,
+                'domain': row.domain,
+                'date': row.date,
+                'minutes': row.minutes,
             }
-            for record in usage_records
+            for row in self._read_db.execute(statement)
         ]
+    
+    def _get_rolled_up_usage(self, user_id: str, start_date: date, end_date: date) -> List[Dict]:
+        """
+        Read usage that the retention job rolled up into weekly or monthly totals.
+        
+        Each rollup is spread evenly over the days of its period, so old
+        ranges are served at coarse granularity with correct period totals.
+        
+        Args:
+            user_id: User identifier
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+            
+        Returns:
+            List of per-day usage records with domain, date, minutes and coarse=True
+        """
+        rollups = self._read_db.execute(
+            _SELECT_ROLLUPS, {"user_id": user_id, "start_date": start_date, "end_date": end_date}
+        )
+        
+        records = []
+        for rollup in rollups:
+            period_days = (rollup.period_end - rollup.period_start).days + 1
+            per_day = rollup.minutes / period_days
+            day = max(rollup.period_start, start_date)
+            last_day = min(rollup.period_end, end_date)
+            while day <= last_day:
+                records.append({
+                    'domain': rollup.domain,
+                    'date': day,
+                    'minutes': per_day,
+                    'coarse': True,
+                })
+                day += timedelta(days=1)
+        return records
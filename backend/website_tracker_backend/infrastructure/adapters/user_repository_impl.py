@@ -1,23 +1,49 @@
 """
 SQLAlchemy implementation of UserRepository.
 """
+from typing import Callable, Optional
 from sqlalchemy.orm import Session
 
 from ...domain.interfaces.user_repository import UserRepository
+from ..database.writer import SingleWriter
 from ..database.models import User
 
 
 class SQLAlchemyUserRepository(UserRepository):
     """SQLAlchemy implementation of user repository."""
     
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        read_db: Optional[Session] = None,
+        writer: Optional[SingleWriter] = None,
+    ):
         """
-        Initialize repository with database session.
+        Initialize repository with database sessions.
         
         Args:
-            db: SQLAlchemy database session
+            db: SQLAlchemy database session used for writes
+            read_db: Optional read-only session used for queries that do not
+                write (defaults to db)
+            writer: Optional single writer; if given, writes are queued on it
+                and group-committed instead of committed on db
         """
         self._db = db
+        self._read_db = read_db if read_db is not None else db
+        self._writer = writer
+    
+    def _write(self, operation: Callable[[Session], None]) -> None:
+        """
+        Apply a write operation and commit it.
+        
+        Args:
+            operation: Callable performing the write on a session, without committing
+        """
+        if self._writer is not None:
+            self._writer.execute(operation)
+        else:
+            operation(self._db)
+            self._db.commit()
     
     def get_or_create_user(self, user_id: str) -> None:
         """
@@ -26,9 +52,27 @@ class SQLAlchemyUserRepository(UserRepository):
         Args:
             user_id: User identifier
         """
-        user = self._db.query(User).filter(User.id == user_id).first()
-        if not user:
-            user = User(id=user_id)
-            self._db.add(user)
-            self._db.commit()
-            self._db.refresh(user)
+        # Most calls find an existing user; check on the read session first so
+        # read-only requests do not touch the writer
+        if self._read_db is not self._db and self._user_exists(self._read_db, user_id):
+            return
+        
+        def write(session: Session) -> None:
+            if not self._user_exists(session, user_id):
+                session.add(User(id=user_id))
+        
+        self._write(write)
+    
+    @staticmethod
+    def _user_exists(db: Session, user_id: str) -> bool:
+        """
+        Check whether a user exists.
+        
+        Args:
+            db: Session to query
+            user_id: User identifier
+            
+        Returns:
+            True if the user exists
+        """
+        return db.query(User.id).filter(User.id == user_id).first() is not None
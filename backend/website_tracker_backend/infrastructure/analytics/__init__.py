@@ -0,0 +1,5 @@
+"""
+Analytics infrastructure - columnar archive of closed months of usage.
+
+Requires the optional numpy dependency (pip install '.[analytics]').
+"""
@@ -0,0 +1,229 @@
+"""
+Export closed months of usage from every shard into the columnar archive:
+python -m website_tracker_backend columnar
+
+    columnar export                            # archive every closed month not archived yet
+    columnar export --month 2024-01 --overwrite
+    columnar query domains --start 2024-01-01 --end 2024-03-31 --top 10
+
+Only daily usage is archived; rows already rolled up by the retention job
+are not.
+"""
+from array import array
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import json
+import logging
+import shutil
+
+from sqlalchemy import and_, select
+
+from ..database.models import UsageRecord
+from ..database.partitions import existing_partitions, parse_partition_name, partition_name, partition_table
+from ..database.sharding import ShardedDatabase
+from .columnar import (
+    COLUMNS, DOMAINS_FILE, MANIFEST_FILE, USERS_FILE,
+    month_key, np, read_dictionary, read_manifest, write_json,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip while streaming a month
+FETCH_SIZE = 10_000
+
+
+class ColumnarArchiver:
+    """Writes months of usage into a columnar archive directory."""
+
+    def __init__(self, root: Path):
+        """
+        Initialize archiver.
+
+        Args:
+            root: Archive directory (created if missing)
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def archived_months(self) -> Dict[str, int]:
+        """
+        Get the months already in the archive.
+
+        Returns:
+            Dictionary mapping month key to row count
+        """
+        return read_manifest(self.root)
+
+    def export_month(self, shards: ShardedDatabase, year: int, month: int, overwrite: bool = False) -> int:
+        """
+        Export one month of daily usage from every shard.
+
+        Args:
+            shards: All shard databases
+            year: Year
+            month: Month (1-12)
+            overwrite: Replace the month if it is already archived
+
+        Returns:
+            Number of rows archived
+
+        Raises:
+            FileExistsError: If the month is archived and overwrite is False
+        """
+        key = month_key(year, month)
+        manifest = self.archived_months()
+        if key in manifest and not overwrite:
+            raise FileExistsError(f"Month {key} is already archived")
+
+        users = read_dictionary(self.root, USERS_FILE)
+        domains = read_dictionary(self.root, DOMAINS_FILE)
+        user_index = {value: index for index, value in enumerate(users)}
+        domain_index = {value: index for index, value in enumerate(domains)}
+
+        columns = {name: array(dtype.char) for name, dtype in COLUMNS.items()}
+        for database in shards.shards:
+            for user_id, domain, day, minutes in _month_rows(database, year, month):
+                if user_id not in user_index:
+                    user_index[user_id] = len(users)
+                    users.append(user_id)
+                if domain not in domain_index:
+                    domain_index[domain] = len(domains)
+                    domains.append(domain)
+                columns["user"].append(user_index[user_id])
+                columns["domain"].append(domain_index[domain])
+                columns["day"].append(day.day)
+                columns["minutes"].append(minutes)
+
+        arrays = {name: np.frombuffer(values, dtype=COLUMNS[name]) for name, values in columns.items()}
+        # Sort by day so readers can slice a date range with searchsorted
+        order = np.argsort(arrays["day"], kind="stable")
+        row_count = len(order)
+
+        tmp_dir = self.root / f".{key}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir()
+        for name, values in arrays.items():
+            np.save(tmp_dir / f"{name}.npy", values[order])
+
+        # Dictionaries are append-only, so saving them first is safe even if
+        # the month is never published
+        write_json(self.root / USERS_FILE, users)
+        write_json(self.root / DOMAINS_FILE, domains)
+        month_dir = self.root / key
+        if month_dir.exists():
+            shutil.rmtree(month_dir)
+        tmp_dir.rename(month_dir)
+        manifest[key] = row_count
+        write_json(self.root / MANIFEST_FILE, {"months": dict(sorted(manifest.items()))})
+
+        logger.info(f"Archived {row_count} usage rows for {key}")
+        return row_count
+
+    def export_closed_months(self, shards: ShardedDatabase, today: Optional[date] = None) -> List[str]:
+        """
+        Export every month before the current one that is not archived yet.
+
+        Args:
+            shards: All shard databases
+            today: Current date (defaults to today)
+
+        Returns:
+            Keys of the exported months
+        """
+        today = today or date.today()
+        archived = self.archived_months()
+        months = set()
+        for database in shards.shards:
+            months.update(_months_with_usage(database))
+
+        exported = []
+        for year, month in sorted(months):
+            key = month_key(year, month)
+            if (year, month) >= (today.year, today.month) or key in archived:
+                continue
+            self.export_month(shards, year, month)
+            exported.append(key)
+        return exported
+
+
+def _month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """First day of the month and first day of the next month."""
+    return date(year, month, 1), date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+
+
+def _month_rows(database, year: int, month: int) -> Iterator[Tuple[str, str, date, float]]:
+    """Stream (user_id, domain, date, minutes) for a month from the table and its partition."""
+    start, end = _month_bounds(year, month)
+    with database.read_engine.connect() as connection:
+        tables = [UsageRecord.__table__]
+        name = partition_name(year, month)
+        if name in existing_partitions(connection, refresh=True):
+            tables.append(partition_table(name))
+        for table in tables:
+            result = connection.execution_options(yield_per=FETCH_SIZE).execute(
+                select(table.c.user_id, table.c.domain, table.c.date, table.c.minutes)
+                .where(and_(table.c.date >= start, table.c.date < end))
+            )
+            for row in result:
+                yield row.user_id, row.domain, row.date, row.minutes
+
+
+def _months_with_usage(database) -> List[Tuple[int, int]]:
+    """Months that have daily usage in the table or a partition."""
+    table = UsageRecord.__table__
+    with database.read_engine.connect() as connection:
+        dates = [row[0] for row in connection.execute(select(table.c.date).distinct())]
+        months = {(day.year, day.month) for day in dates}
+        months.update(parse_partition_name(name) for name in existing_partitions(connection, refresh=True))
+    return sorted(months)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Export months into the columnar archive, or query it.
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    from ..database.connection import get_shards
+    from .query import ColumnarArchive
+
+    parser = argparse.ArgumentParser(
+        prog="python -m website_tracker_backend columnar",
+        description="Columnar archive of closed months of usage.",
+    )
+    parser.add_argument("--dir", default="analytics", help="Archive directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export = subparsers.add_parser("export", help="Archive closed months (or one month) from every shard")
+    export.add_argument("--month", help="Month to archive, YYYY-MM (default: all closed months)")
+    export.add_argument("--overwrite", action="store_true", help="Replace an archived month")
+    query = subparsers.add_parser("query", help="Aggregate archived usage")
+    query.add_argument("report", choices=["domains", "users", "daily", "active-users"])
+    query.add_argument("--start", required=True, help="Start date, YYYY-MM-DD")
+    query.add_argument("--end", required=True, help="End date, YYYY-MM-DD")
+    query.add_argument("--top", type=int, default=None, help="Limit domains/users to the largest N")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.command == "export":
+        archiver = ColumnarArchiver(Path(args.dir))
+        if args.month:
+            year, month = (int(part) for part in args.month.split("-"))
+            archiver.export_month(get_shards(), year, month, overwrite=args.overwrite)
+        else:
+            print(archiver.export_closed_months(get_shards()))
+        return
+
+    archive = ColumnarArchive(Path(args.dir))
+    start, end = date.fromisoformat(args.start), date.fromisoformat(args.end)
+    if args.report == "domains":
+        result = archive.domain_totals(start, end, args.top)
+    elif args.report == "users":
+        result = archive.user_totals(start, end, args.top)
+    elif args.report == "daily":
+        result = {day.isoformat(): minutes for day, minutes in archive.daily_totals(start, end).items()}
+    else:
+        result = archive.active_users(start, end)
+    print(json.dumps(result, indent=2))
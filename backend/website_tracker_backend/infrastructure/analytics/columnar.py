@@ -0,0 +1,96 @@
+"""
+Columnar on-disk format for archived usage.
+
+An archive directory holds append-only dictionaries shared by all months
+and one directory of fixed-width column arrays per archived month:
+
+    users.json            ["<user id>", ...]      index -> user id
+    domains.json          ["<domain>", ...]       index -> domain
+    manifest.json         {"months": {"2024-01": <row count>, ...}}
+    2024-01/user.npy      uint32  user index
+    2024-01/domain.npy    uint32  domain index
+    2024-01/day.npy       uint8   day of month, rows sorted by day
+    2024-01/minutes.npy   float32 minutes
+
+Columns are plain .npy files so readers can memory-map them (see query.py).
+"""
+from pathlib import Path
+from typing import Dict, List
+import json
+import os
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError(
+        "The columnar archive requires numpy: pip install 'website-tracker-backend[analytics]'"
+    ) from e
+
+USERS_FILE = "users.json"
+DOMAINS_FILE = "domains.json"
+MANIFEST_FILE = "manifest.json"
+
+# Column name -> dtype
+COLUMNS: Dict[str, "np.dtype"] = {
+    "user": np.dtype(np.uint32),
+    "domain": np.dtype(np.uint32),
+    "day": np.dtype(np.uint8),
+    "minutes": np.dtype(np.float32),
+}
+
+
+def month_key(year: int, month: int) -> str:
+    """
+    Get the directory name of an archived month.
+
+    Args:
+        year: Year
+        month: Month (1-12)
+
+    Returns:
+        Month key, e.g. 2024-01
+    """
+    return f"{year:04d}-{month:02d}"
+
+
+def read_json(path: Path, default):
+    """Read a JSON file, or return default if it does not exist."""
+    if not path.exists():
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_json(path: Path, value) -> None:
+    """Write a JSON file atomically (write to a temporary file, then rename)."""
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(value, f)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(root: Path) -> Dict[str, int]:
+    """
+    Get the archived months and their row counts.
+
+    Args:
+        root: Archive directory
+
+    Returns:
+        Dictionary mapping month key to row count
+    """
+    return read_json(root / MANIFEST_FILE, {"months": {}})["months"]
+
+
+def read_dictionary(root: Path, name: str) -> List[str]:
+    """
+    Read a dictionary (users.json or domains.json).
+
+    Args:
+        root: Archive directory
+        name: Dictionary file name
+
+    Returns:
+        List mapping index to value
+    """
+    return read_json(root / name, [])
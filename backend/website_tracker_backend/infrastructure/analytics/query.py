@@ -0,0 +1,144 @@
+"""
+Aggregate queries over the columnar archive.
+
+Column files are memory-mapped, so only the pages covering the requested
+days are read from disk, and nothing is loaded into RAM up front. Queries
+never touch the SQLite database.
+"""
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .columnar import DOMAINS_FILE, USERS_FILE, month_key, np, read_dictionary, read_manifest
+
+
+class ColumnarArchive:
+    """Read-only view of a columnar archive directory."""
+
+    def __init__(self, root: Path):
+        """
+        Open an archive. Dictionaries are read now; columns are mapped per query.
+
+        Args:
+            root: Archive directory
+        """
+        self.root = Path(root)
+        self.months = read_manifest(self.root)
+        self.users: List[str] = read_dictionary(self.root, USERS_FILE)
+        self.domains: List[str] = read_dictionary(self.root, DOMAINS_FILE)
+
+    def domain_totals(self, start_date: date, end_date: date, top: Optional[int] = None) -> Dict[str, float]:
+        """
+        Total minutes per domain over all users.
+
+        Args:
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+            top: Only return the largest N domains
+
+        Returns:
+            Dictionary mapping domain to minutes, largest first
+        """
+        totals = np.zeros(len(self.domains), dtype=np.float64)
+        for _, columns, rows in self._slices(start_date, end_date):
+            totals += np.bincount(
+                columns["domain"][rows], weights=columns["minutes"][rows], minlength=len(self.domains)
+            )
+        return self._ranked(totals, self.domains, top)
+
+    def user_totals(self, start_date: date, end_date: date, top: Optional[int] = None) -> Dict[str, float]:
+        """
+        Total minutes per user over all domains.
+
+        Args:
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+            top: Only return the largest N users
+
+        Returns:
+            Dictionary mapping user id to minutes, largest first
+        """
+        totals = np.zeros(len(self.users), dtype=np.float64)
+        for _, columns, rows in self._slices(start_date, end_date):
+            totals += np.bincount(
+                columns["user"][rows], weights=columns["minutes"][rows], minlength=len(self.users)
+            )
+        return self._ranked(totals, self.users, top)
+
+    def daily_totals(self, start_date: date, end_date: date) -> Dict[date, float]:
+        """
+        Total minutes per day over all users and domains.
+
+        Args:
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+
+        Returns:
+            Dictionary mapping date to minutes, for days with usage
+        """
+        result: Dict[date, float] = {}
+        for (year, month), columns, rows in self._slices(start_date, end_date):
+            per_day = np.bincount(columns["day"][rows], weights=columns["minutes"][rows], minlength=32)
+            for day in np.flatnonzero(per_day):
+                result[date(year, month, int(day))] = float(per_day[day])
+        return result
+
+    def active_users(self, start_date: date, end_date: date) -> int:
+        """
+        Count users with any usage in a range.
+
+        Args:
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+
+        Returns:
+            Number of distinct users
+        """
+        seen = np.zeros(len(self.users), dtype=bool)
+        for _, columns, rows in self._slices(start_date, end_date):
+            seen[columns["user"][rows]] = True
+        return int(seen.sum())
+
+    def _overlapping_months(self, start_date: date, end_date: date) -> List[Tuple[int, int]]:
+        """Archived months overlapping a date range, in order."""
+        months = []
+        for key in sorted(self.months):
+            year, month = (int(part) for part in key.split("-"))
+            first = date(year, month, 1)
+            last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            if first <= end_date and last >= start_date:
+                months.append((year, month))
+        return months
+
+    def _slices(
+        self, start_date: date, end_date: date
+    ) -> Iterator[Tuple[Tuple[int, int], Dict[str, "np.ndarray"], slice]]:
+        """
+        Memory-map each overlapping month and find the rows within the range.
+
+        Yields:
+            ((year, month), columns, rows) where rows is a slice of the day-sorted columns
+        """
+        for year, month in self._overlapping_months(start_date, end_date):
+            month_dir = self.root / month_key(year, month)
+            columns = {
+                name: np.load(month_dir / f"{name}.npy", mmap_mode="r")
+                for name in ("user", "domain", "day", "minutes")
+            }
+            first_day = start_date.day if (start_date.year, start_date.month) == (year, month) else 1
+            last_day = end_date.day if (end_date.year, end_date.month) == (year, month) else 31
+            days = columns["day"]
+            rows = slice(
+                int(np.searchsorted(days, first_day, side="left")),
+                int(np.searchsorted(days, last_day, side="right")),
+            )
+            yield (year, month), columns, rows
+
+    @staticmethod
+    def _ranked(totals: "np.ndarray", names: List[str], top: Optional[int]) -> Dict[str, float]:
+        """Non-zero totals keyed by name, largest first."""
+        order = np.argsort(totals)[::-1]
+        order = order[totals[order] > 0]
+        if top is not None:
+            order = order[:top]
+        return {names[index]: float(totals[index]) for index in order}
@@ -1,54 +1,375 @@
 """
 Database connection and session management.
+
+Engines are created lazily, on first use, in the process that uses them.
+Worker processes forked from a parent that already opened connections
+discard the inherited pool and build their own (see _reset_after_fork).
+
+Configuration is read by config.py only. Each application builds its own
+shards from its Settings (shards_from_settings) and keeps them on
+app.state; get_shards() is the environment-configured instance used by
+the command line tools.
+
+Users can be spread over several databases (DATABASE_SHARD_URLS, see
+sharding.py). The request dependencies opening sessions on the shard of
+the user in the X-User-ID header are in application/dependencies.py.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 import os
-from typing import Generator
+import weakref
+from typing import List, Optional
 
+from ...config import Settings
 from .models import Base
+from .sharding import ShardedDatabase
+from .writer import SingleWriter
 
 # Export Base for use in tests and other modules
-__all__ = ['Base', 'get_db', 'init_db', 'SessionLocal', 'engine']
+__all__ = [
+    'Base', 'Database', 'ShardedDatabase', 'get_database', 'get_shards', 'shards_from_settings',
+    'init_db', 'SessionLocal', 'engine',
+]
 
-# Database URL - SQLite for development
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./website_tracker.db")
+# Every Database of this process, so a forked child can drop their engines
+_databases: "weakref.WeakSet[Database]" = weakref.WeakSet()
 
-# Create engine with SQLite-specific configuration
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    poolclass=StaticPool if "sqlite" in DATABASE_URL else None,
-    echo=False,  # Set to True for SQL query logging
-)
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class Database:
+    """
+    Lazily created writer and reader engines for one logical database.
 
+    Writes use a single writer engine. Reads use a separate pool of
+    read-only connections: a replica URL if one is configured, otherwise
+    read-only connections to the same SQLite file (WAL lets them run
+    concurrently with the writer). In-memory SQLite and server databases
+    without a replica URL read through the writer engine.
 
-def init_db() -> None:
+    With single_writer enabled, repositories queue their writes on a
+    SingleWriter thread that group-commits them (see writer.py).
     """
-    Initialize database by creating all tables.
-    
-    Note: This function is kept for backward compatibility.
-    For production use, run the migration script: ./migrate.sh
+
+    def __init__(
+        self,
+        url: str,
+        read_url: Optional[str] = None,
+        read_pool_size: int = Settings.database_read_pool_size,
+        sqlite_busy_timeout_ms: int = Settings.sqlite_busy_timeout_ms,
+        single_writer: str = Settings.single_writer,
+        group_commit_interval_ms: float = Settings.group_commit_interval_ms,
+        usage_partitioning: str = Settings.usage_partitioning,
+        query_cache_size: int = Settings.sql_query_cache_size,
+    ):
+        """
+        Initialize database handle. No connection is made until first use.
+
+        Args:
+            url: SQLAlchemy database URL for writes
+            read_url: Optional URL for reads (e.g. a replica)
+            read_pool_size: Number of pooled read connections
+            sqlite_busy_timeout_ms: Lock wait timeout for file-backed SQLite
+            single_writer: "auto" (file-backed SQLite only), "on" or "off"
+            group_commit_interval_ms: Single writer commit window
+            usage_partitioning: "off" or "monthly" usage partitions
+            query_cache_size: Compiled statements cached per engine
+        """
+        self.url = url
+        self.read_url = read_url if read_url else _default_read_url(url)
+        self.read_pool_size = read_pool_size
+        self.sqlite_busy_timeout_ms = sqlite_busy_timeout_ms
+        if single_writer == "auto":
+            self.single_writer_enabled = _sqlite_file_path(url) is not None
+        else:
+            self.single_writer_enabled = single_writer == "on"
+        self.group_commit_interval_ms = group_commit_interval_ms
+        self.usage_partitioning = usage_partitioning
+        self.query_cache_size = query_cache_size
+        self._writer: Optional[SingleWriter] = None
+        self._engine: Optional[Engine] = None
+        self._session_factory: Optional[sessionmaker] = None
+        self._read_engine: Optional[Engine] = None
+        self._read_session_factory: Optional[sessionmaker] = None
+        _databases.add(self)
+
+    @property
+    def engine(self) -> Engine:
+        """Writer engine for this process, created on first access."""
+        if self._engine is None:
+            self._engine = _create_engine(
+                self.url, self.sqlite_busy_timeout_ms, query_cache_size=self.query_cache_size
+            )
+        return self._engine
+
+    @property
+    def read_engine(self) -> Engine:
+        """Reader engine for this process, created on first access."""
+        if self.read_url is None:
+            return self.engine
+        if self._read_engine is None:
+            self._read_engine = _create_engine(
+                self.read_url,
+                self.sqlite_busy_timeout_ms,
+                read_pool_size=self.read_pool_size,
+                query_cache_size=self.query_cache_size,
+            )
+        return self._read_engine
+
+    @property
+    def session_factory(self) -> sessionmaker:
+        """Session factory bound to this process's writer engine."""
+        if self._session_factory is None:
+            self._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        return self._session_factory
+
+    @property
+    def read_session_factory(self) -> sessionmaker:
+        """Session factory bound to this process's reader engine."""
+        if self.read_url is None:
+            return self.session_factory
+        if self._read_session_factory is None:
+            self._read_session_factory = sessionmaker(
+                autocommit=False, autoflush=False, bind=self.read_engine
+            )
+        return self._read_session_factory
+
+    @property
+    def writer(self) -> Optional[SingleWriter]:
+        """Single writer for this process, or None if writes commit directly."""
+        if not self.single_writer_enabled:
+            return None
+        if self._writer is None:
+            self._writer = SingleWriter(self.session_factory, self.group_commit_interval_ms)
+        return self._writer
+
+    def session(self) -> Session:
+        """
+        Open a new session on the writer engine.
+
+        Returns:
+            Database session
+        """
+        return self.session_factory()
+
+    def read_session(self) -> Session:
+        """
+        Open a new session on the reader engine.
+
+        Returns:
+            Database session for read-only queries
+        """
+        return self.read_session_factory()
+
+    def dispose(self, close: bool = True) -> None:
+        """
+        Release the engines and their pooled connections.
+
+        Args:
+            close: Close pooled connections. Pass False in a forked child so
+                connections owned by the parent are dropped, not closed.
+        """
+        if self._writer is not None and close:
+            # Commit whatever is still queued before closing connections
+            self._writer.stop()
+        self._writer = None
+        for engine_ in (self._engine, self._read_engine):
+            if engine_ is not None:
+                engine_.dispose(close=close)
+        self._engine = None
+        self._session_factory = None
+        self._read_engine = None
+        self._read_session_factory = None
+
+
+def _sqlite_file_path(url: str) -> Optional[str]:
+    """
+    Get the file path of a file-backed SQLite URL.
+
+    Args:
+        url: Database URL
+
+    Returns:
+        File path, or None for in-memory SQLite and other databases
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return None
+    path = parsed.database
+    if not path or path == ":memory:" or path.startswith("file:"):
+        return None
+    return path
+
+
+def _default_read_url(url: str) -> Optional[str]:
+    """
+    Derive a read-only URL for a file-backed SQLite database.
+
+    Args:
+        url: Writer database URL
+
+    Returns:
+        Read-only SQLite URI, or None if reads should use the writer engine
+    """
+    path = _sqlite_file_path(url)
+    if path is None:
+        return None
+    return f"sqlite:///file:{path}?mode=ro&uri=true"
+
+
+def _create_engine(
+    url: str,
+    sqlite_busy_timeout_ms: int,
+    read_pool_size: Optional[int] = None,
+    query_cache_size: int = Settings.sql_query_cache_size,
+) -> Engine:
+    """
+    Create an engine with SQLite-specific configuration.
+
+    Args:
+        url: SQLAlchemy database URL
+        sqlite_busy_timeout_ms: Lock wait timeout for file-backed SQLite
+        read_pool_size: Pool size for a reader engine, None for the writer
+        query_cache_size: Compiled statements cached by the engine
+
+    Returns:
+        Engine instance
     """
-    Base.metadata.create_all(bind=engine)
+    is_sqlite = "sqlite" in url
+    options = {}
+    if read_pool_size is not None:
+        # Readers get a real pool so concurrent requests use separate connections
+        options = {"pool_size": read_pool_size, "max_overflow": 0}
+    elif _sqlite_file_path(url) is not None:
+        # One dedicated writer connection; concurrent writers wait for it
+        # instead of sharing it
+        options = {"pool_size": 1, "max_overflow": 0}
+    elif is_sqlite:
+        options = {"poolclass": StaticPool}
+    new_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if is_sqlite else {},
+        echo=False,  # Set to True for SQL query logging
+        query_cache_size=query_cache_size,
+        **options,
+    )
+    if is_sqlite and ":memory:" not in url:
+        is_reader = read_pool_size is not None
 
+        @event.listens_for(new_engine, "connect")
+        def _configure_sqlite_connection(dbapi_connection, connection_record) -> None:
+            # WAL and a busy timeout let several worker processes share the file
+            cursor = dbapi_connection.cursor()
+            if not is_reader:
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(sqlite_busy_timeout_ms)}")
+            cursor.close()
 
-def get_db() -> Generator[Session, None, None]:
+    return new_engine
+
+
+_shards: Optional[ShardedDatabase] = None
+
+
+def _build_shards(
+    url: str,
+    read_url: Optional[str] = None,
+    shard_urls: Optional[List[str]] = None,
+    **options,
+) -> ShardedDatabase:
+    """
+    Build the shard list for a configuration.
+
+    Args:
+        url: Database URL used when there is a single shard
+        read_url: Optional replica URL, only used with a single shard
+        shard_urls: Optional shard URLs, replacing url
+        **options: Further Database arguments, applied to every shard
+
+    Returns:
+        ShardedDatabase with one Database per shard
+    """
+    if shard_urls and len(shard_urls) > 1:
+        return ShardedDatabase([Database(shard_url, **options) for shard_url in shard_urls])
+    return ShardedDatabase([Database(shard_urls[0] if shard_urls else url, read_url, **options)])
+
+
+def shards_from_settings(settings: Settings) -> ShardedDatabase:
+    """
+    Build the databases described by settings. No connection is made until first use.
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        ShardedDatabase for database_shard_urls, or a single database_url shard
+    """
+    return _build_shards(
+        settings.database_url,
+        settings.database_read_url,
+        settings.database_shard_urls,
+        read_pool_size=settings.database_read_pool_size,
+        sqlite_busy_timeout_ms=settings.sqlite_busy_timeout_ms,
+        single_writer=settings.single_writer,
+        group_commit_interval_ms=settings.group_commit_interval_ms,
+        usage_partitioning=settings.usage_partitioning,
+        query_cache_size=settings.sql_query_cache_size,
+    )
+
+
+def get_shards() -> ShardedDatabase:
+    """
+    Get the shards configured by the environment, for command line tools.
+
+    Applications use their own shards (app.state.shards) instead.
+
+    Returns:
+        ShardedDatabase for DATABASE_SHARD_URLS, or a single DATABASE_URL shard
     """
-    Dependency for FastAPI to get database session.
-    
-    Yields:
-        Database session
+    global _shards
+    if _shards is None:
+        _shards = shards_from_settings(Settings.from_env())
+    return _shards
+
+
+def get_database() -> Database:
+    """
+    Get the environment-configured default database (the first shard).
+
+    Returns:
+        Database for DATABASE_URL
+    """
+    return get_shards().shards[0]
+
+
+def _reset_after_fork() -> None:
+    """Drop engines inherited from the parent process without closing them."""
+    for database in list(_databases):
+        database.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def __getattr__(name: str):
+    # Backward compatible module attributes, resolved lazily
+    if name == "engine":
+        return get_database().engine
+    if name == "SessionLocal":
+        return get_database().session_factory
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def init_db() -> None:
+    """
+    Initialize database by creating all tables.
+
+    Note: This function is kept for backward compatibility.
+    For production use, run the migration script: ./migrate.sh
     """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    for database in get_shards().shards:
+        Base.metadata.create_all(bind=database.engine)
 
 
 # Note: get_or_create_user moved to user_repository_impl.py
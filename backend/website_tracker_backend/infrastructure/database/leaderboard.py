@@ -0,0 +1,278 @@
+"""
+Per-domain usage counters for the global leaderboard:
+python -m website_tracker_backend leaderboard reconcile
+
+Every usage upsert applies its delta (new minutes - previous minutes, and
++1/-1 users when a user's minutes for the domain become non-zero or zero) to
+one DomainUsageTotal row for the day and one for its week, in the same
+transaction as the usage row. GET /api/admin/leaderboard then reads the top
+counters from an index instead of scanning usage_records.
+
+Counters can drift from the raw rows when usage is written outside the sync
+path (resharding, seeding, manual fixes) or when two transactions update the
+same usage row concurrently without the single writer. The reconcile
+command recomputes the counters of recent weeks from the raw rows, reports
+mismatches, and with --repair overwrites them. Raw rows rolled up by the
+retention job are gone, so only reconcile ranges newer than the retention
+age.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+import argparse
+import logging
+import uuid
+
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+
+from ...domain.services.change_cursor import utc_now
+from .models import DomainUsageTotal, UsageRecord
+from .partitions import partitions_for_range, usage_select
+
+if TYPE_CHECKING:
+    from .connection import Database
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("day", "week")
+
+# Minutes differences below this are rounding, not drift
+TOLERANCE = 1e-6
+
+
+def week_start(day: date) -> date:
+    """
+    Get the Monday of a day's week.
+
+    Args:
+        day: Any day
+
+    Returns:
+        Monday on or before day
+    """
+    return day - timedelta(days=day.weekday())
+
+
+def apply_usage_delta(
+    session: Session,
+    user_id: str,
+    domain: str,
+    usage_date: date,
+    previous: Optional[float],
+    minutes: float,
+    partitioned: bool = False,
+) -> None:
+    """
+    Update the day and week counters for one changed usage row. Does not commit.
+
+    Args:
+        session: Session of the usage write
+        user_id: User identifier
+        domain: Domain name
+        usage_date: Date of usage
+        previous: Minutes before the write, or None if the row is new
+        minutes: Minutes after the write
+        partitioned: Usage is stored in monthly partitions
+    """
+    minutes_delta = minutes - (previous or 0.0)
+    users_delta = int(minutes > 0) - int(bool(previous and previous > 0))
+    if minutes_delta == 0 and users_delta == 0:
+        return
+
+    _add(session, "day", usage_date, domain, minutes_delta, users_delta)
+    monday = week_start(usage_date)
+    if users_delta and _active_on_other_days(session, user_id, domain, monday, usage_date, partitioned):
+        # The user already counts (and keeps counting) for this week
+        users_delta = 0
+    _add(session, "week", monday, domain, minutes_delta, users_delta)
+
+
+def _add(session: Session, granularity: str, period_start: date, domain: str, minutes: float, users: int) -> None:
+    """Add deltas to a counter, creating it if needed."""
+    table = DomainUsageTotal.__table__
+    now = utc_now()
+    result = session.execute(
+        table.update()
+        .where(and_(
+            table.c.granularity == granularity,
+            table.c.period_start == period_start,
+            table.c.domain == domain,
+        ))
+        .values(minutes=table.c.minutes + minutes, users=table.c.users + users, updated_at=now)
+    )
+    if result.rowcount == 0:
+        session.execute(table.insert().values(
+            id=str(uuid.uuid4()),
+            domain=domain,
+            granularity=granularity,
+            period_start=period_start,
+            minutes=minutes,
+            users=users,
+            updated_at=now,
+        ))
+
+
+def _active_on_other_days(
+    session: Session, user_id: str, domain: str, monday: date, usage_date: date, partitioned: bool
+) -> bool:
+    """Check whether a user has usage of a domain on another day of the week."""
+    sunday = monday + timedelta(days=6)
+    tables = [UsageRecord.__table__]
+    if partitioned:
+        tables += partitions_for_range(session.connection(), monday, sunday)
+    for table in tables:
+        found = session.execute(
+            select(table.c.id)
+            .where(and_(
+                table.c.user_id == user_id,
+                table.c.domain == domain,
+                table.c.date >= monday,
+                table.c.date <= sunday,
+                table.c.date != usage_date,
+                table.c.minutes > 0,
+            ))
+            .limit(1)
+        ).first()
+        if found is not None:
+            return True
+    return False
+
+
+@dataclass
+class CounterMismatch:
+    """A counter that differs from the raw usage rows."""
+
+    granularity: str
+    period_start: date
+    domain: str
+    expected_minutes: float
+    expected_users: int
+    counted_minutes: float
+    counted_users: int
+
+
+def reconcile(database: "Database", start_date: date, end_date: date, repair: bool = False) -> List[CounterMismatch]:
+    """
+    Compare the counters of whole weeks with the raw usage rows of one database.
+
+    Args:
+        database: Database (shard) to check
+        start_date: Start date (widened to its Monday)
+        end_date: End date (widened to its Sunday)
+        repair: Overwrite mismatching counters with the raw values
+
+    Returns:
+        Mismatching counters
+    """
+    start = week_start(start_date)
+    end = week_start(end_date) + timedelta(days=6)
+    expected = _raw_totals(database, start, end)
+
+    table = DomainUsageTotal.__table__
+    with database.read_session() as session:
+        counted = {
+            (row.granularity, row.period_start, row.domain): (row.minutes, row.users)
+            for row in session.execute(
+                select(table.c.granularity, table.c.period_start, table.c.domain, table.c.minutes, table.c.users)
+                .where(and_(table.c.period_start >= start, table.c.period_start <= end))
+            )
+        }
+
+    mismatches = []
+    for key in sorted(expected.keys() | counted.keys()):
+        expected_minutes, expected_users = expected.get(key, (0.0, 0))
+        counted_minutes, counted_users = counted.get(key, (0.0, 0))
+        if abs(expected_minutes - counted_minutes) > TOLERANCE or expected_users != counted_users:
+            mismatches.append(CounterMismatch(
+                *key, expected_minutes, expected_users, counted_minutes, counted_users
+            ))
+
+    if repair and mismatches:
+        _write(database, lambda session: _overwrite(session, mismatches))
+    logger.info(f"Reconciled counters {start} - {end}: {len(mismatches)} mismatches")
+    return mismatches
+
+
+def _raw_totals(database: "Database", start: date, end: date) -> Dict[Tuple[str, date, str], Tuple[float, int]]:
+    """Day and week totals computed from the raw usage rows."""
+    minutes: Dict[Tuple[str, date, str], float] = {}
+    users: Dict[Tuple[str, date, str], set] = {}
+    with database.read_session() as session:
+        tables = [UsageRecord.__table__] + partitions_for_range(session.connection(), start, end)
+        statement = usage_select(
+            tables,
+            ["user_id", "domain", "date", "minutes"],
+            lambda table: and_(table.c.date >= start, table.c.date <= end),
+        )
+        for row in session.execute(statement):
+            for key in (("day", row.date, row.domain), ("week", week_start(row.date), row.domain)):
+                minutes[key] = minutes.get(key, 0.0) + row.minutes
+                if row.minutes > 0:
+                    users.setdefault(key, set()).add(row.user_id)
+    return {key: (total, len(users.get(key, ()))) for key, total in minutes.items()}
+
+
+def _overwrite(session: Session, mismatches: List[CounterMismatch]) -> None:
+    """Set mismatching counters to their raw values."""
+    table = DomainUsageTotal.__table__
+    for mismatch in mismatches:
+        matches = and_(
+            table.c.granularity == mismatch.granularity,
+            table.c.period_start == mismatch.period_start,
+            table.c.domain == mismatch.domain,
+        )
+        session.execute(table.delete().where(matches))
+        if mismatch.expected_minutes or mismatch.expected_users:
+            session.execute(table.insert().values(
+                id=str(uuid.uuid4()),
+                domain=mismatch.domain,
+                granularity=mismatch.granularity,
+                period_start=mismatch.period_start,
+                minutes=mismatch.expected_minutes,
+                users=mismatch.expected_users,
+                updated_at=utc_now(),
+            ))
+
+
+def _write(database: "Database", operation: Callable[[Session], None]) -> None:
+    """Apply a write through the single writer if enabled, else commit directly."""
+    writer = database.writer
+    if writer is not None:
+        writer.execute(operation)
+        return
+    with database.session() as session:
+        operation(session)
+        session.commit()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Reconcile the leaderboard counters on every shard.
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    from .connection import get_shards
+
+    parser = argparse.ArgumentParser(
+        prog="python -m website_tracker_backend leaderboard",
+        description="Check the per-domain leaderboard counters against raw usage.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    check = subparsers.add_parser("reconcile", help="Compare recent counters with raw usage rows")
+    check.add_argument("--days", type=int, default=28, help="Check the weeks covering this many days back")
+    check.add_argument("--repair", action="store_true", help="Overwrite mismatching counters")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    today = date.today()
+    for index, database in enumerate(get_shards().shards):
+        mismatches = reconcile(database, today - timedelta(days=args.days), today, repair=args.repair)
+        for mismatch in mismatches:
+            print(
+                f"shard {index}: {mismatch.granularity} {mismatch.period_start} {mismatch.domain}: "
+                f"counted {mismatch.counted_minutes:.1f} min / {mismatch.counted_users} users, "
+                f"raw {mismatch.expected_minutes:.1f} min / {mismatch.expected_users} users"
+            )
+        print(f"shard {index}: {len(mismatches)} mismatches" + (" repaired" if args.repair and mismatches else ""))
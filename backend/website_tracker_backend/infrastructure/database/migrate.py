@@ -2,6 +2,9 @@
 Database migration script.
 Drops all existing tables and recreates them from scratch.
 This is a destructive operation - all data will be lost!
+
+To change the schema of a database in use, add a versioned migration to
+migrations.py instead.
 """
 import os
 import sys
@@ -27,8 +30,10 @@ except ImportError:
     # python-dotenv not installed, continue without it
     pass
 
-from website_tracker_backend.infrastructure.database.connection import engine, Base, SessionLocal
+from website_tracker_backend.infrastructure.database.connection import Base, get_shards
 from website_tracker_backend.infrastructure.database.models import User, TrackedSite, UsageRecord
+from website_tracker_backend.infrastructure.database.leaderboard import reconcile
+from website_tracker_backend.infrastructure.database.migrations import upgrade
 import logging
 
 logging.basicConfig(
@@ -39,36 +44,27 @@ logger = logging.getLogger(__name__)
 
 
 def drop_all_tables():
-    """Drop all existing tables."""
+    """Drop all existing tables on every shard."""
     logger.info("Dropping all existing tables...")
-    Base.metadata.drop_all(bind=engine)
+    for database in get_shards().shards:
+        Base.metadata.drop_all(bind=database.engine)
     logger.info("All tables dropped successfully")
 
 
 def create_all_tables():
-    """Create all tables from models."""
+    """Create all tables from models on every shard."""
     logger.info("Creating all tables...")
-    Base.metadata.create_all(bind=engine)
+    for database in get_shards().shards:
+        Base.metadata.create_all(bind=database.engine)
     logger.info("All tables created successfully")
 
 
 def create_indexes():
-    """Create indexes for performance."""
-    from sqlalchemy import text
-    
+    """Create indexes for performance and record the schema version (see migrations.py)."""
     logger.info("Creating indexes...")
     
-    with engine.connect() as conn:
-        # Create indexes if they don't exist
-        indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_usage_records_user_date ON usage_records(user_id, date);",
-            "CREATE INDEX IF NOT EXISTS idx_usage_records_user_domain_date ON usage_records(user_id, domain, date);",
-            "CREATE INDEX IF NOT EXISTS idx_tracked_sites_user ON tracked_sites(user_id);",
-        ]
-        
-        for index_sql in indexes:
-            conn.execute(text(index_sql))
-            conn.commit()
+    for database in get_shards().shards:
+        upgrade(database)
     
     logger.info("Indexes created successfully")
 
@@ -96,7 +92,7 @@ def seed_fake_data():
         user_id = str(uuid.uuid4())
         logger.info(f"Generated user ID: {user_id}")
     
-    db = SessionLocal()
+    db = get_shards().database_for(user_id).session()
     try:
         # Create a test user
         user = User(id=user_id, email="test@example.com")
@@ -153,6 +149,9 @@ def seed_fake_data():
         
         db.commit()
         logger.info(f"Created {len(usage_records)} usage records for the past 7 days")
+        
+        # Seeded rows bypass the sync path, so build their leaderboard counters
+        reconcile(get_shards().database_for(user_id), today - timedelta(days=7), today, repair=True)
         logger.info("✅ Fake data seeded successfully!")
         
     except Exception as e:
@@ -168,16 +167,17 @@ def migrate():
     Main migration function.
     Destroys existing database and creates a new one.
     """
-    database_path = os.getenv("DATABASE_URL", "sqlite:///./website_tracker.db")
-    
-    # Extract file path for SQLite
-    if database_path.startswith("sqlite:///"):
-        db_file = database_path.replace("sqlite:///", "")
-        if os.path.exists(db_file):
-            logger.warning(f"⚠️  WARNING: Existing database file '{db_file}' will be destroyed!")
-            logger.warning("⚠️  All data will be lost!")
-        else:
-            logger.info(f"Creating new database file: {db_file}")
+    for database in get_shards().shards:
+        database_path = database.url
+        
+        # Extract file path for SQLite
+        if database_path.startswith("sqlite:///"):
+            db_file = database_path.replace("sqlite:///", "")
+            if os.path.exists(db_file):
+                logger.warning(f"⚠️  WARNING: Existing database file '{db_file}' will be destroyed!")
+                logger.warning("⚠️  All data will be lost!")
+            else:
+                logger.info(f"Creating new database file: {db_file}")
     
     try:
         # Drop all existing tables
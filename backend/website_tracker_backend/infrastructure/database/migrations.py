@@ -0,0 +1,365 @@
+"""
+Versioned, non-destructive schema migrations: python -m website_tracker_backend migrations
+
+Unlike migrate.py, which drops every table and re-seeds, the runner applies
+additive changes in place, so it can run against a live database (the only
+thing it removes is an index made redundant by a newer one):
+
+    migrations status                  # applied and pending versions per shard
+    migrations upgrade [--to VERSION] [--batch-size 500] [--pause-ms 50]
+
+Each migration is a list of operations (new tables, new columns, new
+indexes, backfills), and its version is recorded in schema_migrations once
+all of them succeeded. Every operation checks whether its work is already
+done (IF NOT EXISTS, existing columns, rows still matching the backfill's
+condition), so a migration interrupted halfway is simply run again.
+
+Backfills update at most --batch-size rows per transaction and sleep
+--pause-ms between batches, so each write lock is short and syncs queued
+by the server get in between. Creating an index is a single statement and
+holds the write lock while it is built; on large tables run it off-peak.
+
+SQLite can only add nullable columns or columns with a constant default,
+and new columns are not added to existing usage partitions. New tables,
+columns and indexes must also be added to models.py, so fresh databases
+get them from create_all.
+
+On startup the server compares the indexes declared in models.py with the
+database (INDEX_CHECK): "warn" logs the missing ones, "create" builds them.
+"""
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+import argparse
+import logging
+import os
+import time
+
+from sqlalchemy import Index, Table, inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.schema import CreateIndex as CreateIndexDDL
+
+from ...domain.services.change_cursor import utc_now
+from .models import (
+    Base, DeviceUsageRecord, DomainUsageTotal, SchemaMigration, SyncReceipt, TrackedSite,
+    TrackedSiteRemoval, UsageRecord, UsageRollup, User,
+)
+
+if TYPE_CHECKING:
+    from .connection import Database
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_PAUSE_MS = 50.0
+
+_schema_migrations = SchemaMigration.__table__
+
+
+@dataclass(frozen=True)
+class BackfillOptions:
+    """Throttling of backfills."""
+
+    batch_size: int = DEFAULT_BATCH_SIZE
+    pause_ms: float = DEFAULT_PAUSE_MS
+
+
+@dataclass(frozen=True)
+class CreateTable:
+    """Create a table defined in models.py if it does not exist."""
+
+    table: Table
+
+    def apply(self, engine: Engine, options: BackfillOptions) -> None:
+        self.table.create(bind=engine, checkfirst=True)
+
+
+@dataclass(frozen=True)
+class CreateIndex:
+    """Create an index if it does not exist."""
+
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+
+    def apply(self, engine: Engine, options: BackfillOptions) -> None:
+        with engine.begin() as connection:
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table}({', '.join(self.columns)})"
+            ))
+
+
+@dataclass(frozen=True)
+class DropIndex:
+    """Drop an index if it exists."""
+
+    name: str
+
+    def apply(self, engine: Engine, options: BackfillOptions) -> None:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP INDEX IF EXISTS {self.name}"))
+
+
+@dataclass(frozen=True)
+class AddColumn:
+    """Add a column of a table defined in models.py if the table lacks it."""
+
+    table: Table
+    column: str
+
+    def apply(self, engine: Engine, options: BackfillOptions) -> None:
+        existing = {column["name"] for column in inspect(engine).get_columns(self.table.name)}
+        if self.column in existing:
+            return
+        definition = CreateColumn(self.table.c[self.column]).compile(dialect=engine.dialect)
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE {self.table.name} ADD COLUMN {definition}"))
+
+
+@dataclass(frozen=True)
+class Backfill:
+    """
+    Set columns of the rows matching a condition, in throttled batches.
+
+    The condition must stop matching a row once it is backfilled (e.g.
+    "column IS NULL"); that is how the backfill finds the rows left to do.
+    """
+
+    table: Table
+    values: Dict[str, object]
+    pending: Callable[[Table], object]
+
+    def apply(self, engine: Engine, options: BackfillOptions) -> None:
+        key = list(self.table.primary_key.columns)[0]
+        batch = (
+            self.table.update()
+            .where(key.in_(
+                select(key).where(self.pending(self.table)).limit(options.batch_size).scalar_subquery()
+            ))
+            .values(self.values)
+        )
+        total = 0
+        while True:
+            with engine.begin() as connection:
+                updated = connection.execute(batch).rowcount
+            total += updated
+            if updated < options.batch_size:
+                break
+            logger.info(f"Backfilled {total} rows of {self.table.name}")
+            time.sleep(options.pause_ms / 1000)
+        logger.info(f"Backfilled {total} rows of {self.table.name} ({', '.join(self.values)})")
+
+
+Operation = Union[CreateTable, CreateIndex, DropIndex, AddColumn, Backfill]
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema version."""
+
+    version: int
+    name: str
+    operations: Sequence[Operation]
+
+
+# Append new migrations with the next version; never edit applied ones
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline", [
+        CreateTable(User.__table__),
+        CreateTable(TrackedSite.__table__),
+        CreateTable(UsageRecord.__table__),
+        CreateIndex("idx_usage_records_user_date", "usage_records", ("user_id", "date")),
+        CreateIndex("idx_usage_records_user_domain_date", "usage_records", ("user_id", "domain", "date")),
+        CreateIndex("idx_tracked_sites_user", "tracked_sites", ("user_id",)),
+    ]),
+    Migration(2, "usage rollups", [
+        CreateTable(UsageRollup.__table__),
+        CreateIndex("idx_usage_rollups_user_period", "usage_rollups", ("user_id", "period_start")),
+    ]),
+    Migration(3, "leaderboard counters", [
+        CreateTable(DomainUsageTotal.__table__),
+        CreateIndex("idx_domain_usage_totals_top", "domain_usage_totals", ("granularity", "period_start", "minutes")),
+    ]),
+    Migration(4, "sync receipts", [
+        CreateTable(SyncReceipt.__table__),
+        CreateIndex("idx_sync_receipts_user_sequence", "sync_receipts", ("user_id", "endpoint", "sequence")),
+    ]),
+    Migration(5, "per-device usage", [
+        CreateTable(DeviceUsageRecord.__table__),
+        CreateIndex("idx_device_usage_records_date", "device_usage_records", ("date",)),
+    ]),
+    Migration(6, "change cursors", [
+        CreateTable(TrackedSiteRemoval.__table__),
+        CreateIndex("idx_usage_records_user_updated", "usage_records", ("user_id", "updated_at")),
+        CreateIndex("idx_tracked_sites_user_updated", "tracked_sites", ("user_id", "updated_at")),
+        CreateIndex("idx_tracked_site_removals_user", "tracked_site_removals", ("user_id", "removed_at")),
+    ]),
+    Migration(7, "hot-path indexes", [
+        CreateIndex(
+            "idx_usage_records_user_date_cover", "usage_records", ("user_id", "date", "domain", "minutes")
+        ),
+        # Prefixes of the covering index and of the unique constraints' indexes
+        DropIndex("idx_usage_records_user_date"),
+        DropIndex("idx_usage_records_user_domain_date"),
+        DropIndex("idx_tracked_sites_user"),
+    ]),
+]
+
+
+def applied_versions(engine: Engine) -> Set[int]:
+    """
+    Get the migrations recorded in a database.
+
+    Args:
+        engine: Engine of the database
+
+    Returns:
+        Applied versions
+    """
+    _schema_migrations.create(bind=engine, checkfirst=True)
+    with engine.connect() as connection:
+        return set(connection.execute(select(_schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(engine: Engine, migrations: Sequence[Migration] = MIGRATIONS) -> List[Migration]:
+    """
+    Get the migrations not yet applied to a database.
+
+    Args:
+        engine: Engine of the database
+        migrations: Known migrations
+
+    Returns:
+        Pending migrations in version order
+    """
+    applied = applied_versions(engine)
+    return sorted(
+        (migration for migration in migrations if migration.version not in applied),
+        key=lambda migration: migration.version,
+    )
+
+
+def upgrade(
+    database: "Database",
+    target: Optional[int] = None,
+    options: BackfillOptions = BackfillOptions(),
+    migrations: Sequence[Migration] = MIGRATIONS,
+) -> List[int]:
+    """
+    Apply the pending migrations of one database, in version order.
+
+    Args:
+        database: Database (shard) to upgrade
+        target: Last version to apply (defaults to all)
+        options: Backfill throttling
+        migrations: Known migrations
+
+    Returns:
+        Versions applied
+    """
+    engine = database.engine
+    applied = []
+    for migration in pending_migrations(engine, migrations):
+        if target is not None and migration.version > target:
+            break
+        logger.info(f"Applying migration {migration.version} ({migration.name})")
+        for operation in migration.operations:
+            operation.apply(engine, options)
+        with engine.begin() as connection:
+            connection.execute(_schema_migrations.insert().values(
+                version=migration.version, name=migration.name, applied_at=utc_now(),
+            ))
+        applied.append(migration.version)
+    return applied
+
+
+def missing_indexes(engine: Engine) -> List[Index]:
+    """
+    Get the indexes declared in models.py that a database lacks.
+
+    Tables that do not exist yet are skipped; migrations create them.
+
+    Args:
+        engine: Engine of the database
+
+    Returns:
+        Missing indexes
+    """
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables or not table.indexes:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(
+            index for index in sorted(table.indexes, key=lambda index: index.name)
+            if index.name not in existing
+        )
+    return missing
+
+
+def check_indexes(database: "Database", create: bool = False) -> List[str]:
+    """
+    Warn about, or create, the declared indexes a database lacks.
+
+    Args:
+        database: Database (shard) to check
+        create: Create missing indexes instead of only logging them
+
+    Returns:
+        Names of the indexes that were missing
+    """
+    from .connection import _sqlite_file_path
+
+    path = _sqlite_file_path(database.url)
+    if path is not None and not os.path.exists(path):
+        # Not created yet; do not leave an empty file behind
+        return []
+    engine = database.engine
+    missing = missing_indexes(engine)
+    for index in missing:
+        if create:
+            logger.info(f"Creating missing index {index.name} on {index.table.name}")
+            with engine.begin() as connection:
+                # Several workers may start at once
+                connection.execute(CreateIndexDDL(index, if_not_exists=True))
+        else:
+            logger.warning(
+                f"Index {index.name} on {index.table.name} is missing; "
+                "run python -m website_tracker_backend migrations upgrade"
+            )
+    return [index.name for index in missing]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Show or apply the versioned migrations on every shard.
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    from .connection import get_shards
+
+    parser = argparse.ArgumentParser(
+        prog="python -m website_tracker_backend migrations",
+        description="Apply additive schema migrations without downtime.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="Show applied and pending migrations")
+    apply = subparsers.add_parser("upgrade", help="Apply pending migrations")
+    apply.add_argument("--to", type=int, help="Last version to apply (default: all)")
+    apply.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per backfill transaction")
+    apply.add_argument("--pause-ms", type=float, default=DEFAULT_PAUSE_MS, help="Pause between backfill batches")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    for index, database in enumerate(get_shards().shards):
+        if args.command == "status":
+            applied = applied_versions(database.engine)
+            for migration in sorted(MIGRATIONS, key=lambda migration: migration.version):
+                state = "applied" if migration.version in applied else "pending"
+                print(f"shard {index}: {migration.version} {migration.name}: {state}")
+        else:
+            versions = upgrade(database, args.to, BackfillOptions(args.batch_size, args.pause_ms))
+            print(f"shard {index}: applied {versions if versions else 'nothing'}")
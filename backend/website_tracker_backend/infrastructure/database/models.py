@@ -1,12 +1,18 @@
 """
 SQLAlchemy models for the database.
+
+Indexes the hot paths depend on are declared here, next to their tables,
+so create_all builds them and the startup check (migrations.py) can find
+missing ones. Unique constraints already come with an index; do not add
+another index on the same leading columns.
 """
-from sqlalchemy import Column, String, Integer, Float, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, ForeignKey, Index, Text, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from datetime import datetime
 import uuid
 
+from ...domain.services.change_cursor import utc_now
+
 Base = declarative_base()
 
 
@@ -16,8 +22,8 @@ class User(Base):
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     email = Column(String, unique=True, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
     
     # Relationships
     tracked_sites = relationship("TrackedSite", back_populates="user", cascade="all, delete-orphan")
@@ -32,13 +38,31 @@ class TrackedSite(Base):
     user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     domain = Column(String, nullable=False)
     daily_limit = Column(Integer, nullable=False)  # minutes
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
     
     # Relationships
     user = relationship("User", back_populates="tracked_sites")
     
-    __table_args__ = (UniqueConstraint('user_id', 'domain', name='_user_domain_uc'),)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'domain', name='_user_domain_uc'),
+        Index('idx_tracked_sites_user_updated', 'user_id', 'updated_at'),
+    )
+
+
+class TrackedSiteRemoval(Base):
+    """Tombstone of a removed tracked site, for delta reads (?since=<cursor>)."""
+    __tablename__ = "tracked_site_removals"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    domain = Column(String, nullable=False)
+    removed_at = Column(DateTime, nullable=False, default=utc_now)
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'domain', name='_user_removed_domain_uc'),
+        Index('idx_tracked_site_removals_user', 'user_id', 'removed_at'),
+    )
 
 
 class UsageRecord(Base):
@@ -50,10 +74,103 @@ class UsageRecord(Base):
     domain = Column(String, nullable=False)
     date = Column(Date, nullable=False)  # YYYY-MM-DD
     minutes = Column(Float, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
     
     # Relationships
     user = relationship("User", back_populates="usage_records")
     
-    __table_args__ = (UniqueConstraint('user_id', 'domain', 'date', name='_user_domain_date_uc'),)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'domain', 'date', name='_user_domain_date_uc'),
+        # Covers calendar range reads (domain, date, minutes by user and date)
+        Index('idx_usage_records_user_date_cover', 'user_id', 'date', 'domain', 'minutes'),
+        Index('idx_usage_records_user_updated', 'user_id', 'updated_at'),
+    )
+
+
+class DeviceUsageRecord(Base):
+    """Daily usage per domain as reported by one device of a user.
+    
+    usage_records holds the sum over the user's devices, plus the minutes
+    synced without a device ID (see SQLAlchemyUsageRepository.upsert_device_usage).
+    """
+    __tablename__ = "device_usage_records"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    device_id = Column(String, nullable=False)  # X-Device-ID header
+    domain = Column(String, nullable=False)
+    date = Column(Date, nullable=False)
+    minutes = Column(Float, nullable=False)
+    updated_at = Column(DateTime, default=utc_now)
+    
+    # Device last: the constraint's index also serves the per-day sum over devices
+    __table_args__ = (
+        UniqueConstraint('user_id', 'domain', 'date', 'device_id', name='_user_domain_date_device_uc'),
+        Index('idx_device_usage_records_date', 'date'),
+    )
+
+
+class UsageRollup(Base):
+    """Weekly or monthly usage aggregate replacing old daily usage records."""
+    __tablename__ = "usage_rollups"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    domain = Column(String, nullable=False)
+    granularity = Column(String, nullable=False)  # "week" or "month"
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False)  # inclusive
+    minutes = Column(Float, nullable=False)  # total over the period
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'domain', 'granularity', 'period_start', name='_user_domain_period_uc'),
+        Index('idx_usage_rollups_user_period', 'user_id', 'period_start'),
+    )
+
+
+class DomainUsageTotal(Base):
+    """Minutes and distinct users per domain for one day or week, across a shard's users."""
+    __tablename__ = "domain_usage_totals"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    domain = Column(String, nullable=False)
+    granularity = Column(String, nullable=False)  # "day" or "week"
+    period_start = Column(Date, nullable=False)  # the day, or Monday of the week
+    minutes = Column(Float, nullable=False, default=0.0)
+    users = Column(Integer, nullable=False, default=0)  # users with minutes > 0
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
+    
+    __table_args__ = (
+        UniqueConstraint('granularity', 'period_start', 'domain', name='_granularity_period_domain_uc'),
+        Index('idx_domain_usage_totals_top', 'granularity', 'period_start', 'minutes'),
+    )
+
+
+class SyncReceipt(Base):
+    """Response of a recent sync request, for answering retries (see sync_receipt_service.py)."""
+    __tablename__ = "sync_receipts"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    endpoint = Column(String, nullable=False)  # "usage", "tracked_sites" or "heartbeat" (plus ":<device ID>" if sent)
+    idempotency_key = Column(String, nullable=True)
+    sequence = Column(Integer, nullable=True)
+    response = Column(Text, nullable=False)  # JSON
+    created_at = Column(DateTime, default=utc_now)
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'endpoint', 'idempotency_key', name='_user_endpoint_key_uc'),
+        Index('idx_sync_receipts_user_sequence', 'user_id', 'endpoint', 'sequence'),
+    )
+
+
+class SchemaMigration(Base):
+    """Versioned migration applied to this database (see migrations.py)."""
+    __tablename__ = "schema_migrations"
+    
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime, default=utc_now)
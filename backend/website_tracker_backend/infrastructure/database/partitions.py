@@ -0,0 +1,377 @@
+"""
+Monthly partitioning of usage records: python -m website_tracker_backend partitions
+
+With USAGE_PARTITIONING=monthly, usage rows are stored in one table per
+month (usage_records_YYYY_MM) instead of the single usage_records table.
+Range queries only read the partitions overlapping the requested dates, and
+each partition has its own small indexes. A closed month can be archived to
+its own (optionally gzipped) SQLite file and dropped without touching the
+live partitions.
+
+    partitions migrate                 # move rows from usage_records into partitions
+    partitions list                    # show partitions and row counts
+    partitions archive 2023-01 --dir archive [--gzip]
+"""
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import argparse
+import gzip
+import logging
+import shutil
+import threading
+import time
+import weakref
+
+from sqlalchemy import (
+    Column, Date, DateTime, Float, Index, MetaData, String, Table, UniqueConstraint,
+    and_, event, inspect, select, text, union_all,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from .models import UsageRecord
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "usage_records_"
+
+# Partition tables live in their own metadata so Base.metadata.create_all
+# does not create them
+partition_metadata = MetaData()
+
+_tables_lock = threading.Lock()
+
+# Partition names known to exist, per engine, and when they were last read
+_known_partitions: "weakref.WeakKeyDictionary[Engine, Set[str]]" = weakref.WeakKeyDictionary()
+_refreshed_at: "weakref.WeakKeyDictionary[Engine, float]" = weakref.WeakKeyDictionary()
+
+# Seconds before a past month without a partition is looked up again; only
+# syncs of old days and the CLI create past partitions, so reads of long
+# ranges (e.g. a year of trends) do not query the schema on every call
+PARTITION_REFRESH_SECONDS = 60.0
+
+
+def partition_name(year: int, month: int) -> str:
+    """
+    Get the table name of a month's partition.
+
+    Args:
+        year: Year
+        month: Month (1-12)
+
+    Returns:
+        Table name, e.g. usage_records_2024_01
+    """
+    return f"{PARTITION_PREFIX}{year:04d}_{month:02d}"
+
+
+def parse_partition_name(name: str) -> Optional[Tuple[int, int]]:
+    """
+    Get the month of a partition table.
+
+    Args:
+        name: Table name
+
+    Returns:
+        (year, month), or None if name is not a partition
+    """
+    suffix = name[len(PARTITION_PREFIX):] if name.startswith(PARTITION_PREFIX) else ""
+    parts = suffix.split("_")
+    if len(parts) != 2 or not all(part.isdigit() for part in parts):
+        return None
+    return int(parts[0]), int(parts[1])
+
+
+def months_in_range(start_date: date, end_date: date) -> List[Tuple[int, int]]:
+    """
+    List the months overlapping a date range.
+
+    Args:
+        start_date: Start date (inclusive)
+        end_date: End date (inclusive)
+
+    Returns:
+        (year, month) pairs in order
+    """
+    months = []
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def partition_table(name: str) -> Table:
+    """
+    Get the Table for a partition, defining it on first use.
+
+    Args:
+        name: Partition table name
+
+    Returns:
+        Table with the usage_records columns
+    """
+    with _tables_lock:
+        table = partition_metadata.tables.get(name)
+        if table is None:
+            table = Table(
+                name,
+                partition_metadata,
+                Column("id", String, primary_key=True),
+                Column("user_id", String, nullable=False),
+                Column("domain", String, nullable=False),
+                Column("date", Date, nullable=False),
+                Column("minutes", Float, nullable=False),
+                Column("created_at", DateTime),
+                Column("updated_at", DateTime),
+                UniqueConstraint("user_id", "domain", "date", name=f"{name}_uc"),
+                # Covering, like idx_usage_records_user_date_cover
+                Index(f"idx_{name}_user_date", "user_id", "date", "domain", "minutes"),
+            )
+        return table
+
+
+def existing_partitions(connection: Connection, refresh: bool = False) -> Set[str]:
+    """
+    Get the partition tables that exist in a database.
+
+    Names are cached per engine; pass refresh=True to re-read them (e.g. when
+    another process may have created a partition).
+
+    Args:
+        connection: Connection to the database
+        refresh: Ignore the cache
+
+    Returns:
+        Set of partition table names
+    """
+    engine = connection.engine
+    names = _known_partitions.get(engine)
+    if names is None or refresh:
+        names = {
+            name for name in inspect(connection).get_table_names()
+            if parse_partition_name(name) is not None
+        }
+        _known_partitions[engine] = names
+        _refreshed_at[engine] = time.monotonic()
+    return names
+
+
+def ensure_partition(session: Session, year: int, month: int) -> Table:
+    """
+    Create a month's partition if it does not exist yet.
+
+    Args:
+        session: Session used for the write
+        year: Year
+        month: Month (1-12)
+
+    Returns:
+        The partition table
+    """
+    name = partition_name(year, month)
+    table = partition_table(name)
+    connection = session.connection()
+    if name not in existing_partitions(connection):
+        table.create(connection, checkfirst=True)
+        # Cached once the creating transaction commits (see _remember_new_partitions)
+        session.info.setdefault("new_partitions", set()).add((connection.engine, name))
+    return table
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_new_partitions(session: Session) -> None:
+    for engine, name in session.info.pop("new_partitions", ()):
+        _known_partitions.setdefault(engine, set()).add(name)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_new_partitions(session: Session) -> None:
+    session.info.pop("new_partitions", None)
+
+
+def partitions_for_range(connection: Connection, start_date: date, end_date: date) -> List[Table]:
+    """
+    Get the existing partitions overlapping a date range (partition pruning).
+
+    Args:
+        connection: Connection to the database
+        start_date: Start date (inclusive)
+        end_date: End date (inclusive)
+
+    Returns:
+        Partition tables, in month order
+    """
+    wanted = [partition_name(year, month) for year, month in months_in_range(start_date, end_date)]
+    known = existing_partitions(connection)
+    missing = {name for name in wanted if name not in known}
+    if missing:
+        # Another process (or this process's writer engine) may have created
+        # the partition since we looked. Months around today are created by
+        # ordinary syncs and are looked up at once, other months only after
+        # PARTITION_REFRESH_SECONDS.
+        today = date.today()
+        recent = {
+            partition_name(year, month)
+            for year, month in months_in_range(today - timedelta(days=1), today + timedelta(days=1))
+        }
+        refreshed_at = _refreshed_at.get(connection.engine, 0.0)
+        if missing & recent or time.monotonic() - refreshed_at >= PARTITION_REFRESH_SECONDS:
+            known = existing_partitions(connection, refresh=True)
+    return [partition_table(name) for name in wanted if name in known]
+
+
+def usage_select(tables: List[Table], columns: List[str], where: Callable[[Table], object]):
+    """
+    Build a UNION ALL over partitions.
+
+    Args:
+        tables: Partitions to read
+        columns: Column names to select
+        where: Function mapping a table to its filter condition
+
+    Returns:
+        Selectable, or None if there are no tables
+    """
+    selects = [
+        select(*(table.c[column] for column in columns)).where(where(table))
+        for table in tables
+    ]
+    if not selects:
+        return None
+    return selects[0] if len(selects) == 1 else union_all(*selects)
+
+
+def migrate_to_partitions(engine: Engine) -> int:
+    """
+    Move rows from usage_records into monthly partitions, one month per transaction.
+
+    Args:
+        engine: Writer engine of the database
+
+    Returns:
+        Number of rows moved
+    """
+    base = UsageRecord.__table__
+    columns = ["id", "user_id", "domain", "date", "minutes", "created_at", "updated_at"]
+    with engine.connect() as connection:
+        dates = [row[0] for row in connection.execute(select(base.c.date).distinct())]
+    months = sorted({(day.year, day.month) for day in dates})
+
+    moved = 0
+    for year, month in months:
+        start = date(year, month, 1)
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        with Session(bind=engine) as session:
+            table = ensure_partition(session, year, month)
+            in_month = and_(base.c.date >= start, base.c.date < end)
+            result = session.execute(
+                table.insert().from_select(columns, select(*(base.c[c] for c in columns)).where(in_month))
+            )
+            session.execute(base.delete().where(in_month))
+            session.commit()
+            moved += result.rowcount
+        logger.info(f"Moved usage for {year:04d}-{month:02d} into {partition_name(year, month)}")
+    return moved
+
+
+def partition_row_counts(engine: Engine) -> Dict[str, int]:
+    """
+    Count rows per partition.
+
+    Args:
+        engine: Engine of the database
+
+    Returns:
+        Dictionary mapping partition name to row count, in month order
+    """
+    with engine.connect() as connection:
+        names = sorted(existing_partitions(connection, refresh=True))
+        return {
+            name: connection.execute(text(f'SELECT COUNT(*) FROM "{name}"')).scalar()
+            for name in names
+        }
+
+
+def archive_partition(engine: Engine, year: int, month: int, archive_dir: Path, compress: bool = False) -> Path:
+    """
+    Copy a month's partition into its own SQLite file and drop it.
+
+    Only the archived partition is read and dropped; other partitions and
+    their indexes are untouched.
+
+    Args:
+        engine: Writer engine of a SQLite database
+        year: Year
+        month: Month (1-12)
+        archive_dir: Directory for the archive file
+        compress: Gzip the archive file
+
+    Returns:
+        Path of the archive file
+    """
+    name = partition_name(year, month)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_dir / f"{name}.db"
+    if path.exists():
+        raise FileExistsError(f"Archive {path} already exists")
+
+    with engine.connect() as connection:
+        if name not in existing_partitions(connection, refresh=True):
+            raise ValueError(f"Partition {name} does not exist")
+        connection.execute(text("ATTACH DATABASE :path AS archive"), {"path": str(path)})
+        try:
+            connection.execute(text(f'CREATE TABLE archive."{name}" AS SELECT * FROM main."{name}"'))
+            connection.commit()
+        finally:
+            connection.execute(text("DETACH DATABASE archive"))
+        partition_table(name).drop(connection)
+        connection.commit()
+        existing_partitions(connection).discard(name)
+
+    if compress:
+        gzip_path = path.with_suffix(".db.gz")
+        with open(path, "rb") as source, gzip.open(gzip_path, "wb") as target:
+            shutil.copyfileobj(source, target)
+        path.unlink()
+        path = gzip_path
+    logger.info(f"Archived {name} to {path}")
+    return path
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Run the partition maintenance tool on every shard.
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    from .connection import get_shards
+
+    parser = argparse.ArgumentParser(
+        prog="python -m website_tracker_backend partitions",
+        description="Manage monthly usage partitions.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("migrate", help="Move rows from usage_records into monthly partitions")
+    subparsers.add_parser("list", help="Show partitions and row counts")
+    archive = subparsers.add_parser("archive", help="Archive a month's partition to its own file and drop it")
+    archive.add_argument("month", help="Month to archive, YYYY-MM")
+    archive.add_argument("--dir", default="archive", help="Archive directory")
+    archive.add_argument("--gzip", action="store_true", help="Compress the archive file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    shards = get_shards().shards
+    for index, database in enumerate(shards):
+        if args.command == "migrate":
+            moved = migrate_to_partitions(database.engine)
+            print(f"shard {index}: moved {moved} rows")
+        elif args.command == "list":
+            for name, count in partition_row_counts(database.engine).items():
+                print(f"shard {index}: {name} {count} rows")
+        else:
+            year, month = (int(part) for part in args.month.split("-"))
+            archive_dir = Path(args.dir) / f"shard{index}" if len(shards) > 1 else Path(args.dir)
+            print(archive_partition(database.engine, year, month, archive_dir, compress=args.gzip))
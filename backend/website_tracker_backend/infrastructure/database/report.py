@@ -0,0 +1,282 @@
+"""
+Fleet-wide daily statistics: python -m website_tracker_backend report
+
+For every day of a range the report gives the number of active users (any
+minutes), total minutes per domain, and the share of active users who
+reached the daily limit of at least one tracked site (with their current
+limits, as the calendar shows them).
+
+The users of each shard are split into ranges of --users-per-task IDs and
+the ranges run in a process pool, one worker per core by default. Each
+worker opens its own read-only connection per shard and aggregates its
+range in SQL (GROUP BY day and domain), so only per-day totals are sent
+back. User ranges do not overlap, so the partial aggregates merge by
+adding them up.
+
+Days already rolled up by the retention job have no daily rows and are
+left out.
+"""
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+import argparse
+import json
+import logging
+import os
+import time
+
+from sqlalchemy import and_, case, func, select
+
+from .models import TrackedSite, UsageRecord, User
+from .partitions import partitions_for_range, usage_select
+
+if TYPE_CHECKING:
+    from .connection import Database
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USERS_PER_TASK = 1000
+
+_tracked_sites = TrackedSite.__table__
+
+# Read-only databases opened by this worker process, by (url, read_url)
+_worker_databases: Dict[Tuple[str, Optional[str]], "Database"] = {}
+
+
+@dataclass(frozen=True)
+class UserRange:
+    """Users of one shard with low <= user_id < high (no upper bound if high is None)."""
+
+    url: str
+    read_url: Optional[str]
+    low: str
+    high: Optional[str]
+
+
+@dataclass
+class PartialReport:
+    """Per-day totals of a set of users. Sets of different users add up."""
+
+    active_users: Counter = field(default_factory=Counter)
+    over_limit_users: Counter = field(default_factory=Counter)
+    minutes: Counter = field(default_factory=Counter)
+
+    def merge(self, other: "PartialReport") -> None:
+        """
+        Add the totals of a disjoint set of users.
+
+        Args:
+            other: Totals to add
+        """
+        self.active_users.update(other.active_users)
+        self.over_limit_users.update(other.over_limit_users)
+        self.minutes.update(other.minutes)
+
+
+def user_ranges(database: "Database", users_per_task: int) -> List[UserRange]:
+    """
+    Split the users of a shard into ranges of consecutive IDs.
+
+    Args:
+        database: Database (shard) to split
+        users_per_task: Users per range
+
+    Returns:
+        Ranges in ID order, covering every user once
+    """
+    users = User.__table__
+    with database.read_session() as session:
+        ids = session.execute(select(users.c.id).order_by(users.c.id)).scalars().all()
+    lows = ids[::users_per_task]
+    highs = lows[1:] + [None]
+    return [
+        UserRange(database.url, database.read_url, low, high)
+        for low, high in zip(lows, highs)
+    ]
+
+
+def aggregate_range(user_range: UserRange, start_date: date, end_date: date) -> PartialReport:
+    """
+    Compute the per-day totals of one range of users.
+
+    Runs in a worker process, reading through that process's own connection.
+
+    Args:
+        user_range: Users to aggregate
+        start_date: First day (inclusive)
+        end_date: Last day (inclusive)
+
+    Returns:
+        Totals of the range
+    """
+    database = _worker_database(user_range)
+    partial = PartialReport()
+    with database.read_session() as session:
+        tables = [UsageRecord.__table__] + partitions_for_range(session.connection(), start_date, end_date)
+
+        def in_range(table):
+            conditions = [
+                table.c.date >= start_date,
+                table.c.date <= end_date,
+                table.c.user_id >= user_range.low,
+            ]
+            if user_range.high is not None:
+                conditions.append(table.c.user_id < user_range.high)
+            return and_(*conditions)
+
+        usage = usage_select(tables, ["user_id", "domain", "date", "minutes"], in_range).subquery()
+
+        for day, domain, minutes in session.execute(
+            select(usage.c.date, usage.c.domain, func.sum(usage.c.minutes))
+            .group_by(usage.c.date, usage.c.domain)
+        ):
+            partial.minutes[(day, domain)] += minutes
+
+        # One row per user and day, then counted per day
+        reached = and_(_tracked_sites.c.daily_limit > 0, usage.c.minutes >= _tracked_sites.c.daily_limit)
+        per_user = (
+            select(
+                usage.c.date.label("date"),
+                usage.c.user_id.label("user_id"),
+                func.max(case((reached, 1), else_=0)).label("over_limit"),
+            )
+            .select_from(usage.outerjoin(_tracked_sites, and_(
+                _tracked_sites.c.user_id == usage.c.user_id,
+                _tracked_sites.c.domain == usage.c.domain,
+            )))
+            .where(usage.c.minutes > 0)
+            .group_by(usage.c.date, usage.c.user_id)
+            .subquery()
+        )
+        for day, active, over_limit in session.execute(
+            select(per_user.c.date, func.count(), func.sum(per_user.c.over_limit))
+            .group_by(per_user.c.date)
+        ):
+            partial.active_users[day] += active
+            partial.over_limit_users[day] += over_limit or 0
+    return partial
+
+
+def _worker_database(user_range: UserRange) -> "Database":
+    """Open (once per process) a read-only handle on the range's shard."""
+    from .connection import Database
+
+    key = (user_range.url, user_range.read_url)
+    database = _worker_databases.get(key)
+    if database is None:
+        database = _worker_databases[key] = Database(
+            user_range.url, read_url=user_range.read_url, read_pool_size=1, single_writer="off"
+        )
+    return database
+
+
+def _aggregate_task(task: Tuple[UserRange, date, date]) -> PartialReport:
+    """Process pool entry point."""
+    return aggregate_range(*task)
+
+
+def run_report(
+    databases: Iterable["Database"],
+    start_date: date,
+    end_date: date,
+    workers: int = 1,
+    users_per_task: int = DEFAULT_USERS_PER_TASK,
+) -> PartialReport:
+    """
+    Compute the per-day totals of every user of every shard.
+
+    Args:
+        databases: Shards to read
+        start_date: First day (inclusive)
+        end_date: Last day (inclusive)
+        workers: Worker processes (1 aggregates in this process)
+        users_per_task: Users per range handed to a worker
+
+    Returns:
+        Merged totals
+    """
+    tasks = [
+        (user_range, start_date, end_date)
+        for database in databases
+        for user_range in user_ranges(database, users_per_task)
+    ]
+    report = PartialReport()
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            report.merge(_aggregate_task(task))
+        return report
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        for partial in executor.map(_aggregate_task, tasks):
+            report.merge(partial)
+    return report
+
+
+def daily_rows(report: PartialReport) -> List[Dict]:
+    """
+    Turn merged totals into one row per day.
+
+    Args:
+        report: Merged totals
+
+    Returns:
+        Rows in date order, with domains by descending minutes
+    """
+    domains: Dict[date, Dict[str, float]] = {}
+    for (day, domain), minutes in report.minutes.items():
+        domains.setdefault(day, {})[domain] = minutes
+
+    rows = []
+    for day in sorted(domains.keys() | report.active_users.keys()):
+        active = report.active_users.get(day, 0)
+        over_limit = report.over_limit_users.get(day, 0)
+        day_domains = domains.get(day, {})
+        rows.append({
+            'date': day.isoformat(),
+            'activeUsers': active,
+            'overLimitUsers': over_limit,
+            'shareOverLimit': over_limit / active if active else 0.0,
+            'totalMinutes': sum(day_domains.values()),
+            'domains': dict(sorted(day_domains.items(), key=lambda item: (-item[1], item[0]))),
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Print the fleet-wide daily statistics of every shard.
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    from .connection import get_shards
+
+    parser = argparse.ArgumentParser(
+        prog="python -m website_tracker_backend report",
+        description="Compute fleet-wide daily usage statistics in parallel.",
+    )
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(), help="Last day (default: today)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: cores)")
+    parser.add_argument("--users-per-task", type=int, default=DEFAULT_USERS_PER_TASK, help="Users per worker task")
+    parser.add_argument("--top", type=int, default=5, help="Domains printed per day")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per day with every domain")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    shards = get_shards()
+    started = time.perf_counter()
+    report = run_report(shards.shards, args.start, args.end, args.workers, args.users_per_task)
+    logger.info(f"Report {args.start} - {args.end} computed in {time.perf_counter() - started:.2f}s")
+
+    for row in daily_rows(report):
+        if args.json:
+            print(json.dumps(row))
+            continue
+        top = ", ".join(f"{domain} {minutes:.0f}" for domain, minutes in list(row['domains'].items())[:args.top])
+        print(
+            f"{row['date']}: {row['activeUsers']} active, {row['shareOverLimit']:.1%} over limit, "
+            f"{row['totalMinutes']:.0f} min ({top})"
+        )
@@ -0,0 +1,297 @@
+"""
+Move users between shards: python -m website_tracker_backend reshard
+
+Copies every user whose shard differs between the current layout
+(DATABASE_SHARD_URLS / DATABASE_URL) and the target layout (--to) into its
+target shard, one transaction per user. Target shards are first brought to
+the latest schema by the migration runner (migrations.py). Copies are upserts, so the tool can
+run while the servers keep writing to the current layout and be re-run to
+catch up. To switch layouts without downtime:
+
+    1. reshard --to <new urls>                  # bulk copy, servers still on old layout
+    2. deploy DATABASE_SHARD_URLS=<new urls>    # servers now write to the new shards
+    3. reshard --from <old urls> --to <new urls> --delete-source
+                                                # copy writes made during the deploy,
+                                                # then remove moved users from old shards
+
+Usage rows and rollups written during the switch are merged by keeping
+the most recently updated row. Usage is copied from usage_records and from
+every monthly partition (usage_records_YYYY_MM) into the table of the same
+name on the target. Sync receipts move with the user, so retries sent
+across the switch are still recognized.
+
+Leaderboard counters (domain_usage_totals) are per shard and follow the
+shard's usage rows: every copied or deleted usage row applies its delta to
+the counters of the shard it is written to or deleted from. Between the
+copy and --delete-source a moved user is on both shards, so cross-shard
+totals count them twice until the source rows are deleted.
+"""
+from typing import List, Optional
+import argparse
+import logging
+
+from sqlalchemy import Table, select
+from sqlalchemy.orm import Session
+
+from .connection import Database, ShardedDatabase, get_shards
+from .leaderboard import apply_usage_delta
+from .migrations import upgrade
+from .models import (
+    DeviceUsageRecord, SyncReceipt, TrackedSite, TrackedSiteRemoval, UsageRecord, UsageRollup, User,
+)
+from .partitions import ensure_partition, existing_partitions, parse_partition_name, partition_table
+
+logger = logging.getLogger(__name__)
+
+
+def copy_user(source: Session, target: Session, user_id: str) -> None:
+    """
+    Upsert one user's rows from the source into the target session.
+
+    The caller commits the target session.
+
+    Args:
+        source: Session on the user's current shard
+        target: Session on the user's new shard
+        user_id: User identifier
+    """
+    user = source.get(User, user_id)
+    if user is None:
+        return
+    if target.get(User, user_id) is None:
+        target.add(User(id=user.id, email=user.email, created_at=user.created_at, updated_at=user.updated_at))
+        target.flush()
+
+    target_sites = {
+        site.domain: site
+        for site in target.query(TrackedSite).filter(TrackedSite.user_id == user_id)
+    }
+    for site in source.query(TrackedSite).filter(TrackedSite.user_id == user_id):
+        existing = target_sites.get(site.domain)
+        if existing is None:
+            target.add(TrackedSite(
+                user_id=user_id,
+                domain=site.domain,
+                daily_limit=site.daily_limit,
+                created_at=site.created_at,
+                updated_at=site.updated_at,
+            ))
+        elif _is_newer(site.updated_at, existing.updated_at):
+            existing.daily_limit = site.daily_limit
+            existing.updated_at = site.updated_at
+
+    target_removals = {
+        removal.domain: removal
+        for removal in target.query(TrackedSiteRemoval).filter(TrackedSiteRemoval.user_id == user_id)
+    }
+    for removal in source.query(TrackedSiteRemoval).filter(TrackedSiteRemoval.user_id == user_id):
+        existing = target_removals.get(removal.domain)
+        if existing is None:
+            target.add(TrackedSiteRemoval(user_id=user_id, domain=removal.domain, removed_at=removal.removed_at))
+        elif _is_newer(removal.removed_at, existing.removed_at):
+            existing.removed_at = removal.removed_at
+
+    for table in _usage_tables(source):
+        _copy_usage(source, target, table, user_id)
+
+    target_devices = {
+        (record.domain, record.date, record.device_id): record
+        for record in target.query(DeviceUsageRecord).filter(DeviceUsageRecord.user_id == user_id)
+    }
+    for record in source.query(DeviceUsageRecord).filter(DeviceUsageRecord.user_id == user_id):
+        existing = target_devices.get((record.domain, record.date, record.device_id))
+        if existing is None:
+            target.add(DeviceUsageRecord(
+                user_id=user_id,
+                device_id=record.device_id,
+                domain=record.domain,
+                date=record.date,
+                minutes=record.minutes,
+                updated_at=record.updated_at,
+            ))
+        elif _is_newer(record.updated_at, existing.updated_at):
+            existing.minutes = record.minutes
+            existing.updated_at = record.updated_at
+
+    # Daily rows already rolled up by the retention job only exist here
+    target_rollups = {
+        (rollup.domain, rollup.granularity, rollup.period_start): rollup
+        for rollup in target.query(UsageRollup).filter(UsageRollup.user_id == user_id)
+    }
+    for rollup in source.query(UsageRollup).filter(UsageRollup.user_id == user_id):
+        existing = target_rollups.get((rollup.domain, rollup.granularity, rollup.period_start))
+        if existing is None:
+            target.add(UsageRollup(
+                user_id=user_id,
+                domain=rollup.domain,
+                granularity=rollup.granularity,
+                period_start=rollup.period_start,
+                period_end=rollup.period_end,
+                minutes=rollup.minutes,
+                created_at=rollup.created_at,
+                updated_at=rollup.updated_at,
+            ))
+        elif _is_newer(rollup.updated_at, existing.updated_at):
+            existing.minutes = rollup.minutes
+            existing.updated_at = rollup.updated_at
+
+    target_receipts = target.query(SyncReceipt).filter(SyncReceipt.user_id == user_id).all()
+    known_ids = {receipt.id for receipt in target_receipts}
+    known_keys = {
+        (receipt.endpoint, receipt.idempotency_key)
+        for receipt in target_receipts if receipt.idempotency_key is not None
+    }
+    for receipt in source.query(SyncReceipt).filter(SyncReceipt.user_id == user_id):
+        if receipt.id in known_ids or (receipt.endpoint, receipt.idempotency_key) in known_keys:
+            continue
+        target.add(SyncReceipt(
+            id=receipt.id,
+            user_id=user_id,
+            endpoint=receipt.endpoint,
+            idempotency_key=receipt.idempotency_key,
+            sequence=receipt.sequence,
+            response=receipt.response,
+            created_at=receipt.created_at,
+        ))
+
+
+def _usage_tables(session: Session) -> List[Table]:
+    """Get usage_records and the monthly partitions of a shard."""
+    names = sorted(existing_partitions(session.connection(), refresh=True))
+    return [UsageRecord.__table__] + [partition_table(name) for name in names]
+
+
+def _copy_usage(source: Session, target: Session, table: Table, user_id: str) -> None:
+    """Upsert one user's rows of a usage table into the table of the same name on the target."""
+    rows = source.execute(select(table).where(table.c.user_id == user_id)).all()
+    if not rows:
+        return
+    if table.name != UsageRecord.__tablename__:
+        table = ensure_partition(target, *parse_partition_name(table.name))
+    existing = {
+        (row.domain, row.date): row
+        for row in target.execute(select(table).where(table.c.user_id == user_id))
+    }
+    for row in rows:
+        current = existing.get((row.domain, row.date))
+        if current is None:
+            target.execute(table.insert().values(**row._asdict()))
+            previous = None
+        elif _is_newer(row.updated_at, current.updated_at):
+            target.execute(
+                table.update()
+                .where(table.c.id == current.id)
+                .values(minutes=row.minutes, updated_at=row.updated_at)
+            )
+            previous = current.minutes
+        else:
+            continue
+        apply_usage_delta(target, user_id, row.domain, row.date, previous, row.minutes, partitioned=True)
+
+
+def _is_newer(source_time, target_time) -> bool:
+    """Whether the source row was updated after the target row."""
+    if source_time is None:
+        return False
+    return target_time is None or source_time > target_time
+
+
+def delete_user(session: Session, user_id: str) -> None:
+    """
+    Delete one user's rows. The caller commits the session.
+
+    Args:
+        session: Session on the user's old shard
+        user_id: User identifier
+    """
+    for table in _usage_tables(session):
+        rows = session.execute(
+            select(table.c.id, table.c.domain, table.c.date, table.c.minutes).where(table.c.user_id == user_id)
+        ).all()
+        for row in rows:
+            session.execute(table.delete().where(table.c.id == row.id))
+            apply_usage_delta(session, user_id, row.domain, row.date, row.minutes, 0.0, partitioned=True)
+    session.query(DeviceUsageRecord).filter(DeviceUsageRecord.user_id == user_id).delete(synchronize_session=False)
+    session.query(SyncReceipt).filter(SyncReceipt.user_id == user_id).delete(synchronize_session=False)
+    session.query(UsageRollup).filter(UsageRollup.user_id == user_id).delete(synchronize_session=False)
+    session.query(TrackedSite).filter(TrackedSite.user_id == user_id).delete(synchronize_session=False)
+    session.query(TrackedSiteRemoval).filter(TrackedSiteRemoval.user_id == user_id).delete(synchronize_session=False)
+    session.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+
+
+def reshard(source: ShardedDatabase, target: ShardedDatabase, delete_source: bool = False) -> int:
+    """
+    Copy users whose shard changes from the source layout to the target layout.
+
+    Args:
+        source: Current shard layout
+        target: New shard layout
+        delete_source: Remove moved users from their old shard after copying
+
+    Returns:
+        Number of users moved
+    """
+    # Same schema and recorded versions as shards set up by migrate.py
+    for database in target.shards:
+        upgrade(database)
+
+    moved = 0
+    for source_database in source.shards:
+        with source_database.read_session() as session:
+            user_ids = [user_id for (user_id,) in session.query(User.id)]
+
+        for user_id in user_ids:
+            target_database = target.database_for(user_id)
+            if target_database.url == source_database.url:
+                continue
+            with source_database.read_session() as source_session, target_database.session() as target_session:
+                copy_user(source_session, target_session, user_id)
+                target_session.commit()
+            if delete_source:
+                with source_database.session() as session:
+                    delete_user(session, user_id)
+                    session.commit()
+            moved += 1
+
+    logger.info(f"Moved {moved} users to their target shards")
+    return moved
+
+
+def _shards_from_urls(urls: List[str]) -> ShardedDatabase:
+    """Build a ShardedDatabase with the single writer off (the tool commits directly)."""
+    return ShardedDatabase([Database(url, single_writer="off") for url in urls])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Run the resharding tool.
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m website_tracker_backend reshard",
+        description="Move users between shards.",
+    )
+    parser.add_argument(
+        "--from", dest="source", default=None,
+        help="Comma-separated current shard URLs (default: DATABASE_SHARD_URLS or DATABASE_URL)",
+    )
+    parser.add_argument("--to", dest="target", required=True, help="Comma-separated target shard URLs")
+    parser.add_argument(
+        "--delete-source", action="store_true",
+        help="Delete moved users from their old shard (run once servers use the new layout)",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.source:
+        source = _shards_from_urls([url.strip() for url in args.source.split(",") if url.strip()])
+    else:
+        source = _shards_from_urls([database.url for database in get_shards().shards])
+    target = _shards_from_urls([url.strip() for url in args.target.split(",") if url.strip()])
+    try:
+        reshard(source, target, delete_source=args.delete_source)
+    finally:
+        source.dispose()
+        target.dispose()
@@ -0,0 +1,361 @@
+"""
+Retention job rolling old daily usage into weekly or monthly aggregates:
+python -m website_tracker_backend retention
+
+Daily usage rows older than the retention age are summed into UsageRollup
+rows (one per user, domain and period) and deleted, a bounded chunk per
+transaction, so the hot usage table and its indexes stop growing with the
+age of the user base. Only whole periods before the cutoff are rolled up.
+The usage repository serves rolled-up ranges as coarse per-day estimates.
+Per-device rows before the cutoff are deleted as well: their sums are
+already in the rolled-up usage.
+
+A job can run in every server worker and from the CLI at the same time:
+each chunk is selected and deleted by one statement, and only the rows a
+job's own DELETE removed are added to its rollups. Daily rows created
+after their period was rolled up are resyncs of counted days and are
+dropped (late_rows_dropped).
+
+Each job keeps RetentionMetrics (rows processed, time spent), exposed by
+GET /api/maintenance/retention for jobs running in the server process.
+"""
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import logging
+import threading
+import time
+import uuid
+
+from sqlalchemy import Table, and_, select
+from sqlalchemy.orm import Session
+
+from ...domain.services.change_cursor import utc_now
+from .connection import Database, get_shards
+from .models import DeviceUsageRecord, UsageRecord, UsageRollup
+from .partitions import existing_partitions, parse_partition_name, partition_table
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("week", "month")
+
+
+def period_bounds(day: date, granularity: str) -> Tuple[date, date]:
+    """
+    Get the period containing a day.
+
+    Args:
+        day: Any day
+        granularity: "week" (Monday to Sunday) or "month"
+
+    Returns:
+        (first day, last day) of the period, inclusive
+    """
+    if granularity == "week":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    start = day.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, next_month - timedelta(days=1)
+
+
+@dataclass
+class RetentionMetrics:
+    """Counters for one retention job."""
+
+    runs: int = 0
+    rows_rolled_up: int = 0
+    rollups_written: int = 0
+    late_rows_dropped: int = 0
+    partitions_dropped: int = 0
+    seconds_total: float = 0.0
+    last_run_rows: int = 0
+    last_run_seconds: float = 0.0
+    last_run_at: Optional[str] = None
+    last_cutoff: Optional[str] = None
+    last_error: Optional[str] = None
+
+
+class RetentionJob:
+    """Rolls daily usage older than max_age_days into period aggregates for one database."""
+
+    def __init__(
+        self,
+        database: Database,
+        max_age_days: int,
+        granularity: str = "month",
+        chunk_size: int = 1000,
+    ):
+        """
+        Initialize the job.
+
+        Args:
+            database: Database (shard) to maintain
+            max_age_days: Daily rows older than this many days are rolled up
+            granularity: "week" or "month" aggregates
+            chunk_size: Maximum raw rows rolled up per transaction
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {GRANULARITIES}")
+        self._database = database
+        self.max_age_days = max_age_days
+        self.granularity = granularity
+        self.chunk_size = chunk_size
+        self.metrics = RetentionMetrics()
+        self._metrics_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def cutoff(self, today: date) -> date:
+        """
+        First day that is kept at daily granularity.
+
+        Args:
+            today: Current date
+
+        Returns:
+            Start of the period containing today - max_age_days
+        """
+        return period_bounds(today - timedelta(days=self.max_age_days), self.granularity)[0]
+
+    def run_once(self, today: Optional[date] = None) -> int:
+        """
+        Roll up every daily row before the cutoff, one chunk per transaction.
+
+        Args:
+            today: Current date (defaults to today)
+
+        Returns:
+            Number of daily rows rolled up
+        """
+        cutoff = self.cutoff(today or date.today())
+        started = time.perf_counter()
+        rows = rollups = late = dropped = 0
+        try:
+            for table in self._source_tables(cutoff):
+                while True:
+                    chunk_rows, chunk_rollups, chunk_late = self._write(
+                        lambda session, table=table: self._roll_up_chunk(session, table, cutoff)
+                    )
+                    rows += chunk_rows
+                    rollups += chunk_rollups
+                    late += chunk_late
+                    if chunk_rows < self.chunk_size:
+                        break
+                if table is not UsageRecord.__table__ and self._drop_if_closed(table, cutoff):
+                    dropped += 1
+            while True:
+                deleted, _ = self._write(lambda session: self._delete_device_chunk(session, cutoff))
+                if deleted < self.chunk_size:
+                    break
+            error = None
+        except Exception as e:
+            logger.error(f"Retention run failed: {e}")
+            error = str(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._metrics_lock:
+                self.metrics.runs += 1
+                self.metrics.rows_rolled_up += rows
+                self.metrics.rollups_written += rollups
+                self.metrics.late_rows_dropped += late
+                self.metrics.partitions_dropped += dropped
+                self.metrics.seconds_total += elapsed
+                self.metrics.last_run_rows = rows
+                self.metrics.last_run_seconds = elapsed
+                self.metrics.last_run_at = utc_now().isoformat()
+                self.metrics.last_cutoff = cutoff.isoformat()
+                self.metrics.last_error = error
+        logger.info(f"Rolled up {rows} usage rows before {cutoff} into {rollups} rollups in {elapsed:.2f}s")
+        return rows
+
+    def metrics_snapshot(self) -> Dict:
+        """
+        Get a copy of the job's metrics.
+
+        Returns:
+            Metrics as a dictionary
+        """
+        with self._metrics_lock:
+            return asdict(self.metrics)
+
+    def start(self, interval_seconds: float) -> None:
+        """
+        Run the job periodically on a background thread.
+
+        Args:
+            interval_seconds: Seconds between runs
+        """
+        def loop() -> None:
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.run_once()
+                except Exception:
+                    pass  # logged and recorded in metrics by run_once
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="usage-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the background thread after the current chunk.
+
+        Args:
+            timeout: Seconds to wait for the thread
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _write(self, operation: Callable[[Session], Tuple[int, ...]]) -> Tuple[int, ...]:
+        """Apply a write through the single writer if enabled, else commit directly."""
+        writer = self._database.writer
+        if writer is not None:
+            return writer.execute(operation)
+        with self._database.session() as session:
+            result = operation(session)
+            session.commit()
+            return result
+
+    def _source_tables(self, cutoff: date) -> List[Table]:
+        """Tables that may hold daily rows before the cutoff."""
+        tables = [UsageRecord.__table__]
+        with self._database.engine.connect() as connection:
+            for name in sorted(existing_partitions(connection, refresh=True)):
+                year, month = parse_partition_name(name)
+                if date(year, month, 1) < cutoff:
+                    tables.append(partition_table(name))
+        return tables
+
+    def _roll_up_chunk(self, session: Session, table: Table, cutoff: date) -> Tuple[int, int, int]:
+        """
+        Delete one chunk of daily rows and roll up the rows deleted, in one transaction.
+
+        The rows are selected and deleted by a single DELETE ... RETURNING, so
+        the statement takes the write lock before it reads and a row is only
+        added to a rollup by the transaction whose DELETE removed it: jobs of
+        several workers (or the CLI next to the server) never count a row twice.
+
+        Rows created after their period's rollup was last written are resyncs
+        of days the rollup already counts (daily syncs send full-day totals).
+        They are deleted without being added, since the day's earlier value
+        can no longer be told apart from the rest of the period.
+
+        Returns:
+            (daily rows deleted, rollups written, late rows dropped)
+        """
+        ids = select(table.c.id).where(table.c.date < cutoff).limit(self.chunk_size).scalar_subquery()
+        rows = session.execute(
+            table.delete()
+            .where(table.c.id.in_(ids))
+            .returning(table.c.user_id, table.c.domain, table.c.date, table.c.minutes, table.c.created_at)
+        ).all()
+        if not rows:
+            return 0, 0, 0
+
+        periods: Dict[Tuple[str, str, date], Tuple[date, List]] = {}
+        for row in rows:
+            period_start, period_end = period_bounds(row.date, self.granularity)
+            periods.setdefault((row.user_id, row.domain, period_start), (period_end, []))[1].append(row)
+
+        rollup_table = UsageRollup.__table__
+        now = utc_now()
+        written = late = 0
+        for (user_id, domain, period_start), (period_end, period_rows) in periods.items():
+            matches = and_(
+                rollup_table.c.user_id == user_id,
+                rollup_table.c.domain == domain,
+                rollup_table.c.granularity == self.granularity,
+                rollup_table.c.period_start == period_start,
+            )
+            rolled_up_at = session.execute(select(rollup_table.c.updated_at).where(matches)).scalar()
+            if rolled_up_at is not None:
+                kept = [row for row in period_rows if row.created_at is None or row.created_at <= rolled_up_at]
+                late += len(period_rows) - len(kept)
+                if not kept:
+                    continue
+                session.execute(
+                    rollup_table.update()
+                    .where(matches)
+                    .values(minutes=rollup_table.c.minutes + sum(row.minutes for row in kept), updated_at=now)
+                )
+            else:
+                session.execute(rollup_table.insert().values(
+                    id=str(uuid.uuid4()),
+                    user_id=user_id,
+                    domain=domain,
+                    granularity=self.granularity,
+                    period_start=period_start,
+                    period_end=period_end,
+                    minutes=sum(row.minutes for row in period_rows),
+                    created_at=now,
+                    updated_at=now,
+                ))
+            written += 1
+        return len(rows), written, late
+
+    def _delete_device_chunk(self, session: Session, cutoff: date) -> Tuple[int, int]:
+        """
+        Delete one chunk of per-device rows before the cutoff.
+
+        Returns:
+            (rows deleted, 0)
+        """
+        table = DeviceUsageRecord.__table__
+        ids = session.execute(
+            select(table.c.id).where(table.c.date < cutoff).limit(self.chunk_size)
+        ).scalars().all()
+        if ids:
+            session.execute(table.delete().where(table.c.id.in_(ids)))
+        return len(ids), 0
+
+    def _drop_if_closed(self, table: Table, cutoff: date) -> bool:
+        """Drop an emptied partition whose whole month is before the cutoff."""
+        year, month = parse_partition_name(table.name)
+        month_end = period_bounds(date(year, month, 1), "month")[1]
+        if month_end >= cutoff:
+            return False
+
+        def drop(session: Session) -> Tuple[int, int]:
+            connection = session.connection()
+            if session.execute(select(table.c.id).limit(1)).first() is not None:
+                return 0, 0
+            table.drop(connection)
+            return 1, 0
+
+        dropped, _ = self._write(drop)
+        if dropped:
+            with self._database.engine.connect() as connection:
+                existing_partitions(connection).discard(table.name)
+        return bool(dropped)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Run the retention job once on every shard.
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m website_tracker_backend retention",
+        description="Roll old daily usage into weekly or monthly aggregates.",
+    )
+    parser.add_argument("--max-age-days", type=int, required=True, help="Keep daily rows this many days")
+    parser.add_argument("--granularity", choices=GRANULARITIES, default="month")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per transaction")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    for index, database in enumerate(get_shards().shards):
+        job = RetentionJob(database, args.max_age_days, args.granularity, args.chunk_size)
+        job.run_once()
+        metrics = job.metrics_snapshot()
+        print(
+            f"shard {index}: rolled up {metrics['rows_rolled_up']} rows into "
+            f"{metrics['rollups_written']} rollups in {metrics['seconds_total']:.2f}s"
+        )
@@ -0,0 +1,109 @@
+"""
+Hash sharding of users across several databases.
+
+Every user lives in exactly one shard, chosen by a stable hash of the user
+id. Per-user requests only touch that shard, so each shard has its own
+writer (and SQLite write lock). Queries spanning all users fan out to every
+shard in parallel and merge the results (see ShardedDatabase.fan_out).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, List, Optional, TypeVar
+import hashlib
+
+from sqlalchemy.orm import Session
+
+if TYPE_CHECKING:
+    from .connection import Database
+
+T = TypeVar("T")
+
+
+def shard_index(user_id: str, shard_count: int) -> int:
+    """
+    Map a user to a shard.
+
+    Uses a cryptographic hash rather than hash(), which is randomized per
+    process, so every worker and tool agrees on the placement.
+
+    Args:
+        user_id: User identifier
+        shard_count: Number of shards
+
+    Returns:
+        Shard index in [0, shard_count)
+    """
+    digest = hashlib.blake2b(user_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+class ShardedDatabase:
+    """A fixed list of shard databases with user routing and fan-out."""
+
+    def __init__(self, shards: List["Database"]):
+        """
+        Initialize with the shard databases, in shard order.
+
+        Args:
+            shards: One Database per shard (at least one)
+        """
+        if not shards:
+            raise ValueError("At least one shard is required")
+        self.shards = shards
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def shard_for(self, user_id: Optional[str]) -> int:
+        """
+        Get the shard index for a user.
+
+        Args:
+            user_id: User identifier (None maps to the first shard)
+
+        Returns:
+            Shard index
+        """
+        if user_id is None or len(self.shards) == 1:
+            return 0
+        return shard_index(user_id, len(self.shards))
+
+    def database_for(self, user_id: Optional[str]) -> "Database":
+        """
+        Get the database holding a user's data.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            Database for the user's shard
+        """
+        return self.shards[self.shard_for(user_id)]
+
+    def fan_out(self, query: Callable[[Session], T]) -> List[T]:
+        """
+        Run a read-only query on every shard in parallel.
+
+        Args:
+            query: Callable receiving a read session for one shard
+
+        Returns:
+            One result per shard, in shard order
+        """
+        def run(database: "Database") -> T:
+            with database.read_session() as session:
+                return query(session)
+
+        if len(self.shards) == 1:
+            return [run(self.shards[0])]
+        with ThreadPoolExecutor(max_workers=len(self.shards)) as executor:
+            return list(executor.map(run, self.shards))
+
+    def dispose(self, close: bool = True) -> None:
+        """
+        Release every shard's engines.
+
+        Args:
+            close: See Database.dispose
+        """
+        for database in self.shards:
+            database.dispose(close=close)
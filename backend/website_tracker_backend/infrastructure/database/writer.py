@@ -0,0 +1,157 @@
+"""
+Single-writer thread with group commit.
+
+SQLite allows one writer at a time. Instead of every request committing on
+its own (and contending for the lock), write operations are queued and
+applied by one thread, which commits everything that arrived within a short
+window in a single transaction. Each caller's future resolves once the
+transaction containing its operation has committed.
+"""
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple, TypeVar
+import logging
+import queue
+import threading
+import time
+
+from sqlalchemy.orm import Session, sessionmaker
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Write operation: receives the writer's session and must not commit. It
+# should return plain values, since ORM objects are expired by the commit
+WriteOperation = Callable[[Session], T]
+
+_STOP = object()
+
+
+class SingleWriter:
+    """Applies queued write operations on one thread, committing in groups."""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        commit_interval_ms: float = 2.0,
+        max_batch_size: int = 512,
+    ):
+        """
+        Initialize the writer. The thread starts on first submit.
+
+        Args:
+            session_factory: Session factory bound to the writer engine
+            commit_interval_ms: How long to collect operations before committing
+            max_batch_size: Maximum operations per transaction
+        """
+        self._session_factory = session_factory
+        self._commit_interval = commit_interval_ms / 1000
+        self._max_batch_size = max_batch_size
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def submit(self, operation: WriteOperation) -> "Future":
+        """
+        Queue a write operation.
+
+        Args:
+            operation: Callable applied to the writer's session
+
+        Returns:
+            Future resolving to the operation's return value after commit
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("SingleWriter has been stopped")
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="single-writer", daemon=True
+                )
+                self._thread.start()
+            self._queue.put((operation, future))
+        return future
+
+    def execute(self, operation: WriteOperation, timeout: Optional[float] = None) -> T:
+        """
+        Queue a write operation and wait until it is committed.
+
+        Args:
+            operation: Callable applied to the writer's session
+            timeout: Seconds to wait, None to wait indefinitely
+
+        Returns:
+            The operation's return value
+
+        Raises:
+            Exception: Whatever the operation or the commit raised
+        """
+        return self.submit(operation).result(timeout)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Apply all queued operations, then stop the thread.
+
+        Args:
+            timeout: Seconds to wait for the thread to finish
+        """
+        with self._lock:
+            self._stopped = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop_after_batch = False
+
+            # Collect whatever else arrives within the commit window
+            deadline = time.monotonic() + self._commit_interval
+            while len(batch) < self._max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop_after_batch = True
+                    break
+                batch.append(item)
+
+            self._apply_batch(batch)
+            if stop_after_batch:
+                return
+
+    def _apply_batch(self, batch: List[Tuple[WriteOperation, Future]]) -> None:
+        """Apply a batch in one transaction, falling back to one-by-one on error."""
+        session = self._session_factory()
+        try:
+            results = []
+            for operation, _ in batch:
+                results.append(operation(session))
+                # Flush so later operations in the batch see this one's rows
+                session.flush()
+            session.commit()
+        except Exception as error:
+            session.rollback()
+            if len(batch) == 1:
+                batch[0][1].set_exception(error)
+                return
+        else:
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            return
+        finally:
+            session.close()
+
+        # Isolate the failing operation so the rest of the batch still commits
+        logger.warning(f"Group commit of {len(batch)} writes failed, retrying individually")
+        for item in batch:
+            self._apply_batch([item])
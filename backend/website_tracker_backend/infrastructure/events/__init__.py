@@ -0,0 +1,3 @@
+"""
+Events infrastructure - in-process pub/sub for pushing changes to clients.
+"""
@@ -0,0 +1,192 @@
+"""
+In-process pub/sub hub fanning out change events to streaming clients.
+
+Each open GET /api/tracked-sites/events connection holds one Subscription.
+A subscription keeps only the latest undelivered event (events carry the
+full state, so an older one is superseded by a newer one), which bounds
+memory per idle connection to a few small objects regardless of how many
+changes are published.
+
+Services publish from threadpool threads; subscriptions are consumed on the
+event loop, so deliveries are handed to the loop with call_soon_threadsafe.
+The hub only reaches clients connected to the same process: with several
+workers, a change synced through one worker is not pushed to clients
+streaming from another.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+import asyncio
+import threading
+
+from ...domain.interfaces.change_publisher import ChangePublisher
+
+
+class HubFullError(Exception):
+    """Raised when a subscription would exceed the hub's limits."""
+
+
+class Subscription:
+    """One client's stream of events."""
+
+    __slots__ = ("user_id", "_loop", "_ready", "_latest", "_hub")
+
+    def __init__(self, hub: "ChangeHub", user_id: str, loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self._hub = hub
+        self._loop = loop
+        self._ready = asyncio.Event()
+        self._latest: Optional[Tuple[str, Dict]] = None
+
+    def _deliver(self, event: Tuple[str, Dict]) -> None:
+        """Store an event, replacing an undelivered one. Runs on the loop."""
+        if self._latest is not None:
+            self._hub.metrics.coalesced += 1
+        self._latest = event
+        self._ready.set()
+
+    async def next_event(self, timeout: float) -> Optional[Tuple[str, Dict]]:
+        """
+        Wait for the next event.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            (event type, data), or None if nothing arrived in time
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        event, self._latest = self._latest, None
+        if event is not None:
+            self._hub.metrics.delivered += 1
+        return event
+
+
+@dataclass
+class HubMetrics:
+    """Counters of the change hub."""
+
+    published: int = 0
+    delivered: int = 0
+    coalesced: int = 0  # events replaced by a newer one before delivery
+    rejected_subscriptions: int = 0
+
+
+class ChangeHub(ChangePublisher):
+    """Fans out published events to the subscriptions of each user."""
+
+    def __init__(self, max_subscribers: int = 50_000, max_subscribers_per_user: int = 8):
+        """
+        Initialize hub.
+
+        Args:
+            max_subscribers: Open subscriptions allowed in this process
+            max_subscribers_per_user: Open subscriptions allowed per user
+        """
+        self.max_subscribers = max_subscribers
+        self.max_subscribers_per_user = max_subscribers_per_user
+        self.metrics = HubMetrics()
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._count = 0
+
+    def subscribe(self, user_id: str) -> Subscription:
+        """
+        Open a subscription for a user. Must be called on the event loop.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            New subscription; close it with unsubscribe()
+
+        Raises:
+            HubFullError: If the process or user limit is reached
+        """
+        subscription = Subscription(self, user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._check_room(user_id)
+            user_subscriptions = self._subscriptions.get(user_id, set())
+            user_subscriptions.add(subscription)
+            self._subscriptions[user_id] = user_subscriptions
+            self._count += 1
+        return subscription
+
+    def check_room(self, user_id: str) -> None:
+        """
+        Check a subscription for a user would be accepted, without opening one.
+
+        Args:
+            user_id: User identifier
+
+        Raises:
+            HubFullError: If the process or user limit is reached
+        """
+        with self._lock:
+            self._check_room(user_id)
+
+    def _check_room(self, user_id: str) -> None:
+        """Raise HubFullError if the limits are reached. Caller holds the lock."""
+        if (
+            self._count >= self.max_subscribers
+            or len(self._subscriptions.get(user_id, ())) >= self.max_subscribers_per_user
+        ):
+            self.metrics.rejected_subscriptions += 1
+            raise HubFullError(f"Too many event streams open for user {user_id}")
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Close a subscription.
+
+        Args:
+            subscription: Subscription returned by subscribe()
+        """
+        with self._lock:
+            user_subscriptions = self._subscriptions.get(subscription.user_id)
+            if user_subscriptions is None or subscription not in user_subscriptions:
+                return
+            user_subscriptions.discard(subscription)
+            if not user_subscriptions:
+                del self._subscriptions[subscription.user_id]
+            self._count -= 1
+
+    def publish(self, user_id: str, event_type: str, data: Dict) -> None:
+        """
+        Publish an event to a user's subscriptions. Safe to call from any thread.
+
+        Args:
+            user_id: User identifier
+            event_type: Event name (e.g. "tracked_sites")
+            data: JSON-serializable event payload
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+            self.metrics.published += 1
+        for subscription in subscriptions:
+            try:
+                subscription._loop.call_soon_threadsafe(subscription._deliver, (event_type, data))
+            except RuntimeError:
+                # The subscriber's loop is closed (server shutting down)
+                self.unsubscribe(subscription)
+
+    def metrics_snapshot(self) -> Dict:
+        """
+        Get the limits and counters.
+
+        Returns:
+            Dictionary matching EventHubMetricsResponse
+        """
+        with self._lock:
+            return {
+                "subscribers": self._count,
+                "users": len(self._subscriptions),
+                "max_subscribers": self.max_subscribers,
+                "max_subscribers_per_user": self.max_subscribers_per_user,
+                "published": self.metrics.published,
+                "delivered": self.metrics.delivered,
+                "coalesced": self.metrics.coalesced,
+                "rejected_subscriptions": self.metrics.rejected_subscriptions,
+            }
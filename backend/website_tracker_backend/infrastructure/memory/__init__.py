@@ -0,0 +1,3 @@
+"""
+Memory infrastructure - in-process storage for STORAGE_BACKEND=memory.
+"""
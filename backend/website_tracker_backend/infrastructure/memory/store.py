@@ -0,0 +1,272 @@
+"""
+In-process store behind the memory repositories (STORAGE_BACKEND=memory).
+
+Every user's data lives in one UserData object: tracked sites and removal
+tombstones by domain, usage by date and domain, and a sorted list of the
+dates that have usage, so range reads bisect to their first day instead of
+looking at every date. Records use __slots__ to keep the per-row overhead
+to a few dozen bytes.
+
+Operations take one store-wide lock; each holds it for a few dictionary
+lookups. There is no database, so the store is only seen by its own
+process: run a single server worker.
+
+Persistence is by snapshot. SnapshotJob pickles the whole store every
+MEMORY_SNAPSHOT_INTERVAL_SECONDS (if anything changed) and on shutdown,
+writing a temporary file and renaming it over the snapshot, and the store
+is reloaded from it on startup. Writes after the last snapshot are lost if
+the process dies. Serializing holds the lock, so requests wait for it on
+large stores.
+"""
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+import os
+import pickle
+import threading
+import time
+
+from ...domain.services.change_cursor import utc_now
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the pickled layout changes; older snapshots are refused
+SNAPSHOT_VERSION = 1
+
+
+class UsageEntry:
+    """Minutes of one user, domain and date."""
+
+    __slots__ = ("minutes", "updated_at")
+
+    def __init__(self, minutes: float, updated_at: datetime):
+        self.minutes = minutes
+        self.updated_at = updated_at
+
+
+class SiteEntry:
+    """Daily limit of one tracked site."""
+
+    __slots__ = ("daily_limit", "updated_at")
+
+    def __init__(self, daily_limit: int, updated_at: datetime):
+        self.daily_limit = daily_limit
+        self.updated_at = updated_at
+
+
+class Receipt:
+    """Stored response of a sync request (see sync_receipt_service.py)."""
+
+    __slots__ = ("idempotency_key", "sequence", "response")
+
+    def __init__(self, idempotency_key: Optional[str], sequence: Optional[int], response: str):
+        self.idempotency_key = idempotency_key
+        self.sequence = sequence
+        self.response = response  # JSON, so callers never share a dict
+
+
+class UserData:
+    """Everything stored for one user."""
+
+    __slots__ = ("created_at", "sites", "removals", "usage", "dates", "devices", "receipts")
+
+    def __init__(self, created_at: datetime):
+        self.created_at = created_at
+        self.sites: Dict[str, SiteEntry] = {}
+        self.removals: Dict[str, datetime] = {}
+        self.usage: Dict[date, Dict[str, UsageEntry]] = {}
+        self.dates: List[date] = []  # sorted keys of usage
+        self.devices: Dict[Tuple[str, date], Dict[str, float]] = {}  # (domain, date) -> device -> minutes
+        self.receipts: Dict[str, List[Receipt]] = {}  # endpoint -> receipts, oldest first
+
+    def set_usage(self, domain: str, usage_date: date, minutes: float, now: datetime) -> None:
+        """
+        Set the minutes of a domain and date.
+
+        Args:
+            domain: Domain name
+            usage_date: Date of usage
+            minutes: Minutes used
+            now: Time of the write
+        """
+        day = self.usage.get(usage_date)
+        if day is None:
+            day = self.usage[usage_date] = {}
+            insort(self.dates, usage_date)
+        entry = day.get(domain)
+        if entry is None:
+            day[domain] = UsageEntry(minutes, now)
+        else:
+            entry.minutes = minutes
+            entry.updated_at = now
+
+    def days_between(self, start_date: date, end_date: date) -> Iterator[Tuple[date, Dict[str, UsageEntry]]]:
+        """
+        Iterate over the dates with usage in a range.
+
+        Args:
+            start_date: Start date (inclusive)
+            end_date: End date (inclusive)
+
+        Yields:
+            (date, entries by domain) in date order
+        """
+        first = bisect_left(self.dates, start_date)
+        last = bisect_right(self.dates, end_date)
+        for usage_date in self.dates[first:last]:
+            yield usage_date, self.usage[usage_date]
+
+
+class MemoryStore:
+    """All users' data, guarded by one lock."""
+
+    def __init__(self, users: Optional[Dict[str, UserData]] = None):
+        """
+        Initialize store.
+
+        Args:
+            users: Data by user ID (e.g. from a snapshot)
+        """
+        self.lock = threading.RLock()
+        self.users: Dict[str, UserData] = users if users is not None else {}
+        # Incremented by every write, so unchanged stores are not saved again
+        self.generation = 0
+
+    def find(self, user_id: str) -> Optional[UserData]:
+        """
+        Get a user's data for reading. Call with the lock held.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            UserData, or None if nothing is stored for the user
+        """
+        return self.users.get(user_id)
+
+    def for_write(self, user_id: str) -> UserData:
+        """
+        Get a user's data for writing, creating it if needed. Call with the lock held.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            UserData of the user
+        """
+        self.generation += 1
+        data = self.users.get(user_id)
+        if data is None:
+            data = self.users[user_id] = UserData(utc_now())
+        return data
+
+    def save(self, path: Path) -> int:
+        """
+        Write a snapshot, replacing the previous one atomically.
+
+        Args:
+            path: Snapshot file
+
+        Returns:
+            Generation saved
+        """
+        with self.lock:
+            generation = self.generation
+            payload = pickle.dumps(
+                {"version": SNAPSHOT_VERSION, "users": self.users}, protocol=pickle.HIGHEST_PROTOCOL
+            )
+        temporary = path.with_name(path.name + ".tmp")
+        with open(temporary, "wb") as snapshot:
+            snapshot.write(payload)
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(temporary, path)
+        return generation
+
+    @classmethod
+    def load(cls, path: Path) -> "MemoryStore":
+        """
+        Read a snapshot written by save().
+
+        Args:
+            path: Snapshot file
+
+        Returns:
+            Store with the snapshot's data, or an empty store if the file does not exist
+
+        Raises:
+            ValueError: If the snapshot was written by an incompatible version
+        """
+        if not path.exists():
+            return cls()
+        with open(path, "rb") as snapshot:
+            # Snapshots are written by this process only (MEMORY_SNAPSHOT_PATH)
+            payload = pickle.load(snapshot)
+        if payload.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {payload.get('version')} in {path}")
+        return cls(payload["users"])
+
+
+class SnapshotJob:
+    """Saves a store periodically on a background thread, and once more on stop."""
+
+    def __init__(self, store: MemoryStore, path: Path):
+        """
+        Initialize snapshot job.
+
+        Args:
+            store: Store to save
+            path: Snapshot file
+        """
+        self._store = store
+        self._path = path
+        self._saved_generation = store.generation
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> bool:
+        """
+        Save the store if it changed since the last snapshot.
+
+        Returns:
+            True if a snapshot was written
+        """
+        if self._store.generation == self._saved_generation:
+            return False
+        started = time.perf_counter()
+        self._saved_generation = self._store.save(self._path)
+        logger.info(f"Saved memory snapshot to {self._path} in {time.perf_counter() - started:.3f}s")
+        return True
+
+    def start(self, interval_seconds: float) -> None:
+        """
+        Run the job periodically on a background thread.
+
+        Args:
+            interval_seconds: Seconds between snapshots
+        """
+        def loop() -> None:
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.run_once()
+                except Exception:
+                    logger.exception(f"Failed to save memory snapshot to {self._path}")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="memory-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the background thread and write a final snapshot.
+
+        Args:
+            timeout: Seconds to wait for the thread
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.run_once()
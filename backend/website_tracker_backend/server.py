@@ -0,0 +1,131 @@
+"""
+Production server entry point: python -m website_tracker_backend serve
+
+Runs uvicorn with several worker processes. Each worker imports the app
+itself and creates its own database engine on first use, so no connection
+state is shared between processes.
+"""
+from typing import Dict, List, Optional
+import argparse
+import importlib.util
+import logging
+import os
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+APP_IMPORT_STRING = "website_tracker_backend.app:app"
+
+
+def resolve_loop(loop: str) -> str:
+    """
+    Resolve the event loop implementation.
+
+    Args:
+        loop: "auto", "uvloop" or "asyncio"
+
+    Returns:
+        "uvloop" if requested or available for "auto", otherwise "asyncio"
+    """
+    if loop == "auto":
+        return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    return loop
+
+
+def resolve_http(http: str) -> str:
+    """
+    Resolve the HTTP protocol implementation.
+
+    Args:
+        http: "auto", "httptools" or "h11"
+
+    Returns:
+        "httptools" if requested or available for "auto", otherwise "h11"
+    """
+    if http == "auto":
+        return "httptools" if importlib.util.find_spec("httptools") else "h11"
+    return http
+
+
+def default_workers() -> int:
+    """
+    Default worker count: WEB_CONCURRENCY if set, otherwise one per CPU core
+    (one with STORAGE_BACKEND=memory, whose store lives in the process).
+
+    Returns:
+        Number of worker processes
+    """
+    web_concurrency = os.getenv("WEB_CONCURRENCY")
+    if web_concurrency:
+        return int(web_concurrency)
+    if os.getenv("STORAGE_BACKEND", "sql").lower() == "memory":
+        return 1
+    return os.cpu_count() or 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser for the production server."""
+    parser = argparse.ArgumentParser(
+        prog="python -m website_tracker_backend serve",
+        description="Run the API with multiple worker processes.",
+    )
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Worker processes (default: $WEB_CONCURRENCY or CPU count)",
+    )
+    parser.add_argument("--loop", choices=["auto", "uvloop", "asyncio"], default="auto")
+    parser.add_argument("--http", choices=["auto", "httptools", "h11"], default="auto")
+    parser.add_argument(
+        "--graceful-timeout", type=int, default=30,
+        help="Seconds to let in-flight requests finish on shutdown",
+    )
+    parser.add_argument("--keep-alive", type=int, default=5, help="Keep-alive timeout in seconds")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    return parser
+
+
+def build_uvicorn_options(args: argparse.Namespace) -> Dict:
+    """
+    Translate parsed arguments into uvicorn.run keyword arguments.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Keyword arguments for uvicorn.run
+    """
+    return {
+        "host": args.host,
+        "port": args.port,
+        "workers": args.workers if args.workers is not None else default_workers(),
+        "loop": resolve_loop(args.loop),
+        "http": resolve_http(args.http),
+        "timeout_graceful_shutdown": args.graceful_timeout,
+        "timeout_keep_alive": args.keep_alive,
+        "backlog": args.backlog,
+        "log_level": args.log_level,
+        # Per-request access logging is a measurable cost at high request rates
+        "access_log": False,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Run the production server.
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv[2:] via __main__)
+    """
+    args = build_parser().parse_args(argv)
+    options = build_uvicorn_options(args)
+    logging.basicConfig(level=logging.INFO)
+    logger.info(
+        f"Starting {options['workers']} workers on {options['host']}:{options['port']} "
+        f"(loop={options['loop']}, http={options['http']})"
+    )
+    # The app must be passed as an import string for uvicorn to spawn workers
+    uvicorn.run(APP_IMPORT_STRING, **options)